@@ -1,5 +1,5 @@
 import asyncio
-from typing import List
+from typing import List, Optional
 from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends
 from sqlalchemy import select, desc, func
@@ -13,11 +13,32 @@ from app.models import (
 from app.schemas import DashboardStats, TimelineItem
 from app.services.auth import get_current_user
 from app.services.downloader.context import downloader_client
+from app.services.downloader.health import health_registry
+from app.services.downloader.snapshots import snapshot_store
 from app.utils.timezone import local_day_start_utc
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
 
+def _count_status(snapshot, status: str) -> int:
+    code = snapshot.table.pools["status"].code(status)
+    return int((snapshot.table.column("status") == code).sum()) if code is not None else 0
+
+
+def _apply_snapshot_stats(result: dict, snapshot):
+    """下载器暂不可用时，用读回的旧快照填充计数和速度"""
+    table = snapshot.table
+    upload = table.column("upload_speed")
+    download = table.column("download_speed")
+    result["upload_speed"] = int(upload.sum())
+    result["download_speed"] = int(download.sum())
+    result["active_torrents"] = int(((upload > 0) | (download > 0)).sum())
+    result["seeding_torrents"] = _count_status(snapshot, "seeding")
+    result["downloading_torrents"] = _count_status(snapshot, "downloading")
+    result["total_torrents"] = len(table)
+    result["total_size"] = int(table.column("size").sum())
+
+
 async def _fetch_downloader_stats(downloader: Downloader) -> dict:
     """Fetch stats from a single downloader with proper error handling."""
     result = {
@@ -32,17 +53,15 @@ async def _fetch_downloader_stats(downloader: Downloader) -> dict:
         "total_size": 0,
         "free_space": 0,
         "online": False,
+        "stale_since": None,
     }
 
     try:
         async with downloader_client(downloader) as client:
             if client:
                 stats = await client.get_stats()
-                # Skip expensive per-torrent reannounce API calls for dashboard
-                try:
-                    torrents = await client.get_torrents(with_reannounce=False)
-                except TypeError:
-                    torrents = await client.get_torrents()
+                # 总大小取自共享种子快照，不再单独拉取种子列表；启动时先用读回的旧快照
+                snapshot = await snapshot_store.get(downloader, allow_stale=True)
 
                 result["upload_speed"] = stats.upload_speed
                 result["download_speed"] = stats.download_speed
@@ -55,13 +74,20 @@ async def _fetch_downloader_stats(downloader: Downloader) -> dict:
                 result["free_space"] = stats.free_space
                 result["online"] = True
 
-                for t in torrents:
-                    result["total_size"] += t.size
+                if snapshot is not None:
+                    result["total_size"] = int(snapshot.table.column("size").sum())
+                    result["stale_since"] = snapshot.stale_since
     except asyncio.TimeoutError:
         pass
     except Exception:
         pass
 
+    if not result["online"]:
+        snapshot = snapshot_store.peek(downloader.id)
+        if snapshot is not None and snapshot.restored:
+            _apply_snapshot_stats(result, snapshot)
+            result["stale_since"] = snapshot.stale_since
+
     return result
 
 
@@ -94,6 +120,7 @@ async def get_stats(
     total_torrents = 0
     total_size = 0
     free_space = 0
+    stale_since: Optional[datetime] = None
 
     for res in results:
         if isinstance(res, dict):
@@ -107,6 +134,8 @@ async def get_stats(
             total_torrents += res["total_torrents"]
             total_size += res["total_size"]
             free_space += res["free_space"]
+            if res["stale_since"] and (stale_since is None or res["stale_since"] < stale_since):
+                stale_since = res["stale_since"]
 
     return DashboardStats(
         total_upload_speed=total_upload_speed,
@@ -119,6 +148,7 @@ async def get_stats(
         total_torrents=total_torrents,
         total_size=total_size,
         free_space=free_space,
+        stale_since=stale_since,
     )
 
 
@@ -215,6 +245,7 @@ async def _fetch_downloader_status(downloader: Downloader) -> dict:
         except Exception:
             pass
 
+    status["health"] = health_registry.snapshot(downloader.id)
     return status
 
 
@@ -251,6 +282,7 @@ async def get_downloaders_status(
                 "download_speed": 0,
                 "free_space": 0,
                 "total_torrents": 0,
+                "health": health_registry.snapshot(dl.id),
             })
 
     return statuses
@@ -14,6 +14,7 @@ from app.schemas import (
 )
 from app.services.auth import get_current_user
 from app.services.delete_service import DeleteService
+from app.services.downloader.snapshots import snapshot_store
 from app.tasks import get_scheduler
 from app.tasks.scheduler import DELETE_CHECK_INTERVAL_SECONDS
 
@@ -182,6 +183,7 @@ async def preview_rule(
     downloaders = dl_result.scalars().all()
     matches = []
     warnings = []
+    stale_since = None
 
     for downloader in downloaders:
         # Check if auto_delete is enabled
@@ -189,7 +191,11 @@ async def preview_rule(
             warnings.append(f"下载器 '{downloader.name}' 的自动删种功能未启用")
 
         try:
-            matching = await service.get_matching_torrents(rule, downloader)
+            matching = await service.get_matching_torrents(rule, downloader, allow_stale=True)
+            snapshot = snapshot_store.peek(downloader.id)
+            if snapshot is not None and snapshot.stale_since:
+                if stale_since is None or snapshot.stale_since < stale_since:
+                    stale_since = snapshot.stale_since
             for torrent, duration_met in matching:
                 matches.append({
                     "downloader": downloader.name,
@@ -210,7 +216,8 @@ async def preview_rule(
         "matches": matches,
         "total": len(matches),
         "will_delete_count": sum(1 for m in matches if m.get("will_delete")),
-        "warnings": warnings
+        "warnings": warnings,
+        "stale_since": stale_since,
     }
 
 
@@ -14,7 +14,11 @@ from app.schemas import (
     TorrentInfo,
 )
 from app.services.auth import get_current_user
-from app.services.downloader import create_downloader
+from app.services.downloader import create_downloader, health_registry
+from app.services.downloader.health import DownloaderHealth
+from app.services.downloader.context import downloader_client
+from app.services.downloader.pool import session_pool
+from app.services.downloader.snapshots import snapshot_store
 from app.utils import get_logger
 
 logger = get_logger('pt_manager.downloaders')
@@ -43,9 +47,8 @@ async def get_all_downloaders_status(
     async def get_single_status(downloader: Downloader) -> DownloaderStatus:
         """Get status for a single downloader"""
         try:
-            client = create_downloader(downloader)
-            try:
-                if await client.connect():
+            async with downloader_client(downloader) as client:
+                if client:
                     stats = await client.get_stats()
                     return DownloaderStatus(
                         id=downloader.id,
@@ -60,9 +63,8 @@ async def get_all_downloaders_status(
                         downloading_torrents=stats.downloading_torrents,
                         total_uploaded=stats.total_uploaded,
                         total_downloaded=stats.total_downloaded,
+                        health=health_registry.snapshot(downloader.id),
                     )
-            finally:
-                await client.disconnect()
         except asyncio.TimeoutError:
             logger.warning(f"下载器 {downloader.name} 连接超时")
         except ConnectionError as e:
@@ -73,6 +75,7 @@ async def get_all_downloaders_status(
             id=downloader.id,
             name=downloader.name,
             online=False,
+            health=health_registry.snapshot(downloader.id),
         )
 
     # Fetch all statuses in parallel
@@ -133,6 +136,10 @@ async def update_downloader(
 
     await db.commit()
     await db.refresh(downloader)
+    await session_pool.invalidate(downloader.id)
+    snapshot_store.forget(downloader.id)
+    # 连接参数可能已修正，清空熔断状态
+    health_registry.remove(downloader.id)
     return downloader
 
 
@@ -152,6 +159,9 @@ async def delete_downloader(
 
     await db.delete(downloader)
     await db.commit()
+    await session_pool.invalidate(downloader_id)
+    snapshot_store.forget(downloader_id)
+    health_registry.remove(downloader_id)
     return {"message": "Downloader deleted"}
 
 
@@ -171,9 +181,12 @@ async def test_downloader(
 
     try:
         client = create_downloader(downloader)
+        # 手动测试不受熔断限制，成功后清除熔断状态
+        client.health = DownloaderHealth(downloader.name)
         try:
             success = await client.connect()
             if success:
+                health_registry.remove(downloader.id)
                 stats = await client.get_stats()
                 return {
                     "success": True,
@@ -208,9 +221,8 @@ async def get_downloader_status(
         raise HTTPException(status_code=404, detail="Downloader not found")
 
     try:
-        client = create_downloader(downloader)
-        try:
-            if await client.connect():
+        async with downloader_client(downloader) as client:
+            if client:
                 stats = await client.get_stats()
                 return DownloaderStatus(
                     id=downloader.id,
@@ -225,9 +237,8 @@ async def get_downloader_status(
                     downloading_torrents=stats.downloading_torrents,
                     total_uploaded=stats.total_uploaded,
                     total_downloaded=stats.total_downloaded,
+                    health=health_registry.snapshot(downloader.id),
                 )
-        finally:
-            await client.disconnect()
     except asyncio.TimeoutError:
         logger.warning(f"下载器 {downloader.name} 状态获取超时")
     except Exception as e:
@@ -237,6 +248,7 @@ async def get_downloader_status(
         id=downloader.id,
         name=downloader.name,
         online=False,
+        health=health_registry.snapshot(downloader.id),
     )
 
 
@@ -255,43 +267,39 @@ async def get_downloader_torrents(
         raise HTTPException(status_code=404, detail="Downloader not found")
 
     try:
-        client = create_downloader(downloader)
-        try:
-            if await client.connect():
-                torrents = await client.get_torrents()
-                return [
-                    TorrentInfo(
-                        hash=t.hash,
-                        name=t.name,
-                        size=t.size,
-                        progress=t.progress,
-                        status=t.status,
-                        uploaded=t.uploaded,
-                        downloaded=t.downloaded,
-                        ratio=t.ratio,
-                        upload_speed=t.upload_speed,
-                        download_speed=t.download_speed,
-                        seeders=t.seeders,
-                        leechers=t.leechers,
-                        seeds_connected=t.seeds_connected,
-                        peers_connected=t.peers_connected,
-                        tracker=t.tracker,
-                        tags=",".join(t.tags),
-                        category=t.category,
-                        save_path=t.save_path,
-                        added_time=t.added_time,
-                        seeding_time=t.seeding_time,
-                        total_size=t.total_size,
-                        selected_size=t.selected_size,
-                        completed=t.completed,
-                        completed_time=t.completed_time,
-                        state=t.state,
-                        tracker_status=t.tracker_status,
-                    )
-                    for t in torrents
-                ]
-        finally:
-            await client.disconnect()
+        torrents = await snapshot_store.torrents(downloader, allow_stale=True)
+        if torrents is not None:
+            return [
+                TorrentInfo(
+                    hash=t.hash,
+                    name=t.name,
+                    size=t.size,
+                    progress=t.progress,
+                    status=t.status,
+                    uploaded=t.uploaded,
+                    downloaded=t.downloaded,
+                    ratio=t.ratio,
+                    upload_speed=t.upload_speed,
+                    download_speed=t.download_speed,
+                    seeders=t.seeders,
+                    leechers=t.leechers,
+                    seeds_connected=t.seeds_connected,
+                    peers_connected=t.peers_connected,
+                    tracker=t.tracker,
+                    tags=",".join(t.tags),
+                    category=t.category,
+                    save_path=t.save_path,
+                    added_time=t.added_time,
+                    seeding_time=t.seeding_time,
+                    total_size=t.total_size,
+                    selected_size=t.selected_size,
+                    completed=t.completed,
+                    completed_time=t.completed_time,
+                    state=t.state,
+                    tracker_status=t.tracker_status,
+                )
+                for t in torrents
+            ]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -314,15 +322,12 @@ async def pause_torrent(
         raise HTTPException(status_code=404, detail="Downloader not found")
 
     try:
-        client = create_downloader(downloader)
-        try:
-            if await client.connect():
+        async with downloader_client(downloader) as client:
+            if client:
                 success = await client.pause_torrent(torrent_hash)
                 if success:
                     return {"message": "Torrent paused"}
                 raise HTTPException(status_code=500, detail="Failed to pause torrent")
-        finally:
-            await client.disconnect()
     except HTTPException:
         raise
     except Exception as e:
@@ -345,15 +350,12 @@ async def resume_torrent(
         raise HTTPException(status_code=404, detail="Downloader not found")
 
     try:
-        client = create_downloader(downloader)
-        try:
-            if await client.connect():
+        async with downloader_client(downloader) as client:
+            if client:
                 success = await client.resume_torrent(torrent_hash)
                 if success:
                     return {"message": "Torrent resumed"}
                 raise HTTPException(status_code=500, detail="Failed to resume torrent")
-        finally:
-            await client.disconnect()
     except HTTPException:
         raise
     except Exception as e:
@@ -377,15 +379,12 @@ async def delete_torrent(
         raise HTTPException(status_code=404, detail="Downloader not found")
 
     try:
-        client = create_downloader(downloader)
-        try:
-            if await client.connect():
+        async with downloader_client(downloader) as client:
+            if client:
                 success = await client.remove_torrent(torrent_hash, delete_files)
                 if success:
                     return {"message": "Torrent deleted"}
                 raise HTTPException(status_code=500, detail="Failed to delete torrent")
-        finally:
-            await client.disconnect()
     except HTTPException:
         raise
     except Exception as e:
@@ -408,15 +407,12 @@ async def reannounce_torrent(
         raise HTTPException(status_code=404, detail="Downloader not found")
 
     try:
-        client = create_downloader(downloader)
-        try:
-            if await client.connect():
+        async with downloader_client(downloader) as client:
+            if client:
                 success = await client.reannounce_torrent(torrent_hash)
                 if success:
                     return {"message": "Torrent reannounced"}
                 raise HTTPException(status_code=500, detail="Failed to reannounce torrent")
-        finally:
-            await client.disconnect()
     except HTTPException:
         raise
     except Exception as e:
@@ -7,6 +7,7 @@ from app.models import User, Downloader
 from app.schemas import TorrentScore, LifecycleActionRequest
 from app.services.auth import get_current_user
 from app.services.downloader.context import downloader_client
+from app.services.downloader.snapshots import snapshot_store
 from app.services.lifecycle import score_torrents
 
 
@@ -24,10 +25,9 @@ async def get_scores(
     if not downloader:
         raise HTTPException(status_code=404, detail="Downloader not found")
 
-    async with downloader_client(downloader) as client:
-        if not client:
-            raise HTTPException(status_code=400, detail="Downloader unavailable")
-        torrents = await client.get_torrents()
+    torrents = await snapshot_store.torrents(downloader, allow_stale=True)
+    if torrents is None:
+        raise HTTPException(status_code=400, detail="Downloader unavailable")
 
     return score_torrents(torrents)
 
@@ -44,23 +44,23 @@ async def apply_lifecycle_action(
         raise HTTPException(status_code=404, detail="Downloader not found")
 
     action = data.action.lower()
-    results = []
+    if action not in ("pause", "resume", "archive"):
+        raise HTTPException(status_code=400, detail="Unsupported action")
+
+    torrent_hashes = list(data.torrent_hashes)
     async with downloader_client(downloader) as client:
         if not client:
             raise HTTPException(status_code=400, detail="Downloader unavailable")
-        for torrent_hash in data.torrent_hashes:
-            if action == "pause":
-                ok = await client.pause_torrent(torrent_hash)
-            elif action == "resume":
-                ok = await client.resume_torrent(torrent_hash)
-            elif action == "archive":
-                ok = True
-                if data.archive_path:
-                    ok = await client.set_torrent_location(torrent_hash, data.archive_path)
-                tag_ok = await client.add_torrent_tags(torrent_hash, ["archived"])
-                ok = ok and tag_ok
-            else:
-                raise HTTPException(status_code=400, detail="Unsupported action")
-            results.append({"hash": torrent_hash, "success": ok})
+        if action == "pause":
+            ok = await client.pause_torrents(torrent_hashes)
+        elif action == "resume":
+            ok = await client.resume_torrents(torrent_hashes)
+        else:
+            ok = True
+            if data.archive_path:
+                ok = await client.set_torrents_location(torrent_hashes, data.archive_path)
+            tag_ok = await client.add_torrents_tags(torrent_hashes, ["archived"])
+            ok = ok and tag_ok
 
+    results = [{"hash": torrent_hash, "success": ok} for torrent_hash in torrent_hashes]
     return {"results": results}
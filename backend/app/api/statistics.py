@@ -13,6 +13,7 @@ from app.models import (
 )
 from app.services.auth import get_current_user
 from app.services.downloader import create_downloader
+from app.services.downloader.snapshots import snapshot_store
 from app.utils.timezone import (
     get_local_tzinfo,
     local_day_start_utc,
@@ -111,9 +112,9 @@ async def get_overview(
                     if not client:
                         return None
                     dl_stats = await client.get_stats()
-                    torrents = await client.get_torrents()
-                    total_size = sum(t.size for t in torrents)
-                    return dl_stats, total_size
+                snapshot = await snapshot_store.get(dl, allow_stale=True)
+                total_size = int(snapshot.table.column("size").sum()) if snapshot is not None else 0
+                return dl_stats, total_size
             except Exception:
                 return None
 
@@ -277,9 +278,9 @@ async def get_downloader_stats(
                     if not client:
                         return dl.id, None
                     dl_stats = await client.get_stats()
-                    torrents = await client.get_torrents()
-                    total_size = sum(t.size for t in torrents)
-                    return dl.id, (dl_stats, total_size)
+                snapshot = await snapshot_store.get(dl, allow_stale=True)
+                total_size = int(snapshot.table.column("size").sum()) if snapshot is not None else 0
+                return dl.id, (dl_stats, total_size)
             except Exception:
                 return dl.id, None
 
@@ -39,6 +39,23 @@ class Settings(BaseSettings):
     # SECURITY: SSL verification is enabled by default. Only disable for trusted internal networks
     HTTP_VERIFY_SSL: bool = True
     HTTP_USER_AGENT: str = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+    # JSON responses larger than this (bytes) are decoded in a worker thread, 0 = never
+    JSON_THREAD_THRESHOLD: int = 1024 * 1024
+    # Per-downloader request budget (token bucket), 0 = unlimited.
+    # qBittorrent announce-cache refills are capped per call (ANNOUNCE_REFILL_PER_CALL) and run
+    # in the ACTION lane, so a cold cache on thousands of seeds fills over several ticks
+    DOWNLOADER_REQUEST_RATE: float = 30.0
+    DOWNLOADER_REQUEST_BURST: int = 60
+    # Shared torrent snapshots: poll interval per downloader and default max age.
+    # 0 = on demand only; torrent events (auto report, webhooks) then only fire when something reads a snapshot
+    TORRENT_SNAPSHOT_INTERVAL: float = 5.0
+    TORRENT_SNAPSHOT_MAX_AGE: float = 10.0
+    # Seconds between writes of snapshots / speed-limit status for warm start, 0 = never persist
+    TORRENT_SNAPSHOT_PERSIST_INTERVAL: float = 60.0
+    # Upload speed (bytes/s) whose crossing emits a speed_threshold torrent event, 0 = disabled
+    TORRENT_SPEED_THRESHOLD: int = 10 * 1024 * 1024
+    # Write one speed_limit_records row per torrent per tick instead of per-minute rollups (debugging)
+    SPEED_LIMIT_RAW_RECORDS: bool = False
 
     # RSS tuning
     RSS_MAX_CONCURRENT_FREE_CHECKS: int = 8
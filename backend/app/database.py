@@ -65,6 +65,7 @@ async def get_db():
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await _ensure_downloader_columns(conn)
         await _ensure_delete_rule_columns(conn)
         await _ensure_delete_record_columns(conn)
         await _ensure_speed_limit_site_columns(conn)
@@ -73,6 +74,10 @@ async def init_db():
 
 # Whitelist of allowed column names and their DDL definitions for schema migrations
 # This prevents potential SQL injection even though column names come from code
+_DOWNLOADER_COLUMNS_WHITELIST = frozenset({
+    "rpc_port"
+})
+
 _DELETE_RULE_COLUMNS_WHITELIST = frozenset({
     "pause", "only_delete_torrent", "limit_speed", "rule_type", "code"
 })
@@ -91,6 +96,23 @@ _U2_MAGIC_CONFIG_COLUMNS_WHITELIST = frozenset({
 })
 
 
+async def _ensure_downloader_columns(conn):
+    """Ensure downloaders table has rpc_port column for Deluge daemon RPC."""
+    if conn.dialect.name != "sqlite":
+        return
+    result = await conn.exec_driver_sql("PRAGMA table_info(downloaders)")
+    existing = {row[1] for row in result.fetchall()}
+    columns = {
+        "rpc_port": "INTEGER DEFAULT 0",
+    }
+    for name, ddl in columns.items():
+        # Security: Validate column name against whitelist
+        if name not in _DOWNLOADER_COLUMNS_WHITELIST:
+            raise ValueError(f"Column name '{name}' not in whitelist")
+        if name not in existing:
+            await conn.exec_driver_sql(f"ALTER TABLE downloaders ADD COLUMN {name} {ddl}")
+
+
 async def _ensure_delete_rule_columns(conn):
     """Ensure delete_rules table has new columns for Vertex-compatible rules."""
     if conn.dialect.name != "sqlite":
@@ -169,12 +191,30 @@ async def _ensure_u2_magic_config_columns(conn):
 def init_sync_db():
     """Initialize sync database tables (for logger)"""
     Base.metadata.create_all(bind=sync_engine)
+    _ensure_downloader_columns_sync()
     _ensure_delete_rule_columns_sync()
     _ensure_delete_record_columns_sync()
     _ensure_speed_limit_site_columns_sync()
     _ensure_u2_magic_config_columns_sync()
 
 
+def _ensure_downloader_columns_sync():
+    if sync_engine.dialect.name != "sqlite":
+        return
+    with sync_engine.begin() as conn:
+        result = conn.exec_driver_sql("PRAGMA table_info(downloaders)")
+        existing = {row[1] for row in result.fetchall()}
+        columns = {
+            "rpc_port": "INTEGER DEFAULT 0",
+        }
+        for name, ddl in columns.items():
+            # Security: Validate column name against whitelist
+            if name not in _DOWNLOADER_COLUMNS_WHITELIST:
+                raise ValueError(f"Column name '{name}' not in whitelist")
+            if name not in existing:
+                conn.exec_driver_sql(f"ALTER TABLE downloaders ADD COLUMN {name} {ddl}")
+
+
 def _ensure_delete_rule_columns_sync():
     if sync_engine.dialect.name != "sqlite":
         return
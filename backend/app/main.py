@@ -1,5 +1,6 @@
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
@@ -10,6 +11,8 @@ from app.config import settings
 from app.database import init_db, init_sync_db
 from app.api import api_router
 from app.api.realtime import broadcaster as realtime_broadcaster
+from app.services.downloader.budget import PRIORITY_READ, RequestDeferred, request_priority
+from app.services.downloader.snapshots import snapshot_store
 from app.tasks import scheduler
 from app.utils import get_logger
 from app.utils.logger import init_db_logging
@@ -32,6 +35,7 @@ async def lifespan(app: FastAPI):
     # Initialize database logging after DB is ready
     init_db_logging()
     scheduler.start()
+    snapshot_store.start()
     logger.info("PT Manager Pro started successfully")
 
     yield
@@ -39,6 +43,17 @@ async def lifespan(app: FastAPI):
     # Shutdown
     scheduler.stop()
     await realtime_broadcaster.stop()
+    await snapshot_store.stop()
+
+    # Write the unfinished minute of speed-limit record rollups
+    try:
+        from app.services.speed_limiter import flush_record_rollup
+        await flush_record_rollup()
+    except Exception:
+        pass
+
+    # Persist speed-limit states not yet written by the periodic save
+    await scheduler.flush_speed_limit_state()
 
     # Close shared HTTP clients to avoid unclosed connection warnings
     try:
@@ -47,6 +62,12 @@ async def lifespan(app: FastAPI):
     except Exception:
         pass
 
+    try:
+        from app.services.downloader.pool import session_pool
+        await session_pool.close_all()
+    except Exception:
+        pass
+
     logger.info("PT Manager Pro stopped")
 
 
@@ -75,6 +96,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+# 界面的只读请求（GET）访问下载器时排在限速和后台操作之后
+@app.middleware("http")
+async def downloader_request_priority(request: Request, call_next):
+    if request.method == "GET":
+        with request_priority(PRIORITY_READ):
+            return await call_next(request)
+    return await call_next(request)
+
+
+# 只读请求在令牌桶中排队超时：下载器繁忙，让界面稍后重试
+@app.exception_handler(RequestDeferred)
+async def downloader_request_deferred(request: Request, exc: RequestDeferred):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Downloader is busy, please retry"},
+        headers={"Retry-After": "5"},
+    )
+
+
 # Include API router
 app.include_router(api_router)
 
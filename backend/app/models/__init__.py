@@ -10,11 +10,13 @@ from app.models.models import (
     SpeedLimitConfig,
     SpeedLimitSite,
     SpeedLimitRecord,
+    SpeedLimitState,
     U2MagicConfig,
     U2MagicRecord,
     TorrentCache,
     TorrentStatus,
     SystemSettings,
+    SnapshotBlob,
     DailyTrafficBaseline,
     LogRecord,
     WebhookEndpoint,
@@ -37,11 +39,13 @@ __all__ = [
     "SpeedLimitConfig",
     "SpeedLimitSite",
     "SpeedLimitRecord",
+    "SpeedLimitState",
     "U2MagicConfig",
     "U2MagicRecord",
     "TorrentCache",
     "TorrentStatus",
     "SystemSettings",
+    "SnapshotBlob",
     "DailyTrafficBaseline",
     "LogRecord",
     "WebhookEndpoint",
@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import Column, Integer, String, Text, Boolean, Float, DateTime, ForeignKey, JSON, Enum as SQLEnum, Index, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Text, Boolean, Float, DateTime, ForeignKey, JSON, LargeBinary, Enum as SQLEnum, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 import enum
 
@@ -44,6 +44,7 @@ class Downloader(Base):
     password = Column(String(255), default="")
     use_ssl = Column(Boolean, default=False)
     download_dir = Column(String(500), default="")
+    rpc_port = Column(Integer, default=0)  # Deluge daemon RPC port, 0 = use Web UI JSON
 
     # Features
     enabled = Column(Boolean, default=True)
@@ -295,6 +296,16 @@ class SpeedLimitRecord(Base):
     )
 
 
+class SpeedLimitState(Base):
+    """Persisted per-torrent speed limiter state (PID / Kalman / speed windows), zlib-compressed JSON"""
+    __tablename__ = "speed_limit_states"
+
+    id = Column(Integer, primary_key=True, index=True)
+    torrent_hash = Column(String(100), unique=True, nullable=False, index=True)
+    data = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 class U2MagicConfig(Base):
     __tablename__ = "u2_magic_config"
 
@@ -412,6 +423,19 @@ class SystemSettings(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
+class SnapshotBlob(Base):
+    """Compressed state persisted for warm start (torrent snapshots, speed-limit status)"""
+    __tablename__ = "snapshot_blobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String(100), unique=True, nullable=False, index=True)  # e.g. torrents:1
+    version = Column(Integer, default=0)
+    item_count = Column(Integer, default=0)
+    captured_at = Column(DateTime, nullable=True)  # UTC
+    data = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 class LogLevel(str, enum.Enum):
     DEBUG = "DEBUG"
     INFO = "INFO"
@@ -61,6 +61,7 @@ class DownloaderBase(BaseModel):
     password: str = ""
     use_ssl: bool = False
     download_dir: str = ""
+    rpc_port: int = 0
     enabled: bool = True
     auto_report: bool = True
     download_first_last: bool = False
@@ -85,6 +86,7 @@ class DownloaderUpdate(BaseModel):
     password: Optional[str] = None
     use_ssl: Optional[bool] = None
     download_dir: Optional[str] = None
+    rpc_port: Optional[int] = None
     enabled: Optional[bool] = None
     auto_report: Optional[bool] = None
     download_first_last: Optional[bool] = None
@@ -119,6 +121,8 @@ class DownloaderStatus(BaseModel):
     downloading_torrents: int = 0
     total_uploaded: float = 0
     total_downloaded: float = 0
+    # 熔断状态与延迟统计（见 downloader/health.py）
+    health: Optional[dict] = None
 
 
 # ============ RSS Schemas ============
@@ -524,6 +528,8 @@ class DashboardStats(BaseModel):
     total_torrents: int
     total_size: float
     free_space: float
+    # 部分数据来自启动时读回的旧快照时，为其中最早的采集时间（UTC）
+    stale_since: Optional[datetime] = None
 
 
 class TimelineItem(BaseModel):
@@ -9,6 +9,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import DeleteRule, DeleteRecord, Downloader, TorrentCache
 from app.services.downloader import TorrentInfo
 from app.services.downloader.context import downloader_client
+from app.services.downloader.snapshots import snapshot_store
 from app.services.notification import notify_delete, notify_delete_batch
 from app.utils import get_logger
 
@@ -485,9 +486,14 @@ class DeleteService:
     async def get_matching_torrents(
         self,
         rule: DeleteRule,
-        downloader: Downloader
+        downloader: Downloader,
+        allow_stale: bool = False,
     ) -> List[Tuple[TorrentInfo, bool]]:
-        """Get torrents matching a rule with duration check status"""
+        """Get torrents matching a rule with duration check status
+
+        allow_stale=True（预览用）时可以使用启动时读回的旧快照，此时只读取持续时间
+        记录，不开始/清除计时。
+        """
         matching: List[Tuple[TorrentInfo, bool]] = []
 
         try:
@@ -495,7 +501,12 @@ class DeleteService:
                 if not client:
                     return []
 
-                torrents = await client.get_torrents()
+                # 种子列表取自共享快照（不含汇报时间，删除规则也不需要）
+                snapshot = await snapshot_store.get(downloader, allow_stale=allow_stale)
+                if snapshot is None or (snapshot.restored and not allow_stale):
+                    return []
+                torrents = snapshot.torrents()
+                read_only = snapshot.restored
                 try:
                     stats = await client.get_stats()
                 except Exception as e:
@@ -522,14 +533,21 @@ class DeleteService:
                 if self.evaluate_rule(rule, torrent, stats):
                     # Check duration if configured (either rule-level or condition-level)
                     duration_met = True
-                    if rule_duration_seconds > 0:
+                    if rule_duration_seconds > 0 and read_only:
+                        since = self._duration_cache.get(
+                            self._duration_cache_key(downloader.id, rule.id, torrent.hash)
+                        )
+                        duration_met = since is not None and (
+                            datetime.utcnow() - since
+                        ).total_seconds() >= rule_duration_seconds
+                    elif rule_duration_seconds > 0:
                         duration_met = self._check_duration_memory(
                             downloader.id, rule.id, torrent.hash, rule_duration_seconds
                         )
                         torrents_to_update.append(torrent.hash)
 
                     matching.append((torrent, duration_met))
-                else:
+                elif not read_only:
                     # Clear duration tracking if condition no longer matches
                     torrents_to_clear.append(torrent.hash)
 
@@ -705,9 +723,11 @@ class DeleteService:
             if matching:
                 logger.info(f"Rule '{rule.name}' matched {len(matching)} torrent(s) on {downloader.name}")
 
+            # 先筛选本轮要处理的种子，再按下载器批量执行
+            selected: List[TorrentInfo] = []
             for torrent, duration_met in matching:
                 # Check max delete count
-                if rule.max_delete_count > 0 and delete_count >= rule.max_delete_count:
+                if rule.max_delete_count > 0 and delete_count + len(selected) >= rule.max_delete_count:
                     logger.debug(f"Rule '{rule.name}': Reached max delete count ({rule.max_delete_count})")
                     break
 
@@ -716,78 +736,68 @@ class DeleteService:
                     logger.debug(f"Rule '{rule.name}': Duration not met for {torrent.name[:30]}...")
                     continue
 
-                action_taken = False
-                # Determine delete_files before any action
-                if force_delete_files:
-                    delete_files = True
-                else:
-                    delete_files = rule.delete_files and not rule.only_delete_torrent
-
-                action_type = "delete"
-                if rule.limit_speed and rule.limit_speed > 0:
-                    action_taken = await self._limit_torrent(
-                        downloader, torrent, rule.limit_speed
-                    )
-                    action_type = "limit"
-                elif rule.pause:
-                    action_taken = await self._pause_torrent(downloader, torrent)
-                    action_type = "pause"
-                else:
-                    action_taken = await self._delete_torrent(
-                        downloader, torrent, delete_files, rule.force_report
-                    )
+                selected.append(torrent)
 
-                if action_taken:
-                    delete_count += 1
-
-                    if action_type == "delete":
-                        record = DeleteRecord(
-                            rule_id=rule.id,
-                            rule_name=rule.name,
-                            downloader_id=downloader.id,
-                            downloader_name=downloader.name,
-                            torrent_hash=torrent.hash,
-                            torrent_name=torrent.name,
-                            size=torrent.size,
-                            uploaded=torrent.uploaded,
-                            downloaded=torrent.downloaded,
-                            ratio=torrent.ratio,
-                            seeding_time=torrent.seeding_time,
-                            tracker=torrent.tracker,
-                            files_deleted=delete_files,
-                            reported=rule.force_report,
-                            action_type=action_type,
-                        )
-                        self.db.add(record)
-                        deleted_records.append(record)
-                        action_records.append(record)
-                    else:
-                        record = DeleteRecord(
-                            rule_id=rule.id,
-                            rule_name=rule.name,
-                            downloader_id=downloader.id,
-                            downloader_name=downloader.name,
-                            torrent_hash=torrent.hash,
-                            torrent_name=torrent.name,
-                            size=torrent.size,
-                            uploaded=torrent.uploaded,
-                            downloaded=torrent.downloaded,
-                            ratio=torrent.ratio,
-                            seeding_time=torrent.seeding_time,
-                            tracker=torrent.tracker,
-                            files_deleted=False,
-                            reported=False,
-                            action_type=action_type,
-                        )
-                        self.db.add(record)
-                        action_records.append(record)
+            if not selected:
+                continue
+
+            # Determine delete_files before any action
+            if force_delete_files:
+                delete_files = True
+            else:
+                delete_files = rule.delete_files and not rule.only_delete_torrent
 
-                    # Clear from duration cache
-                    key = self._duration_cache_key(downloader.id, rule.id, torrent.hash)
-                    if key in self._duration_cache:
-                        del self._duration_cache[key]
-                else:
-                    logger.warning(f"Rule '{rule.name}': Failed to execute action on {torrent.name[:50]}")
+            action_type = "delete"
+            if rule.limit_speed and rule.limit_speed > 0:
+                action_taken = await self._limit_torrents(
+                    downloader, selected, rule.limit_speed
+                )
+                action_type = "limit"
+            elif rule.pause:
+                action_taken = await self._pause_torrents(downloader, selected)
+                action_type = "pause"
+            else:
+                action_taken = await self._delete_torrents(
+                    downloader, selected, delete_files, rule.force_report
+                )
+
+            if not action_taken:
+                logger.warning(
+                    f"Rule '{rule.name}': Failed to execute action on {len(selected)} torrent(s) "
+                    f"from {downloader.name}"
+                )
+                continue
+
+            delete_count += len(selected)
+
+            for torrent in selected:
+                is_delete = action_type == "delete"
+                record = DeleteRecord(
+                    rule_id=rule.id,
+                    rule_name=rule.name,
+                    downloader_id=downloader.id,
+                    downloader_name=downloader.name,
+                    torrent_hash=torrent.hash,
+                    torrent_name=torrent.name,
+                    size=torrent.size,
+                    uploaded=torrent.uploaded,
+                    downloaded=torrent.downloaded,
+                    ratio=torrent.ratio,
+                    seeding_time=torrent.seeding_time,
+                    tracker=torrent.tracker,
+                    files_deleted=delete_files if is_delete else False,
+                    reported=rule.force_report if is_delete else False,
+                    action_type=action_type,
+                )
+                self.db.add(record)
+                action_records.append(record)
+                if is_delete:
+                    deleted_records.append(record)
+
+                # Clear from duration cache
+                key = self._duration_cache_key(downloader.id, rule.id, torrent.hash)
+                if key in self._duration_cache:
+                    del self._duration_cache[key]
 
         # Single commit for all records
         if action_records:
@@ -815,45 +825,49 @@ class DeleteService:
 
         return deleted_records
 
-    async def _delete_torrent(
+    async def _delete_torrents(
         self,
         downloader: Downloader,
-        torrent: TorrentInfo,
+        torrents: List[TorrentInfo],
         delete_files: bool,
         force_report: bool
     ) -> bool:
-        """Delete a single torrent"""
+        """Delete torrents in one batched request"""
+        hashes = [t.hash for t in torrents]
         try:
             async with downloader_client(downloader) as client:
                 if not client:
                     logger.error(
-                        f"Failed to connect to {downloader.name} for deleting {torrent.name[:30]}..."
+                        f"Failed to connect to {downloader.name} for deleting {len(torrents)} torrent(s)"
                     )
                     return False
 
                 # Force report before deletion
                 if force_report:
-                    await client.reannounce_torrent(torrent.hash)
+                    await client.reannounce_torrents(hashes)
                     # Wait a bit for report
                     import asyncio
                     await asyncio.sleep(2)
 
-                # Delete torrent
-                success = await client.remove_torrent(torrent.hash, delete_files)
+                # Delete torrents
+                success = await client.remove_torrents(hashes, delete_files)
 
             if success:
-                logger.info(
-                    f"Deleted torrent: {torrent.name[:50]} from {downloader.name} (files: {delete_files})"
-                )
+                # 后续规则需要看到删除后的列表
+                snapshot_store.invalidate(downloader.id)
+                for torrent in torrents:
+                    logger.info(
+                        f"Deleted torrent: {torrent.name[:50]} from {downloader.name} (files: {delete_files})"
+                    )
             else:
                 logger.error(
-                    f"Failed to delete torrent: {torrent.name[:50]} from {downloader.name}"
+                    f"Failed to delete {len(torrents)} torrent(s) from {downloader.name}"
                 )
 
             return success
         except Exception as e:
             logger.error(
-                f"Error deleting torrent {torrent.name[:30]}... from {downloader.name}: {e}"
+                f"Error deleting {len(torrents)} torrent(s) from {downloader.name}: {e}"
             )
             return False
     async def run_all_rules(self) -> List[DeleteRecord]:
@@ -881,33 +895,37 @@ class DeleteService:
 
         return all_deleted
 
-    async def _pause_torrent(self, downloader: Downloader, torrent: TorrentInfo) -> bool:
+    async def _pause_torrents(self, downloader: Downloader, torrents: List[TorrentInfo]) -> bool:
         try:
             async with downloader_client(downloader) as client:
                 if not client:
                     return False
-                success = await client.pause_torrent(torrent.hash)
+                success = await client.pause_torrents([t.hash for t in torrents])
 
             if success:
-                logger.info(f"Paused torrent: {torrent.name[:50]} from {downloader.name}")
+                snapshot_store.invalidate(downloader.id)
+                for torrent in torrents:
+                    logger.info(f"Paused torrent: {torrent.name[:50]} from {downloader.name}")
             return success
         except Exception as e:
-            logger.error(f"Error pausing torrent: {e}")
+            logger.error(f"Error pausing torrents: {e}")
             return False
-    async def _limit_torrent(self, downloader: Downloader, torrent: TorrentInfo, limit_speed: int) -> bool:
+    async def _limit_torrents(self, downloader: Downloader, torrents: List[TorrentInfo], limit_speed: int) -> bool:
         try:
             async with downloader_client(downloader) as client:
                 if not client:
                     return False
-                download_success = await client.set_torrent_download_limit(torrent.hash, limit_speed)
-                upload_success = await client.set_torrent_upload_limit(torrent.hash, limit_speed)
+                limits = {t.hash: limit_speed for t in torrents}
+                download_success = await client.set_torrents_download_limit(limits)
+                upload_success = await client.set_torrents_upload_limit(limits)
                 success = download_success and upload_success
 
             if success:
-                logger.info(
-                    f"Limited torrent: {torrent.name[:50]} to {limit_speed} B/s on {downloader.name}"
-                )
+                for torrent in torrents:
+                    logger.info(
+                        f"Limited torrent: {torrent.name[:50]} to {limit_speed} B/s on {downloader.name}"
+                    )
             return success
         except Exception as e:
-            logger.error(f"Error limiting torrent: {e}")
+            logger.error(f"Error limiting torrents: {e}")
             return False
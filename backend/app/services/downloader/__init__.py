@@ -4,10 +4,18 @@ from .base import BaseDownloader, TorrentInfo, DownloaderStats
 from .qbittorrent import QBittorrentClient
 from .transmission import TransmissionClient
 from .deluge import DelugeClient
+from .health import health_registry
 
 
 def create_downloader(downloader: Downloader) -> BaseDownloader:
     """Factory function to create appropriate downloader client"""
+    client = _create_client(downloader)
+    if getattr(downloader, "id", None) is not None:
+        client.health = health_registry.get(downloader.id, downloader.name)
+    return client
+
+
+def _create_client(downloader: Downloader) -> BaseDownloader:
     if downloader.type == DownloaderType.QBITTORRENT:
         return QBittorrentClient(
             host=downloader.host,
@@ -31,6 +39,7 @@ def create_downloader(downloader: Downloader) -> BaseDownloader:
             username=downloader.username,
             password=downloader.password,
             use_ssl=downloader.use_ssl,
+            daemon_port=getattr(downloader, "rpc_port", 0) or 0,
         )
     else:
         raise ValueError(f"Unknown downloader type: {downloader.type}")
@@ -44,4 +53,5 @@ __all__ = [
     "TransmissionClient",
     "DelugeClient",
     "create_downloader",
+    "health_registry",
 ]
@@ -0,0 +1,123 @@
+"""Per-downloader cache of reannounce / tracker lookups
+
+qBittorrent 需要 /torrents/properties + /torrents/trackers 两次请求才能得到
+单个种子的 next_announce 和 interval。汇报时间是可预测的，因此只在以下情况重新获取：
+- 预测的 next_announce_time 已经过去（或未知且超过 UNKNOWN_TTL）
+- 种子状态变化，或 uploaded 回退/突增
+- 主动触发了强制汇报
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable, Optional, Tuple
+
+# 缓存条目上限（LRU 淘汰）
+MAX_ENTRIES = 20000
+# next_announce 未知时的重新获取间隔（秒）
+UNKNOWN_TTL = 30.0
+# uploaded 单次增长超过该值视为突变（字节）
+UPLOAD_JUMP_BYTES = 1024 * 1024 * 1024
+
+
+@dataclass
+class AnnounceEntry:
+    next_announce: Optional[float]
+    interval: Optional[int]
+    fetched_at: float
+    uploaded: Optional[int] = None
+    state: Optional[str] = None
+    forced: bool = False
+
+
+class AnnounceInfoCache:
+    """Bounded, schedule-aware cache of (next_announce_time, announce_interval)"""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, unknown_ttl: float = UNKNOWN_TTL):
+        self.max_entries = max_entries
+        self.unknown_ttl = unknown_ttl
+        self._entries: "OrderedDict[str, AnnounceEntry]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def needs_refresh(
+        self,
+        torrent_hash: str,
+        uploaded: Optional[int] = None,
+        state: Optional[str] = None,
+        now: Optional[float] = None,
+    ) -> bool:
+        entry = self._entries.get(torrent_hash)
+        if entry is None or entry.forced:
+            return True
+
+        now = now or time.time()
+        if state is not None and entry.state is not None and state != entry.state:
+            return True
+        if uploaded is not None and entry.uploaded is not None:
+            delta = uploaded - entry.uploaded
+            if delta < 0 or delta > UPLOAD_JUMP_BYTES:
+                return True
+
+        if entry.next_announce is None:
+            return now - entry.fetched_at >= self.unknown_ttl
+        return now >= entry.next_announce
+
+    def get(self, torrent_hash: str) -> Optional[Tuple[Optional[float], Optional[int]]]:
+        entry = self._entries.get(torrent_hash)
+        if entry is None:
+            return None
+        self._entries.move_to_end(torrent_hash)
+        return entry.next_announce, entry.interval
+
+    def put(
+        self,
+        torrent_hash: str,
+        next_announce: Optional[float],
+        interval: Optional[int],
+        uploaded: Optional[int] = None,
+        state: Optional[str] = None,
+        now: Optional[float] = None,
+    ):
+        previous = self._entries.get(torrent_hash)
+        # 新结果缺失的字段沿用旧值（interval 通常不会变化）
+        if previous is not None:
+            if interval is None:
+                interval = previous.interval
+            if uploaded is None:
+                uploaded = previous.uploaded
+            if state is None:
+                state = previous.state
+        self._entries[torrent_hash] = AnnounceEntry(
+            next_announce=next_announce,
+            interval=interval,
+            fetched_at=now or time.time(),
+            uploaded=uploaded,
+            state=state,
+        )
+        self._entries.move_to_end(torrent_hash)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def observe(self, torrent_hash: str, uploaded: Optional[int], state: Optional[str]):
+        """缓存命中时记录最新的 uploaded/state，作为下一次突变检测的基准"""
+        entry = self._entries.get(torrent_hash)
+        if entry is not None:
+            entry.uploaded = uploaded
+            entry.state = state
+
+    def invalidate(self, torrent_hash: str):
+        """强制汇报后标记条目需要重新获取"""
+        entry = self._entries.get(torrent_hash)
+        if entry is not None:
+            entry.forced = True
+
+    def prune(self, live_hashes: Iterable[str]):
+        """移除已不在下载器中的种子"""
+        live = set(live_hashes)
+        for torrent_hash in [h for h in self._entries if h not in live]:
+            del self._entries[torrent_hash]
+
+    def clear(self):
+        self._entries.clear()
@@ -2,6 +2,21 @@ from abc import ABC, abstractmethod
 from typing import List, Optional, Dict, Any
 from dataclasses import dataclass
 from datetime import datetime
+import httpx
+
+from .budget import RequestBudget
+from .health import DownloaderHealth, CONNECT_TIMEOUT
+from .singleflight import SingleFlight
+
+# 批量操作单次请求携带的最大种子数
+BATCH_CHUNK_SIZE = 500
+
+# get_torrents(status_filter=...) 可用的统一状态，active = downloading + seeding
+TORRENT_STATUSES = ("downloading", "seeding", "paused", "queued", "checking", "error")
+ACTIVE_STATUSES = ("downloading", "seeding")
+
+# 依赖 tracker 汇报信息的字段（未请求时可跳过 reannounce/tracker 查询）
+ANNOUNCE_FIELDS = ("next_announce_time", "announce_interval")
 
 
 @dataclass
@@ -59,12 +74,28 @@ class BaseDownloader(ABC):
         self.password = password
         self.use_ssl = use_ssl
         self._client = None
+        # 延迟/错误统计与熔断状态；create_downloader 会替换为按下载器 ID 共享的实例
+        self.health = DownloaderHealth(host)
+        # 相同读请求的合并（见 singleflight.py），写操作后需调用 _flights.invalidate()
+        self._flights = SingleFlight()
+        # 按优先级分道的请求令牌桶（见 budget.py）
+        self.budget = RequestBudget()
 
     @property
     def base_url(self) -> str:
         protocol = "https" if self.use_ssl else "http"
         return f"{protocol}://{self.host}:{self.port}"
 
+    @property
+    def is_connected(self) -> bool:
+        """Whether the underlying HTTP session is open (used by the session pool)"""
+        return getattr(self, "_session", None) is not None
+
+    def request_timeout(self, bulk: bool = False) -> httpx.Timeout:
+        """Request timeout derived from observed latency (bulk: full listings / uploads)"""
+        timeout = self.health.timeout(bulk)
+        return httpx.Timeout(timeout, connect=min(timeout, CONNECT_TIMEOUT))
+
     @abstractmethod
     async def connect(self) -> bool:
         """Connect to the downloader and verify connection"""
@@ -76,10 +107,54 @@ class BaseDownloader(ABC):
         pass
 
     @abstractmethod
-    async def get_torrents(self) -> List[TorrentInfo]:
-        """Get all torrents"""
+    async def get_torrents(
+        self,
+        with_reannounce: bool = True,
+        fields: Optional[List[str]] = None,
+        status_filter: Optional[str | List[str]] = None,
+        hashes: Optional[List[str]] = None,
+        category: Optional[str] = None,
+        tag: Optional[str] = None,
+    ) -> List[TorrentInfo]:
+        """Get torrents
+
+        Args:
+            with_reannounce: 是否补充 next_announce_time/announce_interval（可能需要额外请求）
+            fields: 需要的 TorrentInfo 字段名，None 表示全部；未请求的字段为默认值，hash 始终返回
+            status_filter: 统一状态（见 TORRENT_STATUSES）或 "active"，可传列表
+            hashes: 只返回这些种子
+            category: 分类（Deluge 为 label）
+            tag: 标签
+        过滤条件优先映射为下载器原生参数，不支持的部分在本地过滤。
+        """
         pass
 
+    async def get_torrent_table(
+        self,
+        with_reannounce: bool = False,
+        fields: Optional[List[str]] = None,
+        status_filter: Optional[str | List[str]] = None,
+        hashes: Optional[List[str]] = None,
+        category: Optional[str] = None,
+        tag: Optional[str] = None,
+    ):
+        """Get torrents as a columnar TorrentTable
+
+        参数与 get_torrents 相同。默认由 get_torrents 的结果转换，
+        适配器应覆盖为直接从原始 JSON 填充。
+        """
+        from .table import TorrentTable
+
+        torrents = await self.get_torrents(
+            with_reannounce=with_reannounce,
+            fields=fields,
+            status_filter=status_filter,
+            hashes=hashes,
+            category=category,
+            tag=tag,
+        )
+        return TorrentTable.from_infos(torrents)
+
     @abstractmethod
     async def get_torrent(self, torrent_hash: str) -> Optional[TorrentInfo]:
         """Get a specific torrent by hash"""
@@ -161,6 +236,156 @@ class BaseDownloader(ABC):
         """Resume all torrents"""
         pass
 
+    # ===== 查询辅助 =====
+
+    @staticmethod
+    def expand_status_filter(status_filter: Optional[str | List[str]]) -> Optional[set]:
+        """Normalize status_filter into a set of TorrentInfo.status values"""
+        if status_filter is None:
+            return None
+        values = [status_filter] if isinstance(status_filter, str) else list(status_filter)
+        statuses = set()
+        for value in values:
+            if value == "active":
+                statuses.update(ACTIVE_STATUSES)
+            else:
+                statuses.add(value)
+        return statuses
+
+    @staticmethod
+    def wants_fields(fields: Optional[List[str]], names) -> bool:
+        """Whether any of names is requested (fields=None means all)"""
+        return fields is None or any(name in fields for name in names)
+
+    @staticmethod
+    def query_fields(
+        fields: Optional[List[str]],
+        status_filter=None,
+        category: Optional[str] = None,
+        tag: Optional[str] = None,
+    ) -> Optional[List[str]]:
+        """Add the fields needed for local filtering to a projection"""
+        if fields is None:
+            return None
+        needed = list(fields)
+        if status_filter is not None:
+            needed.append("status")
+        if category is not None:
+            needed.append("category")
+        if tag is not None:
+            needed.append("tags")
+        return needed
+
+    @staticmethod
+    def native_fields(
+        fields: Optional[List[str]],
+        field_map: Dict[str, tuple],
+        default: List[str],
+    ) -> List[str]:
+        """Map TorrentInfo field names to the downloader's native keys"""
+        if fields is None:
+            return list(default)
+        native: List[str] = []
+        for name in ["hash", *fields]:
+            for key in field_map.get(name, ()):
+                if key not in native:
+                    native.append(key)
+        return native
+
+    def filter_table(
+        self,
+        table,
+        status_filter=None,
+        hashes: Optional[List[str]] = None,
+        category: Optional[str] = None,
+        tag: Optional[str] = None,
+    ):
+        """Apply get_torrents filters to a TorrentTable (vectorized)"""
+        if status_filter is None and hashes is None and category is None and tag is None:
+            return table
+        return table.select(table.mask(self.expand_status_filter(status_filter), hashes, category, tag))
+
+    def filter_torrents(
+        self,
+        torrents: List[TorrentInfo],
+        status_filter=None,
+        hashes: Optional[List[str]] = None,
+        category: Optional[str] = None,
+        tag: Optional[str] = None,
+    ) -> List[TorrentInfo]:
+        """Apply get_torrents filters locally"""
+        statuses = self.expand_status_filter(status_filter)
+        hash_set = {h.lower() for h in hashes} if hashes is not None else None
+        result = []
+        for torrent in torrents:
+            if statuses is not None and torrent.status not in statuses:
+                continue
+            if hash_set is not None and torrent.hash.lower() not in hash_set:
+                continue
+            if category is not None and torrent.category != category:
+                continue
+            if tag is not None and tag not in torrent.tags:
+                continue
+            result.append(torrent)
+        return result
+
+    # ===== 批量操作 =====
+    # 默认实现逐个调用单种子接口，适配器应覆盖为一次（或分块）请求
+
+    @staticmethod
+    def chunk_hashes(hashes: List[str], size: int = BATCH_CHUNK_SIZE) -> List[List[str]]:
+        """Split hashes into request-sized chunks"""
+        hashes = list(dict.fromkeys(h for h in hashes if h))
+        return [hashes[i:i + size] for i in range(0, len(hashes), size)]
+
+    @staticmethod
+    def group_by_limit(limits: Dict[str, int]) -> Dict[int, List[str]]:
+        """Group a hash -> limit mapping by equal limit values"""
+        groups: Dict[int, List[str]] = {}
+        for torrent_hash, limit in limits.items():
+            groups.setdefault(int(limit), []).append(torrent_hash)
+        return groups
+
+    async def remove_torrents(self, torrent_hashes: List[str], delete_files: bool = False) -> bool:
+        """Remove many torrents"""
+        results = [await self.remove_torrent(h, delete_files) for h in torrent_hashes]
+        return all(results)
+
+    async def pause_torrents(self, torrent_hashes: List[str]) -> bool:
+        """Pause many torrents"""
+        results = [await self.pause_torrent(h) for h in torrent_hashes]
+        return all(results)
+
+    async def resume_torrents(self, torrent_hashes: List[str]) -> bool:
+        """Resume many torrents"""
+        results = [await self.resume_torrent(h) for h in torrent_hashes]
+        return all(results)
+
+    async def reannounce_torrents(self, torrent_hashes: List[str]) -> bool:
+        """Force reannounce many torrents"""
+        results = [await self.reannounce_torrent(h) for h in torrent_hashes]
+        return all(results)
+
+    async def set_torrents_upload_limit(self, limits: Dict[str, int]) -> bool:
+        """Set per-torrent upload limits from a hash -> bytes/s mapping"""
+        results = [await self.set_torrent_upload_limit(h, limit) for h, limit in limits.items()]
+        return all(results)
+
+    async def set_torrents_download_limit(self, limits: Dict[str, int]) -> bool:
+        """Set per-torrent download limits from a hash -> bytes/s mapping"""
+        results = [await self.set_torrent_download_limit(h, limit) for h, limit in limits.items()]
+        return all(results)
+
+    async def set_torrents_location(self, torrent_hashes: List[str], location: str) -> bool:
+        """Move many torrents to a new location"""
+        results = [await self.set_torrent_location(h, location) for h in torrent_hashes]
+        return all(results)
+
+    async def add_torrents_tags(self, torrent_hashes: List[str], tags: List[str]) -> bool:
+        """Add tags to many torrents"""
+        results = [await self.add_torrent_tags(h, tags) for h in torrent_hashes]
+        return all(results)
+
     async def set_torrent_location(self, torrent_hash: str, location: str) -> bool:
         """Move torrent files to a new location"""
         return False
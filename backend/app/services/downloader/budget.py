@@ -0,0 +1,166 @@
+"""Per-downloader request budget with priority lanes
+
+限速、删种、RSS、U2 魔法、仪表盘和实时推送都直接请求同一个下载器 WebUI，
+60 秒间隔的定时任务又会在整分钟附近扎堆。每个客户端持有一个令牌桶：
+- 速率 DOWNLOADER_REQUEST_RATE 次/秒，容量 DOWNLOADER_REQUEST_BURST（速率为 0 时不限制）
+- 请求按优先级分道：限速/汇报（CRITICAL）> 删种/RSS 等操作（ACTION）> 仪表盘/实时读取（READ）；
+  qBittorrent 汇报信息缓存的补齐走 ACTION 道且每次限量，冷启动时不会长时间占满令牌桶
+- 低优先级请求不能用光令牌，需为高优先级保留一部分（LANE_RESERVE）
+- 令牌不足时按优先级排队；READ 等待超过 READ_MAX_WAIT 秒直接放弃，适配器抛出
+  RequestDeferred（本轮跳过，调用方保留上一次的数据，由下一次轮询补上；
+  相同的读请求已由 singleflight 合并）
+
+优先级通过上下文变量传递，调用方用 request_priority() 包住一段逻辑即可，
+不需要修改下载器方法的签名。
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from app.config import settings
+
+# 优先级（数值越小越优先）
+PRIORITY_CRITICAL = 0
+PRIORITY_ACTION = 1
+PRIORITY_READ = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_CRITICAL: "critical",
+    PRIORITY_ACTION: "action",
+    PRIORITY_READ: "read",
+}
+
+# 各优先级拿令牌后桶内至少保留的比例（相对容量）
+LANE_RESERVE = {
+    PRIORITY_CRITICAL: 0.0,
+    PRIORITY_ACTION: 0.1,
+    PRIORITY_READ: 0.25,
+}
+
+# READ 请求的最长排队时间（秒），超时视为本轮跳过
+READ_MAX_WAIT = 5.0
+
+
+class RequestDeferred(Exception):
+    """A READ request gave up waiting for the request budget (not a downloader error)"""
+
+
+_priority: ContextVar[int] = ContextVar("downloader_request_priority", default=PRIORITY_ACTION)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+@contextmanager
+def request_priority(priority: int):
+    """在该上下文（及其创建的任务）中发起的下载器请求使用指定优先级"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class RequestBudget:
+    """Token bucket shared by all requests to one downloader"""
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[float] = None):
+        self.rate = float(settings.DOWNLOADER_REQUEST_RATE if rate is None else rate)
+        self.burst = max(1.0, float(settings.DOWNLOADER_REQUEST_BURST if burst is None else burst))
+        self.tokens = self.burst
+        self._updated = time.monotonic()
+        # (priority, seq, future) 小顶堆
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self.granted: Counter = Counter()
+        self.deferred: Counter = Counter()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.rate <= 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _needed(self, priority: int) -> float:
+        """该优先级拿到令牌还差多少（<=0 表示可以拿）"""
+        reserve = (self.burst - 1) * LANE_RESERVE.get(priority, 0.0)
+        return 1 + reserve - self.tokens
+
+    def _queued_ahead(self, priority: int) -> bool:
+        return any(p <= priority and not f.done() for p, _, f in self._waiters)
+
+    async def acquire(self, priority: Optional[int] = None) -> bool:
+        """取一个令牌；READ 排队超时返回 False，调用方应抛出 RequestDeferred"""
+        if priority is None:
+            priority = current_priority()
+        if self.unlimited:
+            return True
+
+        self._refill()
+        if not self._queued_ahead(priority) and self._needed(priority) <= 0:
+            self.tokens -= 1
+            self.granted[priority] += 1
+            return True
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self._wake()
+        timeout = READ_MAX_WAIT if priority >= PRIORITY_READ else None
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self.deferred[priority] += 1
+            # 唤醒调度任务清理已放弃的等待者
+            self._wakeup.set()
+            return False
+        self.granted[priority] += 1
+        return True
+
+    def _wake(self):
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        else:
+            self._wakeup.set()
+
+    async def _dispatch(self):
+        """按优先级依次放行排队的请求"""
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            self._refill()
+            needed = self._needed(priority)
+            if needed <= 0:
+                heapq.heappop(self._waiters)
+                self.tokens -= 1
+                future.set_result(True)
+                continue
+            # 等待补充令牌，期间有更高优先级请求入队会被唤醒重新选择
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), needed / self.rate)
+            except asyncio.TimeoutError:
+                pass
+
+    def snapshot(self) -> dict:
+        self._refill()
+        waiting = Counter(p for p, _, f in self._waiters if not f.done())
+        return {
+            "rate": self.rate,
+            "tokens": round(self.tokens, 2),
+            "waiting": {PRIORITY_NAMES[p]: waiting.get(p, 0) for p in PRIORITY_NAMES},
+            "deferred": {PRIORITY_NAMES[p]: self.deferred.get(p, 0) for p in PRIORITY_NAMES},
+        }
@@ -6,10 +6,11 @@ from typing import Optional
 from app.models import Downloader
 from app.services.downloader import create_downloader
 from app.services.downloader.base import BaseDownloader
+from app.services.downloader.pool import session_pool
 
 
 @asynccontextmanager
-async def downloader_client(downloader: Downloader):
+async def downloader_client(downloader: Downloader, pooled: bool = True):
     """
     Async context manager for safe downloader connections.
 
@@ -18,9 +19,16 @@ async def downloader_client(downloader: Downloader):
             if client:
                 stats = await client.get_stats()
 
-    Always disconnects even if an exception occurs.
+    By default the client is leased from the process-wide session pool and
+    stays logged in after the block exits. Pass pooled=False (or use a
+    downloader without an id) for a one-off connection that is always
+    disconnected, even if an exception occurs.
     Yields None if connection fails.
     """
+    if pooled and getattr(downloader, "id", None) is not None:
+        yield await session_pool.acquire(downloader)
+        return
+
     client: Optional[BaseDownloader] = None
     connected = False
     try:
@@ -1,13 +1,22 @@
 import asyncio
 import base64
+import functools
 import random
-from typing import List, Optional
-from datetime import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
 import httpx
 import json
+from deluge_client import DelugeRPCClient
+from deluge_client.client import DelugeClientException, RemoteException
 
 from .base import BaseDownloader, TorrentInfo, DownloaderStats
+from .budget import RequestDeferred
+from .singleflight import coalesced
+from .table import TorrentTable, torrent_info_from_values
 from app.utils import get_logger
+from app.utils.bencode import parse_torrent
+from app.utils.fast_json import decode_response
 
 logger = get_logger('pt_manager.downloader.deluge')
 
@@ -17,29 +26,185 @@ RETRY_BASE_DELAY = 0.5
 RETRY_MAX_DELAY = 10.0
 RETRY_EXPONENTIAL_BASE = 2
 
+# 只读方法前缀（其余方法视为写操作，完成后清空合并的读结果）
+READ_METHOD_PREFIXES = ("core.get_", "auth.", "web.", "daemon.")
+# 建立/维护会话的方法，不占用请求预算
+SESSION_METHOD_PREFIXES = ("auth.", "web.connect", "web.get_hosts")
+
+# 守护进程 RPC 单次调用超时（秒）
+DAEMON_TIMEOUT = 30
+# RPC 出错的标记，与成功但返回 null 的结果区分
+RPC_FAILED = object()
+
+# core.get_torrents_status 请求字段
+TORRENT_FIELDS = [
+    "name", "state", "total_size", "progress", "total_uploaded",
+    "total_done", "ratio", "upload_payload_rate", "download_payload_rate",
+    "total_seeds", "total_peers", "num_seeds", "num_peers",
+    "tracker_host", "tracker", "label", "save_path", "time_added",
+    "seeding_time", "trackers"
+]
+
+# TorrentInfo 字段 -> Deluge 字段（hash 为返回 dict 的 key）
+FIELD_MAP = {
+    "name": ("name",),
+    "size": ("total_size",),
+    "progress": ("progress",),
+    "status": ("state",),
+    "uploaded": ("total_uploaded",),
+    "downloaded": ("total_done",),
+    "ratio": ("ratio",),
+    "upload_speed": ("upload_payload_rate",),
+    "download_speed": ("download_payload_rate",),
+    "seeders": ("total_seeds",),
+    "leechers": ("total_peers",),
+    "seeds_connected": ("num_seeds",),
+    "peers_connected": ("num_peers",),
+    "tracker": ("tracker_host", "tracker"),
+    "tags": ("label",),
+    "category": ("label",),
+    "save_path": ("save_path",),
+    "added_time": ("time_added",),
+    "seeding_time": ("seeding_time",),
+    "next_announce_time": ("trackers",),
+    "announce_interval": ("trackers",),
+    "total_size": ("total_size",),
+    "selected_size": ("total_size",),
+    "completed": ("total_done",),
+    "state": ("state",),
+    "tracker_status": ("trackers",),
+}
+
+# 统一状态 -> Deluge state 过滤值
+DELUGE_STATES = {
+    "downloading": "Downloading",
+    "seeding": "Seeding",
+    "paused": "Paused",
+    "checking": "Checking",
+    "queued": "Queued",
+    "error": "Error",
+}
+
+# get_filter_tree 中不需要的分类（只取 state 计数）
+FILTER_TREE_HIDDEN = ("tracker_host", "label", "owner")
+
+
+class DelugeDaemonTransport:
+    """Deluge 守护进程 RPC（rencode over TLS，默认端口 58846）
+
+    deluge-client 是阻塞实现且不是线程安全的，所有调用都放到该连接独占的
+    单线程 executor 中串行执行，不阻塞事件循环。
+    """
+
+    def __init__(self, host: str, port: int, username: str, password: str, timeout: float = DAEMON_TIMEOUT):
+        self._client = DelugeRPCClient(
+            host, port, username, password,
+            decode_utf8=True,
+            automatic_reconnect=True,
+            timeout=timeout,
+        )
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"deluge-rpc-{host}:{port}")
+
+    @property
+    def connected(self) -> bool:
+        return self._client.connected
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args))
+
+    async def connect(self):
+        await self._run(self._client.connect)
+
+    async def call(self, method: str, *args):
+        return await self._run(self._client.call, method, *args)
+
+    async def close(self):
+        try:
+            await self._run(self._client.disconnect)
+        finally:
+            self._executor.shutdown(wait=False)
+
 
 class DelugeClient(BaseDownloader):
-    """Deluge WebUI JSON-RPC API client"""
+    """Deluge client: WebUI JSON-RPC, or daemon RPC when daemon_port is set"""
 
-    def __init__(self, host: str, port: int, username: str = "", password: str = "", use_ssl: bool = False):
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str = "",
+        password: str = "",
+        use_ssl: bool = False,
+        daemon_port: int = 0,
+    ):
         super().__init__(host, port, username, password, use_ssl)
+        self.daemon_port = daemon_port or 0
         self._session: Optional[httpx.AsyncClient] = None
+        self._daemon: Optional[DelugeDaemonTransport] = None
         self._request_id = 0
+        self._auth_lock = asyncio.Lock()
+        self._auth_epoch = 0
+        # 守护进程模式下由 get_torrents_status(diff=True) 维护的种子表：id -> 原始字段
+        self._table: Dict[str, dict] = {}
+        self._table_lock = asyncio.Lock()
+        self._table_synced = False
+
+    @property
+    def is_connected(self) -> bool:
+        if self.daemon_port:
+            return self._daemon is not None and self._daemon.connected
+        return self._session is not None
+
+    def reset_table(self):
+        """丢弃本地种子表，下一次查询重新全量获取"""
+        self._table.clear()
+        self._table_synced = False
+
+    async def sync_torrents(self) -> Optional[Dict[str, dict]]:
+        """刷新守护进程模式下的本地种子表
+
+        diff=True 时守护进程按会话记录上次返回的值，只返回变化的字段（未变化的种子为空 dict），
+        未出现在结果中的种子即已删除。表为空时先做一次不带 diff 的全量获取，
+        不会改变服务端基准，之后的 diff 结果依然正确。
+        """
+        async with self._table_lock:
+            diff = self._table_synced
+            params = [{}, TORRENT_FIELDS, True] if diff else [{}, TORRENT_FIELDS]
+            result = await self._rpc_call("core.get_torrents_status", params, bulk=not diff)
+            if result is None:
+                return None
+
+            table: Dict[str, dict] = {}
+            for torrent_id, changed in result.items():
+                row = self._table.get(torrent_id) if diff else None
+                if row is None:
+                    row = {}
+                row.update(changed)
+                table[torrent_id] = row
+            self._table = table
+            self._table_synced = True
+            return table
 
     async def connect(self) -> bool:
+        if self.daemon_port:
+            return await self._connect_daemon()
         try:
-            self._session = httpx.AsyncClient(
-                base_url=self.base_url,
-                timeout=httpx.Timeout(30.0, connect=10.0),
-                verify=False,
-                limits=httpx.Limits(max_keepalive_connections=5, max_connections=10)
-            )
+            # 复用已有的 keep-alive 会话，仅重新登录
+            if self._session is None:
+                self._session = httpx.AsyncClient(
+                    base_url=self.base_url,
+                    timeout=httpx.Timeout(30.0, connect=10.0),
+                    verify=False,
+                    limits=httpx.Limits(max_keepalive_connections=5, max_connections=10)
+                )
 
             # Login to Deluge WebUI
             result = await self._rpc_call("auth.login", [self.password])
             if not result:
                 await self.disconnect()
                 return False
+            self._auth_epoch += 1
 
             # Connect to daemon (if using web UI)
             # First check if already connected
@@ -57,21 +222,139 @@ class DelugeClient(BaseDownloader):
             await self.disconnect()
             return False
 
+    async def _connect_daemon(self) -> bool:
+        try:
+            if self._daemon is not None:
+                await self._daemon.close()
+            self._daemon = DelugeDaemonTransport(self.host, self.daemon_port, self.username, self.password)
+            await self._daemon.connect()
+            # 新连接的 diff 基准为空，本地表也一并重建
+            self.reset_table()
+            self._auth_epoch += 1
+            return True
+        except Exception as e:
+            logger.error(f"Deluge daemon connection error: {e}")
+            await self.disconnect()
+            return False
+
     async def disconnect(self):
+        if self._daemon:
+            try:
+                await self._daemon.close()
+            except Exception:
+                pass
+            self._daemon = None
         if self._session:
             try:
                 await self._rpc_call("auth.delete_session")
             except Exception:
                 pass
-            await self._session.aclose()
+            try:
+                await self._session.aclose()
+            except Exception:
+                pass
             self._session = None
 
-    async def _rpc_call(self, method: str, params: list = None, retries: int = MAX_RETRIES) -> Optional[any]:
+    async def _reauthenticate(self, stale_epoch: int) -> bool:
+        """Web 会话过期时重新登录；并发请求只触发一次"""
+        async with self._auth_lock:
+            if self.is_connected and self._auth_epoch != stale_epoch:
+                return True
+            logger.warning("Deluge session expired, reconnecting...")
+            return await self.connect()
+
+    async def _daemon_call(self, method: str, params: list = None, retries: int = MAX_RETRIES) -> Any:
+        """守护进程 RPC 调用，方法名与 Web UI 的 core.* 一致；出错返回 RPC_FAILED"""
+        if not self.is_connected:
+            if not await self._reauthenticate(self._auth_epoch):
+                return RPC_FAILED
+
+        # 熔断冷却期内直接跳过
+        if not self.health.allow_request():
+            return RPC_FAILED
+
+        last_error = None
+        for attempt in range(retries):
+            if attempt and not self.health.available:
+                break
+            epoch = self._auth_epoch
+            try:
+                started = time.monotonic()
+                result = await self._daemon.call(method, *(params or []))
+                self.health.record_success(time.monotonic() - started)
+                return result
+            except RemoteException as e:
+                # 守护进程正常响应了错误，不计入健康统计
+                self.health.record_success(time.monotonic() - started)
+                logger.error(f"Deluge daemon RPC error ({method}): {e}")
+                return RPC_FAILED
+            except (DelugeClientException, OSError) as e:
+                # deluge-client 已自动重连过一次，这里重建连接后再试
+                last_error = e
+                self.health.record_failure(str(e) or type(e).__name__)
+                logger.warning(f"Deluge daemon RPC error (attempt {attempt + 1}/{retries}): {e}")
+                if attempt < retries - 1:
+                    delay = min(
+                        RETRY_BASE_DELAY * (RETRY_EXPONENTIAL_BASE ** attempt) + random.uniform(0, 0.5),
+                        RETRY_MAX_DELAY
+                    )
+                    await asyncio.sleep(delay)
+                    if not await self._reauthenticate(epoch):
+                        break
+            except Exception as e:
+                logger.error(f"Deluge daemon RPC error: {e}")
+                return RPC_FAILED
+
+        if last_error:
+            logger.error(f"Deluge daemon RPC failed after {retries} retries: {last_error}")
+        return RPC_FAILED
+
+    async def _rpc_call(
+        self, method: str, params: list = None, retries: int = MAX_RETRIES, bulk: bool = False
+    ) -> Optional[any]:
+        """RPC 调用，出错返回 None（成功但结果为 null 的写方法请用 _rpc_ok 判断）"""
+        result = await self._rpc_result(method, params, retries, bulk)
+        return None if result is RPC_FAILED else result
+
+    async def _rpc_ok(self, method: str, params: list = None) -> bool:
+        """写方法调用是否成功；set_torrent_options/force_reannounce/pause_torrent 等成功时返回 null"""
+        return await self._rpc_result(method, params) is not RPC_FAILED
+
+    async def _rpc_result(
+        self, method: str, params: list = None, retries: int = MAX_RETRIES, bulk: bool = False
+    ) -> Any:
+        """先按优先级取令牌（登录/连接步骤除外，READ 排队超时抛出 RequestDeferred），
+        写方法完成后丢弃合并的读结果。bulk=True 用于全量列表/添加种子，Web UI 超时不低于默认值
+        （守护进程连接使用固定的 DAEMON_TIMEOUT）。出错返回 RPC_FAILED"""
+        if not method.startswith(SESSION_METHOD_PREFIXES) and not await self.budget.acquire():
+            raise RequestDeferred(f"Deluge {self.host}: {method} deferred")
+        try:
+            if self.daemon_port:
+                return await self._daemon_call(method, params, retries)
+            return await self._web_call(method, params, retries, bulk)
+        finally:
+            if not method.startswith(READ_METHOD_PREFIXES):
+                self._flights.invalidate()
+
+    async def _web_call(
+        self, method: str, params: list = None, retries: int = MAX_RETRIES, bulk: bool = False
+    ) -> Any:
+        """Web UI JSON-RPC 调用；出错返回 RPC_FAILED"""
+
+        # auth.*/web.* 属于建立连接的步骤，不触发自动重登录
+        can_relogin = not method.startswith(("auth.", "web."))
         if not self._session:
-            return None
+            if not can_relogin or not await self._reauthenticate(self._auth_epoch):
+                return RPC_FAILED
+
+        if not self.health.allow_request():
+            return RPC_FAILED
 
         last_error = None
         for attempt in range(retries):
+            if attempt and not self.health.available:
+                break
+            epoch = self._auth_epoch
             try:
                 self._request_id += 1
                 payload = {
@@ -80,20 +363,35 @@ class DelugeClient(BaseDownloader):
                     "params": params or []
                 }
 
+                started = time.monotonic()
                 response = await self._session.post(
                     "/json",
                     json=payload,
-                    headers={"Content-Type": "application/json"}
+                    headers={"Content-Type": "application/json"},
+                    timeout=self.request_timeout(bulk),
                 )
+                if response.status_code >= 500:
+                    self.health.record_failure(f"HTTP {response.status_code}")
+                else:
+                    self.health.record_success(time.monotonic() - started)
 
+                expired = response.status_code in (401, 403)
                 if response.status_code == 200:
-                    data = response.json()
-                    if data.get("error") is None:
+                    data = await decode_response(response)
+                    error = data.get("error")
+                    if error is None:
                         return data.get("result")
+                    # code 1: Not authenticated
+                    expired = isinstance(error, dict) and error.get("code") == 1
 
-                return None
-            except (httpx.RemoteProtocolError, httpx.ConnectError, httpx.ReadTimeout) as e:
+                if expired and can_relogin and attempt < retries - 1:
+                    if await self._reauthenticate(epoch):
+                        continue
+
+                return RPC_FAILED
+            except (httpx.RemoteProtocolError, httpx.ConnectError, httpx.TimeoutException) as e:
                 last_error = e
+                self.health.record_failure(str(e) or type(e).__name__)
                 logger.warning(f"Deluge RPC error (attempt {attempt + 1}/{retries}): {e}")
                 if attempt < retries - 1:
                     delay = min(
@@ -103,14 +401,18 @@ class DelugeClient(BaseDownloader):
                     await asyncio.sleep(delay)
             except Exception as e:
                 logger.error(f"Deluge RPC error: {e}")
-                return None
+                return RPC_FAILED
 
         if last_error:
             logger.error(f"Deluge RPC failed after {retries} retries: {last_error}")
-        return None
+        return RPC_FAILED
 
     def _parse_torrent(self, torrent_id: str, data: dict) -> TorrentInfo:
         """Parse Deluge torrent data to TorrentInfo"""
+        return torrent_info_from_values(self._torrent_values(torrent_id, data))
+
+    def _torrent_values(self, torrent_id: str, data: dict) -> Dict[str, Any]:
+        """Extract TorrentInfo field values (times as unix timestamps)"""
         state = data.get("state", "").lower()
         status_map = {
             "downloading": "downloading",
@@ -126,7 +428,7 @@ class DelugeClient(BaseDownloader):
 
         # Parse added time
         time_added = data.get("time_added", 0)
-        added_time = datetime.fromtimestamp(time_added) if time_added else None
+        added_time = time_added or None
 
         # Get tracker from tracker_host
         tracker = data.get("tracker_host", "") or data.get("tracker", "")
@@ -144,7 +446,7 @@ class DelugeClient(BaseDownloader):
                 break
 
         total_size = data.get("total_size", 0)
-        return TorrentInfo(
+        return dict(
             hash=torrent_id,
             name=data.get("name", ""),
             size=data.get("total_size", 0),
@@ -205,36 +507,96 @@ class DelugeClient(BaseDownloader):
             return None
         return min(intervals)
 
-    async def get_torrents(self) -> List[TorrentInfo]:
-        fields = [
-            "name", "state", "total_size", "progress", "total_uploaded",
-            "total_done", "ratio", "upload_payload_rate", "download_payload_rate",
-            "total_seeds", "total_peers", "num_seeds", "num_peers",
-            "tracker_host", "tracker", "label", "save_path", "time_added",
-            "seeding_time", "trackers"
-        ]
+    @coalesced
+    async def get_torrents(
+        self,
+        with_reannounce: bool = True,
+        fields: Optional[List[str]] = None,
+        status_filter=None,
+        hashes: Optional[List[str]] = None,
+        category: Optional[str] = None,
+        tag: Optional[str] = None,
+    ) -> List[TorrentInfo]:
+        """获取种子，过滤条件映射为 core.get_torrents_status 的 filter dict 和 key 列表"""
+        if hashes is not None and not hashes:
+            return []
 
-        result = await self._rpc_call("core.get_torrents_status", [{}, fields])
+        # 守护进程模式下完整查询走 diff 增量表，过滤在本地完成
+        if self.daemon_port and fields is None and hashes is None:
+            table = await self.sync_torrents()
+            if table is not None:
+                torrents = [self._parse_torrent(tid, tdata) for tid, tdata in table.items()]
+                return self.filter_torrents(torrents, status_filter, None, category, tag)
+
+        filter_dict = {}
+        if hashes is not None:
+            filter_dict["id"] = list(hashes)
+        statuses = self.expand_status_filter(status_filter)
+        if statuses and len(statuses) == 1:
+            state = DELUGE_STATES.get(next(iter(statuses)))
+            if state:
+                filter_dict["state"] = state
+        # Deluge 只有 label，category/tag 都对应 label
+        label = category if category is not None else tag
+        if label is not None:
+            filter_dict["label"] = label
+
+        keys = self.native_fields(
+            self.query_fields(fields, status_filter, category, tag), FIELD_MAP, TORRENT_FIELDS
+        )
+        result = await self._rpc_call("core.get_torrents_status", [filter_dict, keys], bulk=hashes is None)
         if not result:
             return []
 
-        return [self._parse_torrent(tid, tdata) for tid, tdata in result.items()]
+        torrents = [self._parse_torrent(tid, tdata) for tid, tdata in result.items()]
+        return self.filter_torrents(torrents, status_filter, None, category, tag)
+
+    @coalesced
+    async def get_torrent_table(
+        self,
+        with_reannounce: bool = False,
+        fields: Optional[List[str]] = None,
+        status_filter=None,
+        hashes: Optional[List[str]] = None,
+        category: Optional[str] = None,
+        tag: Optional[str] = None,
+    ) -> TorrentTable:
+        """直接由 core.get_torrents_status 的结果构建列式表"""
+        if hashes is not None and not hashes:
+            return TorrentTable.empty()
+
+        if self.daemon_port and fields is None and hashes is None:
+            result = await self.sync_torrents()
+        else:
+            filter_dict = {"id": list(hashes)} if hashes is not None else {}
+            keys = self.native_fields(
+                self.query_fields(fields, status_filter, category, tag), FIELD_MAP, TORRENT_FIELDS
+            )
+            result = await self._rpc_call(
+                "core.get_torrents_status", [filter_dict, keys], bulk=hashes is None
+            )
+        if not result:
+            return TorrentTable.empty()
+
+        table = TorrentTable.from_rows(
+            list(result.items()), lambda item: self._torrent_values(*item)
+        )
+        return self.filter_table(table, status_filter, hashes, category, tag)
 
     async def get_torrent(self, torrent_hash: str) -> Optional[TorrentInfo]:
-        fields = [
-            "name", "state", "total_size", "progress", "total_uploaded",
-            "total_done", "ratio", "upload_payload_rate", "download_payload_rate",
-            "total_seeds", "total_peers", "num_seeds", "num_peers",
-            "tracker_host", "tracker", "label", "save_path", "time_added",
-            "seeding_time", "trackers"
-        ]
-
-        result = await self._rpc_call("core.get_torrent_status", [torrent_hash, fields])
+        result = await self._rpc_call("core.get_torrent_status", [torrent_hash, TORRENT_FIELDS])
         if not result:
             return None
 
         return self._parse_torrent(torrent_hash, result)
 
+    async def _torrent_exists(self, torrent_hash: str) -> bool:
+        """守护进程模式查本地种子表；Web UI 模式没有本地表，按哈希查询一次"""
+        if self.daemon_port and torrent_hash in self._table:
+            return True
+        result = await self._rpc_call("core.get_torrent_status", [torrent_hash, ["name"]])
+        return bool(result)
+
     async def add_torrent(
         self,
         torrent: bytes | str,
@@ -261,8 +623,15 @@ class DelugeClient(BaseDownloader):
             torrent_b64 = base64.b64encode(torrent).decode()
             result = await self._rpc_call(
                 "core.add_torrent_file",
-                ["torrent.torrent", torrent_b64, options]
+                ["torrent.torrent", torrent_b64, options],
+                bulk=True,
             )
+            if not result:
+                # 重复添加时 Deluge 返回错误，已有该哈希则视为已存在
+                meta = parse_torrent(torrent)
+                if meta and await self._torrent_exists(meta.info_hash):
+                    logger.info(f"Torrent {meta.info_hash} already exists")
+                    return meta.info_hash
         else:
             # Add from URL/magnet
             result = await self._rpc_call(
@@ -284,39 +653,92 @@ class DelugeClient(BaseDownloader):
         return result is True
 
     async def pause_torrent(self, torrent_hash: str) -> bool:
-        result = await self._rpc_call("core.pause_torrent", [[torrent_hash]])
-        return result is not None
+        return await self._rpc_ok("core.pause_torrent", [[torrent_hash]])
 
     async def resume_torrent(self, torrent_hash: str) -> bool:
-        result = await self._rpc_call("core.resume_torrent", [[torrent_hash]])
-        return result is not None
+        return await self._rpc_ok("core.resume_torrent", [[torrent_hash]])
 
     async def reannounce_torrent(self, torrent_hash: str) -> bool:
-        result = await self._rpc_call("core.force_reannounce", [[torrent_hash]])
-        return result is not None
+        return await self._rpc_ok("core.force_reannounce", [[torrent_hash]])
 
     async def set_torrent_upload_limit(self, torrent_hash: str, limit: int) -> bool:
         # Deluge uses KB/s, -1 for unlimited
         limit_kbps = limit / 1024 if limit > 0 else -1
-        result = await self._rpc_call(
+        return await self._rpc_ok(
             "core.set_torrent_options",
             [[torrent_hash], {"max_upload_speed": limit_kbps}]
         )
-        return result is not None
 
     async def set_torrent_download_limit(self, torrent_hash: str, limit: int) -> bool:
         limit_kbps = limit / 1024 if limit > 0 else -1
-        result = await self._rpc_call(
+        return await self._rpc_ok(
             "core.set_torrent_options",
             [[torrent_hash], {"max_download_speed": limit_kbps}]
         )
-        return result is not None
 
+    # ===== 批量操作：torrent_ids 使用列表参数 =====
+
+    async def remove_torrents(self, torrent_hashes: List[str], delete_files: bool = False) -> bool:
+        ok = True
+        for chunk in self.chunk_hashes(torrent_hashes):
+            # core.remove_torrents 仅 Deluge 2.x 提供，返回失败列表
+            errors = await self._rpc_call("core.remove_torrents", [chunk, delete_files])
+            if errors is None:
+                ok = await super().remove_torrents(chunk, delete_files) and ok
+            elif errors:
+                logger.warning(f"Deluge failed to remove {len(errors)} torrent(s)")
+                ok = False
+        return ok
+
+    async def _rpc_ids(self, method: str, torrent_hashes: List[str], *args) -> bool:
+        """对一批种子调用同一 RPC 方法，按 BATCH_CHUNK_SIZE 分块"""
+        ok = True
+        for chunk in self.chunk_hashes(torrent_hashes):
+            ok = await self._rpc_ok(method, [chunk, *args]) and ok
+        return ok
+
+    async def pause_torrents(self, torrent_hashes: List[str]) -> bool:
+        return await self._rpc_ids("core.pause_torrent", torrent_hashes)
+
+    async def resume_torrents(self, torrent_hashes: List[str]) -> bool:
+        return await self._rpc_ids("core.resume_torrent", torrent_hashes)
+
+    async def reannounce_torrents(self, torrent_hashes: List[str]) -> bool:
+        return await self._rpc_ids("core.force_reannounce", torrent_hashes)
+
+    async def set_torrents_upload_limit(self, limits: Dict[str, int]) -> bool:
+        ok = True
+        for limit, torrent_hashes in self.group_by_limit(limits).items():
+            limit_kbps = limit / 1024 if limit > 0 else -1
+            ok = await self._rpc_ids(
+                "core.set_torrent_options", torrent_hashes, {"max_upload_speed": limit_kbps}
+            ) and ok
+        return ok
+
+    async def set_torrents_download_limit(self, limits: Dict[str, int]) -> bool:
+        ok = True
+        for limit, torrent_hashes in self.group_by_limit(limits).items():
+            limit_kbps = limit / 1024 if limit > 0 else -1
+            ok = await self._rpc_ids(
+                "core.set_torrent_options", torrent_hashes, {"max_download_speed": limit_kbps}
+            ) and ok
+        return ok
+
+    @coalesced
     async def get_stats(self) -> DownloaderStats:
+        """按状态的种子数取自 core.get_filter_tree（服务端计数），不拉取种子列表"""
         session = await self._rpc_call("core.get_session_status", [[
             "upload_rate", "download_rate", "total_upload", "total_download"
         ]])
-        torrents = await self.get_torrents()
+        counts = await self._state_counts()
+        if counts is None:
+            torrents = await self.get_torrents(fields=["status"])
+            counts = {"All": len(torrents)}
+            for torrent in torrents:
+                state = DELUGE_STATES.get(torrent.status)
+                if state:
+                    counts[state] = counts.get(state, 0) + 1
+        total = counts.get("All", 0)
 
         if not session:
             return DownloaderStats(
@@ -325,14 +747,14 @@ class DelugeClient(BaseDownloader):
                 total_uploaded=0,
                 total_downloaded=0,
                 free_space=0,
-                total_torrents=len(torrents),
+                total_torrents=total,
                 active_torrents=0,
                 downloading_torrents=0,
                 seeding_torrents=0,
             )
 
-        downloading = sum(1 for t in torrents if t.status == "downloading")
-        seeding = sum(1 for t in torrents if t.status == "seeding")
+        downloading = counts.get("Downloading", 0)
+        seeding = counts.get("Seeding", 0)
         active = downloading + seeding
 
         return DownloaderStats(
@@ -341,38 +763,45 @@ class DelugeClient(BaseDownloader):
             total_uploaded=session.get("total_upload", 0),
             total_downloaded=session.get("total_download", 0),
             free_space=await self.get_free_space(),
-            total_torrents=len(torrents),
+            total_torrents=total,
             active_torrents=active,
             downloading_torrents=downloading,
             seeding_torrents=seeding,
         )
 
+    async def _state_counts(self) -> Optional[Dict[str, int]]:
+        """Deluge state -> 种子数（含 "All"），失败返回 None"""
+        tree = await self._rpc_call("core.get_filter_tree", [True, list(FILTER_TREE_HIDDEN)])
+        if not isinstance(tree, dict) or "state" not in tree:
+            return None
+        try:
+            return {str(state): int(count) for state, count in tree["state"]}
+        except (TypeError, ValueError):
+            return None
+
+    @coalesced
     async def get_free_space(self, path: Optional[str] = None) -> int:
         result = await self._rpc_call("core.get_free_space", [path] if path else [])
         return result or 0
 
     async def set_global_upload_limit(self, limit: int) -> bool:
         limit_kbps = limit / 1024 if limit > 0 else -1
-        result = await self._rpc_call(
+        return await self._rpc_ok(
             "core.set_config",
             [{"max_upload_speed": limit_kbps}]
         )
-        return result is not None
 
     async def set_global_download_limit(self, limit: int) -> bool:
         limit_kbps = limit / 1024 if limit > 0 else -1
-        result = await self._rpc_call(
+        return await self._rpc_ok(
             "core.set_config",
             [{"max_download_speed": limit_kbps}]
         )
-        return result is not None
 
     async def pause_all_torrents(self) -> bool:
         """Pause all torrents using Deluge RPC"""
-        result = await self._rpc_call("core.pause_session")
-        return result is not None
+        return await self._rpc_ok("core.pause_session")
 
     async def resume_all_torrents(self) -> bool:
         """Resume all torrents using Deluge RPC"""
-        result = await self._rpc_call("core.resume_session")
-        return result is not None
+        return await self._rpc_ok("core.resume_session")
@@ -0,0 +1,251 @@
+"""Torrent change events derived from successive snapshots
+
+实时推送原先每 5 秒对整张种子列表逐个拼接签名比对，自动汇报每 60 秒扫描全部种子
+找 5 分钟前添加的种子。现在由快照仓库（snapshots.py）在发布新版本时与上一版本做
+一次向量化比对，生成类型化事件并发布到进程内事件总线，订阅方各取所需：
+
+- added / removed：新增、删除
+- changed：状态、进度、速度或分享率有变化（实时推送用）
+- state_changed：统一状态变化（如 downloading -> seeding）
+- completed：进度到达 100%
+- tracker_error：tracker 返回错误
+- speed_threshold：上传速度跨越 TORRENT_SPEED_THRESHOLD
+
+每次比对的事件作为一批投递；订阅队列有上限，消费过慢时丢弃最旧的批次。
+下载器的第一份快照只作为基线，不产生 added 事件。
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+from app.config import settings
+from app.services.downloader.table import TorrentTable
+from app.utils import get_logger
+
+logger = get_logger('pt_manager.downloader.events')
+
+EVENT_ADDED = "added"
+EVENT_REMOVED = "removed"
+EVENT_CHANGED = "changed"
+EVENT_STATE_CHANGED = "state_changed"
+EVENT_COMPLETED = "completed"
+EVENT_TRACKER_ERROR = "tracker_error"
+EVENT_SPEED_THRESHOLD = "speed_threshold"
+
+EVENT_TYPES = (
+    EVENT_ADDED, EVENT_REMOVED, EVENT_CHANGED, EVENT_STATE_CHANGED,
+    EVENT_COMPLETED, EVENT_TRACKER_ERROR, EVENT_SPEED_THRESHOLD,
+)
+
+# 事件附带的种子字段（与原实时推送一致）
+EVENT_FIELDS = (
+    "name", "status", "progress", "ratio", "upload_speed",
+    "download_speed", "seeding_time", "size",
+)
+
+# 视为正常的 tracker 消息（小写），纯数字为 Transmission 的 peer 数
+TRACKER_OK_MESSAGES = {"", "success", "ok", "announce ok", "announce ok.", "working"}
+
+# 订阅队列默认容量（批次数）
+DEFAULT_QUEUE_SIZE = 256
+
+
+@dataclass
+class TorrentEvent:
+    type: str
+    downloader_id: int
+    hash: str
+    data: Dict[str, Any] = field(default_factory=dict)
+    at: float = field(default_factory=time.time)
+
+    @property
+    def name(self) -> str:
+        return self.data.get("name", "")
+
+
+def is_tracker_error(message: Any) -> bool:
+    if not isinstance(message, str):
+        return False
+    text = message.strip()
+    return not (text.isdigit() or text.lower() in TRACKER_OK_MESSAGES)
+
+
+def _pooled(table: TorrentTable, name: str) -> np.ndarray:
+    """驻留列解码为对象数组（不同表的编码不可直接比较）"""
+    values = np.empty(len(table.pools[name].values), dtype=object)
+    values[:] = table.pools[name].values
+    return values[table.column(name)]
+
+
+def _tracker_errors(table: TorrentTable) -> np.ndarray:
+    """每行 tracker 是否报错（按驻留值判断一次再展开）"""
+    values = table.pools["tracker_status"].values
+    flags = np.fromiter((is_tracker_error(v) for v in values), dtype=bool, count=len(values))
+    return flags[table.column("tracker_status")]
+
+
+def _row_data(table: TorrentTable, row: int) -> Dict[str, Any]:
+    return {name: table.value(row, name) for name in EVENT_FIELDS}
+
+
+def diff_tables(
+    downloader_id: int,
+    previous: TorrentTable,
+    current: TorrentTable,
+    speed_threshold: Optional[int] = None,
+) -> List[TorrentEvent]:
+    """比较同一下载器的两份种子表，返回事件列表"""
+    if speed_threshold is None:
+        speed_threshold = settings.TORRENT_SPEED_THRESHOLD
+    now = time.time()
+    events: List[TorrentEvent] = []
+
+    def emit(event_type: str, table: TorrentTable, row: int, **extra):
+        data = _row_data(table, row)
+        data.update(extra)
+        events.append(TorrentEvent(event_type, downloader_id, table.hashes[row], data, now))
+
+    prev_index = previous.index
+    cur_index = current.index
+    for row, torrent_hash in enumerate(current.hashes):
+        if torrent_hash not in prev_index:
+            emit(EVENT_ADDED, current, row, added_time=current.value(row, "added_time"))
+    for row, torrent_hash in enumerate(previous.hashes):
+        if torrent_hash not in cur_index:
+            emit(EVENT_REMOVED, previous, row)
+
+    # 对齐两表共有的行（顺序未变时直接一一对应）
+    if previous.hashes == current.hashes:
+        cur_rows = prev_rows = np.arange(len(current))
+    else:
+        common = [(row, prev_index[h]) for row, h in enumerate(current.hashes) if h in prev_index]
+        if not common:
+            return events
+        cur_rows = np.fromiter((c for c, _ in common), dtype=np.int64, count=len(common))
+        prev_rows = np.fromiter((p for _, p in common), dtype=np.int64, count=len(common))
+    if not len(cur_rows):
+        return events
+
+    prev_status = _pooled(previous, "status")[prev_rows]
+    cur_status = _pooled(current, "status")[cur_rows]
+    status_changed = prev_status != cur_status
+
+    prev_progress = previous.column("progress")[prev_rows]
+    cur_progress = current.column("progress")[cur_rows]
+    completed = (prev_progress < 1.0) & (cur_progress >= 1.0)
+
+    prev_up = previous.column("upload_speed")[prev_rows]
+    cur_up = current.column("upload_speed")[cur_rows]
+    changed = (
+        status_changed
+        | (np.round(prev_progress, 4) != np.round(cur_progress, 4))
+        | (prev_up != cur_up)
+        | (previous.column("download_speed")[prev_rows] != current.column("download_speed")[cur_rows])
+        | (np.round(previous.column("ratio")[prev_rows], 3) != np.round(current.column("ratio")[cur_rows], 3))
+    )
+
+    tracker_error = _tracker_errors(current)[cur_rows] & ~_tracker_errors(previous)[prev_rows]
+
+    crossed = np.zeros(len(cur_rows), dtype=bool)
+    if speed_threshold > 0:
+        crossed = (prev_up >= speed_threshold) != (cur_up >= speed_threshold)
+
+    for i in np.flatnonzero(changed | tracker_error | crossed):
+        row = int(cur_rows[i])
+        if changed[i]:
+            emit(EVENT_CHANGED, current, row)
+        if status_changed[i]:
+            emit(EVENT_STATE_CHANGED, current, row, previous_status=prev_status[i])
+        if completed[i]:
+            emit(EVENT_COMPLETED, current, row)
+        if tracker_error[i]:
+            emit(EVENT_TRACKER_ERROR, current, row, tracker_status=current.value(row, "tracker_status"))
+        if crossed[i]:
+            emit(EVENT_SPEED_THRESHOLD, current, row, above=bool(cur_up[i] >= speed_threshold))
+    return events
+
+
+class EventSubscription:
+    """One subscriber's bounded queue of event batches"""
+
+    def __init__(self, bus: "TorrentEventBus", name: str, types: Optional[Iterable[str]], maxsize: int):
+        self.bus = bus
+        self.name = name
+        self.types: Optional[Set[str]] = set(types) if types is not None else None
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def _offer(self, events: List[TorrentEvent]):
+        if self.types is not None:
+            events = [e for e in events if e.type in self.types]
+        if not events:
+            return
+        if self.queue.full():
+            oldest = self.queue.get_nowait()
+            self.dropped += len(oldest)
+            logger.debug(f"事件订阅 {self.name} 消费过慢，丢弃 {len(oldest)} 个事件")
+        self.queue.put_nowait(events)
+
+    async def get(self) -> List[TorrentEvent]:
+        """等待下一批事件"""
+        return await self.queue.get()
+
+    def drain(self) -> List[TorrentEvent]:
+        """取出当前已到达的全部事件，不等待"""
+        events: List[TorrentEvent] = []
+        while not self.queue.empty():
+            events.extend(self.queue.get_nowait())
+        return events
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> List[TorrentEvent]:
+        return await self.get()
+
+
+class TorrentEventBus:
+    """In-process publish/subscribe for torrent events"""
+
+    def __init__(self):
+        self._subscriptions: List[EventSubscription] = []
+        self.published = 0
+
+    def subscribe(
+        self,
+        name: str,
+        types: Optional[Iterable[str]] = None,
+        maxsize: int = DEFAULT_QUEUE_SIZE,
+    ) -> EventSubscription:
+        """订阅指定类型的事件（None 表示全部）"""
+        subscription = EventSubscription(self, name, types, maxsize)
+        self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: EventSubscription):
+        if subscription in self._subscriptions:
+            self._subscriptions.remove(subscription)
+
+    def publish(self, events: List[TorrentEvent]):
+        """投递一批事件（不阻塞，由快照仓库在刷新后调用）"""
+        if not events:
+            return
+        self.published += len(events)
+        for subscription in list(self._subscriptions):
+            subscription._offer(events)
+
+    def snapshot(self) -> dict:
+        return {
+            "published": self.published,
+            "subscribers": {s.name: {"pending": s.queue.qsize(), "dropped": s.dropped} for s in self._subscriptions},
+        }
+
+
+event_bus = TorrentEventBus()
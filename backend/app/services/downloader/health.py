@@ -0,0 +1,186 @@
+"""Per-downloader health tracking and circuit breaker
+
+记录每个下载器的请求延迟（p50/p99）和错误率：
+- 请求超时由观测到的 p99 延迟推导，而不是固定 30 秒；全量列表、上传种子等
+  大请求至少使用 DEFAULT_TIMEOUT（样本多为廉价的增量轮询，p99 代表不了它们）
+- 连续失败或错误率过高时熔断（open），冷却期内调用方直接跳过该下载器
+- 冷却结束后放行一个探测请求（half-open），成功则恢复，失败则冷却时间翻倍
+
+一个下载器宕机时，顺序循环（限速、删种、选择下载器等）不会被它拖住。
+"""
+
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from app.utils import get_logger
+
+logger = get_logger('pt_manager.downloader.health')
+
+# 熔断器状态
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# 延迟样本窗口 / 成败记录窗口
+LATENCY_WINDOW = 200
+OUTCOME_WINDOW = 50
+# 样本数不足时使用默认超时
+MIN_SAMPLES = 20
+DEFAULT_TIMEOUT = 30.0
+# 自适应超时 = p99 * TIMEOUT_MULTIPLIER，限制在 [MIN_TIMEOUT, MAX_TIMEOUT]
+TIMEOUT_MULTIPLIER = 4.0
+MIN_TIMEOUT = 5.0
+MAX_TIMEOUT = 30.0
+# 连接阶段超时上限
+CONNECT_TIMEOUT = 10.0
+# 连续失败次数 / 错误率阈值
+FAILURE_THRESHOLD = 3
+ERROR_RATE_THRESHOLD = 0.5
+# 冷却时间（秒），探测失败后翻倍
+COOLDOWN_BASE = 15.0
+COOLDOWN_MAX = 300.0
+
+
+class DownloaderHealth:
+    """Latency / error statistics and circuit state of one downloader"""
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.cooldown = COOLDOWN_BASE
+        self.opened_at = 0.0
+        self.last_error = ""
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._outcomes: Deque[bool] = deque(maxlen=OUTCOME_WINDOW)
+        self._probe_started: Optional[float] = None
+
+    # ===== 熔断 =====
+
+    def retry_in(self, now: Optional[float] = None) -> float:
+        """距离冷却结束的秒数，未熔断为 0"""
+        if self.state != OPEN:
+            return 0.0
+        now = now or time.monotonic()
+        return max(0.0, self.opened_at + self.cooldown - now)
+
+    @property
+    def available(self) -> bool:
+        """是否值得尝试（熔断冷却期内为 False），不占用探测名额"""
+        return self.retry_in() <= 0
+
+    def allow_request(self, now: Optional[float] = None) -> bool:
+        """请求前调用；half-open 时只放行一个探测请求"""
+        if self.state == CLOSED:
+            return True
+        now = now or time.monotonic()
+        if self.state == OPEN:
+            if self.retry_in(now) > 0:
+                return False
+            self.state = HALF_OPEN
+            self._probe_started = None
+        # 探测请求卡住超过 MAX_TIMEOUT 时允许重新探测
+        if self._probe_started is not None and now - self._probe_started < MAX_TIMEOUT:
+            return False
+        self._probe_started = now
+        return True
+
+    def record_success(self, latency: float):
+        self._latencies.append(latency)
+        self._outcomes.append(True)
+        self.consecutive_failures = 0
+        if self.state != CLOSED:
+            logger.info(f"Downloader {self.name} recovered, closing circuit")
+            self.state = CLOSED
+            self.cooldown = COOLDOWN_BASE
+            self._probe_started = None
+
+    def record_failure(self, error: str = ""):
+        self._outcomes.append(False)
+        self.consecutive_failures += 1
+        self.last_error = error
+        if self.state == HALF_OPEN:
+            self._open(min(self.cooldown * 2, COOLDOWN_MAX))
+        elif self.state == CLOSED and (
+            self.consecutive_failures >= FAILURE_THRESHOLD
+            or (len(self._outcomes) >= MIN_SAMPLES and self.error_rate >= ERROR_RATE_THRESHOLD)
+        ):
+            self._open(COOLDOWN_BASE)
+
+    def _open(self, cooldown: float):
+        self.state = OPEN
+        self.cooldown = cooldown
+        self.opened_at = time.monotonic()
+        self._probe_started = None
+        logger.warning(
+            f"Downloader {self.name} circuit open for {cooldown:.0f}s "
+            f"({self.consecutive_failures} consecutive failures: {self.last_error})"
+        )
+
+    # ===== 统计 =====
+
+    @property
+    def error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def timeout(self, bulk: bool = False) -> float:
+        """由 p99 延迟推导的请求超时（秒），bulk 请求不低于 DEFAULT_TIMEOUT"""
+        if bulk or len(self._latencies) < MIN_SAMPLES:
+            return DEFAULT_TIMEOUT
+        p99 = self.percentile(99) or 0.0
+        return min(MAX_TIMEOUT, max(MIN_TIMEOUT, p99 * TIMEOUT_MULTIPLIER))
+
+    def snapshot(self) -> dict:
+        p50 = self.percentile(50)
+        p99 = self.percentile(99)
+        return {
+            "state": self.state,
+            "latency_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "latency_p99_ms": round(p99 * 1000, 1) if p99 is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "timeout": round(self.timeout(), 1),
+            "consecutive_failures": self.consecutive_failures,
+            "retry_in": round(self.retry_in(), 1),
+            "last_error": self.last_error,
+        }
+
+
+class HealthRegistry:
+    """按下载器 ID 共享的健康状态（客户端重建后依然保留）"""
+
+    def __init__(self):
+        self._entries: Dict[int, DownloaderHealth] = {}
+
+    def get(self, downloader_id: int, name: str = "") -> DownloaderHealth:
+        health = self._entries.get(downloader_id)
+        if health is None:
+            health = DownloaderHealth(name or str(downloader_id))
+            self._entries[downloader_id] = health
+        elif name:
+            health.name = name
+        return health
+
+    def is_available(self, downloader_id: int) -> bool:
+        health = self._entries.get(downloader_id)
+        return health is None or health.available
+
+    def snapshot(self, downloader_id: int) -> dict:
+        health = self._entries.get(downloader_id)
+        return (health or DownloaderHealth()).snapshot()
+
+    def remove(self, downloader_id: int):
+        self._entries.pop(downloader_id, None)
+
+
+# Global registry instance
+health_registry = HealthRegistry()
@@ -0,0 +1,101 @@
+"""qBittorrent /api/v2/sync/maindata 增量同步表
+
+维护每个下载器的种子表，通过 rid 游标只拉取变化部分：
+- torrents: 新增或变化的种子（仅包含变化字段）
+- torrents_removed: 已删除的种子 hash
+- server_state: 全局状态（同样只包含变化字段）
+- full_update=true 时整表替换
+
+同时按 qBittorrent state 维护种子计数，get_stats 不需要遍历种子表。
+"""
+
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Set
+
+
+class MaindataTable:
+    """In-memory torrent table fed by maindata rid deltas"""
+
+    def __init__(self):
+        self.rid: int = 0
+        self.torrents: Dict[str, dict] = {}
+        self.server_state: dict = {}
+        self.last_sync: float = 0.0
+        # qBittorrent state -> 种子数
+        self.state_counts: Counter = Counter()
+        # 自上次 consume_changes 以来变化/删除的 hash
+        self._changed: Set[str] = set()
+        self._removed: Set[str] = set()
+        self._full_update = False
+
+    def reset(self):
+        """丢弃游标，下一次同步会是全量"""
+        self.rid = 0
+        self.torrents.clear()
+        self.server_state = {}
+        self.last_sync = 0.0
+        self.state_counts.clear()
+        self._changed.clear()
+        self._removed.clear()
+        self._full_update = True
+
+    @property
+    def synced(self) -> bool:
+        return self.last_sync > 0
+
+    def age(self, now: Optional[float] = None) -> float:
+        if not self.last_sync:
+            return float("inf")
+        return (now or time.monotonic()) - self.last_sync
+
+    def apply(self, data: dict):
+        """应用一次 maindata 响应"""
+        if data.get("full_update"):
+            self.torrents = {}
+            self.server_state = {}
+            self.state_counts.clear()
+            self._changed.clear()
+            self._removed.clear()
+            self._full_update = True
+
+        for torrent_hash, fields in (data.get("torrents") or {}).items():
+            current = self.torrents.get(torrent_hash)
+            if current is None:
+                current = {"hash": torrent_hash}
+                self.torrents[torrent_hash] = current
+                current.update(fields)
+                self.state_counts[current.get("state")] += 1
+            else:
+                old_state = current.get("state")
+                current.update(fields)
+                if current.get("state") != old_state:
+                    self.state_counts[old_state] -= 1
+                    self.state_counts[current.get("state")] += 1
+            self._changed.add(torrent_hash)
+            self._removed.discard(torrent_hash)
+
+        for torrent_hash in data.get("torrents_removed") or []:
+            row = self.torrents.pop(torrent_hash, None)
+            if row is not None:
+                self.state_counts[row.get("state")] -= 1
+                self._removed.add(torrent_hash)
+            self._changed.discard(torrent_hash)
+
+        server_state = data.get("server_state")
+        if server_state:
+            self.server_state.update(server_state)
+
+        self.rid = data.get("rid", self.rid)
+        self.last_sync = time.monotonic()
+
+    def consume_changes(self) -> tuple[bool, Set[str], Set[str]]:
+        """返回并清空 (是否全量, 变化 hash, 删除 hash)"""
+        result = (self._full_update, self._changed, self._removed)
+        self._full_update = False
+        self._changed = set()
+        self._removed = set()
+        return result
+
+    def rows(self) -> List[dict]:
+        return list(self.torrents.values())
@@ -0,0 +1,125 @@
+"""Process-wide pool of persistent downloader sessions
+
+每个下载器（按 Downloader.id）只保持一个已登录、keep-alive 的客户端，
+避免每次调用都重复 login/logout 以及 TCP/TLS 握手。
+下载器配置变更（updated_at 或连接参数变化）时自动失效并重建。
+熔断中的下载器（见 health.py）直接返回 None，调用方按离线处理。
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from app.models import Downloader
+from app.services.downloader import create_downloader
+from app.services.downloader.base import BaseDownloader
+from app.services.downloader.health import DownloaderHealth, health_registry
+from app.utils import get_logger
+
+logger = get_logger('pt_manager.downloader.pool')
+
+
+@dataclass
+class _PooledSession:
+    fingerprint: Tuple
+    client: BaseDownloader
+
+
+class DownloaderSessionPool:
+    """按下载器 ID 缓存已认证的客户端"""
+
+    def __init__(self):
+        self._sessions: Dict[int, _PooledSession] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+
+    @staticmethod
+    def _fingerprint(downloader: Downloader) -> Tuple:
+        """配置指纹，任一字段变化都会触发重建"""
+        dl_type = getattr(downloader.type, "value", downloader.type)
+        return (
+            downloader.updated_at,
+            dl_type,
+            downloader.host,
+            downloader.port,
+            downloader.username or "",
+            downloader.password or "",
+            bool(downloader.use_ssl),
+            getattr(downloader, "rpc_port", 0) or 0,
+        )
+
+    def _get_lock(self, downloader_id: int) -> asyncio.Lock:
+        lock = self._locks.get(downloader_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[downloader_id] = lock
+        return lock
+
+    async def acquire(self, downloader: Downloader) -> Optional[BaseDownloader]:
+        """获取（必要时创建并登录）下载器的共享客户端，失败或熔断中返回 None"""
+        downloader_id = downloader.id
+        fingerprint = self._fingerprint(downloader)
+        health = health_registry.get(downloader_id, downloader.name)
+        if not health.available:
+            return None
+
+        async with self._get_lock(downloader_id):
+            entry = self._sessions.get(downloader_id)
+            if entry and entry.fingerprint == fingerprint:
+                if entry.client.is_connected:
+                    return entry.client
+                # 会话已断开，复用同一客户端重新登录
+                if await self._connect(entry.client, health):
+                    return entry.client
+                await self._discard(downloader_id)
+                return None
+
+            if entry:
+                logger.info(f"Downloader {downloader.name} config changed, rebuilding session")
+                await self._discard(downloader_id)
+
+            client = create_downloader(downloader)
+            if not await self._connect(client, health):
+                try:
+                    await client.disconnect()
+                except Exception:
+                    pass
+                return None
+
+            self._sessions[downloader_id] = _PooledSession(fingerprint=fingerprint, client=client)
+            return client
+
+    @staticmethod
+    async def _connect(client: BaseDownloader, health: DownloaderHealth) -> bool:
+        """登录并记录结果；熔断冷却期内不尝试"""
+        if not health.available:
+            return False
+        started = time.monotonic()
+        if await client.connect():
+            health.record_success(time.monotonic() - started)
+            return True
+        health.record_failure("connect failed")
+        return False
+
+    async def _discard(self, downloader_id: int):
+        entry = self._sessions.pop(downloader_id, None)
+        if entry:
+            try:
+                await entry.client.disconnect()
+            except Exception:
+                pass
+
+    async def invalidate(self, downloader_id: int):
+        """丢弃指定下载器的会话（配置更新/删除时调用）"""
+        async with self._get_lock(downloader_id):
+            await self._discard(downloader_id)
+
+    async def close_all(self):
+        """关闭所有会话（应用退出时调用）"""
+        for downloader_id in list(self._sessions.keys()):
+            await self._discard(downloader_id)
+        self._locks.clear()
+
+
+# Global pool instance
+session_pool = DownloaderSessionPool()
@@ -1,12 +1,20 @@
 import asyncio
-import hashlib
+import copy
 import random
-from typing import List, Optional
+import time
+from typing import Any, Dict, List, Optional, TypedDict
 from datetime import datetime
 import httpx
 
-from .base import BaseDownloader, TorrentInfo, DownloaderStats
+from .base import BaseDownloader, TorrentInfo, DownloaderStats, ANNOUNCE_FIELDS
+from .budget import PRIORITY_ACTION, RequestDeferred, current_priority, request_priority
+from .maindata import MaindataTable
+from .announce_cache import AnnounceInfoCache
+from .singleflight import coalesced
+from .table import TorrentTable, torrent_info_from_values
 from app.utils import get_logger
+from app.utils.bencode import parse_torrent
+from app.utils.fast_json import decode_response
 
 logger = get_logger('pt_manager.downloader.qbittorrent')
 
@@ -16,6 +24,73 @@ RETRY_BASE_DELAY = 0.5  # 基础延迟（秒）
 RETRY_MAX_DELAY = 10.0  # 最大延迟（秒）
 RETRY_EXPONENTIAL_BASE = 2  # 指数退避基数
 
+# maindata 在该时间内视为新鲜，不再重复同步（秒）
+MAINDATA_MAX_AGE = 1.0
+# 并发获取 properties/trackers 的上限
+ANNOUNCE_FETCH_CONCURRENCY = 8
+# 每次调用最多刷新的种子数（每个 2 次请求，默认令牌桶容量为 60）；冷缓存分多轮补齐，
+# 不会一次性占满令牌桶让删种/仪表盘等请求排队或被推迟
+ANNOUNCE_REFILL_PER_CALL = 20
+
+# qBittorrent state -> 统一状态
+QB_STATE_MAP = {
+    "downloading": "downloading",
+    "stalledDL": "downloading",
+    "metaDL": "downloading",
+    "forcedDL": "downloading",
+    "uploading": "seeding",
+    "stalledUP": "seeding",
+    "forcedUP": "seeding",
+    "pausedDL": "paused",
+    "pausedUP": "paused",
+    "queuedDL": "queued",
+    "queuedUP": "queued",
+    "checkingDL": "checking",
+    "checkingUP": "checking",
+    "checkingResumeData": "checking",
+    "error": "error",
+    "missingFiles": "error",
+    "moving": "checking",
+    "unknown": "error",
+}
+
+# 统一状态 -> torrents/info 的 filter 参数
+QB_STATUS_FILTERS = {
+    "downloading": "downloading",
+    "seeding": "seeding",
+    "paused": "paused",
+    "checking": "checking",
+    "error": "errored",
+}
+
+
+class QbTorrentRecord(TypedDict, total=False):
+    """torrents/info 中 _torrent_values 用到的字段，安装 msgspec 时只解码这些键"""
+    hash: str
+    name: str
+    state: str
+    size: int
+    total_size: int
+    completed: int
+    progress: float
+    uploaded: int
+    downloaded: int
+    ratio: float
+    upspeed: int
+    dlspeed: int
+    num_complete: int
+    num_incomplete: int
+    num_seeds: int
+    num_leechs: int
+    tracker: str
+    tags: str
+    category: str
+    save_path: str
+    added_on: int
+    completion_on: int
+    seeding_time: int
+    next_announce: Any
+
 
 class QBittorrentClient(BaseDownloader):
     """qBittorrent WebUI API client"""
@@ -25,53 +100,67 @@ class QBittorrentClient(BaseDownloader):
         self._session: Optional[httpx.AsyncClient] = None
         self._cookies = {}
         self._connected = False
+        self._auth_lock = asyncio.Lock()
+        # sync/maindata 增量表及已解析种子缓存
+        self._maindata = MaindataTable()
+        self._maindata_lock = asyncio.Lock()
+        self._parsed: Dict[str, TorrentInfo] = {}
+        # 按汇报计划失效的 reannounce/tracker 缓存
+        self._announce_cache = AnnounceInfoCache()
+
+    @property
+    def is_connected(self) -> bool:
+        return self._session is not None and self._connected
 
     async def connect(self) -> bool:
         try:
-            self._session = httpx.AsyncClient(
-                base_url=self.base_url,
-                timeout=httpx.Timeout(30.0, connect=10.0),
-                verify=False,  # Allow self-signed certs
-                limits=httpx.Limits(max_keepalive_connections=5, max_connections=10)
-            )
-
-            # Login
-            response = await self._session.post(
-                "/api/v2/auth/login",
-                data={"username": self.username, "password": self.password}
-            )
-
-            if response.status_code == 200 and response.text == "Ok.":
-                self._cookies = dict(response.cookies)
-                auth_check = await self._session.get(
-                    "/api/v2/torrents/info",
-                    params={"limit": 1},
-                    cookies=self._cookies
+            # 复用已有的 keep-alive 会话，仅重新登录
+            if self._session is None:
+                self._session = httpx.AsyncClient(
+                    base_url=self.base_url,
+                    timeout=httpx.Timeout(30.0, connect=10.0),
+                    verify=False,  # Allow self-signed certs
+                    limits=httpx.Limits(max_keepalive_connections=5, max_connections=10)
                 )
-                ok = auth_check.status_code == 200
-                if not ok:
-                    await self.disconnect()
-                else:
-                    self._connected = True
-                return ok
 
-            if self.username or self.password:
+            ok = await self._login()
+            if not ok:
                 await self.disconnect()
-                return False
-
-            # Try without auth (if qBittorrent has auth disabled)
-            response = await self._session.get("/api/v2/app/version")
-            if response.status_code == 200:
-                self._connected = True
-                return True
-
-            await self.disconnect()
-            return False
+            return ok
         except Exception as e:
             logger.error(f"qBittorrent connection error: {e}")
             await self.disconnect()
             return False
 
+    async def _login(self) -> bool:
+        """登录并校验会话"""
+        self._connected = False
+        # 新会话的 rid 游标不再有效
+        self._maindata.reset()
+        self._parsed.clear()
+        response = await self._session.post(
+            "/api/v2/auth/login",
+            data={"username": self.username, "password": self.password}
+        )
+
+        if response.status_code == 200 and response.text == "Ok.":
+            self._cookies = dict(response.cookies)
+            auth_check = await self._session.get(
+                "/api/v2/torrents/info",
+                params={"limit": 1},
+                cookies=self._cookies
+            )
+            self._connected = auth_check.status_code == 200
+            return self._connected
+
+        if self.username or self.password:
+            return False
+
+        # Try without auth (if qBittorrent has auth disabled)
+        response = await self._session.get("/api/v2/app/version")
+        self._connected = response.status_code == 200
+        return self._connected
+
     async def disconnect(self):
         self._connected = False
         if self._session:
@@ -89,31 +178,72 @@ class QBittorrentClient(BaseDownloader):
         """确保连接有效，如果断开则尝试重连"""
         if self._session and self._connected:
             return True
-        return await self.connect()
+        async with self._auth_lock:
+            # 其他协程可能已经完成重连
+            if self._session and self._connected:
+                return True
+            return await self.connect()
+
+    async def _reauthenticate(self, stale_cookies: dict) -> bool:
+        """会话失效（401/403）时重新登录；并发请求只触发一次登录"""
+        async with self._auth_lock:
+            if self._connected and self._cookies is not stale_cookies:
+                return True
+            try:
+                if self._session is None:
+                    return await self.connect()
+                return await self._login()
+            except Exception as e:
+                logger.error(f"qBittorrent re-login error: {e}")
+                self._connected = False
+                return False
 
     async def _request(self, method: str, endpoint: str, retries: int = MAX_RETRIES, **kwargs) -> Optional[httpx.Response]:
+        """发送请求；先按优先级取令牌（READ 排队超时抛出 RequestDeferred），非 GET 请求完成后丢弃合并的读结果"""
+        if not await self.budget.acquire():
+            raise RequestDeferred(f"qBittorrent {self.host}: {method} {endpoint} deferred")
+        try:
+            return await self._send_request(method, endpoint, retries, **kwargs)
+        finally:
+            if method != "GET":
+                self._flights.invalidate()
+
+    async def _send_request(self, method: str, endpoint: str, retries: int = MAX_RETRIES, **kwargs) -> Optional[httpx.Response]:
         """发送请求，带指数退避重试机制"""
         if not self._session:
             if not await self._ensure_connected():
                 return None
 
+        # 熔断冷却期内直接跳过
+        if not self.health.allow_request():
+            return None
+
+        explicit_cookies = "cookies" in kwargs
         last_error = None
         for attempt in range(retries):
+            if attempt and not self.health.available:
+                break
             try:
-                kwargs.setdefault("cookies", self._cookies)
-                response = await self._session.request(method, endpoint, **kwargs)
+                cookies = kwargs["cookies"] if explicit_cookies else self._cookies
+                started = time.monotonic()
+                response = await self._session.request(
+                    method, endpoint, **{"timeout": self.request_timeout(), **kwargs, "cookies": cookies}
+                )
+                if response.status_code >= 500:
+                    self.health.record_failure(f"HTTP {response.status_code}")
+                else:
+                    self.health.record_success(time.monotonic() - started)
                 if 200 <= response.status_code < 300:
                     return response
-                # 401 可能需要重新登录
-                if response.status_code == 401:
+                # 401/403 说明会话过期，需要重新登录
+                if response.status_code in (401, 403) and not explicit_cookies:
                     logger.warning("qBittorrent session expired, reconnecting...")
-                    self._connected = False
-                    if await self._ensure_connected():
-                        kwargs["cookies"] = self._cookies
+                    if attempt < retries - 1 and await self._reauthenticate(cookies):
                         continue
                 return None
-            except (httpx.RemoteProtocolError, httpx.ConnectError, httpx.ReadTimeout) as e:
+            except (httpx.RemoteProtocolError, httpx.ConnectError, httpx.TimeoutException) as e:
                 last_error = e
+                self.health.record_failure(str(e) or type(e).__name__)
                 logger.warning(f"qBittorrent request error (attempt {attempt + 1}/{retries}): {e}")
                 self._connected = False
                 if attempt < retries - 1:
@@ -124,7 +254,6 @@ class QBittorrentClient(BaseDownloader):
                     )
                     await asyncio.sleep(delay)
                     if await self._ensure_connected():
-                        kwargs["cookies"] = self._cookies
                         continue
             except Exception as e:
                 logger.error(f"qBittorrent request error: {e}")
@@ -136,35 +265,18 @@ class QBittorrentClient(BaseDownloader):
 
     def _parse_torrent(self, data: dict) -> TorrentInfo:
         """Parse qBittorrent torrent data to TorrentInfo"""
-        status_map = {
-            "downloading": "downloading",
-            "stalledDL": "downloading",
-            "metaDL": "downloading",
-            "forcedDL": "downloading",
-            "uploading": "seeding",
-            "stalledUP": "seeding",
-            "forcedUP": "seeding",
-            "pausedDL": "paused",
-            "pausedUP": "paused",
-            "queuedDL": "queued",
-            "queuedUP": "queued",
-            "checkingDL": "checking",
-            "checkingUP": "checking",
-            "checkingResumeData": "checking",
-            "error": "error",
-            "missingFiles": "error",
-            "moving": "checking",
-            "unknown": "error",
-        }
+        return torrent_info_from_values(self._torrent_values(data))
 
+    def _torrent_values(self, data: dict) -> Dict[str, Any]:
+        """Extract TorrentInfo field values (times as unix timestamps)"""
         state = data.get("state", "unknown")
-        status = status_map.get(state, "error")
+        status = QB_STATE_MAP.get(state, "error")
 
         added_on = data.get("added_on", 0)
-        added_time = datetime.fromtimestamp(added_on) if added_on and added_on > 0 else None
+        added_time = added_on if added_on and added_on > 0 else None
         completion_on = data.get("completion_on", 0)
         # completion_on can be -1 (not completed) or 0 (unknown)
-        completed_time = datetime.fromtimestamp(completion_on) if completion_on and completion_on > 0 else None
+        completed_time = completion_on if completion_on and completion_on > 0 else None
 
         tags = data.get("tags", "")
         tag_list = [t.strip() for t in tags.split(",") if t.strip()] if tags else []
@@ -174,7 +286,7 @@ class QBittorrentClient(BaseDownloader):
         total_size = data.get("total_size", 0) or data.get("size", 0)
         selected_size = data.get("size", total_size)
         completed = data.get("completed", data.get("downloaded", 0))
-        return TorrentInfo(
+        return dict(
             hash=data.get("hash", ""),
             name=data.get("name", ""),
             size=total_size,
@@ -246,6 +358,9 @@ class QBittorrentClient(BaseDownloader):
             announce_interval: 汇报间隔秒数
         """
         now = datetime.now().timestamp()
+        if not self._announce_cache.needs_refresh(torrent_hash, now=now):
+            return self._announce_cache.get(torrent_hash)
+
         best_next_announce = None
         best_interval = None
         reannounce_zero = False  # 标记是否遇到 reannounce=0
@@ -314,96 +429,213 @@ class QBittorrentClient(BaseDownloader):
         # 如果 reannounce=0 且 trackers 也没有有效值，说明刚刚汇报过
         # 不在这里估算，让上层代码基于种子年龄估算
 
+        self._announce_cache.put(torrent_hash, best_next_announce, best_interval, now=now)
         return best_next_announce, best_interval
 
     def _calculate_torrent_hash(self, torrent_data: bytes) -> Optional[str]:
-        """Calculate info_hash from torrent file content using proper bencode parsing"""
-        try:
-            def find_info_bounds(data: bytes, start: int) -> int:
-                """Find the end position of a bencoded value starting at 'start'"""
-                if start >= len(data):
-                    return start
-                char = data[start:start+1]
-                if char == b'd':
-                    # Dictionary: d<key><value>...e
-                    pos = start + 1
-                    while pos < len(data) and data[pos:pos+1] != b'e':
-                        # Parse key (always a string)
-                        pos = find_info_bounds(data, pos)
-                        # Parse value
-                        pos = find_info_bounds(data, pos)
-                    return pos + 1  # Include the 'e'
-                elif char == b'l':
-                    # List: l<item>...e
-                    pos = start + 1
-                    while pos < len(data) and data[pos:pos+1] != b'e':
-                        pos = find_info_bounds(data, pos)
-                    return pos + 1  # Include the 'e'
-                elif char == b'i':
-                    # Integer: i<number>e
-                    end = data.index(b'e', start)
-                    return end + 1
-                elif char.isdigit():
-                    # String: <length>:<content>
-                    colon = data.index(b':', start)
-                    length = int(data[start:colon])
-                    return colon + 1 + length
-                else:
-                    raise ValueError(f"Unknown bencode type at position {start}")
+        """Calculate info_hash from torrent file content"""
+        meta = parse_torrent(torrent_data)
+        return meta.info_hash if meta else None
+
+    async def sync_maindata(self, max_age: float = 0.0) -> bool:
+        """通过 rid 增量同步 maindata，max_age 内已同步则直接返回"""
+        async with self._maindata_lock:
+            if self._maindata.synced and self._maindata.age() <= max_age:
+                return True
 
-            # Find the info dict in the torrent data
-            info_key = b'4:info'
-            info_pos = torrent_data.find(info_key)
-            if info_pos == -1:
-                return None
+            response = await self._request(
+                "GET",
+                "/api/v2/sync/maindata",
+                params={"rid": self._maindata.rid},
+                timeout=self.request_timeout(bulk=self._maindata.rid == 0),
+            )
+            if not response:
+                return False
 
-            info_start = info_pos + len(info_key)
-            info_end = find_info_bounds(torrent_data, info_start)
+            try:
+                self._maindata.apply(await decode_response(response))
+            except Exception as e:
+                logger.error(f"Error applying qBittorrent maindata: {e}")
+                self._maindata.reset()
+                self._parsed.clear()
+                return False
 
-            info_data = torrent_data[info_start:info_end]
-            return hashlib.sha1(info_data).hexdigest().lower()
-        except Exception as e:
-            logger.debug(f"Failed to calculate torrent hash: {e}")
+            full_update, changed, removed = self._maindata.consume_changes()
+            if full_update:
+                self._parsed.clear()
+            for torrent_hash in changed | removed:
+                self._parsed.pop(torrent_hash, None)
+            return True
+
+    def _maindata_rows(self, hashes: Optional[List[str]] = None) -> Dict[str, dict]:
+        """增量表中的行；指定 hashes 时只按 key 查找这些种子，代价与种子总数无关"""
+        rows = self._maindata.torrents
+        if hashes is None:
+            return rows
+        return {h: rows[h] for h in dict.fromkeys(hashes) if h in rows}
+
+    def _maindata_torrents(self, hashes: Optional[List[str]] = None) -> List[TorrentInfo]:
+        """从增量表生成 TorrentInfo，只重新解析变化过的种子"""
+        torrents = []
+        for torrent_hash, row in self._maindata_rows(hashes).items():
+            info = self._parsed.get(torrent_hash)
+            if info is None:
+                info = self._parse_torrent(row)
+                self._parsed[torrent_hash] = info
+            # 返回副本，调用方修改字段不会污染缓存
+            torrents.append(copy.copy(info))
+        return torrents
+
+    async def _fetch_torrent_list(self, hashes: Optional[List[str]] = None) -> Optional[List[TorrentInfo]]:
+        """优先使用 maindata 增量表（hashes 只取这些种子），失败时回退到全量 torrents/info"""
+        if await self.sync_maindata():
+            return self._maindata_torrents(hashes)
+
+        response = await self._request("GET", "/api/v2/torrents/info", timeout=self.request_timeout(bulk=True))
+        if not response:
             return None
+        rows = await decode_response(response, List[QbTorrentRecord])
+        return [self._parse_torrent(t) for t in rows]
 
-    async def get_torrents(self, with_reannounce: bool = True) -> List[TorrentInfo]:
-        """获取所有种子，可选批量获取 reannounce 信息"""
-        response = await self._request("GET", "/api/v2/torrents/info")
+    async def _query_torrents(
+        self,
+        status_filter=None,
+        hashes: Optional[List[str]] = None,
+        category: Optional[str] = None,
+        tag: Optional[str] = None,
+    ) -> Optional[List[TorrentInfo]]:
+        """使用 torrents/info 的 filter/hashes/category/tag 参数做服务端过滤"""
+        params = {}
+        statuses = self.expand_status_filter(status_filter)
+        if statuses and len(statuses) == 1:
+            qb_filter = QB_STATUS_FILTERS.get(next(iter(statuses)))
+            if qb_filter:
+                params["filter"] = qb_filter
+        if hashes is not None:
+            params["hashes"] = "|".join(hashes)
+        if category is not None:
+            params["category"] = category
+        if tag is not None:
+            params["tag"] = tag
+
+        response = await self._request(
+            "GET", "/api/v2/torrents/info", params=params, timeout=self.request_timeout(bulk=hashes is None)
+        )
         if not response:
+            return None
+        rows = await decode_response(response, List[QbTorrentRecord])
+        return [self._parse_torrent(t) for t in rows]
+
+    @coalesced
+    async def get_torrents(
+        self,
+        with_reannounce: bool = True,
+        fields: Optional[List[str]] = None,
+        status_filter=None,
+        hashes: Optional[List[str]] = None,
+        category: Optional[str] = None,
+        tag: Optional[str] = None,
+    ) -> List[TorrentInfo]:
+        """获取种子，可选批量获取 reannounce 信息
+
+        qBittorrent 不支持字段投影。maindata 增量表已建立时，增量同步后本地过滤
+        代价最小；否则有过滤条件时使用 torrents/info 的原生参数直接查询。
+        """
+        if hashes is not None and not hashes:
             return []
 
         try:
-            data = response.json()
-            torrents = [self._parse_torrent(t) for t in data]
-
-            # 批量获取活跃种子的 reannounce 信息
-            if with_reannounce:
-                active_torrents = [t for t in torrents if t.status in ['seeding', 'downloading']]
-                # 并行获取所有活跃种子的 properties
-                if active_torrents:
-                    tasks = [self._get_torrent_reannounce(t.hash) for t in active_torrents]
-                    results = await asyncio.gather(*tasks, return_exceptions=True)
-
-                    # 更新种子的 next_announce_time
-                    hash_to_reannounce = {}
-                    for i, result in enumerate(results):
-                        if isinstance(result, tuple) and result[0] is not None:
-                            hash_to_reannounce[active_torrents[i].hash] = result
-
-                    now = datetime.now().timestamp()
-                    for torrent in torrents:
-                        if torrent.hash in hash_to_reannounce:
-                            next_ann, interval = hash_to_reannounce[torrent.hash]
-                            if next_ann and next_ann > now:
-                                torrent.next_announce_time = next_ann
-                            if interval and interval > 0:
-                                torrent.announce_interval = interval
+            filtered = any(v is not None for v in (status_filter, hashes, category, tag))
+            if filtered and not self._maindata.synced:
+                torrents = await self._query_torrents(status_filter, hashes, category, tag)
+            else:
+                torrents = await self._fetch_torrent_list(hashes)
+            if torrents is None:
+                return []
+            if filtered:
+                # 服务端 filter 语义与统一状态不完全一致，本地再过滤一次
+                torrents = self.filter_torrents(torrents, status_filter, hashes, category, tag)
+
+            # 批量获取活跃种子的 reannounce 信息（只刷新缓存中已到期的条目）
+            if with_reannounce and self.wants_fields(fields, ANNOUNCE_FIELDS):
+                await self._refresh_announce_cache(torrents, prune=not filtered)
 
             return torrents
+        except RequestDeferred:
+            raise
         except Exception as e:
             logger.error(f"Error parsing torrents: {e}")
             return []
 
+    @coalesced
+    async def get_torrent_table(
+        self,
+        with_reannounce: bool = False,
+        fields: Optional[List[str]] = None,
+        status_filter=None,
+        hashes: Optional[List[str]] = None,
+        category: Optional[str] = None,
+        tag: Optional[str] = None,
+    ) -> TorrentTable:
+        """直接由 maindata 增量表的原始行构建列式表"""
+        if hashes is not None and not hashes:
+            return TorrentTable.empty()
+        if with_reannounce or not await self.sync_maindata():
+            return await super().get_torrent_table(with_reannounce, fields, status_filter, hashes, category, tag)
+
+        try:
+            table = TorrentTable.from_rows(self._maindata_rows(hashes).values(), self._torrent_values)
+            return self.filter_table(table, status_filter, hashes, category, tag)
+        except Exception as e:
+            logger.error(f"Error building torrent table: {e}")
+            return TorrentTable.empty()
+
+    async def _refresh_announce_cache(self, torrents: List[TorrentInfo], prune: bool = True):
+        """按汇报计划刷新 announce 缓存，并回填到种子对象"""
+        if prune:
+            self._announce_cache.prune(t.hash for t in torrents)
+        active_torrents = [t for t in torrents if t.status in ['seeding', 'downloading']]
+        if not active_torrents:
+            return
+
+        now = datetime.now().timestamp()
+        due = [
+            t for t in active_torrents
+            if self._announce_cache.needs_refresh(t.hash, t.uploaded, t.state, now)
+        ]
+
+        # 每次最多刷新 ANNOUNCE_REFILL_PER_CALL 个，其余仍为到期状态，后续调用继续补
+        due = due[:ANNOUNCE_REFILL_PER_CALL]
+        if due:
+            # 限制并发，避免数千个种子同时请求压垮 WebUI
+            semaphore = asyncio.Semaphore(ANNOUNCE_FETCH_CONCURRENCY)
+
+            async def fetch(torrent: TorrentInfo):
+                async with semaphore:
+                    return await self._get_torrent_reannounce(torrent.hash)
+
+            # 补缓存不走 CRITICAL 道，限速/汇报请求优先拿令牌
+            with request_priority(max(current_priority(), PRIORITY_ACTION)):
+                results = await asyncio.gather(*[fetch(t) for t in due], return_exceptions=True)
+            for torrent, result in zip(due, results):
+                if isinstance(result, tuple):
+                    self._announce_cache.put(
+                        torrent.hash, result[0], result[1],
+                        uploaded=torrent.uploaded, state=torrent.state, now=now
+                    )
+
+        # 更新种子的 next_announce_time
+        for torrent in active_torrents:
+            cached = self._announce_cache.get(torrent.hash)
+            if not cached:
+                continue
+            self._announce_cache.observe(torrent.hash, torrent.uploaded, torrent.state)
+            next_ann, interval = cached
+            if next_ann and next_ann > now:
+                torrent.next_announce_time = next_ann
+            if interval and interval > 0:
+                torrent.announce_interval = interval
+
     async def _get_torrent_reannounce(self, torrent_hash: str) -> tuple[Optional[float], Optional[int]]:
         """快速获取单个种子的 reannounce 时间和汇报间隔
 
@@ -541,17 +773,14 @@ class QBittorrentClient(BaseDownloader):
             "POST",
             "/api/v2/torrents/add",
             data=data,
-            files=files if files else None
+            files=files if files else None,
+            timeout=self.request_timeout(bulk=True),
         )
 
         if response and response.text == "Ok.":
-            # If we calculated the hash from torrent file, verify and return it
+            # 种子文件的哈希已本地算出，qBittorrent 接受后无需再轮询确认
             if expected_hash:
-                # Wait a bit for qBittorrent to process
-                await asyncio.sleep(0.5)
-                torrent_info = await self.get_torrent(expected_hash)
-                if torrent_info:
-                    return expected_hash
+                return expected_hash
 
             # Fallback: check recently added torrents (sorted by added_on desc)
             # instead of fetching ALL torrents which is very expensive
@@ -574,6 +803,11 @@ class QBittorrentClient(BaseDownloader):
             logger.warning("Could not determine hash of added torrent")
             return None
 
+        # 重复的种子会返回 "Fails."，本地增量表中已有该哈希则视为已存在
+        if response and expected_hash and expected_hash in self._maindata.torrents:
+            logger.info(f"Torrent {expected_hash} already exists")
+            return expected_hash
+
         return None
 
     async def remove_torrent(self, torrent_hash: str, delete_files: bool = False) -> bool:
@@ -627,6 +861,8 @@ class QBittorrentClient(BaseDownloader):
             "/api/v2/torrents/reannounce",
             data={"hashes": torrent_hash}
         )
+        # 强制汇报后汇报时间已改变，下次需要重新获取
+        self._announce_cache.invalidate(torrent_hash)
         return response is not None
 
     async def set_torrent_upload_limit(self, torrent_hash: str, limit: int) -> bool:
@@ -645,9 +881,97 @@ class QBittorrentClient(BaseDownloader):
         )
         return response is not None
 
+    # ===== 批量操作：hashes 使用 | 拼接 =====
+
+    async def _post_hashes(self, endpoint: str, torrent_hashes: List[str], **data) -> bool:
+        """对一批种子执行同一操作，按 BATCH_CHUNK_SIZE 分块"""
+        ok = True
+        for chunk in self.chunk_hashes(torrent_hashes):
+            response = await self._request(
+                "POST",
+                endpoint,
+                data={"hashes": "|".join(chunk), **data}
+            )
+            ok = ok and response is not None
+        return ok
+
+    async def remove_torrents(self, torrent_hashes: List[str], delete_files: bool = False) -> bool:
+        return await self._post_hashes(
+            "/api/v2/torrents/delete",
+            torrent_hashes,
+            deleteFiles="true" if delete_files else "false"
+        )
+
+    async def pause_torrents(self, torrent_hashes: List[str]) -> bool:
+        return await self._post_hashes("/api/v2/torrents/pause", torrent_hashes)
+
+    async def resume_torrents(self, torrent_hashes: List[str]) -> bool:
+        return await self._post_hashes("/api/v2/torrents/resume", torrent_hashes)
+
+    async def reannounce_torrents(self, torrent_hashes: List[str]) -> bool:
+        ok = await self._post_hashes("/api/v2/torrents/reannounce", torrent_hashes)
+        for torrent_hash in torrent_hashes:
+            self._announce_cache.invalidate(torrent_hash)
+        return ok
+
+    async def set_torrents_upload_limit(self, limits: Dict[str, int]) -> bool:
+        ok = True
+        for limit, torrent_hashes in self.group_by_limit(limits).items():
+            ok = await self._post_hashes(
+                "/api/v2/torrents/setUploadLimit", torrent_hashes, limit=str(limit)
+            ) and ok
+        return ok
+
+    async def set_torrents_download_limit(self, limits: Dict[str, int]) -> bool:
+        ok = True
+        for limit, torrent_hashes in self.group_by_limit(limits).items():
+            ok = await self._post_hashes(
+                "/api/v2/torrents/setDownloadLimit", torrent_hashes, limit=str(limit)
+            ) and ok
+        return ok
+
+    async def set_torrents_location(self, torrent_hashes: List[str], location: str) -> bool:
+        return await self._post_hashes(
+            "/api/v2/torrents/setLocation", torrent_hashes, location=location
+        )
+
+    async def add_torrents_tags(self, torrent_hashes: List[str], tags: List[str]) -> bool:
+        if not tags:
+            return False
+        return await self._post_hashes(
+            "/api/v2/torrents/addTags", torrent_hashes, tags=",".join(tags)
+        )
+
+    @coalesced
     async def get_stats(self) -> DownloaderStats:
+        """全局速度/流量/剩余空间取自 maindata server_state，种子数取自增量维护的状态计数，
+        与种子数量无关；maindata 不可用时回退到 transfer/info + 种子列表"""
+        if not await self.sync_maindata(max_age=MAINDATA_MAX_AGE):
+            return await self._transfer_info_stats()
+
+        state = self._maindata.server_state
+        counts: Dict[str, int] = {}
+        for qb_state, count in self._maindata.state_counts.items():
+            status = QB_STATE_MAP.get(qb_state, "error")
+            counts[status] = counts.get(status, 0) + count
+        downloading = counts.get("downloading", 0)
+        seeding = counts.get("seeding", 0)
+
+        return DownloaderStats(
+            upload_speed=state.get("up_info_speed", 0),
+            download_speed=state.get("dl_info_speed", 0),
+            total_uploaded=state.get("up_info_data", 0),
+            total_downloaded=state.get("dl_info_data", 0),
+            free_space=state.get("free_space_on_disk", 0) or 0,
+            total_torrents=len(self._maindata.torrents),
+            active_torrents=downloading + seeding,
+            downloading_torrents=downloading,
+            seeding_torrents=seeding,
+        )
+
+    async def _transfer_info_stats(self) -> DownloaderStats:
         response = await self._request("GET", "/api/v2/transfer/info")
-        torrents = await self.get_torrents(with_reannounce=False)
+        torrents = await self.get_torrents(with_reannounce=False, fields=["status"])
 
         if not response:
             return DownloaderStats(
@@ -693,17 +1017,11 @@ class QBittorrentClient(BaseDownloader):
                 seeding_torrents=0,
             )
 
+    @coalesced
     async def get_free_space(self, path: Optional[str] = None) -> int:
-        endpoint = "/api/v2/sync/maindata"
-        response = await self._request("GET", endpoint)
-        if not response:
-            return 0
-
-        try:
-            data = response.json()
-            return data.get("server_state", {}).get("free_space_on_disk", 0)
-        except Exception:
+        if not await self.sync_maindata(max_age=MAINDATA_MAX_AGE):
             return 0
+        return self._maindata.server_state.get("free_space_on_disk", 0) or 0
 
     async def set_global_upload_limit(self, limit: int) -> bool:
         response = await self._request(
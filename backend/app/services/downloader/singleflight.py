@@ -0,0 +1,133 @@
+"""Single-flight coalescing of identical concurrent downloader reads
+
+实时推送、仪表盘、统计、限速状态和定时任务经常在几百毫秒内对同一下载器发起
+相同的 get_torrents/get_stats。客户端由会话池按下载器共享，因此在客户端上按
+(方法, 参数) 合并：
+- 同一请求正在进行时，后来的调用者等待同一个结果
+- 完成后 COALESCE_TTL 秒内的相同调用直接复用结果
+- 写操作会清空已完成的结果，之后的调用也不再加入写之前发起的请求（按代数区分）；
+  已经在等待这些请求的调用者仍拿到写之前的结果（它们本就在写之前发起）
+- 过期结果在写入新结果时清理，并限制条数（每轮的 hashes 参数都不同，否则会一直留在内存里）
+- 进行中的请求按发起者的优先级区分（见 budget.py），调用者只加入优先级不低于
+  自己的请求，避免高优先级调用跟着低优先级请求在令牌桶中排队或被放弃；
+  出错（包括 RequestDeferred）和空结果（适配器出错时返回 []/0/None）不缓存
+
+结果为列表/dataclass 时返回拷贝（dataclass 的列表字段如 tags 也复制），
+调用方修改字段不会影响其他调用者。
+"""
+
+import asyncio
+import copy
+import dataclasses
+import functools
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from .budget import PRIORITY_NAMES, current_priority
+
+# 结果复用窗口（秒）
+COALESCE_TTL = 0.3
+# 最多保留的已完成结果数
+MAX_RESULTS = 64
+
+
+def _freeze(value: Any) -> Hashable:
+    """把参数转换为可哈希的 key"""
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = tuple(_freeze(v) for v in value)
+        return tuple(sorted(items, key=repr)) if isinstance(value, (set, frozenset)) else items
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+def _copy_dataclass(item: Any) -> Any:
+    """浅拷贝 dataclass，列表字段（如 TorrentInfo.tags）另行复制"""
+    clone = copy.copy(item)
+    for field in dataclasses.fields(item):
+        value = getattr(item, field.name)
+        if isinstance(value, list):
+            setattr(clone, field.name, list(value))
+    return clone
+
+
+def _copy_result(value: Any) -> Any:
+    if isinstance(value, list):
+        return [_copy_dataclass(item) if dataclasses.is_dataclass(item) else item for item in value]
+    if dataclasses.is_dataclass(value):
+        return _copy_dataclass(value)
+    return value
+
+
+class SingleFlight:
+    """Share in-flight calls and briefly cache their results"""
+
+    def __init__(self, ttl: float = COALESCE_TTL):
+        self.ttl = ttl
+        # (key, 优先级) -> (发起时的代数, 进行中的任务)
+        self._inflight: Dict[Tuple[Hashable, int], Tuple[int, asyncio.Task]] = {}
+        self._results: Dict[Hashable, Tuple[float, Any]] = {}
+        # 每次写操作递增，写之前发起的请求结果不再缓存
+        self._generation = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        cached = self._results.get(key)
+        if cached is not None:
+            if time.monotonic() - cached[0] <= self.ttl:
+                return _copy_result(cached[1])
+            del self._results[key]
+
+        priority = current_priority()
+        task = None
+        for lane in sorted(PRIORITY_NAMES):
+            if lane > priority:
+                break
+            flight = self._inflight.get((key, lane))
+            if flight is not None and flight[0] == self._generation:
+                task = flight[1]
+                break
+        if task is None:
+            # 独立任务执行（继承发起者的优先级），发起者被取消（如 wait_for 超时）不影响其他等待者
+            task = asyncio.ensure_future(fn())
+            self._inflight[(key, priority)] = (self._generation, task)
+            task.add_done_callback(functools.partial(self._finish, key, priority, self._generation))
+        return _copy_result(await asyncio.shield(task))
+
+    def _finish(self, key: Hashable, priority: int, generation: int, task: asyncio.Task):
+        flight = self._inflight.get((key, priority))
+        if flight is not None and flight[1] is task:
+            del self._inflight[(key, priority)]
+        if generation != self._generation or task.cancelled() or task.exception() is not None:
+            return
+        result = task.result()
+        if not result:
+            # 适配器出错时返回空值，缓存它会让 TTL 内的调用者都拿到"没有种子"
+            return
+        now = time.monotonic()
+        self._results.pop(key, None)
+        self._sweep(now)
+        self._results[key] = (now, result)
+
+    def _sweep(self, now: float):
+        """清理过期结果；仍超过 MAX_RESULTS 时丢弃最早写入的"""
+        expired = [k for k, (stored, _) in self._results.items() if now - stored > self.ttl]
+        for k in expired:
+            del self._results[k]
+        while len(self._results) >= MAX_RESULTS:
+            del self._results[next(iter(self._results))]
+
+    def invalidate(self):
+        """写操作后调用：丢弃已有结果；进行中的请求按代数失效，之后的调用不再加入它们"""
+        self._generation += 1
+        self._results.clear()
+
+
+def coalesced(method):
+    """Decorator for downloader read methods: coalesce by (method, args)"""
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        key = (method.__name__, _freeze(args), _freeze(kwargs))
+        return await self._flights.do(key, lambda: method(self, *args, **kwargs))
+
+    return wrapper
@@ -0,0 +1,362 @@
+"""Shared torrent snapshots - one poller per enabled downloader
+
+删种、自动汇报、实时推送、仪表盘、统计、生命周期评分和种子列表接口原先各自拉取
+完整种子列表，10 个下载器时每轮就是 N×M 次全量请求。这里为每个启用的下载器
+维护一份最新的列式种子表（TorrentTable），带递增版本号和采集时间：
+
+- 后台每个下载器一个轮询任务，间隔 TORRENT_SNAPSHOT_INTERVAL 秒
+- 消费者通过 snapshot_store.get(downloader, max_age) 读取；快照超过 max_age 时
+  立即刷新一次（同一下载器的并发刷新只发一次请求）
+- 刷新失败（请求出错/熔断中）保留旧快照，不会发布空表
+- 每个新版本与上一版本比对，变化以事件形式发布到 events.event_bus
+- 每 TORRENT_SNAPSHOT_PERSIST_INTERVAL 秒把有变化的快照压缩写入数据库（warm_start），
+  启动时先读回作为"旧快照"（restored=True，带 stale_since），allow_stale 的消费者
+  可以立即使用，同时后台刷新；读回的快照不作为事件基线
+
+快照不含汇报时间（with_reannounce=False）。限速循环需要秒级数据和汇报时间，
+仍直接读取下载器。
+"""
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.models import Downloader
+from app.services.downloader.base import TorrentInfo
+from app.services.downloader.budget import PRIORITY_ACTION, request_priority
+from app.services.downloader.context import downloader_client
+from app.services.downloader.events import diff_tables, event_bus
+from app.services.downloader.table import TorrentTable
+from app.services.warm_start import TORRENTS_KEY_PREFIX, delete_blob, load_blobs, save_blob, torrents_key
+from app.utils import get_logger
+
+logger = get_logger('pt_manager.downloader.snapshots')
+
+# 重新读取启用下载器列表的间隔（秒）
+RECONCILE_INTERVAL = 30.0
+
+
+@dataclass
+class TorrentSnapshot:
+    """Latest full torrent table of one downloader"""
+    downloader_id: int
+    version: int
+    table: TorrentTable
+    captured_at: float = field(default_factory=time.monotonic)
+    captured_time: float = field(default_factory=time.time)
+    # 启动时从数据库读回，尚未被实时数据替换
+    restored: bool = False
+    _infos: Optional[List[TorrentInfo]] = field(default=None, repr=False)
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.captured_at
+
+    @property
+    def stale_since(self) -> Optional[datetime]:
+        """读回的旧快照返回其采集时间（UTC），实时快照返回 None"""
+        return datetime.utcfromtimestamp(self.captured_time) if self.restored else None
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def torrents(self) -> List[TorrentInfo]:
+        """TorrentInfo 列表（首次访问时转换并缓存，调用方不要修改其中对象）"""
+        if self._infos is None:
+            self._infos = self.table.to_infos()
+        return self._infos
+
+
+class TorrentSnapshotStore:
+    """按下载器 ID 保存最新快照，并负责后台轮询"""
+
+    def __init__(self, interval: Optional[float] = None, max_age: Optional[float] = None):
+        self.interval = float(settings.TORRENT_SNAPSHOT_INTERVAL if interval is None else interval)
+        self.max_age = float(settings.TORRENT_SNAPSHOT_MAX_AGE if max_age is None else max_age)
+        self._snapshots: Dict[int, TorrentSnapshot] = {}
+        self._versions: Dict[int, int] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self._downloaders: Dict[int, Downloader] = {}
+        # 上一次发布的表，用于生成事件（invalidate 不清除，避免漏掉变化）
+        self._baselines: Dict[int, TorrentTable] = {}
+        self._pollers: Dict[int, asyncio.Task] = {}
+        self._supervisor: Optional[asyncio.Task] = None
+        self._persister: Optional[asyncio.Task] = None
+        # 已写入数据库的版本
+        self._persisted: Dict[int, int] = {}
+        self._loaded = False
+        self._background: Set[asyncio.Task] = set()
+
+    def _get_lock(self, downloader_id: int) -> asyncio.Lock:
+        lock = self._locks.get(downloader_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[downloader_id] = lock
+        return lock
+
+    def peek(self, downloader_id: int) -> Optional[TorrentSnapshot]:
+        """不触发刷新，直接返回当前快照"""
+        return self._snapshots.get(downloader_id)
+
+    async def get(
+        self,
+        downloader: Downloader,
+        max_age: Optional[float] = None,
+        allow_stale: bool = False,
+    ) -> Optional[TorrentSnapshot]:
+        """读取快照，超过 max_age 秒时先刷新；下载器不可用且没有旧快照时返回 None
+
+        allow_stale=True 时直接返回已有的旧快照，刷新放到后台进行（只读展示用）。
+        否则刷新失败时也不返回启动时读回的快照（删种等操作不能基于旧数据）。
+        """
+        max_age = self.max_age if max_age is None else max_age
+        snapshot = self._snapshots.get(downloader.id)
+        if snapshot is not None and snapshot.age <= max_age and not snapshot.restored:
+            return snapshot
+        if snapshot is not None and allow_stale:
+            self._refresh_in_background(downloader)
+            return snapshot
+        snapshot = await self.refresh(downloader, max_age=max_age)
+        if snapshot is not None and snapshot.restored and not allow_stale:
+            return None
+        return snapshot
+
+    async def torrents(
+        self,
+        downloader: Downloader,
+        max_age: Optional[float] = None,
+        allow_stale: bool = False,
+    ) -> Optional[List[TorrentInfo]]:
+        snapshot = await self.get(downloader, max_age, allow_stale=allow_stale)
+        return snapshot.torrents() if snapshot is not None else None
+
+    def _refresh_in_background(self, downloader: Downloader):
+        if self._get_lock(downloader.id).locked():
+            return
+        task = asyncio.create_task(self.refresh(downloader))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def refresh(self, downloader: Downloader, max_age: float = 0.0) -> Optional[TorrentSnapshot]:
+        """从下载器拉取完整种子表并发布新版本，失败时返回旧快照"""
+        downloader_id = downloader.id
+        async with self._get_lock(downloader_id):
+            # 等锁期间其他调用方可能已经刷新过
+            snapshot = self._snapshots.get(downloader_id)
+            if snapshot is not None and max_age > 0 and snapshot.age <= max_age and not snapshot.restored:
+                return snapshot
+
+            try:
+                # 快照同时服务删种等操作，不按 READ 优先级排队放弃
+                with request_priority(PRIORITY_ACTION):
+                    async with downloader_client(downloader) as client:
+                        if not client:
+                            return snapshot
+                        table = await client.get_torrent_table()
+                        # 适配器出错时返回空表，以熔断器记录区分真实的空列表
+                        if client.health.consecutive_failures or not client.health.available:
+                            logger.debug(f"下载器 {downloader.name} 快照刷新失败，保留旧快照")
+                            return snapshot
+            except Exception as e:
+                logger.warning(f"刷新下载器 {downloader.name} 种子快照失败: {e}")
+                return snapshot
+
+            if snapshot is not None and table is snapshot.table:
+                # singleflight 复用了上一次的结果，数据没有变化
+                return snapshot
+
+            version = self._versions.get(downloader_id, 0) + 1
+            self._versions[downloader_id] = version
+            snapshot = TorrentSnapshot(downloader_id=downloader_id, version=version, table=table)
+            self._snapshots[downloader_id] = snapshot
+            self._publish_changes(downloader_id, table)
+            return snapshot
+
+    def _publish_changes(self, downloader_id: int, table: TorrentTable):
+        """与上一次发布的表比对，把变化发布到事件总线"""
+        previous = self._baselines.get(downloader_id)
+        self._baselines[downloader_id] = table
+        if previous is None:
+            return
+        try:
+            event_bus.publish(diff_tables(downloader_id, previous, table))
+        except Exception as e:
+            logger.warning(f"生成下载器 {downloader_id} 种子事件失败: {e}")
+
+    def invalidate(self, downloader_id: int):
+        """丢弃快照（删除/暂停种子后调用），下次读取会重新拉取"""
+        self._snapshots.pop(downloader_id, None)
+
+    def forget(self, downloader_id: int):
+        """下载器配置更新/删除时调用
+
+        除快照外还丢弃轮询任务持有的旧配置，避免新旧配置交替导致会话池反复重建；
+        轮询任务随后退出，下一次同步下载器列表时按新配置重建。
+        """
+        self.invalidate(downloader_id)
+        self._downloaders.pop(downloader_id, None)
+        self._baselines.pop(downloader_id, None)
+        # 持久化的快照属于旧配置（ID 也可能被新下载器复用）
+        self._persisted.pop(downloader_id, None)
+        try:
+            task = asyncio.get_running_loop().create_task(delete_blob(torrents_key(downloader_id)))
+        except RuntimeError:
+            return
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    # ===== 预热持久化 =====
+
+    async def load_persisted(self, downloader_ids: Iterable[int]) -> int:
+        """读回数据库中的快照（只填充还没有快照的下载器），返回读回数量"""
+        wanted = set(downloader_ids)
+        loaded = 0
+        for blob in await load_blobs(TORRENTS_KEY_PREFIX):
+            try:
+                downloader_id = int(blob.key[len(TORRENTS_KEY_PREFIX):])
+            except ValueError:
+                continue
+            if downloader_id not in wanted or downloader_id in self._snapshots:
+                continue
+            try:
+                table = await asyncio.to_thread(TorrentTable.from_bytes, blob.data)
+            except Exception as e:
+                logger.warning(f"读回下载器 {downloader_id} 快照失败: {e}")
+                continue
+            captured_time = (
+                (blob.captured_at - datetime.utcfromtimestamp(0)).total_seconds()
+                if blob.captured_at else time.time()
+            )
+            version = max(self._versions.get(downloader_id, 0), blob.version or 0)
+            self._versions[downloader_id] = version
+            self._persisted[downloader_id] = version
+            self._snapshots[downloader_id] = TorrentSnapshot(
+                downloader_id=downloader_id,
+                version=version,
+                table=table,
+                # 按实际经过的时间计算 age
+                captured_at=time.monotonic() - max(0.0, time.time() - captured_time),
+                captured_time=captured_time,
+                restored=True,
+            )
+            loaded += 1
+        self._loaded = True
+        if loaded:
+            logger.info(f"已读回 {loaded} 个下载器的种子快照")
+        return loaded
+
+    async def persist(self) -> int:
+        """把尚未写入的新版本快照写入数据库，返回写入数量"""
+        written = 0
+        for downloader_id, snapshot in list(self._snapshots.items()):
+            if snapshot.restored or snapshot.version <= self._persisted.get(downloader_id, 0):
+                continue
+            try:
+                data = await asyncio.to_thread(snapshot.table.to_bytes)
+            except Exception as e:
+                logger.warning(f"序列化下载器 {downloader_id} 快照失败: {e}")
+                continue
+            saved = await save_blob(
+                torrents_key(downloader_id),
+                data,
+                version=snapshot.version,
+                item_count=len(snapshot),
+                captured_at=datetime.utcfromtimestamp(snapshot.captured_time),
+            )
+            if saved:
+                self._persisted[downloader_id] = snapshot.version
+                written += 1
+        return written
+
+    # ===== 后台轮询 =====
+
+    @property
+    def running(self) -> bool:
+        return self._supervisor is not None and not self._supervisor.done()
+
+    def start(self):
+        if self.running or self.interval <= 0:
+            return
+        self._supervisor = asyncio.create_task(self._supervise())
+        if settings.TORRENT_SNAPSHOT_PERSIST_INTERVAL > 0:
+            self._persister = asyncio.create_task(self._persist_loop(settings.TORRENT_SNAPSHOT_PERSIST_INTERVAL))
+        logger.info(f"种子快照轮询已启动，间隔 {self.interval}s")
+
+    async def stop(self):
+        tasks = list(self._pollers.values()) + list(self._background)
+        for task in (self._supervisor, self._persister):
+            if task is not None:
+                tasks.append(task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._pollers.clear()
+        self._background.clear()
+        self._supervisor = None
+        if self._persister is not None:
+            self._persister = None
+            # 退出前写入最新快照，下次启动直接使用
+            await self.persist()
+
+    async def _persist_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.persist()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"持久化种子快照失败: {e}")
+
+    async def _supervise(self):
+        """定期同步启用的下载器列表，增删对应的轮询任务"""
+        from app.database import async_session_maker
+
+        while True:
+            try:
+                async with async_session_maker() as db:
+                    result = await db.execute(select(Downloader).where(Downloader.enabled == True))
+                    downloaders = {d.id: d for d in result.scalars().all()}
+                self._downloaders = downloaders
+                if not self._loaded:
+                    await self.load_persisted(downloaders)
+
+                for downloader_id in list(self._pollers):
+                    if downloader_id not in downloaders:
+                        self._pollers.pop(downloader_id).cancel()
+                        self.forget(downloader_id)
+                for downloader_id in downloaders:
+                    task = self._pollers.get(downloader_id)
+                    if task is None or task.done():
+                        self._pollers[downloader_id] = asyncio.create_task(self._poll(downloader_id))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"同步快照下载器列表失败: {e}")
+            await asyncio.sleep(RECONCILE_INTERVAL)
+
+    async def _poll(self, downloader_id: int):
+        # 错开各下载器的首次轮询
+        await asyncio.sleep(random.uniform(0, self.interval))
+        while True:
+            downloader = self._downloaders.get(downloader_id)
+            if downloader is None:
+                return
+            started = time.monotonic()
+            try:
+                # 消费者刚刚按需刷新过时跳过本轮
+                await self.refresh(downloader, max_age=self.interval / 2)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"下载器 {downloader_id} 快照轮询出错: {e}")
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+
+snapshot_store = TorrentSnapshotStore()
@@ -0,0 +1,314 @@
+"""Columnar torrent table
+
+每次轮询为数千个种子创建 TorrentInfo（约 30 个字段，含 list/datetime）开销很大。
+TorrentTable 按列存储同一批种子：
+- 数值字段为 NumPy 数组（缺失值用 NaN 表示的列为 float64）
+- tracker/category/status 等重复度高的字符串使用共享的驻留池，列中只存 int32 编码
+- hash -> 行号索引
+
+row(i)/get(hash) 返回只读行视图，属性与 TorrentInfo 一致，可直接交给现有调用方；
+需要可修改对象时使用 to_info()/to_infos()。
+"""
+
+import json
+import zlib
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from .base import TorrentInfo
+
+# 整数列
+INT_COLUMNS = (
+    "size", "uploaded", "downloaded", "upload_speed", "download_speed",
+    "seeders", "leechers", "seeds_connected", "peers_connected", "seeding_time",
+    "total_size", "selected_size", "completed",
+)
+# 浮点列，None 存为 NaN
+FLOAT_COLUMNS = (
+    "progress", "ratio", "added_time", "completed_time",
+    "next_announce_time", "announce_interval",
+)
+# 驻留池编码列（tags 以 tuple 驻留）
+POOLED_COLUMNS = ("status", "state", "tracker", "category", "tracker_status", "save_path", "tags")
+# 逐行不同的字符串
+OBJECT_COLUMNS = ("hash", "name")
+
+# 以 unix 时间戳存储，转换为 TorrentInfo 时还原为 datetime
+TIMESTAMP_COLUMNS = ("added_time", "completed_time")
+# 浮点存储但 TorrentInfo 中为 int 的列
+OPTIONAL_INT_COLUMNS = ("announce_interval",)
+
+# to_bytes() 序列化格式版本，列定义变化时递增（旧数据直接丢弃）
+SERIAL_VERSION = 1
+
+
+def torrent_info_from_values(values: Dict[str, Any]) -> TorrentInfo:
+    """由适配器提取的字段值（时间为 unix 时间戳）创建 TorrentInfo"""
+    for name in TIMESTAMP_COLUMNS:
+        timestamp = values.get(name)
+        values[name] = datetime.fromtimestamp(timestamp) if timestamp else None
+    return TorrentInfo(**values)
+
+
+class StringPool:
+    """Interned value pool: value <-> int32 code"""
+
+    def __init__(self):
+        self.values: List[Any] = []
+        self._codes: Dict[Any, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def intern(self, value: Any) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self._codes[value] = code
+            self.values.append(value)
+        return code
+
+    def code(self, value: Any) -> Optional[int]:
+        """查找已有编码，不存在返回 None"""
+        return self._codes.get(value)
+
+
+class TorrentTableBuilder:
+    """逐行追加，build() 时一次性转换为数组"""
+
+    def __init__(self):
+        self._pools: Dict[str, StringPool] = {name: StringPool() for name in POOLED_COLUMNS}
+        self._data: Dict[str, list] = {
+            name: [] for name in (*INT_COLUMNS, *FLOAT_COLUMNS, *POOLED_COLUMNS, *OBJECT_COLUMNS)
+        }
+
+    def append(self, values: Dict[str, Any]):
+        """追加一行；values 为 TorrentInfo 字段名 -> 值，时间字段为 unix 时间戳"""
+        data = self._data
+        for name in INT_COLUMNS:
+            data[name].append(values.get(name) or 0)
+        for name in FLOAT_COLUMNS:
+            value = values.get(name)
+            data[name].append(np.nan if value is None else value)
+        for name in OBJECT_COLUMNS:
+            data[name].append(values.get(name) or "")
+        for name in POOLED_COLUMNS:
+            value = values.get(name)
+            if name == "tags":
+                value = tuple(value or ())
+            elif name != "state":
+                value = value or ""
+            data[name].append(self._pools[name].intern(value))
+
+    def build(self) -> "TorrentTable":
+        data = self._data
+        columns: Dict[str, np.ndarray] = {}
+        for name in INT_COLUMNS:
+            columns[name] = np.asarray(data[name], dtype=np.int64)
+        for name in FLOAT_COLUMNS:
+            columns[name] = np.asarray(data[name], dtype=np.float64)
+        for name in POOLED_COLUMNS:
+            columns[name] = np.asarray(data[name], dtype=np.int32)
+        return TorrentTable(columns, list(data["hash"]), list(data["name"]), self._pools)
+
+
+class TorrentRow:
+    """Read-only view of one table row with TorrentInfo-compatible attributes"""
+
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table: "TorrentTable", row: int):
+        self._table = table
+        self._row = row
+
+    def __getattr__(self, name: str) -> Any:
+        return self._table.value(self._row, name)
+
+    def to_info(self) -> TorrentInfo:
+        return self._table.to_info(self._row)
+
+    def __repr__(self) -> str:
+        return f"TorrentRow(hash={self.hash!r}, name={self.name!r})"
+
+
+class TorrentTable:
+    """Columnar snapshot of a downloader's torrents"""
+
+    def __init__(
+        self,
+        columns: Dict[str, np.ndarray],
+        hashes: List[str],
+        names: List[str],
+        pools: Dict[str, StringPool],
+    ):
+        self._columns = columns
+        self.hashes = hashes
+        self.names = names
+        self.pools = pools
+        self.index: Dict[str, int] = {h: i for i, h in enumerate(hashes)}
+
+    # ===== 构建 =====
+
+    @classmethod
+    def from_rows(cls, rows: Iterable, extract: Callable[[Any], Dict[str, Any]]) -> "TorrentTable":
+        """由下载器原始 JSON 行直接构建，extract 为适配器的字段提取函数"""
+        builder = TorrentTableBuilder()
+        for row in rows:
+            builder.append(extract(row))
+        return builder.build()
+
+    @classmethod
+    def from_infos(cls, torrents: Iterable[TorrentInfo]) -> "TorrentTable":
+        builder = TorrentTableBuilder()
+        for torrent in torrents:
+            values = dict(torrent.__dict__)
+            for name in TIMESTAMP_COLUMNS:
+                value = values.get(name)
+                values[name] = value.timestamp() if value else None
+            builder.append(values)
+        return builder.build()
+
+    @classmethod
+    def empty(cls) -> "TorrentTable":
+        return TorrentTableBuilder().build()
+
+    # ===== 序列化 =====
+
+    def to_bytes(self) -> bytes:
+        """紧凑序列化：JSON 头（hash/name/驻留池/列元数据）+ 各列原始字节，整体 zlib 压缩"""
+        names = sorted(self._columns)
+        header = {
+            "v": SERIAL_VERSION,
+            "hashes": self.hashes,
+            "names": self.names,
+            "pools": {name: pool.values for name, pool in self.pools.items()},
+            "columns": [[name, self._columns[name].dtype.str, len(self._columns[name])] for name in names],
+        }
+        head = json.dumps(header, ensure_ascii=False).encode()
+        body = b"".join(np.ascontiguousarray(self._columns[name]).tobytes() for name in names)
+        return zlib.compress(len(head).to_bytes(4, "little") + head + body, 6)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "TorrentTable":
+        """还原 to_bytes() 的结果；格式版本或列不匹配时抛出 ValueError"""
+        raw = zlib.decompress(data)
+        size = int.from_bytes(raw[:4], "little")
+        header = json.loads(raw[4:4 + size])
+        if header.get("v") != SERIAL_VERSION:
+            raise ValueError(f"unsupported table format {header.get('v')}")
+
+        offset = 4 + size
+        columns: Dict[str, np.ndarray] = {}
+        for name, dtype, length in header["columns"]:
+            dtype = np.dtype(dtype)
+            columns[name] = np.frombuffer(raw, dtype=dtype, count=length, offset=offset).copy()
+            offset += dtype.itemsize * length
+        missing = set((*INT_COLUMNS, *FLOAT_COLUMNS, *POOLED_COLUMNS)) - set(columns)
+        if missing:
+            raise ValueError(f"missing columns: {sorted(missing)}")
+
+        pools: Dict[str, StringPool] = {}
+        for name in POOLED_COLUMNS:
+            pool = StringPool()
+            for value in header["pools"].get(name, []):
+                pool.intern(tuple(value) if name == "tags" else value)
+            pools[name] = pool
+        return cls(columns, header["hashes"], header["names"], pools)
+
+    # ===== 访问 =====
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def __iter__(self) -> Iterator[TorrentRow]:
+        for row in range(len(self.hashes)):
+            yield TorrentRow(self, row)
+
+    def __contains__(self, torrent_hash: str) -> bool:
+        return torrent_hash in self.index
+
+    def row(self, row: int) -> TorrentRow:
+        return TorrentRow(self, row)
+
+    def get(self, torrent_hash: str) -> Optional[TorrentRow]:
+        row = self.index.get(torrent_hash)
+        return TorrentRow(self, row) if row is not None else None
+
+    def column(self, name: str) -> np.ndarray:
+        """数值列数组；驻留列返回 int32 编码（配合 pools[name] 解码）"""
+        return self._columns[name]
+
+    def value(self, row: int, name: str) -> Any:
+        """读取单个字段，返回值类型与 TorrentInfo 一致"""
+        if name == "hash":
+            return self.hashes[row]
+        if name == "name":
+            return self.names[row]
+        column = self._columns.get(name)
+        if column is None:
+            raise AttributeError(name)
+        if name in POOLED_COLUMNS:
+            value = self.pools[name].values[column[row]]
+            return list(value) if name == "tags" else value
+        value = column[row]
+        if name in INT_COLUMNS:
+            return int(value)
+        if np.isnan(value):
+            return None
+        if name in TIMESTAMP_COLUMNS:
+            return datetime.fromtimestamp(value) if value else None
+        if name in OPTIONAL_INT_COLUMNS:
+            return int(value)
+        return float(value)
+
+    def to_info(self, row: int) -> TorrentInfo:
+        return TorrentInfo(**{name: self.value(row, name) for name in TorrentInfo.__dataclass_fields__})
+
+    def to_infos(self) -> List[TorrentInfo]:
+        return [self.to_info(row) for row in range(len(self.hashes))]
+
+    # ===== 向量化查询 =====
+
+    def isin(self, name: str, values: Iterable[Any]) -> np.ndarray:
+        """驻留列的成员判断，返回布尔掩码"""
+        pool = self.pools[name]
+        codes = [code for code in (pool.code(v) for v in values) if code is not None]
+        return np.isin(self._columns[name], np.asarray(codes, dtype=np.int32))
+
+    def mask(
+        self,
+        statuses: Optional[set] = None,
+        hashes: Optional[List[str]] = None,
+        category: Optional[str] = None,
+        tag: Optional[str] = None,
+    ) -> np.ndarray:
+        """与 BaseDownloader.filter_torrents 语义相同的过滤掩码"""
+        mask = np.ones(len(self.hashes), dtype=bool)
+        if statuses is not None:
+            mask &= self.isin("status", statuses)
+        if hashes is not None:
+            wanted = {h.lower() for h in hashes}
+            mask &= np.fromiter((h.lower() in wanted for h in self.hashes), dtype=bool, count=len(self.hashes))
+        if category is not None:
+            mask &= self.isin("category", [category])
+        if tag is not None:
+            mask &= self.isin("tags", [t for t in self.pools["tags"].values if tag in t])
+        return mask
+
+    def select(self, rows) -> "TorrentTable":
+        """按布尔掩码或行号数组取子表（共享驻留池）"""
+        rows = np.flatnonzero(rows) if getattr(rows, "dtype", None) == bool else np.asarray(rows, dtype=np.int64)
+        columns = {name: column[rows] for name, column in self._columns.items()}
+        return TorrentTable(
+            columns,
+            [self.hashes[i] for i in rows],
+            [self.names[i] for i in rows],
+            self.pools,
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """数组列占用的字节数（不含 hash/name 字符串）"""
+        return sum(column.nbytes for column in self._columns.values())
@@ -1,12 +1,19 @@
 import asyncio
 import base64
 import random
-from typing import List, Optional
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 import httpx
 
 from .base import BaseDownloader, TorrentInfo, DownloaderStats
+from .budget import RequestDeferred
+from .singleflight import coalesced
+from .table import TorrentTable, torrent_info_from_values
 from app.utils import get_logger
+from app.utils.bencode import parse_torrent
+from app.utils.fast_json import decode_response
 
 logger = get_logger('pt_manager.downloader.transmission')
 
@@ -16,6 +23,69 @@ RETRY_BASE_DELAY = 0.5
 RETRY_MAX_DELAY = 10.0
 RETRY_EXPONENTIAL_BASE = 2
 
+# torrent-get status -> 统一状态
+TR_STATUS_MAP = {
+    0: "paused",      # TR_STATUS_STOPPED
+    1: "queued",      # TR_STATUS_CHECK_WAIT
+    2: "checking",    # TR_STATUS_CHECK
+    3: "queued",      # TR_STATUS_DOWNLOAD_WAIT
+    4: "downloading", # TR_STATUS_DOWNLOAD
+    5: "queued",      # TR_STATUS_SEED_WAIT
+    6: "seeding",     # TR_STATUS_SEED
+}
+
+# get_stats 直接使用状态计数的最大表龄（秒），超过则先增量同步
+STATS_MAX_AGE = 2.0
+
+# 只读 RPC 方法（其余方法视为写操作，完成后清空合并的读结果）
+READ_METHODS = frozenset({"torrent-get", "session-get", "session-stats", "free-space"})
+
+# torrent-get 请求字段
+TORRENT_FIELDS = [
+    "id", "hashString", "name", "totalSize", "percentDone", "status",
+    "uploadedEver", "downloadedEver", "uploadRatio", "rateUpload",
+    "rateDownload", "seeders", "leechers", "peersGettingFromUs",
+    "peersSendingToUs", "trackers", "labels", "downloadDir",
+    "addedDate", "doneDate", "secondsSeeding", "error", "trackerStats",
+    "sizeWhenDone", "haveValid", "haveUnchecked"
+]
+
+# TorrentInfo 字段 -> torrent-get 字段
+FIELD_MAP = {
+    "hash": ("id", "hashString"),
+    "name": ("name",),
+    "size": ("totalSize",),
+    "progress": ("percentDone",),
+    "status": ("status", "error"),
+    "uploaded": ("uploadedEver",),
+    "downloaded": ("downloadedEver",),
+    "ratio": ("uploadRatio",),
+    "upload_speed": ("rateUpload",),
+    "download_speed": ("rateDownload",),
+    "seeders": ("trackerStats",),
+    "leechers": ("trackerStats",),
+    "seeds_connected": ("peersGettingFromUs",),
+    "peers_connected": ("peersSendingToUs",),
+    "tracker": ("trackers",),
+    "tags": ("labels",),
+    "save_path": ("downloadDir",),
+    "added_time": ("addedDate",),
+    "seeding_time": ("doneDate", "secondsSeeding", "status", "error"),
+    "next_announce_time": ("trackerStats",),
+    "announce_interval": ("trackerStats",),
+    "total_size": ("totalSize",),
+    "selected_size": ("sizeWhenDone", "totalSize"),
+    "completed": ("haveValid", "haveUnchecked"),
+    "completed_time": ("doneDate",),
+    "state": ("status", "error"),
+    "tracker_status": ("trackerStats",),
+}
+
+# 增量同步：定期全量对账间隔（秒）
+FULL_RECONCILE_INTERVAL = 300.0
+# recently-active 覆盖最近 60 秒的变化，距上次同步超过该值时改为全量
+RECENTLY_ACTIVE_WINDOW = 45.0
+
 
 class TransmissionClient(BaseDownloader):
     """Transmission RPC API client"""
@@ -25,6 +95,14 @@ class TransmissionClient(BaseDownloader):
         self._session: Optional[httpx.AsyncClient] = None
         self._session_id = ""
         self._rpc_path = "/transmission/rpc"
+        self._auth_lock = asyncio.Lock()
+        # 增量同步的本地种子表（id -> torrent-get 原始数据）
+        self._table: Dict[int, dict] = {}
+        self._table_lock = asyncio.Lock()
+        self._last_sync = 0.0
+        self._last_full_sync = 0.0
+        # 统一状态 -> 种子数，随种子表增量维护
+        self._status_counts: Counter = Counter()
 
     async def connect(self) -> bool:
         try:
@@ -32,13 +110,15 @@ class TransmissionClient(BaseDownloader):
             if self.username:
                 auth = (self.username, self.password)
 
-            self._session = httpx.AsyncClient(
-                base_url=self.base_url,
-                timeout=httpx.Timeout(30.0, connect=10.0),
-                verify=False,
-                auth=auth,
-                limits=httpx.Limits(max_keepalive_connections=5, max_connections=10)
-            )
+            # 复用已有的 keep-alive 会话，仅重新握手获取 session id
+            if self._session is None:
+                self._session = httpx.AsyncClient(
+                    base_url=self.base_url,
+                    timeout=httpx.Timeout(30.0, connect=10.0),
+                    verify=False,
+                    auth=auth,
+                    limits=httpx.Limits(max_keepalive_connections=5, max_connections=10)
+                )
 
             # Get session ID (Transmission requires X-Transmission-Session-Id header)
             response = await self._session.post(self._rpc_path, json={})
@@ -46,6 +126,7 @@ class TransmissionClient(BaseDownloader):
             if response.status_code == 409:
                 # Get session ID from header
                 self._session_id = response.headers.get("X-Transmission-Session-Id", "")
+                self._last_full_sync = 0.0
                 if self._session_id:
                     # Verify connection
                     result = await self._rpc_call("session-get")
@@ -63,43 +144,94 @@ class TransmissionClient(BaseDownloader):
 
     async def disconnect(self):
         if self._session:
-            await self._session.aclose()
+            try:
+                await self._session.aclose()
+            except Exception:
+                pass
             self._session = None
 
-    async def _rpc_call(self, method: str, arguments: dict = None, retries: int = MAX_RETRIES) -> Optional[dict]:
+    async def _reauthenticate(self, stale_session_id: str) -> bool:
+        """401/403 时重新握手；并发请求只触发一次"""
+        async with self._auth_lock:
+            if self._session is not None and self._session_id != stale_session_id:
+                return True
+            logger.warning("Transmission session rejected, reconnecting...")
+            return await self.connect()
+
+    async def _rpc_call(
+        self, method: str, arguments: dict = None, retries: int = MAX_RETRIES, bulk: bool = False
+    ) -> Optional[dict]:
+        """RPC 调用；先按优先级取令牌（READ 排队超时抛出 RequestDeferred），写方法完成后丢弃合并的读结果
+
+        bulk=True 用于全量列表/添加种子，超时不低于默认值
+        """
+        if not await self.budget.acquire():
+            raise RequestDeferred(f"Transmission {self.host}: {method} deferred")
+        try:
+            return await self._send_rpc(method, arguments, retries, bulk)
+        finally:
+            if method not in READ_METHODS:
+                self._flights.invalidate()
+
+    async def _send_rpc(
+        self, method: str, arguments: dict = None, retries: int = MAX_RETRIES, bulk: bool = False
+    ) -> Optional[dict]:
         if not self._session:
+            if not await self._reauthenticate(self._session_id):
+                return None
+
+        # 熔断冷却期内直接跳过
+        if not self.health.allow_request():
             return None
 
         last_error = None
         for attempt in range(retries):
+            if attempt and not self.health.available:
+                break
             try:
                 payload = {"method": method}
                 if arguments:
                     payload["arguments"] = arguments
 
+                started = time.monotonic()
                 response = await self._session.post(
                     self._rpc_path,
                     json=payload,
-                    headers={"X-Transmission-Session-Id": self._session_id}
+                    headers={"X-Transmission-Session-Id": self._session_id},
+                    timeout=self.request_timeout(bulk),
                 )
 
                 if response.status_code == 409:
                     # Session ID expired, get new one
                     self._session_id = response.headers.get("X-Transmission-Session-Id", "")
+                    # 守护进程可能已重启，种子 id 会重新分配，下次同步做全量对账
+                    self._last_full_sync = 0.0
+                    started = time.monotonic()
                     response = await self._session.post(
                         self._rpc_path,
                         json=payload,
-                        headers={"X-Transmission-Session-Id": self._session_id}
+                        headers={"X-Transmission-Session-Id": self._session_id},
+                        timeout=self.request_timeout(bulk),
                     )
 
+                if response.status_code >= 500:
+                    self.health.record_failure(f"HTTP {response.status_code}")
+                else:
+                    self.health.record_success(time.monotonic() - started)
+
                 if response.status_code == 200:
-                    data = response.json()
+                    data = await decode_response(response)
                     if data.get("result") == "success":
                         return data.get("arguments", {})
 
+                if response.status_code in (401, 403) and method != "session-get":
+                    if attempt < retries - 1 and await self._reauthenticate(self._session_id):
+                        continue
+
                 return None
-            except (httpx.RemoteProtocolError, httpx.ConnectError, httpx.ReadTimeout) as e:
+            except (httpx.RemoteProtocolError, httpx.ConnectError, httpx.TimeoutException) as e:
                 last_error = e
+                self.health.record_failure(str(e) or type(e).__name__)
                 logger.warning(f"Transmission RPC error (attempt {attempt + 1}/{retries}): {e}")
                 if attempt < retries - 1:
                     delay = min(
@@ -115,31 +247,28 @@ class TransmissionClient(BaseDownloader):
             logger.error(f"Transmission RPC failed after {retries} retries: {last_error}")
         return None
 
+    @staticmethod
+    def _status_of(data: dict) -> str:
+        """Unified status of a torrent-get row"""
+        # Handle error states
+        if data.get("error", 0) > 0:
+            return "error"
+        return TR_STATUS_MAP.get(data.get("status", 0), "error")
+
     def _parse_torrent(self, data: dict) -> TorrentInfo:
         """Parse Transmission torrent data to TorrentInfo"""
-        status_map = {
-            0: "paused",      # TR_STATUS_STOPPED
-            1: "queued",      # TR_STATUS_CHECK_WAIT
-            2: "checking",    # TR_STATUS_CHECK
-            3: "queued",      # TR_STATUS_DOWNLOAD_WAIT
-            4: "downloading", # TR_STATUS_DOWNLOAD
-            5: "queued",      # TR_STATUS_SEED_WAIT
-            6: "seeding",     # TR_STATUS_SEED
-        }
-
-        status_code = data.get("status", 0)
-        status = status_map.get(status_code, "error")
+        return torrent_info_from_values(self._torrent_values(data))
 
-        # Handle error states
-        if data.get("error", 0) > 0:
-            status = "error"
+    def _torrent_values(self, data: dict) -> Dict[str, Any]:
+        """Extract TorrentInfo field values (times as unix timestamps)"""
+        status = self._status_of(data)
 
         added_date = data.get("addedDate", 0)
-        added_time = datetime.fromtimestamp(added_date) if added_date else None
+        added_time = added_date or None
 
         # Calculate seeding time
         done_date = data.get("doneDate", 0)
-        completed_time = datetime.fromtimestamp(done_date) if done_date else None
+        completed_time = done_date or None
         if done_date > 0 and status == "seeding":
             seeding_time = int(datetime.now().timestamp() - done_date)
         else:
@@ -174,7 +303,7 @@ class TransmissionClient(BaseDownloader):
         total_size = data.get("totalSize", 0)
         selected_size = data.get("sizeWhenDone", total_size)
         completed = data.get("haveValid", 0) + data.get("haveUnchecked", 0)
-        return TorrentInfo(
+        return dict(
             hash=data.get("hashString", ""),
             name=data.get("name", ""),
             size=data.get("totalSize", 0),
@@ -235,37 +364,118 @@ class TransmissionClient(BaseDownloader):
             return None
         return min(intervals)
 
-    async def get_torrents(self) -> List[TorrentInfo]:
-        fields = [
-            "id", "hashString", "name", "totalSize", "percentDone", "status",
-            "uploadedEver", "downloadedEver", "uploadRatio", "rateUpload",
-            "rateDownload", "seeders", "leechers", "peersGettingFromUs",
-            "peersSendingToUs", "trackers", "labels", "downloadDir",
-            "addedDate", "doneDate", "secondsSeeding", "error", "trackerStats",
-            "sizeWhenDone", "haveValid", "haveUnchecked"
-        ]
-
-        result = await self._rpc_call("torrent-get", {"fields": fields})
-        if not result:
+    def reset_table(self):
+        """丢弃本地种子表，下一次同步为全量"""
+        self._table.clear()
+        self._status_counts.clear()
+        self._last_sync = 0.0
+        self._last_full_sync = 0.0
+
+    async def sync_torrents(self, full: bool = False) -> bool:
+        """同步本地种子表
+
+        平时只请求 ids="recently-active"（最近变化的种子 + removed 列表），
+        每 FULL_RECONCILE_INTERVAL 秒或间隔过长时做一次全量对账。
+        """
+        async with self._table_lock:
+            now = time.monotonic()
+            need_full = (
+                full
+                or not self._last_full_sync
+                or now - self._last_full_sync >= FULL_RECONCILE_INTERVAL
+                or now - self._last_sync >= RECENTLY_ACTIVE_WINDOW
+            )
+
+            arguments = {"fields": TORRENT_FIELDS}
+            if not need_full:
+                arguments["ids"] = "recently-active"
+
+            result = await self._rpc_call("torrent-get", arguments, bulk=need_full)
+            if result is None:
+                return False
+
+            torrents = result.get("torrents", [])
+            counts = self._status_counts
+            if need_full:
+                self._table = {t["id"]: t for t in torrents if "id" in t}
+                self._status_counts = Counter(self._status_of(t) for t in self._table.values())
+                self._last_full_sync = now
+            else:
+                for torrent in torrents:
+                    if "id" in torrent:
+                        previous = self._table.get(torrent["id"])
+                        if previous is not None:
+                            counts[self._status_of(previous)] -= 1
+                        counts[self._status_of(torrent)] += 1
+                        self._table[torrent["id"]] = torrent
+                for torrent_id in result.get("removed", []):
+                    previous = self._table.pop(torrent_id, None)
+                    if previous is not None:
+                        counts[self._status_of(previous)] -= 1
+            self._last_sync = now
+            return True
+
+    @coalesced
+    async def get_torrents(
+        self,
+        with_reannounce: bool = True,
+        fields: Optional[List[str]] = None,
+        status_filter=None,
+        hashes: Optional[List[str]] = None,
+        category: Optional[str] = None,
+        tag: Optional[str] = None,
+    ) -> List[TorrentInfo]:
+        """获取种子
+
+        增量种子表已建立时直接使用（增量同步最便宜）；否则 hashes/fields
+        映射为 torrent-get 的 ids/fields 直接请求。状态/标签过滤在本地完成（RPC 不支持）。
+        trackerStats 已包含汇报信息，with_reannounce 无需额外请求。
+        """
+        if hashes is not None and not hashes:
             return []
 
-        torrents = result.get("torrents", [])
-        return [self._parse_torrent(t) for t in torrents]
+        fields = self.query_fields(fields, status_filter, category, tag)
+        use_table = bool(self._last_full_sync) or (hashes is None and fields is None)
+        if not use_table:
+            arguments = {"fields": self.native_fields(fields, FIELD_MAP, TORRENT_FIELDS)}
+            if hashes is not None:
+                arguments["ids"] = list(hashes)
+            result = await self._rpc_call("torrent-get", arguments, bulk=hashes is None)
+            if not result:
+                return []
+            rows = result.get("torrents", [])
+        else:
+            if not await self.sync_torrents():
+                return []
+            rows = self._table.values()
 
-    async def get_torrent(self, torrent_hash: str) -> Optional[TorrentInfo]:
-        fields = [
-            "id", "hashString", "name", "totalSize", "percentDone", "status",
-            "uploadedEver", "downloadedEver", "uploadRatio", "rateUpload",
-            "rateDownload", "seeders", "leechers", "peersGettingFromUs",
-            "peersSendingToUs", "trackers", "labels", "downloadDir",
-            "addedDate", "doneDate", "secondsSeeding", "error", "trackerStats",
-            "sizeWhenDone", "haveValid", "haveUnchecked"
-        ]
+        # 种子做种时间等字段依赖当前时间，每次从原始数据重新解析
+        torrents = [self._parse_torrent(t) for t in rows]
+        return self.filter_torrents(torrents, status_filter, hashes, category, tag)
 
+    @coalesced
+    async def get_torrent_table(
+        self,
+        with_reannounce: bool = False,
+        fields: Optional[List[str]] = None,
+        status_filter=None,
+        hashes: Optional[List[str]] = None,
+        category: Optional[str] = None,
+        tag: Optional[str] = None,
+    ) -> TorrentTable:
+        """直接由增量种子表的原始行构建列式表"""
+        if hashes is not None and not hashes:
+            return TorrentTable.empty()
+        if not await self.sync_torrents():
+            return TorrentTable.empty()
+        table = TorrentTable.from_rows(list(self._table.values()), self._torrent_values)
+        return self.filter_table(table, status_filter, hashes, category, tag)
+
+    async def get_torrent(self, torrent_hash: str) -> Optional[TorrentInfo]:
         # Transmission uses ID or hash
         result = await self._rpc_call("torrent-get", {
             "ids": [torrent_hash],
-            "fields": fields
+            "fields": TORRENT_FIELDS
         })
 
         if not result:
@@ -300,7 +510,7 @@ class TransmissionClient(BaseDownloader):
         if tags:
             arguments["labels"] = tags
 
-        result = await self._rpc_call("torrent-add", arguments)
+        result = await self._rpc_call("torrent-add", arguments, bulk=True)
         if not result:
             return None
 
@@ -308,6 +518,9 @@ class TransmissionClient(BaseDownloader):
         torrent_added = result.get("torrent-added") or result.get("torrent-duplicate")
         if torrent_added:
             torrent_hash = torrent_added.get("hashString")
+            if not torrent_hash and isinstance(torrent, bytes):
+                meta = parse_torrent(torrent)
+                torrent_hash = meta.info_hash if meta else None
 
             # Set speed limits if specified
             if torrent_hash:
@@ -358,9 +571,59 @@ class TransmissionClient(BaseDownloader):
         })
         return result is not None
 
+    # ===== 批量操作：ids 使用列表 =====
+
+    async def _rpc_ids(self, method: str, torrent_hashes: List[str], **arguments) -> bool:
+        """对一批种子调用同一 RPC 方法，按 BATCH_CHUNK_SIZE 分块"""
+        ok = True
+        for chunk in self.chunk_hashes(torrent_hashes):
+            result = await self._rpc_call(method, {"ids": chunk, **arguments})
+            ok = ok and result is not None
+        return ok
+
+    async def remove_torrents(self, torrent_hashes: List[str], delete_files: bool = False) -> bool:
+        return await self._rpc_ids(
+            "torrent-remove", torrent_hashes, **{"delete-local-data": delete_files}
+        )
+
+    async def pause_torrents(self, torrent_hashes: List[str]) -> bool:
+        return await self._rpc_ids("torrent-stop", torrent_hashes)
+
+    async def resume_torrents(self, torrent_hashes: List[str]) -> bool:
+        return await self._rpc_ids("torrent-start", torrent_hashes)
+
+    async def reannounce_torrents(self, torrent_hashes: List[str]) -> bool:
+        return await self._rpc_ids("torrent-reannounce", torrent_hashes)
+
+    async def set_torrents_upload_limit(self, limits: Dict[str, int]) -> bool:
+        ok = True
+        for limit, torrent_hashes in self.group_by_limit(limits).items():
+            ok = await self._rpc_ids(
+                "torrent-set",
+                torrent_hashes,
+                uploadLimited=limit > 0,
+                uploadLimit=limit // 1024 if limit > 0 else 0
+            ) and ok
+        return ok
+
+    async def set_torrents_download_limit(self, limits: Dict[str, int]) -> bool:
+        ok = True
+        for limit, torrent_hashes in self.group_by_limit(limits).items():
+            ok = await self._rpc_ids(
+                "torrent-set",
+                torrent_hashes,
+                downloadLimited=limit > 0,
+                downloadLimit=limit // 1024 if limit > 0 else 0
+            ) and ok
+        return ok
+
+    @coalesced
     async def get_stats(self) -> DownloaderStats:
+        """全局数据取自 session-stats，下载/做种数取自增量种子表维护的状态计数"""
         session = await self._rpc_call("session-stats")
-        torrents = await self.get_torrents()
+        if not self._last_full_sync or time.monotonic() - self._last_sync > STATS_MAX_AGE:
+            await self.sync_torrents()
+        total = len(self._table)
 
         if not session:
             return DownloaderStats(
@@ -369,14 +632,14 @@ class TransmissionClient(BaseDownloader):
                 total_uploaded=0,
                 total_downloaded=0,
                 free_space=0,
-                total_torrents=len(torrents),
+                total_torrents=total,
                 active_torrents=0,
                 downloading_torrents=0,
                 seeding_torrents=0,
             )
 
-        downloading = sum(1 for t in torrents if t.status == "downloading")
-        seeding = sum(1 for t in torrents if t.status == "seeding")
+        downloading = self._status_counts.get("downloading", 0)
+        seeding = self._status_counts.get("seeding", 0)
         active = downloading + seeding
 
         cumulative = session.get("cumulative-stats", {})
@@ -387,12 +650,13 @@ class TransmissionClient(BaseDownloader):
             total_uploaded=cumulative.get("uploadedBytes", 0),
             total_downloaded=cumulative.get("downloadedBytes", 0),
             free_space=await self.get_free_space(),
-            total_torrents=len(torrents),
+            total_torrents=session.get("torrentCount", total),
             active_torrents=active,
             downloading_torrents=downloading,
             seeding_torrents=seeding,
         )
 
+    @coalesced
     async def get_free_space(self, path: Optional[str] = None) -> int:
         session = await self._rpc_call("session-get")
         if not session:
@@ -539,7 +539,7 @@ class NetcupMonitorService:
         at all, so the dynamic speed limiter won't interfere.
         """
         from app.models import Downloader
-        from app.services.downloader import create_downloader
+        from app.services.downloader.context import downloader_client
 
         try:
             async with async_session_maker() as session:
@@ -552,13 +552,11 @@ class NetcupMonitorService:
                     logger.error(f"Downloader {server.downloader_id} not found for server {server.name}")
                     return False
 
-                client = create_downloader(downloader)
+            async with downloader_client(downloader) as client:
                 if not client:
                     logger.error(f"Failed to get client for downloader {downloader.name}")
                     return False
 
-                await client.connect()
-
                 if action == "stop":
                     # Pause all torrents to stop traffic completely
                     await client.pause_all_torrents()
@@ -9,6 +9,10 @@ import httpx
 from app.config import settings
 from app.database import async_session_maker
 from app.models import WebhookEndpoint
+from app.services.downloader.events import (
+    EVENT_ADDED, EVENT_COMPLETED, EVENT_REMOVED, EVENT_SPEED_THRESHOLD,
+    EVENT_STATE_CHANGED, EVENT_TRACKER_ERROR, TorrentEvent,
+)
 from app.services.webhooks import deliver_webhook
 from app.utils import get_logger
 
@@ -397,3 +401,41 @@ async def notify_low_disk_space(downloader_name: str, free_space_bytes: float, t
     if not notifier.is_configured:
         return False
     return await notifier.send_message(message)
+
+
+# 转发给 webhook 的种子事件；只发送给 events 中显式列出该名称的 webhook，
+# 避免未配置过滤的 webhook 突然收到大量种子事件
+TORRENT_WEBHOOK_EVENTS = {
+    EVENT_ADDED: "torrent_added",
+    EVENT_REMOVED: "torrent_removed",
+    EVENT_STATE_CHANGED: "torrent_state_changed",
+    EVENT_COMPLETED: "torrent_completed",
+    EVENT_TRACKER_ERROR: "torrent_tracker_error",
+    EVENT_SPEED_THRESHOLD: "torrent_speed_threshold",
+}
+
+
+async def notify_torrent_events(events: List[TorrentEvent]) -> None:
+    """Deliver a batch of torrent events to subscribed webhooks (one request per event type and downloader)"""
+    grouped: dict = {}
+    for event in events:
+        name = TORRENT_WEBHOOK_EVENTS.get(event.type)
+        if name:
+            torrent = {"hash": event.hash}
+            torrent.update(
+                (k, v.isoformat() if isinstance(v, datetime) else v) for k, v in event.data.items()
+            )
+            grouped.setdefault((name, event.downloader_id), []).append(torrent)
+    if not grouped:
+        return
+
+    async with async_session_maker() as session:
+        result = await session.execute(
+            select(WebhookEndpoint).where(WebhookEndpoint.enabled == True)
+        )
+        webhooks = [w for w in result.scalars().all() if w.events]
+
+    for webhook in webhooks:
+        for (name, downloader_id), torrents in grouped.items():
+            if name in webhook.events:
+                await deliver_webhook(webhook, name, {"downloader_id": downloader_id, "torrents": torrents})
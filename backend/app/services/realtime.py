@@ -10,7 +10,12 @@ from sqlalchemy import select
 
 from app.database import async_session_maker
 from app.models import Downloader, LogRecord
-from app.services.downloader.context import downloader_client
+from app.services.downloader.budget import PRIORITY_READ, request_priority
+from app.services.downloader.events import (
+    EVENT_ADDED, EVENT_CHANGED, EVENT_REMOVED, EventSubscription, event_bus,
+)
+from app.services.downloader.health import health_registry
+from app.services.downloader.snapshots import snapshot_store
 from app.services.speed_limiter import SpeedLimiterService
 from app.utils import get_logger
 from app.api.dashboard import _fetch_downloader_stats, _fetch_downloader_status
@@ -18,6 +23,9 @@ from app.api.dashboard import get_services_status as services_status_handler
 
 logger = get_logger("pt_manager.realtime")
 
+# 种子变化推送可接受的快照最大年龄（秒），与推送间隔一致
+TORRENT_UPDATE_MAX_AGE = 5.0
+
 
 class RealtimeConnectionManager:
     def __init__(self) -> None:
@@ -54,20 +62,30 @@ class RealtimeBroadcaster:
         self._task: asyncio.Task | None = None
         self._running = False
         self._last_log_id = 0
-        self._last_torrent_state: dict[int, dict[str, str]] = {}
+        # 种子变化事件订阅（见 downloader/events.py），推送循环启动时创建
+        self._torrent_events: EventSubscription | None = None
         self._speed_limiter_cache: SpeedLimiterService | None = None
 
     async def start(self) -> None:
         if self._task and not self._task.done():
             return
         self._running = True
-        self._task = asyncio.create_task(self._run())
+        if self._torrent_events is None:
+            self._torrent_events = event_bus.subscribe(
+                "realtime", types=(EVENT_ADDED, EVENT_CHANGED, EVENT_REMOVED), maxsize=64,
+            )
+        # 推送循环的下载器请求排在限速和操作之后
+        with request_priority(PRIORITY_READ):
+            self._task = asyncio.create_task(self._run())
 
     async def stop(self) -> None:
         self._running = False
         if self._task:
             self._task.cancel()
             self._task = None
+        if self._torrent_events is not None:
+            self._torrent_events.close()
+            self._torrent_events = None
 
     async def _run(self) -> None:
         next_dashboard = 0.0
@@ -180,6 +198,7 @@ class RealtimeBroadcaster:
                     "download_speed": 0,
                     "free_space": 0,
                     "total_torrents": 0,
+                    "health": health_registry.snapshot(dl.id),
                 })
 
         await self.manager.broadcast({
@@ -225,48 +244,36 @@ class RealtimeBroadcaster:
         result = await db.execute(select(Downloader).where(Downloader.enabled == True))
         downloaders = result.scalars().all()
 
+        # 快照过旧时触发刷新，刷新产生的变化事件随即进入订阅队列
         for downloader in downloaders:
             try:
-                async with downloader_client(downloader) as client:
-                    if not client:
-                        continue
-                    torrents = await client.get_torrents()
+                await snapshot_store.get(downloader, max_age=TORRENT_UPDATE_MAX_AGE)
             except Exception:
                 continue
 
-            current_state: dict[str, str] = {}
-            changes = []
-            for torrent in torrents:
-                signature = f"{torrent.status}:{torrent.progress:.4f}:{torrent.upload_speed}:{torrent.download_speed}:{torrent.ratio:.3f}"
-                current_state[torrent.hash] = signature
-                if self._last_torrent_state.get(downloader.id, {}).get(torrent.hash) != signature:
-                    changes.append({
-                        "hash": torrent.hash,
-                        "name": torrent.name,
-                        "status": torrent.status,
-                        "progress": torrent.progress,
-                        "ratio": torrent.ratio,
-                        "upload_speed": torrent.upload_speed,
-                        "download_speed": torrent.download_speed,
-                        "seeding_time": torrent.seeding_time,
-                        "size": torrent.size,
-                    })
-
-            removed = []
-            last_state = self._last_torrent_state.get(downloader.id, {})
-            for torrent_hash in last_state:
-                if torrent_hash not in current_state:
-                    removed.append(torrent_hash)
-
-            if changes or removed:
+        if self._torrent_events is None:
+            return
+        enabled = {d.id for d in downloaders}
+        grouped: dict[int, dict[str, dict]] = {}
+        for event in self._torrent_events.drain():
+            if event.downloader_id not in enabled:
+                continue
+            entry = grouped.setdefault(event.downloader_id, {"changes": {}, "removed": {}})
+            if event.type == EVENT_REMOVED:
+                entry["changes"].pop(event.hash, None)
+                entry["removed"][event.hash] = True
+            else:
+                entry["removed"].pop(event.hash, None)
+                entry["changes"][event.hash] = {"hash": event.hash, **event.data}
+
+        for downloader_id, entry in grouped.items():
+            if entry["changes"] or entry["removed"]:
                 await self.manager.broadcast({
                     "type": "torrent_changes",
                     "payload": {
-                        "downloader_id": downloader.id,
-                        "changes": changes,
-                        "removed": removed,
+                        "downloader_id": downloader_id,
+                        "changes": list(entry["changes"].values()),
+                        "removed": list(entry["removed"]),
                         "timestamp": datetime.utcnow().isoformat(),
                     },
                 })
-
-            self._last_torrent_state[downloader.id] = current_state
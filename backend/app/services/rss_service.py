@@ -11,7 +11,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import RssFeed, RssRecord, Downloader, DownloaderType
 from app.config import settings
 from app.services.downloader.context import downloader_client
-from app.utils import parse_size, get_logger
+from app.utils import parse_size, get_logger, get_tracker_domain
+from app.utils.bencode import parse_torrent
 
 logger = get_logger('pt_manager.rss')
 
@@ -735,7 +736,11 @@ class RssService:
                             downloader,
                             feed,
                             http_client=http_client,
+                            info=info,
                         )
+                        # 种子文件解析出的哈希和大小回填到记录
+                        record.torrent_hash = info['torrent_hash']
+                        record.size = info['size']
                         if success:
                             record.downloaded = True
                             record.download_time = datetime.utcnow()
@@ -744,7 +749,7 @@ class RssService:
                             logger.info(f"Successfully added torrent: {info['title'][:50]}...")
                         else:
                             logger.warning(f"Failed to add torrent: {info['title'][:50]}...")
-                            record.skip_reason = "Failed to add to downloader"
+                            record.skip_reason = info.get('skip_reason') or "Failed to add to downloader"
                     else:
                         logger.warning(f"No downloader available for torrent: {info['title'][:50]}...")
                         record.skip_reason = "No downloader available"
@@ -775,8 +780,13 @@ class RssService:
         downloader: Downloader,
         feed: RssFeed,
         http_client: Optional[httpx.AsyncClient] = None,
+        info: Optional[dict] = None,
     ) -> bool:
-        """Add torrent to downloader"""
+        """Add torrent to downloader
+
+        传入 info 时用种子文件元数据回填 torrent_hash / size；RSS 中未给出大小的条目
+        在这里补做大小过滤，未通过时写入 info['skip_reason'] 并返回 False。
+        """
         try:
             async with downloader_client(downloader) as client:
                 if not client:
@@ -812,6 +822,23 @@ class RssService:
                         logger.error(f"Failed to download torrent file from: {torrent_link[:80]}...")
                         return False
 
+                    meta = parse_torrent(torrent_data)
+                    if meta and info is not None:
+                        size_known = info.get('size', 0) > 0
+                        info['torrent_hash'] = meta.info_hash
+                        if not size_known:
+                            info['size'] = meta.total_size
+                            passed, skip_reason = self.filter_torrent(info, feed)
+                            if not passed:
+                                logger.info(f"Skipped after parsing torrent file: {skip_reason}")
+                                info['skip_reason'] = skip_reason
+                                return False
+                    if meta:
+                        logger.debug(
+                            f"Torrent file: {meta.name[:50]} | {meta.total_size} bytes | "
+                            f"tracker: {get_tracker_domain(meta.tracker) or '-'}"
+                        )
+
                 upload_limit = 0
                 download_limit = 0
 
@@ -12,11 +12,16 @@ qBit Smart Limit - 完整移植版
 """
 
 import asyncio
+import base64
+import heapq
 import time
 import json
 import re
-from datetime import datetime, timezone
-from typing import Dict, List, Optional, Tuple, Any, Deque
+import zlib
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
 from collections import deque
 from dataclasses import dataclass, field
 
@@ -26,13 +31,20 @@ try:
 except Exception:  # pragma: no cover
     ZoneInfo = None  # type: ignore
 import httpx
+import numpy as np
 from bs4 import BeautifulSoup
-from sqlalchemy import select, update
+from sqlalchemy import delete, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import SpeedLimitConfig, SpeedLimitSite, SpeedLimitRecord, Downloader, SystemSettings
+from app.config import settings
+from app.models import SpeedLimitConfig, SpeedLimitSite, SpeedLimitRecord, SpeedLimitState, Downloader, SystemSettings
 from app.services.downloader import create_downloader, TorrentInfo
+from app.services.downloader.budget import (
+    PRIORITY_ACTION, RequestDeferred, current_priority, request_priority,
+)
 from app.services.downloader.context import downloader_client
+from app.services.downloader.snapshots import snapshot_store
+from app.services.warm_start import SPEED_LIMIT_STATUS_KEY, load_blobs, pack_json, save_blob, unpack_json
 from app.utils import get_tracker_domain, get_logger
 
 logger = get_logger('pt_manager.speed_limit')
@@ -43,9 +55,21 @@ logger = get_logger('pt_manager.speed_limit')
 # ════════════════════════════════════════════════════════════════════════════════
 _status_cache: Dict[str, Any] = {}
 _status_cache_time: float = 0
+# 各下载器上一次成功获取的状态（超时或请求被推迟时沿用）
+_status_parts: Dict[int, Dict[str, Any]] = {}
 STATUS_CACHE_TTL: float = 2.0  # 状态缓存有效期（秒），2秒快速刷新
 _cache_lock: asyncio.Lock = asyncio.Lock()  # 缓存访问锁，防止竞态条件
 
+# 预热：启动后首次请求先返回数据库中的旧状态（带 stale_since），后台刷新
+_status_warm_loaded: bool = False
+_status_persisted_at: float = 0  # 上次写入数据库的时间
+_status_refresh_task: Optional[asyncio.Task] = None
+
+# 旧版整块 JSON 状态是否已迁移到 speed_limit_states（每个进程检查一次）
+_legacy_state_migrated: bool = False
+# 按 hash 批量查询状态时每批的数量（SQLite 变量数限制）
+STATE_QUERY_CHUNK: int = 500
+
 # TID缓存 (hash -> tid)，避免频繁访问PT站点
 # 种子的TID不会变化，所以可以永久缓存
 _tid_cache: Dict[str, str] = {}
@@ -247,6 +271,26 @@ class C:
     }
     DYNAMIC_INTERVAL_MIN = 0.2    # 最小间隔
     DYNAMIC_INTERVAL_MAX = 5.0    # 最大间隔
+    # 全量扫描间隔：发现新种子、清理已停止的种子；其余轮次只查询到期的种子
+    FULL_SCAN_INTERVAL = 10.0
+    # 每轮等待单个下载器的上限（秒），超时的下载器在后台继续，不阻塞本轮
+    DOWNLOADER_TICK_DEADLINE = 1.0
+    # 刷新状态时单个下载器的超时（秒）
+    STATUS_DOWNLOADER_TIMEOUT = 10.0
+    # 到期种子数达到该值时用批量控制器（BatchLimitEngine）计算限速，否则逐个计算
+    BATCH_MIN_SIZE = 32
+    # 每轮每个下载器最多为汇报时间未知的种子单独查询汇报信息的次数（冷缓存时每次约 2 个请求），
+    # 其余种子本轮使用已保存状态或估算，后续轮次补齐，避免长时间占满请求令牌桶
+    ANNOUNCE_FETCH_PER_TICK = 20
+    # 种子状态写入数据库的间隔（秒），其间只写刚进入新周期的种子
+    STATE_SAVE_INTERVAL = 30.0
+    # 全量扫描中超过该时间（秒）未出现的种子（已删除、移走或暂停），状态写入数据库后移出内存
+    STATE_EVICT_GRACE = 1800.0
+    # 内存中最多保留的种子状态数，超出时淘汰最久未出现的种子
+    MAX_STATES = 20000
+    # 数据库中超过该天数未更新的种子状态被删除，每 STATE_PURGE_INTERVAL 秒检查一次
+    STATE_RETENTION_DAYS = 14
+    STATE_PURGE_INTERVAL = 3600.0
 
 
 # ════════════════════════════════════════════════════════════════════════════════
@@ -492,27 +536,84 @@ class ExtendedKalman:
 
 
 class MultiWindowSpeedTracker:
-    """多窗口速度追踪器 - 使用简单锁保护数据"""
+    """多窗口速度追踪器 - 定长环形缓冲 + 累计和
+
+    采样按时间顺序写入定长环形数组，同时记录到每个采样为止的累计速度和。
+    窗口起点用二分查找定位（环形数组最多分两段，各自有序），窗口内的和、
+    平均值和前后半段趋势都由两个累计和相减得到，不再逐个遍历采样。
+    """
+
+    CAPACITY = 1200
+    # 累计和超过该值时整体减去基数，避免浮点精度损失
+    REBASE_THRESHOLD = 1e14
 
     def __init__(self):
-        self._samples: Deque[Tuple[float, float]] = deque(maxlen=1200)
+        self._times = array('d', bytes(8 * self.CAPACITY))
+        self._speeds = array('d', bytes(8 * self.CAPACITY))
+        self._cums = array('d', bytes(8 * self.CAPACITY))
+        self._head = 0     # 最旧采样的位置
+        self._count = 0
+        self._total = 0.0  # 全部已写入采样的累计和
+
+    def __len__(self) -> int:
+        return self._count
 
     def record(self, now: float, speed: float):
         """记录速度采样"""
-        self._samples.append((now, speed))
+        if self._count < self.CAPACITY:
+            pos = (self._head + self._count) % self.CAPACITY
+            self._count += 1
+        else:
+            pos = self._head
+            self._head = (self._head + 1) % self.CAPACITY
+        self._total += speed
+        self._times[pos] = now
+        self._speeds[pos] = speed
+        self._cums[pos] = self._total
+        if self._total > self.REBASE_THRESHOLD:
+            self._rebase()
+
+    def _rebase(self):
+        base = self._before(0)
+        for i in range(self.CAPACITY):
+            self._cums[i] -= base
+        self._total -= base
+
+    def _pos(self, k: int) -> int:
+        """逻辑序号（0 为最旧）-> 数组位置"""
+        return (self._head + k) % self.CAPACITY
+
+    def _before(self, k: int) -> float:
+        """逻辑序号 k 之前所有采样的累计和"""
+        if k >= self._count:
+            return self._total
+        pos = self._pos(k)
+        return self._cums[pos] - self._speeds[pos]
+
+    def _window_start(self, now: float, window: float) -> int:
+        """第一个满足 now - t <= window 的采样的逻辑序号"""
+        threshold = now - window
+        head, count = self._head, self._count
+        tail = head + count
+        if tail <= self.CAPACITY:
+            return bisect_left(self._times, threshold, head, tail) - head
+        # 已回绕：[head, CAPACITY) 在前，[0, tail - CAPACITY) 在后
+        if threshold <= self._times[self.CAPACITY - 1]:
+            return bisect_left(self._times, threshold, head, self.CAPACITY) - head
+        return self.CAPACITY - head + bisect_left(self._times, threshold, 0, tail - self.CAPACITY)
 
     def get_weighted_avg(self, now: float, phase: str) -> float:
         """获取加权平均速度"""
         weights = C.WINDOW_WEIGHTS.get(phase, C.WINDOW_WEIGHTS['steady'])
-        samples = list(self._samples)
 
         total_weight = 0.0
         weighted_sum = 0.0
 
         for window in C.SPEED_WINDOWS:
-            win_samples = [s for t, s in samples if now - t <= window]
-            if win_samples:
-                avg = sum(win_samples) / len(win_samples)
+            start = self._window_start(now, window)
+            n = self._count - start
+            if n > 0:
+                avg = (self._total - self._before(start)) / n
                 w = weights.get(window, 0.25)
                 weighted_sum += avg * w
                 total_weight += w
@@ -521,24 +622,46 @@ class MultiWindowSpeedTracker:
 
     def get_recent_trend(self, now: float, window: int = 10) -> float:
         """获取最近的速度趋势"""
-        samples = [(t, s) for t, s in self._samples if now - t <= window]
-
-        if len(samples) < 5:
+        start = self._window_start(now, window)
+        n = self._count - start
+        if n < 5:
             return 0.0
 
-        mid = len(samples) // 2
-        first = sum(s for _, s in samples[:mid]) / mid
-        second = sum(s for _, s in samples[mid:]) / (len(samples) - mid)
+        mid = n // 2
+        split = self._before(start + mid)
+        first = (split - self._before(start)) / mid
+        second = (self._total - split) / (n - mid)
         return safe_div(second - first, first, 0)
 
     def clear(self):
-        self._samples.clear()
+        self._head = 0
+        self._count = 0
+        self._total = 0.0
 
     def get_state(self) -> Dict:
-        return {'samples': list(self._samples)}
+        """紧凑编码：起始时间 + float32 时间偏移/速度数组（base64）"""
+        order = [self._pos(k) for k in range(self._count)]
+        t0 = self._times[order[0]] if order else 0.0
+        offsets = array('f', (self._times[i] - t0 for i in order))
+        speeds = array('f', (self._speeds[i] for i in order))
+        return {
+            't0': t0,
+            'dt': base64.b64encode(offsets.tobytes()).decode(),
+            'speeds': base64.b64encode(speeds.tobytes()).decode(),
+        }
 
     def set_state(self, state: Dict):
-        self._samples = deque(state.get('samples', []), maxlen=1200)
+        self.clear()
+        if 'samples' in state:
+            # 旧版格式：[(t, speed), ...]
+            samples = [(float(t), float(v)) for t, v in state.get('samples', [])]
+        else:
+            offsets = array('f', base64.b64decode(state.get('dt', '')))
+            speeds = array('f', base64.b64decode(state.get('speeds', '')))
+            t0 = float(state.get('t0', 0.0))
+            samples = [(t0 + dt, v) for dt, v in zip(offsets, speeds)]
+        for t, v in samples[-self.CAPACITY:]:
+            self.record(t, v)
 
 
 class AdaptiveQuantizer:
@@ -723,6 +846,315 @@ class SmoothLimiter:
         self._smooth_limit = 0
 
 
+# ════════════════════════════════════════════════════════════════════════════════
+# 批量控制器
+# ════════════════════════════════════════════════════════════════════════════════
+# 阶段编码（批量计算用）
+_PHASES = [C.PHASE_WARMUP, C.PHASE_CATCH, C.PHASE_STEADY, C.PHASE_FINISH, C.PHASE_IDLE]
+_WARMUP, _CATCH, _STEADY, _FINISH, _IDLE = range(len(_PHASES))
+_PHASE_KP = np.array([C.PID_PARAMS.get(p, C.PID_PARAMS['steady'])['kp'] for p in _PHASES])
+_PHASE_KI = np.array([C.PID_PARAMS.get(p, C.PID_PARAMS['steady'])['ki'] for p in _PHASES])
+_PHASE_KD = np.array([C.PID_PARAMS.get(p, C.PID_PARAMS['steady'])['kd'] for p in _PHASES])
+_PHASE_QUANT = np.array([C.QUANT_STEPS.get(p, 1024) for p in _PHASES], dtype=np.int64)
+
+
+class ControllerArrays:
+    """Struct-of-arrays copy of the Kalman / PID / smoothing state of a batch of torrents"""
+
+    KALMAN_FIELDS = ('speed', 'accel', 'p00', 'p01', 'p10', 'p11', '_last_time')
+    PID_FIELDS = ('_integral', '_last_error', '_last_time', '_last_output', '_derivative_filter', '_integral_limit')
+
+    def __init__(self, states: List["TorrentState"]):
+        self.states = states
+        kalmans = [s.kalman for s in states]
+        pids = [s.pid for s in states]
+        self.k = {f: np.fromiter((getattr(k, f) for k in kalmans), float, len(states)) for f in self.KALMAN_FIELDS}
+        self.k_init = np.fromiter((k._initialized for k in kalmans), bool, len(states))
+        self.p = {f: np.fromiter((getattr(p, f) for p in pids), float, len(states)) for f in self.PID_FIELDS}
+        self.p_init = np.fromiter((p._initialized for p in pids), bool, len(states))
+        self.smooth = np.fromiter((s.smooth_limiter._smooth_limit for s in states), np.int64, len(states))
+
+    def write_kalman(self, rows: np.ndarray):
+        for i in rows.tolist():
+            kalman = self.states[i].kalman
+            for f in self.KALMAN_FIELDS:
+                setattr(kalman, f, float(self.k[f][i]))
+            kalman._initialized = bool(self.k_init[i])
+
+    def write_pid(self, rows: np.ndarray, phases: np.ndarray):
+        for i in rows.tolist():
+            pid = self.states[i].pid
+            pid.set_phase(_PHASES[phases[i]])
+            for f in self.PID_FIELDS:
+                setattr(pid, f, float(self.p[f][i]))
+            pid._initialized = bool(self.p_init[i])
+
+    def write_smooth(self):
+        for state, value in zip(self.states, self.smooth.tolist()):
+            state.smooth_limiter._smooth_limit = value
+
+
+class BatchLimitEngine:
+    """Vectorized _calculate_limit + SmoothLimiter step for all due torrents of a tick
+
+    每个种子的控制器状态仍保存在 TorrentState 中（持久化、状态接口都依赖它）。
+    每轮把到期种子的卡尔曼 / PID / 平滑状态收集为列数组，一次完成卡尔曼预测更新、
+    按阶段取 PID 参数、分阶段策略、量化、保护和平滑，再写回各对象。
+    速度窗口、周期进度等本身 O(1) 的逐种子方法仍逐个调用。
+    结果与逐个计算一致；种子数少于 C.BATCH_MIN_SIZE 时直接逐个计算。
+    """
+
+    def __init__(self, calculate_limit: Callable[..., int]):
+        # 逐个计算的实现（SpeedLimiterService._calculate_limit）
+        self._calculate_limit = calculate_limit
+
+    def step(
+        self,
+        states: List["TorrentState"],
+        current_speeds: List[float],
+        target_speeds: List[float],
+        safety_margins: List[float],
+        downloading: List[bool],
+        etas: List[int],
+        now: float,
+    ) -> List[int]:
+        """计算并平滑每个种子的上传限速，返回与 states 同序的限速值（0 表示不限速）"""
+        if len(states) < C.BATCH_MIN_SIZE:
+            return [
+                self._scalar(state, speed, target, margin, is_dl, eta, now)
+                for state, speed, target, margin, is_dl, eta
+                in zip(states, current_speeds, target_speeds, safety_margins, downloading, etas)
+            ]
+        # 不在有效剩余时间内的行也参与数组运算（结果被屏蔽），忽略其溢出告警
+        with np.errstate(all='ignore'):
+            return self._vectorized(states, current_speeds, target_speeds, safety_margins, downloading, etas, now)
+
+    def _scalar(self, state, current_speed, target_speed, safety_margin, is_downloading, eta, now) -> int:
+        raw_limit = self._calculate_limit(
+            state, current_speed, target_speed, now, safety_margin,
+            is_downloading=is_downloading, eta_seconds=eta,
+        )
+        if raw_limit > 0:
+            return state.smooth_limiter.smooth(raw_limit, current_speed, state.phase, now)
+        state.smooth_limiter.reset()
+        return raw_limit
+
+    def _vectorized(self, states, current_speeds, target_speeds, safety_margins, downloading, etas, now) -> List[int]:
+        n = len(states)
+        arrays = ControllerArrays(states)
+        current = np.asarray(current_speeds, dtype=float)
+        target = np.asarray(target_speeds, dtype=float)
+        margin = np.asarray(safety_margins, dtype=float)
+        base_target = np.maximum(0.0, target * (1 - np.maximum(0.0, margin)))
+
+        limit = np.zeros(n, dtype=np.int64)
+        phase = np.full(n, _IDLE, dtype=np.int64)
+        active = base_target > 0
+
+        # 1) 卡尔曼预测/更新（写回后周期进度追踪会读取 kalman.speed）
+        self._kalman_update(arrays, current, now, active)
+        arrays.write_kalman(np.flatnonzero(active))
+
+        # 2) 逐种子的 O(1) 部分：速度窗口、周期进度、剩余时间
+        time_left = np.zeros(n)
+        synced = np.zeros(n, dtype=bool)
+        tracked = np.zeros(n)
+        trend = np.zeros(n)
+        correction = np.ones(n)
+        uploaded = np.zeros(n)
+        cycle_start = np.zeros(n)
+        for i in np.flatnonzero(active).tolist():
+            state = states[i]
+            state.tracker_speed.record(now, current_speeds[i])
+            state.update_cycle_progress(target_speeds[i], safety_margins[i])
+            tl = state.get_time_left(now)
+            time_left[i] = tl
+            synced[i] = state.cycle_synced
+            if 2 < tl <= 1e4:
+                tracked[i] = state.tracker_speed.get_weighted_avg(now, get_phase(tl, state.cycle_synced, True))
+                trend[i] = state.tracker_speed.get_recent_trend(now)
+            correction[i] = state.precision_tracker.get_correction() if state.precision_tracker else 1.0
+            uploaded[i] = state.total_uploaded - state.cycle_start_uploaded
+            cycle_start[i] = state.cycle_start_time
+
+        timed = active & (time_left > 2) & (time_left <= 1e4)
+        phase[active & ~timed & ~synced] = _WARMUP
+
+        filtered = arrays.k['speed']
+        tracked = np.where(tracked > 0, tracked, np.where(filtered > 0, filtered, current))
+
+        # 3) 目标总量/进度
+        elapsed = np.where(cycle_start > 0, np.maximum(0.0, now - cycle_start), 0.0)
+        total_time = np.maximum(1.0, elapsed + time_left)
+        adjusted = np.maximum(1.0, base_target * correction)
+        target_total = adjusted * total_time
+        uploaded = np.maximum(0.0, uploaded)
+        progress = uploaded / target_total
+
+        accel = arrays.k['accel']
+        predicted_total = uploaded + np.maximum(0.0, filtered * time_left + 0.5 * accel * time_left * time_left)
+        predicted_ratio = predicted_total / target_total
+
+        # 4) 预算式触发
+        floor_ratio = max(C.LIMIT_TRIGGER_FLOOR_RATIO_MIN, min(C.LIMIT_TRIGGER_FLOOR_RATIO, C.LIMIT_TRIGGER_FLOOR_RATIO_MAX))
+        floor_speed = np.maximum(0.0, adjusted * floor_ratio)
+        eta = np.asarray(etas, dtype=float)
+        effective_tl = np.where(np.asarray(downloading, dtype=bool) & (eta > 0), np.minimum(time_left, eta + 10.0), time_left)
+        buffer_speed = np.maximum(current, tracked)
+        soft_total = uploaded + buffer_speed * C.LIMIT_TRIGGER_BUFFER_SEC + floor_speed * np.maximum(0.0, effective_tl)
+        limiting = timed & ~((soft_total <= target_total) & (progress < 1.0))
+
+        phase[limiting] = np.where(
+            ~synced, _WARMUP,
+            np.where(time_left <= C.FINISH_TIME, _FINISH, np.where(time_left <= C.STEADY_TIME, _STEADY, _CATCH)),
+        )[limiting]
+
+        # 5) 需要达到的速度 + PID
+        need = target_total - uploaded
+        controlled = limiting & (need > 0)
+        required = need / np.maximum(time_left, 1.0)
+        pid_output = self._pid_update(arrays, target_total, uploaded, phase, now, controlled)
+        arrays.write_pid(np.flatnonzero(controlled), phase)
+
+        raw = np.full(n, float(C.MIN_LIMIT))
+        released = np.zeros(n, dtype=bool)  # 分阶段策略直接返回 0 的种子
+
+        finish = controlled & (phase == _FINISH)
+        factor = np.where(
+            predicted_ratio > 1.002, np.maximum(0.8, 1 - (predicted_ratio - 1) * 3),
+            np.where(predicted_ratio < 0.998, np.minimum(1.2, 1 + (1 - predicted_ratio) * 3), 1.0),
+        )
+        raw = np.where(finish, required * pid_output * factor, raw)
+
+        steady = controlled & (phase == _STEADY)
+        headroom = np.where(
+            predicted_ratio > 1.01, 1.0,
+            np.where(predicted_ratio < 0.95, 1.03, C.PID_PARAMS[C.PHASE_STEADY].get('headroom', 1.0)),
+        )
+        raw = np.where(steady, required * headroom * pid_output, raw)
+
+        catch = controlled & (phase == _CATCH)
+        released |= catch & (required > adjusted * 5)
+        raw = np.where(catch, required * C.PID_PARAMS[C.PHASE_CATCH].get('headroom', 1.0) * pid_output, raw)
+
+        warmup = controlled & (phase == _WARMUP)
+        raw = np.where(warmup & (progress >= 1.0), float(C.MIN_LIMIT), raw)
+        raw = np.where(warmup & (progress < 1.0) & (progress >= 0.8), required * 1.01 * pid_output, raw)
+        raw = np.where(warmup & (progress < 0.8) & (progress >= 0.5), required * 1.05, raw)
+        released |= warmup & (progress < 0.5)
+
+        raw = np.maximum(float(C.MIN_LIMIT), raw)
+
+        # 6) 量化
+        quantized = limiting & ~released
+        ratio = tracked / adjusted
+        base_step = _PHASE_QUANT[phase]
+        step = np.where(
+            phase == _FINISH, 256,
+            np.where(ratio > 1.2, base_step * 2, np.where(ratio > 1.05, base_step, np.where(ratio > 0.8, base_step // 2, base_step))),
+        )
+        step = np.where(np.abs(trend) > 0.1, np.maximum(256, step // 2), step)
+        step = np.clip(step, 256, 8192)
+        raw_int = np.floor(raw).astype(np.int64)
+        values = np.maximum(C.MIN_LIMIT, ((raw_int + step // 2) // step) * step)
+
+        # 7) 保护：进度接近完成时防止大爆发
+        protect = np.floor(adjusted * C.SPEED_PROTECT_LIMIT).astype(np.int64)
+        protecting = (progress >= C.PROGRESS_PROTECT) & (current > adjusted * C.SPEED_PROTECT_RATIO)
+        values = np.where(protecting & ((values == 0) | (values > protect)), protect, values)
+        limit[quantized] = np.maximum(0, values[quantized])
+
+        for state, code in zip(states, phase.tolist()):
+            state.phase = _PHASES[code]
+
+        # 8) 平滑
+        result = self._smooth(arrays, limit, phase)
+        arrays.write_smooth()
+        return result.tolist()
+
+    @staticmethod
+    def _kalman_update(arrays: ControllerArrays, measurement: np.ndarray, now: float, mask: np.ndarray):
+        k = arrays.k
+        first = mask & ~arrays.k_init
+        k['speed'][first] = measurement[first]
+        k['_last_time'][first] = now
+        arrays.k_init[first] = True
+
+        dt = now - k['_last_time']
+        rows = mask & ~first & (dt > 0.01)
+        k['_last_time'][rows] = now
+
+        pred_speed = k['speed'] + k['accel'] * dt
+        p00_pred = k['p00'] + dt * (k['p10'] + k['p01']) + dt * dt * k['p11'] + C.KALMAN_Q_SPEED
+        p01_pred = k['p01'] + dt * k['p11']
+        p10_pred = k['p10'] + dt * k['p11']
+        p11_pred = k['p11'] + C.KALMAN_Q_ACCEL
+        s = p00_pred + C.KALMAN_R
+        rows &= np.abs(s) >= 1e-10
+        s = np.where(rows, s, 1.0)
+
+        k0 = p00_pred / s
+        k1 = p10_pred / s
+        innovation = measurement - pred_speed
+        k['speed'] = np.where(rows, pred_speed + k0 * innovation, k['speed'])
+        k['accel'] = np.where(rows, k['accel'] + k1 * innovation, k['accel'])
+        k['p00'], k['p01'], k['p10'], k['p11'] = (
+            np.where(rows, (1 - k0) * p00_pred, k['p00']),
+            np.where(rows, (1 - k0) * p01_pred, k['p01']),
+            np.where(rows, -k1 * p00_pred + p10_pred, k['p10']),
+            np.where(rows, -k1 * p01_pred + p11_pred, k['p11']),
+        )
+
+    @staticmethod
+    def _pid_update(arrays: ControllerArrays, setpoint: np.ndarray, measured: np.ndarray,
+                    phase: np.ndarray, now: float, mask: np.ndarray) -> np.ndarray:
+        p = arrays.p
+        denominator = np.maximum(setpoint, 1)
+        error = np.where(np.abs(denominator) < 1e-10, 0.0, (setpoint - measured) / denominator)
+        output = np.ones(len(setpoint))
+
+        first = mask & ~arrays.p_init
+        p['_last_error'][first] = error[first]
+        p['_last_time'][first] = now
+        arrays.p_init[first] = True
+
+        dt = now - p['_last_time']
+        waiting = mask & ~first & (dt <= 0.01)
+        output[waiting] = p['_last_output'][waiting]
+
+        rows = mask & ~first & (dt > 0.01)
+        dt = np.where(rows, dt, 1.0)
+        p['_last_time'][rows] = now
+        integral = np.clip(p['_integral'] + error * dt, -p['_integral_limit'], p['_integral_limit'])
+        derivative = 0.3 * ((error - p['_last_error']) / dt) + 0.7 * p['_derivative_filter']
+        value = np.clip(
+            1.0 + _PHASE_KP[phase] * error + _PHASE_KI[phase] * integral + _PHASE_KD[phase] * derivative,
+            0.5, 2.0,
+        )
+        p['_integral'] = np.where(rows, integral, p['_integral'])
+        p['_derivative_filter'] = np.where(rows, derivative, p['_derivative_filter'])
+        p['_last_error'] = np.where(rows, error, p['_last_error'])
+        p['_last_output'] = np.where(rows, value, p['_last_output'])
+        output[rows] = value[rows]
+        return output
+
+    @staticmethod
+    def _smooth(arrays: ControllerArrays, new_limit: np.ndarray, phase: np.ndarray) -> np.ndarray:
+        previous = arrays.smooth
+        follow = (new_limit <= 0) | (previous <= 0) | (phase == _FINISH)
+        change = np.abs(new_limit - previous) / np.maximum(previous, 1)
+        blended = np.where(
+            change < 0.2, new_limit,
+            np.where(
+                change < 0.5,
+                np.floor(previous * 0.7 + new_limit * 0.3),
+                np.floor(previous * 0.5 + new_limit * 0.5),
+            ),
+        ).astype(np.int64)
+        arrays.smooth = np.where(follow, new_limit, blended)
+        return np.where(follow, new_limit, np.maximum(C.MIN_LIMIT, blended))
+
+
 # ════════════════════════════════════════════════════════════════════════════════
 # 种子状态管理
 # ════════════════════════════════════════════════════════════════════════════════
@@ -1468,6 +1900,100 @@ class AnnounceOptimizer:
 # ════════════════════════════════════════════════════════════════════════════════
 # 主服务类
 # ════════════════════════════════════════════════════════════════════════════════
+def _encode_state(state: TorrentState) -> bytes:
+    """种子状态 -> 压缩的 JSON（speed_limit_states.data）"""
+    return zlib.compress(json.dumps(state.to_dict(), separators=(",", ":")).encode(), 6)
+
+
+def _decode_state(data: bytes) -> TorrentState:
+    return TorrentState.from_dict(json.loads(zlib.decompress(data)))
+
+
+# ════════════════════════════════════════════════════════════════════════════════
+# 限速记录按分钟汇总
+# ════════════════════════════════════════════════════════════════════════════════
+class RecordRollup:
+    """Per-minute rollup of SpeedLimitRecord deltas
+
+    原来每轮为每个有增量的种子写一行记录，是最大的表和写入来源。现在按
+    (分钟, tracker, 下载器) 在内存中累加上传/下载增量，分钟结束后批量插入一行。
+    统计、趋势和流量预算都按 created_at 对 uploaded/downloaded 求和，结果不变。
+    汇总行的 current_speed 为该分钟内各样本的平均值，其余字段取最后一个样本。
+    """
+
+    def __init__(self):
+        self._buckets: Dict[Tuple[datetime, str, Optional[int]], Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def add(self, record: SpeedLimitRecord, at: datetime):
+        minute = at.replace(second=0, microsecond=0)
+        key = (minute, record.tracker_domain or "", record.downloader_id)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = {
+                "tracker_domain": key[1],
+                "downloader_id": record.downloader_id,
+                "created_at": minute,
+                "current_speed": 0.0,
+                "uploaded": 0.0,
+                "downloaded": 0.0,
+                "samples": 0,
+            }
+        bucket["current_speed"] += record.current_speed or 0
+        bucket["uploaded"] += record.uploaded or 0
+        bucket["downloaded"] += record.downloaded or 0
+        bucket["samples"] += 1
+        bucket["target_speed"] = record.target_speed or 0
+        bucket["limit_applied"] = record.limit_applied or 0
+        bucket["phase"] = record.phase or ""
+
+    def take(self, before: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """取出早于 before 的分钟（None 表示全部）的汇总行"""
+        rows = []
+        for key in [k for k in self._buckets if before is None or k[0] < before]:
+            row = self._buckets.pop(key)
+            row["current_speed"] /= row.pop("samples")
+            rows.append(row)
+        return rows
+
+
+record_rollup = RecordRollup()
+
+
+async def flush_record_rollup():
+    """写入尚未结束的分钟汇总（应在应用关闭时调用）"""
+    rows = record_rollup.take()
+    if not rows:
+        return
+    from app.database import async_session_maker
+
+    try:
+        async with async_session_maker() as db:
+            await db.execute(insert(SpeedLimitRecord), rows)
+            await db.commit()
+    except Exception as e:
+        logger.error(f"写入限速记录汇总失败: {e}")
+
+
+def _start_background_status_refresh():
+    """用独立会话在后台刷新状态（请求方的会话随请求结束而关闭）"""
+    global _status_refresh_task
+    if _status_refresh_task is not None and not _status_refresh_task.done():
+        return
+
+    async def refresh():
+        from app.database import async_session_maker
+        try:
+            async with async_session_maker() as db:
+                await SpeedLimiterService(db).refresh_status()
+        except Exception as e:
+            logger.warning(f"后台刷新限速状态失败: {e}")
+
+    _status_refresh_task = asyncio.create_task(refresh())
+
+
 class SpeedLimiterService:
     """动态限速服务 - 完整版"""
 
@@ -1483,6 +2009,24 @@ class SpeedLimiterService:
         # - ana=None: 未判定，继续观察
         self._ana_state: Dict[int, Dict[str, Any]] = {}
         self._FORCED_REANNOUNCE_INTERVAL: int = 900  # 强制汇报间隔（秒），用于识别 reannounce 偏差
+        # 按种子截止时间调度：(下次评估时间, 下载器ID, hash) 小顶堆，
+        # _deadlines 记录每个种子当前有效的时间，堆中过期条目惰性丢弃
+        self._deadline_heap: List[Tuple[float, int, str]] = []
+        self._deadlines: Dict[Tuple[int, str], float] = {}
+        self._last_full_scan: Dict[int, float] = {}
+        # 各下载器正在进行的限速任务，及已完成但尚未写入数据库的记录
+        self._inflight: Dict[int, asyncio.Task] = {}
+        self._pending_records: List[SpeedLimitRecord] = []
+        # 每轮到期种子的限速批量计算
+        self._batch_engine = BatchLimitEngine(self._calculate_limit)
+        # 状态持久化：待写入的种子、已写入时的周期序号、已查过数据库的种子
+        self._dirty: Set[str] = set()
+        self._saved_cycles: Dict[str, int] = {}
+        self._state_checked: Set[str] = set()
+        self._last_state_save: float = 0
+        # 状态生命周期：每个种子最近一次出现的时间、上次清理数据库的时间
+        self._last_seen: Dict[str, float] = {}
+        self._last_purge: float = 0
 
     @staticmethod
     def _normalize_interval(value: Optional[int]) -> Optional[int]:
@@ -1509,53 +2053,185 @@ class SpeedLimiterService:
         )
         return result.scalars().all()
 
-    async def save_state(self, commit: bool = True):
-        """保存状态到数据库"""
-        try:
-            state_data = {
-                hash: state.to_dict()
-                for hash, state in self.states.items()
-            }
-            state_json = json.dumps(state_data)
+    async def save_state(self, commit: bool = True, force: bool = False):
+        """把有变化的种子状态写入 speed_limit_states（每个种子一行）
 
-            # 更新或创建设置记录
-            result = await self.db.execute(
-                select(SystemSettings).where(SystemSettings.key == self.STATE_KEY)
-            )
-            setting = result.scalar_one_or_none()
-
-            if setting:
-                setting.value = state_json
-            else:
-                setting = SystemSettings(key=self.STATE_KEY, value=state_json)
-                self.db.add(setting)
+        只写本进程评估过的种子；为控制写入频率，每 STATE_SAVE_INTERVAL 秒写一次，
+        其间只写刚进入新周期的种子。force=True 时立即写入全部变化。
+        """
+        now = time.time()
+        if force or now - self._last_state_save >= C.STATE_SAVE_INTERVAL:
+            hashes = [h for h in self._dirty if h in self.states]
+            self._last_state_save = now
+        else:
+            hashes = [
+                h for h in self._dirty
+                if h in self.states and self.states[h].cycle_index != self._saved_cycles.get(h)
+            ]
+        if not hashes:
+            return
 
+        try:
+            await self._write_states(hashes)
             if commit:
                 await self.db.commit()
         except Exception as e:
             logger.error(f"保存限速状态失败: {e}")
 
-    async def load_state(self):
-        """从数据库加载状态"""
-        try:
+    async def _write_states(self, hashes: List[str]):
+        """把指定种子的状态写入当前会话（不提交）"""
+        existing: Dict[str, SpeedLimitState] = {}
+        for i in range(0, len(hashes), STATE_QUERY_CHUNK):
             result = await self.db.execute(
-                select(SystemSettings).where(SystemSettings.key == self.STATE_KEY)
+                select(SpeedLimitState).where(SpeedLimitState.torrent_hash.in_(hashes[i:i + STATE_QUERY_CHUNK]))
             )
-            setting = result.scalar_one_or_none()
-
-            if setting and setting.value:
-                state_data = json.loads(setting.value)
-                self.states = {
-                    hash: TorrentState.from_dict(data)
-                    for hash, data in state_data.items()
-                }
-                logger.info(f"已加载 {len(self.states)} 个种子状态")
+            existing.update({row.torrent_hash: row for row in result.scalars().all()})
+
+        for torrent_hash in hashes:
+            state = self.states[torrent_hash]
+            data = _encode_state(state)
+            row = existing.get(torrent_hash)
+            if row is None:
+                self.db.add(SpeedLimitState(torrent_hash=torrent_hash, data=data))
+            else:
+                row.data = data
+            self._saved_cycles[torrent_hash] = state.cycle_index
+            self._dirty.discard(torrent_hash)
+
+    async def _evict_states(self, now: float):
+        """把不再活跃的种子状态移出内存，并限制内存中的状态数
+
+        超过 STATE_EVICT_GRACE 秒未出现的种子，以及超出 MAX_STATES 时最久未出现的种子，
+        先把未保存的变化写入当前会话再移除；之后再次出现时由 _ensure_states 重新读取。
+        """
+        stale = {h for h in self.states if now - self._last_seen.setdefault(h, now) > C.STATE_EVICT_GRACE}
+        overflow = len(self.states) - len(stale) - C.MAX_STATES
+        if overflow > 0:
+            stale.update(heapq.nsmallest(
+                overflow, (h for h in self.states if h not in stale), key=self._last_seen.__getitem__
+            ))
+        if not stale:
+            return
+
+        try:
+            await self._write_states([h for h in stale if h in self._dirty])
+        except Exception as e:
+            logger.error(f"保存待移出的限速状态失败: {e}")
+            return
+        for torrent_hash in stale:
+            del self.states[torrent_hash]
+            self._last_seen.pop(torrent_hash, None)
+            self._saved_cycles.pop(torrent_hash, None)
+            self._state_checked.discard(torrent_hash)
+        for key in [k for k in self._deadlines if k[1] in stale]:
+            del self._deadlines[key]
+        logger.info(f"已移出 {len(stale)} 个不活跃种子的限速状态，内存中剩余 {len(self.states)} 个")
+
+    async def _purge_saved_states(self, now: float):
+        """删除数据库中长期未更新的种子状态（种子早已删除或停用）"""
+        if now - self._last_purge < C.STATE_PURGE_INTERVAL:
+            return
+        self._last_purge = now
+        # 查过数据库但没有状态、也未创建状态的种子（如检查中、排队中）下次重新查询
+        self._state_checked.intersection_update(self.states)
+        cutoff = datetime.utcnow() - timedelta(days=C.STATE_RETENTION_DAYS)
+        try:
+            result = await self.db.execute(delete(SpeedLimitState).where(SpeedLimitState.updated_at < cutoff))
+            if result.rowcount:
+                logger.info(f"已删除 {result.rowcount} 个超过 {C.STATE_RETENTION_DAYS} 天未更新的种子限速状态")
+        except Exception as e:
+            logger.error(f"清理限速状态失败: {e}")
+
+    async def load_state(self, lazy: bool = True):
+        """加载状态
+
+        lazy=True（默认）时不读取任何种子状态，评估到某个种子时再按需批量读取
+        （见 _ensure_states）；lazy=False 时一次读取全部。两种情况都会先迁移旧版的
+        单个 JSON 状态（SystemSettings.speed_limiter_state）。
+        """
+        try:
+            await self._migrate_legacy_state()
+            if lazy:
+                return
+            result = await self.db.execute(select(SpeedLimitState))
+            for row in result.scalars().all():
+                self._adopt_state(row.torrent_hash, row.data)
+            logger.info(f"已加载 {len(self.states)} 个种子状态")
+        except Exception as e:
+            logger.error(f"加载限速状态失败: {e}")
+
+    def _adopt_state(self, torrent_hash: str, data: bytes):
+        """采用数据库中的状态（内存中已有的较新，不覆盖）"""
+        self._state_checked.add(torrent_hash)
+        if torrent_hash in self.states:
+            return
+        try:
+            state = _decode_state(data)
+        except Exception as e:
+            logger.debug(f"解析种子 {torrent_hash} 限速状态失败: {e}")
+            return
+        self.states[torrent_hash] = state
+        self._saved_cycles[torrent_hash] = state.cycle_index
+        self._last_seen[torrent_hash] = time.time()
+
+    async def _ensure_states(self, hashes: List[str]):
+        """按需读取尚未加载的种子状态（独立会话，可在并发的下载器任务中调用）"""
+        missing = [h for h in hashes if h not in self.states and h not in self._state_checked]
+        if not missing:
+            return
+        self._state_checked.update(missing)
+        from app.database import async_session_maker
+
+        try:
+            async with async_session_maker() as db:
+                for i in range(0, len(missing), STATE_QUERY_CHUNK):
+                    result = await db.execute(
+                        select(SpeedLimitState).where(SpeedLimitState.torrent_hash.in_(missing[i:i + STATE_QUERY_CHUNK]))
+                    )
+                    for row in result.scalars().all():
+                        self._adopt_state(row.torrent_hash, row.data)
         except Exception as e:
             logger.error(f"加载限速状态失败: {e}")
-            self.states = {}
+
+    async def _migrate_legacy_state(self):
+        """把旧版保存在 SystemSettings 中的整块 JSON 状态拆分写入 speed_limit_states"""
+        global _legacy_state_migrated
+        if _legacy_state_migrated:
+            return
+        result = await self.db.execute(
+            select(SystemSettings).where(SystemSettings.key == self.STATE_KEY)
+        )
+        setting = result.scalar_one_or_none()
+        if setting and setting.value:
+            state_data = json.loads(setting.value)
+            existing = set((await self.db.execute(select(SpeedLimitState.torrent_hash))).scalars().all())
+            migrated = 0
+            for torrent_hash, data in state_data.items():
+                if torrent_hash in existing:
+                    continue
+                try:
+                    state = TorrentState.from_dict(data)
+                except Exception:
+                    continue
+                self.db.add(SpeedLimitState(torrent_hash=torrent_hash, data=_encode_state(state)))
+                migrated += 1
+            await self.db.delete(setting)
+            await self.db.commit()
+            logger.info(f"已迁移 {migrated} 个旧版种子限速状态")
+        _legacy_state_migrated = True
+
+    async def _clear_saved_state(self):
+        """删除全部已保存的种子状态"""
+        await self.db.execute(delete(SpeedLimitState))
+        await self.db.commit()
+        self._dirty.clear()
+        self._saved_cycles.clear()
+        self._state_checked.clear()
 
     def _get_or_create_state(self, torrent: TorrentInfo, tracker: str) -> TorrentState:
-        """获取或创建种子状态"""
+        """获取或创建种子状态（并标记为待保存、记录出现时间）"""
+        self._dirty.add(torrent.hash)
+        self._last_seen[torrent.hash] = time.time()
         if torrent.hash not in self.states:
             now = time.time()
             cached_tl = 0.0
@@ -2252,86 +2928,186 @@ class SpeedLimiterService:
         # 定期清理缓存，防止内存泄漏
         cleanup_caches()
 
+        due_by_downloader = self._pop_due(now)
+        current_ids = {dl.id for dl in downloaders}
+        for downloader_id in [i for i in self._last_full_scan if i not in current_ids]:
+            del self._last_full_scan[downloader_id]
+
+        tasks: Dict[int, asyncio.Task] = {}
         for downloader in downloaders:
-            try:
-                async with downloader_client(downloader) as client:
-                    if not client:
+            due_hashes = due_by_downloader.get(downloader.id)
+            inflight = self._inflight.get(downloader.id)
+            if inflight is not None and not inflight.done():
+                # 上一轮超时的下载器仍在处理：到期的种子留到下一轮
+                for torrent_hash in due_hashes or []:
+                    self._schedule(downloader.id, torrent_hash, now + C.DYNAMIC_INTERVAL_MIN)
+                continue
+
+            # 全量扫描时处理新种子和到期的种子，其余轮次只查询到期的种子
+            # （失败或下载器不可用时同样按扫描间隔重试）
+            full_scan = now - self._last_full_scan.get(downloader.id, 0) >= C.FULL_SCAN_INTERVAL
+            if full_scan:
+                self._last_full_scan[downloader.id] = now
+            elif not due_hashes:
+                continue
+            task = asyncio.create_task(self._apply_downloader_limits(
+                downloader, config, site_rule_map, full_scan, due_hashes, now
+            ))
+            task.add_done_callback(self._collect_records)
+            tasks[downloader.id] = task
+            self._inflight[downloader.id] = task
+
+        # 各下载器并发处理；超过期限的继续在后台完成，其记录在之后的轮次写入
+        if tasks:
+            _, pending = await asyncio.wait(tasks.values(), timeout=C.DOWNLOADER_TICK_DEADLINE)
+            for downloader in downloaders:
+                task = tasks.get(downloader.id)
+                if task in pending:
+                    logger.debug(f"下载器 {downloader.name} 本轮处理超过 {C.DOWNLOADER_TICK_DEADLINE}s，转入后台完成")
+                elif task is not None and not task.cancelled() and task.exception() is None:
+                    results.update(task.result()[0])
+
+        records, self._pending_records = self._pending_records, []
+        await self._store_records(records)
+
+        # 定期保存状态，移出不活跃的种子状态（与本轮记录同一事务提交，避免每次多次 commit）
+        await self.save_state(commit=False)
+        await self._evict_states(now)
+        await self._purge_saved_states(now)
+        await self.db.commit()
+
+        return {
+            "enabled": True,
+            "torrents": results,
+            "count": len(results),
+        }
+
+    async def _apply_downloader_limits(
+        self,
+        downloader: Downloader,
+        config: SpeedLimitConfig,
+        site_rule_map: Dict[str, SpeedLimitSite],
+        full_scan: bool,
+        due_hashes: Optional[List[str]],
+        now: float,
+    ) -> Tuple[Dict[str, Any], List[SpeedLimitRecord]]:
+        """处理单个下载器的一轮限速，返回 (结果, 待写入的记录)
+
+        只更新该下载器种子的状态，限速和汇报在本协程内直接下发，
+        记录由调用方在本轮结束时统一写入数据库。
+        """
+        results: Dict[str, Any] = {}
+        records: List[SpeedLimitRecord] = []
+        try:
+            async with downloader_client(downloader) as client:
+                if not client:
+                    return results, records
+
+                if full_scan:
+                    listed = await client.get_torrents(status_filter="active")
+                    self._prune_deadlines(downloader.id, {t.hash for t in listed})
+                    for t in listed:
+                        if t.hash in self.states:
+                            self._last_seen[t.hash] = now
+                    torrents = [t for t in listed if (downloader.id, t.hash) not in self._deadlines]
+                else:
+                    if not due_hashes:
+                        return results, records
+                    torrents = await client.get_torrents(status_filter="active", hashes=due_hashes)
+
+                # 首次评估到的种子从数据库读取上次保存的状态
+                await self._ensure_states([t.hash for t in torrents])
+
+                # 本轮待批量下发的汇报与限速
+                pending_reannounce: List[str] = []
+                # 强制汇报前的状态 (state, last_reannounce, reannounced_this_cycle, last_announce_time)，失败时回滚
+                previous_reannounce: Dict[str, tuple] = {}
+                pending_limits: Dict[str, int] = {}
+                previous_limits: Dict[str, Tuple["TorrentState", int]] = {}
+                # 需要计算限速的种子：(种子, tracker, 状态, 目标速度, 安全余量, 下载限速, 汇报优化)
+                prepared: List[tuple] = []
+                # 本轮为汇报时间未知的种子单独查询的次数
+                announce_fetches = 0
+
+                for torrent in torrents:
+                    if torrent.status not in ['seeding', 'downloading']:
                         continue
 
-                    torrents = await client.get_torrents()
+                    tracker = await self._resolve_tracker_domain(client, torrent)
+                    if not tracker:
+                        continue
 
-                    for torrent in torrents:
-                        if torrent.status not in ['seeding', 'downloading']:
-                            continue
+                    # 获取目标速度和安全余量
+                    site_rule = site_rule_map.get(tracker)
+                    if site_rule:
+                        target_speed = site_rule.target_upload_speed
+                        safety_margin = site_rule.safety_margin
+                        limit_download = getattr(site_rule, 'limit_download_speed', False)
+                        optimize_announce = getattr(site_rule, 'optimize_announce', False)
+                    else:
+                        target_speed = config.target_upload_speed
+                        safety_margin = config.safety_margin
+                        limit_download = False
+                        optimize_announce = False
 
-                        tracker = await self._resolve_tracker_domain(client, torrent)
-                        if not tracker:
-                            continue
+                    # 获取或创建状态（在 target_speed 检查前，确保统计数据始终被记录）
+                    state = self._get_or_create_state(torrent, tracker)
 
-                        # 获取目标速度和安全余量
-                        site_rule = site_rule_map.get(tracker)
-                        if site_rule:
-                            target_speed = site_rule.target_upload_speed
-                            safety_margin = site_rule.safety_margin
-                            limit_download = getattr(site_rule, 'limit_download_speed', False)
-                            optimize_announce = getattr(site_rule, 'optimize_announce', False)
-                        else:
-                            target_speed = config.target_upload_speed
-                            safety_margin = config.safety_margin
-                            limit_download = False
-                            optimize_announce = False
-
-                        # 获取或创建状态（在 target_speed 检查前，确保统计数据始终被记录）
-                        state = self._get_or_create_state(torrent, tracker)
-
-                        # 即使不限速也记录上传/下载增量统计
-                        if target_speed <= 0:
-                            if state.last_record_uploaded == 0 and torrent.uploaded > 0:
-                                state.last_record_uploaded = torrent.uploaded
-                            if state.last_record_downloaded == 0 and torrent.downloaded > 0:
-                                state.last_record_downloaded = torrent.downloaded
-                            delta_up = max(0, torrent.uploaded - state.last_record_uploaded)
-                            delta_dl = max(0, torrent.downloaded - state.last_record_downloaded)
+                    # 即使不限速也记录上传/下载增量统计
+                    if target_speed <= 0:
+                        if state.last_record_uploaded == 0 and torrent.uploaded > 0:
                             state.last_record_uploaded = torrent.uploaded
+                        if state.last_record_downloaded == 0 and torrent.downloaded > 0:
                             state.last_record_downloaded = torrent.downloaded
-                            if delta_up > 0 or delta_dl > 0:
-                                record = SpeedLimitRecord(
-                                    tracker_domain=tracker,
-                                    downloader_id=downloader.id,
-                                    current_speed=torrent.upload_speed,
-                                    target_speed=0,
-                                    limit_applied=0,
-                                    phase="disabled",
-                                    uploaded=delta_up,
-                                    downloaded=delta_dl,
-                                )
-                                self.db.add(record)
-                            continue
-
-                        # 更新下载相关状态（用于下载限速和汇报优化）
-                        state.total_done = getattr(torrent, 'completed', 0) or torrent.downloaded
-                        state.total_size_torrent = torrent.size
-                        state.download_speed = torrent.download_speed
-                        # 计算 ETA
-                        remaining = state.total_size_torrent - state.total_done
-                        if torrent.download_speed > 0 and remaining > 0:
-                            state.eta = int(remaining / torrent.download_speed)
-                        else:
-                            state.eta = 0
-
-                        # 记录详细进度（用于汇报优化）
-                        if optimize_announce or limit_download:
-                            state.detail_progress.append((torrent.uploaded, state.total_done, now))
-
-                        # 获取汇报时间信息 - 关键链路
-                        # 始终尝试从 qBittorrent 获取最新的 reannounce 数据
-                        next_announce = torrent.next_announce_time
-                        announce_interval = self._normalize_interval(torrent.announce_interval)
-                        fetch_attempted = False
+                        delta_up = max(0, torrent.uploaded - state.last_record_uploaded)
+                        delta_dl = max(0, torrent.downloaded - state.last_record_downloaded)
+                        state.last_record_uploaded = torrent.uploaded
+                        state.last_record_downloaded = torrent.downloaded
+                        if delta_up > 0 or delta_dl > 0:
+                            record = SpeedLimitRecord(
+                                tracker_domain=tracker,
+                                downloader_id=downloader.id,
+                                current_speed=torrent.upload_speed,
+                                target_speed=0,
+                                limit_applied=0,
+                                phase="disabled",
+                                uploaded=delta_up,
+                                downloaded=delta_dl,
+                            )
+                            records.append(record)
+                        continue
 
-                        # 总是尝试获取最新数据（不仅仅是当 None 时）
+                    # 更新下载相关状态（用于下载限速和汇报优化）
+                    state.total_done = getattr(torrent, 'completed', 0) or torrent.downloaded
+                    state.total_size_torrent = torrent.size
+                    state.download_speed = torrent.download_speed
+                    # 计算 ETA
+                    remaining = state.total_size_torrent - state.total_done
+                    if torrent.download_speed > 0 and remaining > 0:
+                        state.eta = int(remaining / torrent.download_speed)
+                    else:
+                        state.eta = 0
+
+                    # 记录详细进度（用于汇报优化）
+                    if optimize_announce or limit_download:
+                        state.detail_progress.append((torrent.uploaded, state.total_done, now))
+
+                    # 获取汇报时间信息 - 关键链路
+                    # 始终尝试从 qBittorrent 获取最新的 reannounce 数据
+                    next_announce = torrent.next_announce_time
+                    announce_interval = self._normalize_interval(torrent.announce_interval)
+                    fetch_attempted = False
+
+                    # 总是尝试获取最新数据（不仅仅是当 None 时）；汇报时间已知时客户端缓存命中，
+                    # 未知时需要请求下载器，每轮限量（C.ANNOUNCE_FETCH_PER_TICK）并走 ACTION 道
+                    lane = current_priority()
+                    if next_announce is None:
+                        announce_fetches += 1
+                        lane = max(lane, PRIORITY_ACTION)
+                    if announce_fetches <= C.ANNOUNCE_FETCH_PER_TICK or next_announce is not None:
                         try:
-                            tracker_next, tracker_interval = await client.get_torrent_announce_info(torrent.hash)
+                            with request_priority(lane):
+                                tracker_next, tracker_interval = await client.get_torrent_announce_info(torrent.hash)
                             tracker_interval = self._normalize_interval(tracker_interval)
                             fetch_attempted = True
 
@@ -2349,396 +3125,470 @@ class SpeedLimiterService:
                         except Exception as e:
                             logger.debug(f"获取 tracker 信息失败: {e}")
 
-                        # 如果仍然没有 next_announce，使用已保存状态或估算
-                        if next_announce is None and state.next_announce_time and state.next_announce_time > now:
-                            next_announce = state.next_announce_time
-                            logger.debug(f"[{torrent.name[:20]}] 使用已保存的 next_announce: {int(next_announce - now)}秒后")
-
-
-                        # === 汇报周期：U2 老种并非固定 30 分钟（严格按 u2_magic.py：新30/中45/老60）===
-                        # 说明：
-                        # - qB trackers/properties 不一定提供真实 interval；如果直接用 added_time 估算，会把“刚下载的老种”当新种。
-                        # - u2_magic.py 通过网页发布时间 delta 判定汇报周期，因此这里必须优先拿 publish_time。
-                        interval_hint = announce_interval or state.last_good_interval
-                        cycle_interval = 0
-
-                        # 1) 站点自定义间隔优先
-                        if site_rule and getattr(site_rule, 'custom_announce_interval', 0) > 0:
-                            cycle_interval = int(site_rule.custom_announce_interval)
-
-                        # 2) U2 站点：按发布时间估算 30/45/60 分钟（与脚本一致）
-                        elif site_rule and self._is_u2_site(site_rule, tracker):
-                            publish_time = await self._ensure_u2_publish_time(site_rule, torrent, state)
-                            added_ts = torrent.added_time.timestamp() if torrent.added_time else now
-                            min_interval = 300
-                            if interval_hint and interval_hint > 0:
-                                try:
-                                    min_interval = max(min_interval, int(interval_hint))
-                                except Exception:
-                                    pass
-
-                            if publish_time and publish_time > 0:
-                                cycle_interval = int(
-                                    estimate_announce_interval(
-                                        publish_time,
-                                        min_interval=min_interval,
-                                        seeding_time=torrent.seeding_time or 0,
-                                        is_publish_time=True,
-                                    )
-                                )
-                            else:
-                                cycle_interval = int(
-                                    estimate_announce_interval(
-                                        added_ts,
-                                        min_interval=min_interval,
-                                        seeding_time=torrent.seeding_time or 0,
-                                        is_publish_time=False,
-                                    )
-                                )
-
-                            # 还没通过跳变采样“真实同步”时，允许用估算值覆盖旧版本的错误 1800s
-                            have_measured = len(state.interval_samples) >= 2
-                            if not have_measured:
-                                if (not state.cycle_synced) or (state.cycle_interval <= 0) or (abs(state.cycle_interval - cycle_interval) > 60):
-                                    state.cycle_interval = float(cycle_interval)
-                                    state.cycle_synced = True
-                            # 无论如何都记录当前 announce_interval（用于 UI/debug）
-                                if cycle_interval > 0:
-                                    state.announce_interval = int(cycle_interval)
-                                    state.last_good_interval = int(cycle_interval)
-
-                        # 3) 其他站点：优先用客户端 interval，否则回退状态估算
-                        else:
+                    # 如果仍然没有 next_announce，使用已保存状态或估算
+                    if next_announce is None and state.next_announce_time and state.next_announce_time > now:
+                        next_announce = state.next_announce_time
+                        logger.debug(f"[{torrent.name[:20]}] 使用已保存的 next_announce: {int(next_announce - now)}秒后")
+
+
+                    # === 汇报周期：U2 老种并非固定 30 分钟（严格按 u2_magic.py：新30/中45/老60）===
+                    # 说明：
+                    # - qB trackers/properties 不一定提供真实 interval；如果直接用 added_time 估算，会把“刚下载的老种”当新种。
+                    # - u2_magic.py 通过网页发布时间 delta 判定汇报周期，因此这里必须优先拿 publish_time。
+                    interval_hint = announce_interval or state.last_good_interval
+                    cycle_interval = 0
+
+                    # 1) 站点自定义间隔优先
+                    if site_rule and getattr(site_rule, 'custom_announce_interval', 0) > 0:
+                        cycle_interval = int(site_rule.custom_announce_interval)
+
+                    # 2) U2 站点：按发布时间估算 30/45/60 分钟（与脚本一致）
+                    elif site_rule and self._is_u2_site(site_rule, tracker):
+                        publish_time = await self._ensure_u2_publish_time(site_rule, torrent, state)
+                        added_ts = torrent.added_time.timestamp() if torrent.added_time else now
+                        min_interval = 300
+                        if interval_hint and interval_hint > 0:
                             try:
-                                if interval_hint and interval_hint > 0:
-                                    cycle_interval = int(interval_hint)
-                                else:
-                                    cycle_interval = int(state.get_announce_interval())
+                                min_interval = max(min_interval, int(interval_hint))
                             except Exception:
-                                cycle_interval = int(state.get_announce_interval())
+                                pass
+
+                        if publish_time and publish_time > 0:
+                            cycle_interval = int(
+                                estimate_announce_interval(
+                                    publish_time,
+                                    min_interval=min_interval,
+                                    seeding_time=torrent.seeding_time or 0,
+                                    is_publish_time=True,
+                                )
+                            )
+                        else:
+                            cycle_interval = int(
+                                estimate_announce_interval(
+                                    added_ts,
+                                    min_interval=min_interval,
+                                    seeding_time=torrent.seeding_time or 0,
+                                    is_publish_time=False,
+                                )
+                            )
 
-                            if cycle_interval > 0 and ((not state.cycle_synced) or state.cycle_interval <= 0):
+                        # 还没通过跳变采样“真实同步”时，允许用估算值覆盖旧版本的错误 1800s
+                        have_measured = len(state.interval_samples) >= 2
+                        if not have_measured:
+                            if (not state.cycle_synced) or (state.cycle_interval <= 0) or (abs(state.cycle_interval - cycle_interval) > 60):
                                 state.cycle_interval = float(cycle_interval)
                                 state.cycle_synced = True
+                        # 无论如何都记录当前 announce_interval（用于 UI/debug）
+                            if cycle_interval > 0:
+                                state.announce_interval = int(cycle_interval)
                                 state.last_good_interval = int(cycle_interval)
 
-
-                        # === u2_magic(脚本)风格：next_announce 可靠性检测 + peerlist 兜底 ===
-                        ana_state = self._ana_state.setdefault(getattr(downloader, "id", 0) or 0, {"ana": None, "updated": False})
-                        # 统一为 int 秒
+                    # 3) 其他站点：优先用客户端 interval，否则回退状态估算
+                    else:
                         try:
-                            cycle_interval = int(cycle_interval) if cycle_interval else 0
+                            if interval_hint and interval_hint > 0:
+                                cycle_interval = int(interval_hint)
+                            else:
+                                cycle_interval = int(state.get_announce_interval())
                         except Exception:
-                            cycle_interval = 0
-
-                        next_remaining = None
-                        if next_announce and next_announce > now:
-                            next_remaining = float(next_announce - now)
-
-                        
-                        # === u2_magic 风格增强：next_announce 跳变检测（比脚本更稳）===
-                        # 期望 next_remaining 随时间线性减少；若出现异常跳变，说明客户端 next_announce 可能不可信。
-                        if next_remaining is not None and cycle_interval:
-                            if state.last_next_remaining is not None and state.last_next_update_time > 0:
-                                expected = state.last_next_remaining - (now - state.last_next_update_time)
-
-                                # 允许跨周期 wrap：把 expected 拉回到合理区间再比较
-                                if expected < 0:
-                                    expected = expected % cycle_interval
-                                if expected > cycle_interval:
-                                    expected = expected % cycle_interval
-
-                                diff = next_remaining - expected
-
-                                # 强制汇报(900s)可能导致 diff 近似 ±900，视为正常偏差（不下结论）
-                                forced_like = (abs(diff - self._FORCED_REANNOUNCE_INTERVAL) < 10) or (abs(diff + self._FORCED_REANNOUNCE_INTERVAL) < 10)
-
-                                # 大跳变阈值：至少 120s，且至少占周期 15%
-                                jump_threshold = max(120.0, cycle_interval * 0.15)
-
-                                if (not forced_like) and abs(diff) > jump_threshold:
-                                    state.next_jump_suspect_count += 1
-                                    logger.debug(
-                                        f"[{torrent.name[:20]}] next_announce 跳变: diff={diff:.0f}s, "
-                                        f"expected~{expected:.0f}s, now={next_remaining:.0f}s, "
-                                        f"suspect={state.next_jump_suspect_count}"
-                                    )
-                                else:
-                                    # 逐步衰减怀疑计数，避免偶发抖动导致误判
-                                    state.next_jump_suspect_count = max(0, state.next_jump_suspect_count - 1)
+                            cycle_interval = int(state.get_announce_interval())
 
-                                # 连续多次跳变：直接判定不可信（除非刚强制汇报/刚手动 reannounce）
-                                if state.next_jump_suspect_count >= 2 and ana_state.get("ana") is not False:
-                                    recent_ra = (now - state.last_reannounce) < 120 or (now - state.last_force_reannounce) < 120
-                                    if not recent_ra:
-                                        ana_state["ana"] = False
-                                        ana_state["updated"] = True
-                                        logger.info(f"[{torrent.name[:20]}] next_announce 多次跳变，判定不可信，后续使用 peerlist 推断")
+                        if cycle_interval > 0 and ((not state.cycle_synced) or state.cycle_interval <= 0):
+                            state.cycle_interval = float(cycle_interval)
+                            state.cycle_synced = True
+                            state.last_good_interval = int(cycle_interval)
 
-                            # 更新观测值
-                            state.last_next_remaining = float(next_remaining)
-                            state.last_next_update_time = now
 
-# 观察期：利用 added_time 校验 next_announce 是否与一个完整周期对齐
-                        if (not ana_state.get("updated")) and next_remaining is not None and torrent.added_time and cycle_interval:
-                            added_ts = torrent.added_time.timestamp()
-                            if now - added_ts < cycle_interval:
-                                delta = (now - added_ts) + next_remaining - cycle_interval
-                                if abs(delta) <= 5:
-                                    ana_state["ana"] = True
-                                    ana_state["updated"] = True
-                                    logger.debug(f"[{torrent.name[:20]}] next_announce 校验通过，判定可信")
-                                elif delta < -600:
-                                    # next_announce 疑似异常：用 peerlist idle 反推 last_announce_time 再判断
-                                    if (not state.last_announce_time) and (not state.next_announce_is_true) and site_rule and site_rule.peerlist_enabled:
-                                        tid = self._get_cached_tid(torrent)
-                                        publish_time = _publish_time_cache.get(torrent.hash)
-                                        if not tid:
-                                            tid, publish_time = await self._search_tid_by_hash(site_rule, torrent)
-                                        if publish_time and state and not state.publish_time:
-                                            state.publish_time = publish_time
-                                        if tid:
-                                            peer_t = await self._get_peerlist_time_cached(site_rule, torrent.hash, tid, now)
-                                            if peer_t is not None:
-                                                time_mode = getattr(site_rule, 'peerlist_time_mode', 'elapsed')
-                                                if time_mode == "remaining":
-                                                    last_announce = now + peer_t - cycle_interval
-                                                else:
-                                                    last_announce = now - peer_t
-                                                # 强制汇报识别（u2_magic 脚本逻辑）：若 last_announce + 900 ≈ now + next_remaining，则还不能下结论
-                                                if abs((last_announce + self._FORCED_REANNOUNCE_INTERVAL) - now - next_remaining) < 5:
-                                                    state.next_announce_is_true = True
-                                                    state.last_announce_time = None
-                                                    logger.debug(f"[{torrent.name[:20]}] 疑似强制汇报引起偏差，继续观察")
-                                                else:
-                                                    ana_state["ana"] = False
-                                                    ana_state["updated"] = True
-                                                    logger.info(f"[{torrent.name[:20]}] next_announce 判定不可信，后续使用 peerlist 推断")
-
-                        # 若 next_announce 不可信：优先用 peerlist idle 推断 last_announce_time / next_announce
-                        if ana_state.get("ana") is False and site_rule and site_rule.peerlist_enabled and cycle_interval:
-                            if not state.last_announce_time:
-                                tid = self._get_cached_tid(torrent)
-                                publish_time = _publish_time_cache.get(torrent.hash)
-                                if not tid:
-                                    tid, publish_time = await self._search_tid_by_hash(site_rule, torrent)
-                                if publish_time and state and not state.publish_time:
-                                    state.publish_time = publish_time
-                                if tid:
-                                    peer_t = await self._get_peerlist_time_cached(site_rule, torrent.hash, tid, now)
-                                    if peer_t is not None:
-                                        time_mode = getattr(site_rule, 'peerlist_time_mode', 'elapsed')
-                                        if time_mode == "remaining":
-                                            state.last_announce_time = now + peer_t - cycle_interval
-                                        else:
-                                            state.last_announce_time = now - peer_t
-                            if state.last_announce_time:
-                                next_announce = state.last_announce_time + cycle_interval
-                                logger.debug(f"[{torrent.name[:20]}] 使用 peerlist 推断 next_announce: {int(next_announce-now)}秒后")
-
-                        # 同步周期 - 传递汇报信息（确保链路完整）
-                        state.sync_cycle(
-                            torrent.uploaded,
-                            now,
-                            next_announce=next_announce,
-                            # 使用修正后的 cycle_interval（U2: 30/45/60min），不要直接用客户端可能缺失/错误的 interval
-                            interval=cycle_interval
-                        )
+                    # === u2_magic(脚本)风格：next_announce 可靠性检测 + peerlist 兜底 ===
+                    ana_state = self._ana_state.setdefault(getattr(downloader, "id", 0) or 0, {"ana": None, "updated": False})
+                    # 统一为 int 秒
+                    try:
+                        cycle_interval = int(cycle_interval) if cycle_interval else 0
+                    except Exception:
+                        cycle_interval = 0
 
-                        # 验证链路：如果 sync_cycle 后 next_announce_time 仍为 None，记录警告
-                        if state.next_announce_time is None and fetch_attempted:
-                            logger.debug(f"[{torrent.name[:20]}] 警告: 无法获取有效的 next_announce_time")
+                    next_remaining = None
+                    if next_announce and next_announce > now:
+                        next_remaining = float(next_announce - now)
+
+                    
+                    # === u2_magic 风格增强：next_announce 跳变检测（比脚本更稳）===
+                    # 期望 next_remaining 随时间线性减少；若出现异常跳变，说明客户端 next_announce 可能不可信。
+                    if next_remaining is not None and cycle_interval:
+                        if state.last_next_remaining is not None and state.last_next_update_time > 0:
+                            expected = state.last_next_remaining - (now - state.last_next_update_time)
+
+                            # 允许跨周期 wrap：把 expected 拉回到合理区间再比较
+                            if expected < 0:
+                                expected = expected % cycle_interval
+                            if expected > cycle_interval:
+                                expected = expected % cycle_interval
+
+                            diff = next_remaining - expected
+
+                            # 强制汇报(900s)可能导致 diff 近似 ±900，视为正常偏差（不下结论）
+                            forced_like = (abs(diff - self._FORCED_REANNOUNCE_INTERVAL) < 10) or (abs(diff + self._FORCED_REANNOUNCE_INTERVAL) < 10)
+
+                            # 大跳变阈值：至少 120s，且至少占周期 15%
+                            jump_threshold = max(120.0, cycle_interval * 0.15)
+
+                            if (not forced_like) and abs(diff) > jump_threshold:
+                                state.next_jump_suspect_count += 1
+                                logger.debug(
+                                    f"[{torrent.name[:20]}] next_announce 跳变: diff={diff:.0f}s, "
+                                    f"expected~{expected:.0f}s, now={next_remaining:.0f}s, "
+                                    f"suspect={state.next_jump_suspect_count}"
+                                )
+                            else:
+                                # 逐步衰减怀疑计数，避免偶发抖动导致误判
+                                state.next_jump_suspect_count = max(0, state.next_jump_suspect_count - 1)
+
+                            # 连续多次跳变：直接判定不可信（除非刚强制汇报/刚手动 reannounce）
+                            if state.next_jump_suspect_count >= 2 and ana_state.get("ana") is not False:
+                                recent_ra = (now - state.last_reannounce) < 120 or (now - state.last_force_reannounce) < 120
+                                if not recent_ra:
+                                    ana_state["ana"] = False
+                                    ana_state["updated"] = True
+                                    logger.info(f"[{torrent.name[:20]}] next_announce 多次跳变，判定不可信，后续使用 peerlist 推断")
 
-                        # 计算限速 - 传递安全余量
-                        raw_limit = self._calculate_limit(state, torrent.upload_speed, target_speed, now, safety_margin, is_downloading=(torrent.status == 'downloading'), eta_seconds=state.eta)
+                        # 更新观测值
+                        state.last_next_remaining = float(next_remaining)
+                        state.last_next_update_time = now
 
-                        # 应用平滑限速 - 防止限速值剧烈波动
-                        if raw_limit > 0:
-                            limit = state.smooth_limiter.smooth(raw_limit, torrent.upload_speed, state.phase, now)
-                        else:
-                            limit = raw_limit
-                            state.smooth_limiter.reset()  # 无限速时重置
-
-                        # 检查强制汇报
-                        if config.enabled:
-                            should_ra, reason = ReannounceOptimizer.should_reannounce(
-                                state, torrent.uploaded, torrent.downloaded,
-                                target_speed, now
-                            )
-                            if should_ra:
-                                try:
-                                    await client.reannounce_torrent(torrent.hash)
-                                    state.last_reannounce = now
-                                    state.reannounced_this_cycle = True
-                                    state.last_announce_time = now
-                                    logger.info(f"[{torrent.name[:20]}] 强制汇报: {reason}")
-                                except Exception as e:
-                                    logger.debug(f"强制汇报失败: {e}")
+# 观察期：利用 added_time 校验 next_announce 是否与一个完整周期对齐
+                    if (not ana_state.get("updated")) and next_remaining is not None and torrent.added_time and cycle_interval:
+                        added_ts = torrent.added_time.timestamp()
+                        if now - added_ts < cycle_interval:
+                            delta = (now - added_ts) + next_remaining - cycle_interval
+                            if abs(delta) <= 5:
+                                ana_state["ana"] = True
+                                ana_state["updated"] = True
+                                logger.debug(f"[{torrent.name[:20]}] next_announce 校验通过，判定可信")
+                            elif delta < -600:
+                                # next_announce 疑似异常：用 peerlist idle 反推 last_announce_time 再判断
+                                if (not state.last_announce_time) and (not state.next_announce_is_true) and site_rule and site_rule.peerlist_enabled:
+                                    tid = self._get_cached_tid(torrent)
+                                    publish_time = _publish_time_cache.get(torrent.hash)
+                                    if not tid:
+                                        tid, publish_time = await self._search_tid_by_hash(site_rule, torrent)
+                                    if publish_time and state and not state.publish_time:
+                                        state.publish_time = publish_time
+                                    if tid:
+                                        peer_t = await self._get_peerlist_time_cached(site_rule, torrent.hash, tid, now)
+                                        if peer_t is not None:
+                                            time_mode = getattr(site_rule, 'peerlist_time_mode', 'elapsed')
+                                            if time_mode == "remaining":
+                                                last_announce = now + peer_t - cycle_interval
+                                            else:
+                                                last_announce = now - peer_t
+                                            # 强制汇报识别（u2_magic 脚本逻辑）：若 last_announce + 900 ≈ now + next_remaining，则还不能下结论
+                                            if abs((last_announce + self._FORCED_REANNOUNCE_INTERVAL) - now - next_remaining) < 5:
+                                                state.next_announce_is_true = True
+                                                state.last_announce_time = None
+                                                logger.debug(f"[{torrent.name[:20]}] 疑似强制汇报引起偏差，继续观察")
+                                            else:
+                                                ana_state["ana"] = False
+                                                ana_state["updated"] = True
+                                                logger.info(f"[{torrent.name[:20]}] next_announce 判定不可信，后续使用 peerlist 推断")
+
+                    # 若 next_announce 不可信：优先用 peerlist idle 推断 last_announce_time / next_announce
+                    if ana_state.get("ana") is False and site_rule and site_rule.peerlist_enabled and cycle_interval:
+                        if not state.last_announce_time:
+                            tid = self._get_cached_tid(torrent)
+                            publish_time = _publish_time_cache.get(torrent.hash)
+                            if not tid:
+                                tid, publish_time = await self._search_tid_by_hash(site_rule, torrent)
+                            if publish_time and state and not state.publish_time:
+                                state.publish_time = publish_time
+                            if tid:
+                                peer_t = await self._get_peerlist_time_cached(site_rule, torrent.hash, tid, now)
+                                if peer_t is not None:
+                                    time_mode = getattr(site_rule, 'peerlist_time_mode', 'elapsed')
+                                    if time_mode == "remaining":
+                                        state.last_announce_time = now + peer_t - cycle_interval
+                                    else:
+                                        state.last_announce_time = now - peer_t
+                        if state.last_announce_time:
+                            next_announce = state.last_announce_time + cycle_interval
+                            logger.debug(f"[{torrent.name[:20]}] 使用 peerlist 推断 next_announce: {int(next_announce-now)}秒后")
+
+                    # 同步周期 - 传递汇报信息（确保链路完整）
+                    state.sync_cycle(
+                        torrent.uploaded,
+                        now,
+                        next_announce=next_announce,
+                        # 使用修正后的 cycle_interval（U2: 30/45/60min），不要直接用客户端可能缺失/错误的 interval
+                        interval=cycle_interval
+                    )
 
-                        # 应用限速
-                        if limit != state.current_limit:
-                            try:
-                                await client.set_torrent_upload_limit(torrent.hash, limit)
-                                old_limit = state.current_limit
-                                state.current_limit = limit
-                                # 记录限速变更
-                                if limit > 0 and old_limit == 0:
-                                    logger.info(f"[{torrent.name[:20]}] 开始限速: {limit/1024:.1f}KB/s, 阶段={state.phase}, 速度={torrent.upload_speed/1024:.1f}KB/s")
-                                elif limit == 0 and old_limit > 0:
-                                    logger.info(f"[{torrent.name[:20]}] 解除限速")
-                                elif abs(limit - old_limit) > 10240:  # 变化超过10KB/s才记录
-                                    logger.debug(f"[{torrent.name[:20]}] 限速调整: {old_limit/1024:.1f} -> {limit/1024:.1f}KB/s")
-                            except Exception as e:
-                                logger.error(f"设置限速失败: {e}")
-
-                        # ===== 下载限速功能（参考 u2_magic.py limit_download_speed）=====
-                        download_limit_applied = None
-                        if limit_download and torrent.status == 'downloading':
-                            # 按照 u2_magic.py: this_time = announce_interval - next_announce - 1
-                            this_time = state.get_this_time(now)
-                            this_up = torrent.uploaded - state.cycle_start_uploaded
-
-                            if this_time > 0 and this_up > 0:
-                                dl_limit, dl_reason = DownloadSpeedLimiter.calculate_download_limit(
-                                    state=state,
-                                    this_time=this_time,
-                                    this_up=this_up,
-                                    total_size=state.total_size_torrent,
-                                    total_done=state.total_done,
-                                    eta=state.eta,
-                                    current_download_limit=state.current_download_limit,
-                                    current_download_speed=torrent.download_speed,
-                                    min_time=120
-                                )
+                    # 验证链路：如果 sync_cycle 后 next_announce_time 仍为 None，记录警告
+                    if state.next_announce_time is None and fetch_attempted:
+                        logger.debug(f"[{torrent.name[:20]}] 警告: 无法获取有效的 next_announce_time")
+
+                    prepared.append((torrent, tracker, state, target_speed, safety_margin, limit_download, optimize_announce))
+
+                # 计算限速 - 本轮全部种子一次批量计算并平滑（防止限速值剧烈波动）
+                limits = self._batch_engine.step(
+                    [item[2] for item in prepared],
+                    [item[0].upload_speed for item in prepared],
+                    [item[3] for item in prepared],
+                    [item[4] for item in prepared],
+                    [item[0].status == 'downloading' for item in prepared],
+                    [item[2].eta for item in prepared],
+                    now,
+                )
 
-                                if dl_limit is not None:
-                                    try:
-                                        if dl_limit == -1:
-                                            # 解除下载限速
-                                            await client.set_torrent_download_limit(torrent.hash, 0)
-                                            state.current_download_limit = -1
-                                            logger.info(f"[{torrent.name[:20]}] {dl_reason}")
-                                        else:
-                                            # 设置下载限速（转换为 bytes/s）
-                                            await client.set_torrent_download_limit(torrent.hash, dl_limit * 1024)
-                                            state.current_download_limit = dl_limit
-                                            logger.info(f"[{torrent.name[:20]}] {dl_reason}")
-                                        download_limit_applied = dl_limit
-                                    except Exception as e:
-                                        logger.error(f"设置下载限速失败: {e}")
-
-                        # ===== 汇报优化功能（参考 u2_magic.py optimize_announce_time）=====
-                        optimize_action = None
-                        if optimize_announce and torrent.status == 'downloading':
-                            # 按照 u2_magic.py: this_time = announce_interval - next_announce - 1
-                            this_time = state.get_this_time(now)
-                            this_up = torrent.uploaded - state.cycle_start_uploaded
-                            announce_interval = state.get_announce_interval()
-
-                            should_act, opt_limit, opt_reason = AnnounceOptimizer.should_optimize(
+                for (torrent, tracker, state, target_speed, safety_margin, limit_download, optimize_announce), limit in zip(prepared, limits):
+                    # 检查强制汇报
+                    if config.enabled:
+                        should_ra, reason = ReannounceOptimizer.should_reannounce(
+                            state, torrent.uploaded, torrent.downloaded,
+                            target_speed, now
+                        )
+                        if should_ra:
+                            # 汇报在本轮结束时批量发送
+                            pending_reannounce.append(torrent.hash)
+                            previous_reannounce[torrent.hash] = (
+                                state, state.last_reannounce, state.reannounced_this_cycle, state.last_announce_time
+                            )
+                            state.last_reannounce = now
+                            state.reannounced_this_cycle = True
+                            state.last_announce_time = now
+                            logger.info(f"[{torrent.name[:20]}] 强制汇报: {reason}")
+
+                    # 应用限速（先更新状态，本轮结束时按相同限速值合并批量下发，失败则回滚）
+                    if limit != state.current_limit:
+                        old_limit = state.current_limit
+                        pending_limits[torrent.hash] = limit
+                        previous_limits[torrent.hash] = (state, old_limit)
+                        state.current_limit = limit
+                        # 记录限速变更
+                        if limit > 0 and old_limit == 0:
+                            logger.info(f"[{torrent.name[:20]}] 开始限速: {limit/1024:.1f}KB/s, 阶段={state.phase}, 速度={torrent.upload_speed/1024:.1f}KB/s")
+                        elif limit == 0 and old_limit > 0:
+                            logger.info(f"[{torrent.name[:20]}] 解除限速")
+                        elif abs(limit - old_limit) > 10240:  # 变化超过10KB/s才记录
+                            logger.debug(f"[{torrent.name[:20]}] 限速调整: {old_limit/1024:.1f} -> {limit/1024:.1f}KB/s")
+
+                    # ===== 下载限速功能（参考 u2_magic.py limit_download_speed）=====
+                    download_limit_applied = None
+                    if limit_download and torrent.status == 'downloading':
+                        # 按照 u2_magic.py: this_time = announce_interval - next_announce - 1
+                        this_time = state.get_this_time(now)
+                        this_up = torrent.uploaded - state.cycle_start_uploaded
+
+                        if this_time > 0 and this_up > 0:
+                            dl_limit, dl_reason = DownloadSpeedLimiter.calculate_download_limit(
                                 state=state,
                                 this_time=this_time,
                                 this_up=this_up,
-                                announce_interval=announce_interval,
-                                now=now
+                                total_size=state.total_size_torrent,
+                                total_done=state.total_done,
+                                eta=state.eta,
+                                current_download_limit=state.current_download_limit,
+                                current_download_speed=torrent.download_speed,
+                                min_time=120
                             )
 
-                            if should_act:
+                            if dl_limit is not None:
                                 try:
-                                    if opt_limit is not None:
-                                        # 设置等待汇报的限速
-                                        await client.set_torrent_upload_limit(torrent.hash, opt_limit * 1024)
+                                    if dl_limit == -1:
+                                        # 解除下载限速
+                                        await client.set_torrent_download_limit(torrent.hash, 0)
+                                        state.current_download_limit = -1
+                                        logger.info(f"[{torrent.name[:20]}] {dl_reason}")
+                                    else:
+                                        # 设置下载限速（转换为 bytes/s）
+                                        await client.set_torrent_download_limit(torrent.hash, dl_limit * 1024)
+                                        state.current_download_limit = dl_limit
+                                        logger.info(f"[{torrent.name[:20]}] {dl_reason}")
+                                    download_limit_applied = dl_limit
+                                except Exception as e:
+                                    logger.error(f"设置下载限速失败: {e}")
+
+                    # ===== 汇报优化功能（参考 u2_magic.py optimize_announce_time）=====
+                    optimize_action = None
+                    if optimize_announce and torrent.status == 'downloading':
+                        # 按照 u2_magic.py: this_time = announce_interval - next_announce - 1
+                        this_time = state.get_this_time(now)
+                        this_up = torrent.uploaded - state.cycle_start_uploaded
+                        announce_interval = state.get_announce_interval()
+
+                        should_act, opt_limit, opt_reason = AnnounceOptimizer.should_optimize(
+                            state=state,
+                            this_time=this_time,
+                            this_up=this_up,
+                            announce_interval=announce_interval,
+                            now=now
+                        )
+
+                        if should_act:
+                            # 汇报优化直接下发限速，覆盖本轮待批量下发的值
+                            pending_limits.pop(torrent.hash, None)
+                            try:
+                                if opt_limit is not None:
+                                    # 设置等待汇报的限速
+                                    if await client.set_torrent_upload_limit(torrent.hash, opt_limit * 1024):
                                         state.waiting_for_reannounce = True
                                         state.current_upload_limit = opt_limit
                                         logger.info(f"[{torrent.name[:20]}] 汇报优化: {opt_reason}")
                                         optimize_action = f"等待汇报 (限速{opt_limit}KB/s)"
                                     else:
-                                        # 执行强制汇报
-                                        if now - state.last_force_reannounce >= C.REANNOUNCE_MIN_INTERVAL:
-                                            await client.reannounce_torrent(torrent.hash)
+                                        logger.warning(f"[{torrent.name[:20]}] 汇报优化设置限速失败，下一轮重试")
+                                else:
+                                    # 执行强制汇报（成功后才更新状态，失败下一轮重试）
+                                    if now - state.last_force_reannounce >= C.REANNOUNCE_MIN_INTERVAL:
+                                        if await client.reannounce_torrent(torrent.hash):
                                             state.last_force_reannounce = now
                                             state.waiting_for_reannounce = False
                                             # 解除等待限速
-                                            await client.set_torrent_upload_limit(torrent.hash, 0)
-                                            state.current_upload_limit = -1
+                                            if await client.set_torrent_upload_limit(torrent.hash, 0):
+                                                state.current_upload_limit = -1
                                             logger.info(f"[{torrent.name[:20]}] 汇报优化: {opt_reason}")
                                             optimize_action = "强制汇报"
-                                except Exception as e:
-                                    logger.error(f"汇报优化失败: {e}")
-
-                        # 记录结果
-                        results[torrent.hash] = {
-                            "name": torrent.name[:30],
-                            "tracker": tracker,
-                            "current_speed": torrent.upload_speed,
-                            "target_speed": target_speed,
-                            "limit": limit,
-                            "phase": state.phase,
-                            "time_left": state.get_time_left(now),
-                            "cycle_synced": state.cycle_synced,
-                            "cycle_interval": state.cycle_interval or state.get_announce_interval(),
-                            "announce_interval": state.get_announce_interval(),
-                            # 新增周期进度信息
-                            "cycle_progress": state.cycle_progress,
-                            "cycle_time_progress": state.cycle_time_progress,
-                            "cycle_current_upload": state.cycle_current_upload,
-                            "cycle_target_upload": state.cycle_target_upload,
-                            "cycle_avg_speed": state.cycle_avg_speed,
-                            "estimated_completion": state.estimated_completion,
-                            "safety_margin": safety_margin,
-                            # 添加 next_announce_time 用于调试
-                            "next_announce_time": state.next_announce_time,
-                            # 下载限速和汇报优化信息
-                            "download_limit": download_limit_applied,
-                            "optimize_action": optimize_action,
-                            "limit_download_enabled": limit_download,
-                            "optimize_announce_enabled": optimize_announce,
-                            # 下载状态
-                            "total_done": state.total_done,
-                            "download_speed": torrent.download_speed,
-                            "eta": state.eta,
-                        }
-
-                        # 记录到数据库（补全 uploaded/downloaded，用于“今日上传/今日下载”统计）
-                        # 计算本轮增量，避免累计值重复相加
-                        if state.last_record_uploaded == 0 and torrent.uploaded > 0:
-                            # 兼容旧状态文件：第一次不计入 delta，避免瞬时暴涨
-                            state.last_record_uploaded = torrent.uploaded
-                        if state.last_record_downloaded == 0 and torrent.downloaded > 0:
-                            state.last_record_downloaded = torrent.downloaded
-
-                        delta_uploaded = max(0, torrent.uploaded - state.last_record_uploaded)
-                        delta_downloaded = max(0, torrent.downloaded - state.last_record_downloaded)
+                                        else:
+                                            logger.warning(f"[{torrent.name[:20]}] 汇报优化强制汇报失败，下一轮重试")
+                            except Exception as e:
+                                logger.error(f"汇报优化失败: {e}")
+
+                    # 记录结果
+                    results[torrent.hash] = {
+                        "name": torrent.name[:30],
+                        "tracker": tracker,
+                        "current_speed": torrent.upload_speed,
+                        "target_speed": target_speed,
+                        "limit": limit,
+                        "phase": state.phase,
+                        "time_left": state.get_time_left(now),
+                        "cycle_synced": state.cycle_synced,
+                        "cycle_interval": state.cycle_interval or state.get_announce_interval(),
+                        "announce_interval": state.get_announce_interval(),
+                        # 新增周期进度信息
+                        "cycle_progress": state.cycle_progress,
+                        "cycle_time_progress": state.cycle_time_progress,
+                        "cycle_current_upload": state.cycle_current_upload,
+                        "cycle_target_upload": state.cycle_target_upload,
+                        "cycle_avg_speed": state.cycle_avg_speed,
+                        "estimated_completion": state.estimated_completion,
+                        "safety_margin": safety_margin,
+                        # 添加 next_announce_time 用于调试
+                        "next_announce_time": state.next_announce_time,
+                        # 下载限速和汇报优化信息
+                        "download_limit": download_limit_applied,
+                        "optimize_action": optimize_action,
+                        "limit_download_enabled": limit_download,
+                        "optimize_announce_enabled": optimize_announce,
+                        # 下载状态
+                        "total_done": state.total_done,
+                        "download_speed": torrent.download_speed,
+                        "eta": state.eta,
+                    }
+
+                    # 记录到数据库（补全 uploaded/downloaded，用于“今日上传/今日下载”统计）
+                    # 计算本轮增量，避免累计值重复相加
+                    if state.last_record_uploaded == 0 and torrent.uploaded > 0:
+                        # 兼容旧状态文件：第一次不计入 delta，避免瞬时暴涨
                         state.last_record_uploaded = torrent.uploaded
+                    if state.last_record_downloaded == 0 and torrent.downloaded > 0:
                         state.last_record_downloaded = torrent.downloaded
-                        # 避免写入大量 0 增量记录（不影响今日上传/下载统计）
-                        if delta_uploaded == 0 and delta_downloaded == 0:
-                            continue
-
-                        record = SpeedLimitRecord(
-                            tracker_domain=tracker,
-                            downloader_id=downloader.id,
-                            current_speed=torrent.upload_speed,
-                            target_speed=target_speed,
-                            limit_applied=state.current_limit,
-                            phase=state.phase,
-                            uploaded=delta_uploaded,
-                            downloaded=delta_downloaded,
-                        )
-                        self.db.add(record)
 
-            except Exception as e:
-                logger.error(f"处理下载器 {downloader.name} 失败: {e}")
+                    delta_uploaded = max(0, torrent.uploaded - state.last_record_uploaded)
+                    delta_downloaded = max(0, torrent.downloaded - state.last_record_downloaded)
+                    state.last_record_uploaded = torrent.uploaded
+                    state.last_record_downloaded = torrent.downloaded
+                    # 避免写入大量 0 增量记录（不影响今日上传/下载统计）
+                    if delta_uploaded == 0 and delta_downloaded == 0:
+                        continue
 
-        # 定期保存状态（与本轮记录同一事务提交，避免每次两次 commit）
-        await self.save_state(commit=False)
-        await self.db.commit()
+                    record = SpeedLimitRecord(
+                        tracker_domain=tracker,
+                        downloader_id=downloader.id,
+                        current_speed=torrent.upload_speed,
+                        target_speed=target_speed,
+                        limit_applied=state.current_limit,
+                        phase=state.phase,
+                        uploaded=delta_uploaded,
+                        downloaded=delta_downloaded,
+                    )
+                    records.append(record)
 
-        return {
-            "enabled": True,
-            "torrents": results,
-            "count": len(results),
-        }
+                # 按各自的阶段和剩余时间安排下次评估
+                for torrent in torrents:
+                    self._schedule(downloader.id, torrent.hash, now + self._eval_interval(self.states.get(torrent.hash), now))
+
+                await self._flush_batched_actions(
+                    client, pending_reannounce, pending_limits, previous_limits, previous_reannounce
+                )
+
+        except Exception as e:
+            logger.error(f"处理下载器 {downloader.name} 失败: {e}")
+        return results, records
+
+    async def _store_records(self, records: List[SpeedLimitRecord], flush_all: bool = False):
+        """写入本轮的记录（不提交）
+
+        默认计入按分钟的汇总，已结束的分钟一次批量插入；
+        SPEED_LIMIT_RAW_RECORDS 开启时逐条写入原始记录（调试用）。
+        """
+        at = datetime.utcnow()
+        if settings.SPEED_LIMIT_RAW_RECORDS:
+            self.db.add_all(records)
+        else:
+            for record in records:
+                record_rollup.add(record, at)
+        rows = record_rollup.take(None if flush_all else at.replace(second=0, microsecond=0))
+        if rows:
+            await self.db.execute(insert(SpeedLimitRecord), rows)
+
+    def _collect_records(self, task: asyncio.Task):
+        for downloader_id, inflight in list(self._inflight.items()):
+            if inflight is task:
+                del self._inflight[downloader_id]
+        if task.cancelled() or task.exception() is not None:
+            return
+        self._pending_records.extend(task.result()[1])
+
+    async def _flush_batched_actions(
+        self,
+        client,
+        pending_reannounce: List[str],
+        pending_limits: Dict[str, int],
+        previous_limits: Dict[str, Tuple["TorrentState", int]],
+        previous_reannounce: Optional[Dict[str, tuple]] = None,
+    ):
+        """批量下发本轮的强制汇报和上传限速（汇报在前，与逐个处理时顺序一致）
+
+        下发失败（返回 False 或抛出异常）时回滚状态，下一轮重新判断并下发。
+        """
+        if pending_reannounce:
+            try:
+                ok = await client.reannounce_torrents(pending_reannounce)
+            except Exception as e:
+                logger.debug(f"强制汇报失败: {e}")
+                ok = False
+            if not ok:
+                logger.warning(f"强制汇报 {len(pending_reannounce)} 个种子失败，下一轮重试")
+                for torrent_hash in pending_reannounce:
+                    previous = (previous_reannounce or {}).get(torrent_hash)
+                    if previous is None:
+                        continue
+                    state, last_reannounce, reannounced, last_announce_time = previous
+                    state.last_reannounce = last_reannounce
+                    state.reannounced_this_cycle = reannounced
+                    state.last_announce_time = last_announce_time
+
+        if pending_limits:
+            try:
+                ok = await client.set_torrents_upload_limit(pending_limits)
+            except Exception as e:
+                logger.error(f"设置限速失败: {e}")
+                ok = False
+            if not ok:
+                logger.warning(f"设置 {len(pending_limits)} 个种子的限速失败，下一轮重新下发")
+                # 回滚状态，下一轮重新下发
+                for torrent_hash in pending_limits:
+                    state, old_limit = previous_limits[torrent_hash]
+                    state.current_limit = old_limit
 
     async def clear_limits(self):
         """清除所有限速 - 使用上下文管理器确保连接正确释放"""
@@ -2749,17 +3599,35 @@ class SpeedLimiterService:
 
         for downloader in downloaders:
             try:
+                snapshot = await snapshot_store.get(downloader)
+                if snapshot is None:
+                    continue
                 async with downloader_client(downloader) as client:
                     if client:
-                        torrents = await client.get_torrents()
-                        for torrent in torrents:
-                            await client.set_torrent_upload_limit(torrent.hash, 0)
+                        await client.set_torrents_upload_limit({h: 0 for h in snapshot.table.hashes})
             except Exception as e:
                 logger.error(f"清除限速失败: {e}")
 
+        # 写入剩余的记录和汇总
+        records, self._pending_records = self._pending_records, []
+        try:
+            await self._store_records(records, flush_all=True)
+        except Exception as e:
+            logger.error(f"写入限速记录失败: {e}")
+
+        # 重置前先把未到保存间隔的状态写入
+        await self.save_state(force=True)
+
         # 重置状态
         self.states.clear()
-        await self.save_state()
+        self._last_seen.clear()
+        self._deadline_heap.clear()
+        self._deadlines.clear()
+        self._last_full_scan.clear()
+        for task in self._inflight.values():
+            task.cancel()
+        self._inflight.clear()
+        await self._clear_saved_state()
         logger.info("所有限速已清除")
 
     def get_status(self) -> Dict[str, Any]:
@@ -2813,9 +3681,39 @@ class SpeedLimiterService:
                 # 动态更新time_left（不重新获取数据）
                 return self._update_cache_time_left(_status_cache, cache_age)
 
+            # 启动后还没有刷新过：先返回持久化的旧状态
+            if _status_cache_time == 0:
+                stale = await self._load_persisted_status()
+                if stale is not None:
+                    _start_background_status_refresh()
+                    return stale
+
         # 缓存过期，同步刷新
         return await self.refresh_status()
 
+    async def _load_persisted_status(self) -> Optional[Dict[str, Any]]:
+        """读取上次持久化的状态（每个进程只尝试一次），time_left 按经过的时间修正"""
+        global _status_warm_loaded
+        if _status_warm_loaded:
+            return None
+        _status_warm_loaded = True
+
+        blobs = await load_blobs(SPEED_LIMIT_STATUS_KEY)
+        if not blobs or not blobs[0].captured_at:
+            return None
+        try:
+            cached = unpack_json(blobs[0].data)
+        except Exception as e:
+            logger.warning(f"读取持久化限速状态失败: {e}")
+            return None
+
+        stale_since = blobs[0].captured_at
+        elapsed = max(0.0, (datetime.utcnow() - stale_since).total_seconds())
+        status = self._update_cache_time_left(cached, elapsed)
+        for data in status.values():
+            data["stale_since"] = stale_since
+        return status
+
     def _update_cache_time_left(self, cache: Dict[str, Any], elapsed: float) -> Dict[str, Any]:
         """更新缓存中的time_left字段"""
         updated_cache = {}
@@ -2857,52 +3755,87 @@ class SpeedLimiterService:
         )
         downloaders = result.scalars().all()
 
-        # 遍历下载器获取实时数据
-        for downloader in downloaders:
+        # 并发获取各下载器的实时数据，慢的下载器不拖慢整体；
+        # 超时或被推迟的下载器沿用上一次的状态
+        async def refresh_one(downloader: Downloader) -> Dict[str, Any]:
             try:
-                async with downloader_client(downloader) as client:
-                    if not client:
-                        continue
+                part = await asyncio.wait_for(
+                    self._refresh_downloader_status(downloader, site_rule_map, now),
+                    timeout=C.STATUS_DOWNLOADER_TIMEOUT,
+                )
+            except asyncio.TimeoutError:
+                logger.warning(f"刷新下载器 {downloader.name} 状态超时")
+                part = None
+            if part is None:
+                return _status_parts.get(downloader.id, {})
+            _status_parts[downloader.id] = part
+            return part
 
-                    # get_torrents(with_reannounce=True) 已经批量获取了 reannounce 和 next_announce 数据
-                    torrents = await client.get_torrents()
-
-                    # 过滤活跃种子
-                    active_torrents = [t for t in torrents if t.status in ['seeding', 'downloading']]
-
-                    # 预处理：确定哪些种子需要获取 comment URL (用于peerlist TID提取)
-                    torrents_need_comment = []
-                    for torrent in active_torrents:
-                        tracker = await self._resolve_tracker_domain(client, torrent)
-                        if not tracker:
-                            continue
-                        site_rule = site_rule_map.get(tracker)
-                        # 只有启用了 peerlist 且 TID 未缓存时才需要 comment
-                        if site_rule and site_rule.peerlist_enabled:
-                            if torrent.hash not in _tid_cache and torrent.hash not in _comment_cache:
-                                torrents_need_comment.append(torrent)
-
-                    # 批量获取 comment URL（并行请求）
-                    if torrents_need_comment and hasattr(client, '_request'):
-                        await self._batch_fetch_comments(client, torrents_need_comment)
-
-                    # 处理每个种子
-                    for torrent in active_torrents:
-                        status_entry = await self._process_torrent_status(
-                            client, torrent, site_rule_map, now
-                        )
-                        if status_entry:
-                            status[torrent.hash] = status_entry
-
-            except Exception as e:
-                logger.error(f"刷新下载器 {downloader.name} 状态失败: {e}")
+        for downloader_status in await asyncio.gather(*(refresh_one(dl) for dl in downloaders)):
+            status.update(downloader_status)
 
         # 使用锁保护缓存更新
-        global _status_cache, _status_cache_time
+        global _status_cache, _status_cache_time, _status_persisted_at
         async with _cache_lock:
             _status_cache = status
             _status_cache_time = now
 
+        persist_interval = settings.TORRENT_SNAPSHOT_PERSIST_INTERVAL
+        if persist_interval > 0 and now - _status_persisted_at >= persist_interval:
+            _status_persisted_at = now
+            await save_blob(SPEED_LIMIT_STATUS_KEY, pack_json(status), item_count=len(status))
+
+        return status
+
+    async def _refresh_downloader_status(
+        self,
+        downloader: Downloader,
+        site_rule_map: Dict[str, SpeedLimitSite],
+        now: float,
+    ) -> Optional[Dict[str, Any]]:
+        """获取单个下载器的实时状态；请求被令牌桶推迟时返回 None（沿用上一次的状态）"""
+        status: Dict[str, Any] = {}
+        try:
+            async with downloader_client(downloader) as client:
+                if not client:
+                    return status
+
+                # get_torrents(with_reannounce=True) 已经批量获取了 reannounce 和 next_announce 数据
+                torrents = await client.get_torrents()
+
+                # 过滤活跃种子
+                active_torrents = [t for t in torrents if t.status in ['seeding', 'downloading']]
+                await self._ensure_states([t.hash for t in active_torrents])
+
+                # 预处理：确定哪些种子需要获取 comment URL (用于peerlist TID提取)
+                torrents_need_comment = []
+                for torrent in active_torrents:
+                    tracker = await self._resolve_tracker_domain(client, torrent)
+                    if not tracker:
+                        continue
+                    site_rule = site_rule_map.get(tracker)
+                    # 只有启用了 peerlist 且 TID 未缓存时才需要 comment
+                    if site_rule and site_rule.peerlist_enabled:
+                        if torrent.hash not in _tid_cache and torrent.hash not in _comment_cache:
+                            torrents_need_comment.append(torrent)
+
+                # 批量获取 comment URL（并行请求）
+                if torrents_need_comment and hasattr(client, '_request'):
+                    await self._batch_fetch_comments(client, torrents_need_comment)
+
+                # 处理每个种子
+                for torrent in active_torrents:
+                    status_entry = await self._process_torrent_status(
+                        client, torrent, site_rule_map, now
+                    )
+                    if status_entry:
+                        status[torrent.hash] = status_entry
+
+        except RequestDeferred:
+            logger.debug(f"下载器 {downloader.name} 繁忙，沿用上一次的状态")
+            return None
+        except Exception as e:
+            logger.error(f"刷新下载器 {downloader.name} 状态失败: {e}")
         return status
 
     async def _batch_fetch_comments(self, client, torrents: List[TorrentInfo]):
@@ -3216,47 +4149,75 @@ class SpeedLimiterService:
             "seeding_time": torrent.seeding_time,
         }
 
-    def get_suggested_interval(self) -> float:
-        """获取建议的下次检查间隔
-
-        根据所有活跃种子的最小剩余时间动态调整检查频率
-        参考 Speed-Limiting-Engine.py 的动态休眠机制
-
-        Returns:
-            建议的检查间隔（秒）
-        """
-        if not self.states:
-            return C.DYNAMIC_INTERVAL_MAX
-
-        now = time.time()
-        min_time_left = float('inf')
-
-        # 找出所有活跃种子中最小的剩余时间
-        for state in self.states.values():
-            if state.phase == C.PHASE_IDLE:
-                continue  # 跳过不需要限速的种子
+    # ═══════════════════════════════════════════════════════════════════════════
+    # 截止时间调度
+    # ═══════════════════════════════════════════════════════════════════════════
 
-            time_left = state.get_time_left(now)
-            if time_left > 0:
-                min_time_left = min(min_time_left, time_left)
-
-        # 如果没有活跃种子，使用最大间隔
-        if min_time_left == float('inf'):
+    @staticmethod
+    def _interval_for_time_left(time_left: float) -> float:
+        """根据距离汇报的剩余时间确定检查间隔（参考 Speed-Limiting-Engine.py 的动态休眠）"""
+        if time_left <= 0:
             return C.DYNAMIC_INTERVAL_MAX
-
-        # 根据最小剩余时间确定检查间隔
-        if min_time_left <= 5:
+        if time_left <= 5:
             interval = C.DYNAMIC_INTERVAL['critical']
-        elif min_time_left <= 15:
+        elif time_left <= 15:
             interval = C.DYNAMIC_INTERVAL['urgent']
-        elif min_time_left <= 30:
+        elif time_left <= 30:
             interval = C.DYNAMIC_INTERVAL['active']
-        elif min_time_left <= 60:
+        elif time_left <= 60:
             interval = C.DYNAMIC_INTERVAL['normal']
-        elif min_time_left <= 120:
+        elif time_left <= 120:
             interval = C.DYNAMIC_INTERVAL['relaxed']
         else:
             interval = C.DYNAMIC_INTERVAL['idle']
-
-        # 确保在合理范围内
         return clamp(interval, C.DYNAMIC_INTERVAL_MIN, C.DYNAMIC_INTERVAL_MAX)
+
+    def _eval_interval(self, state: Optional["TorrentState"], now: float) -> float:
+        """单个种子的评估间隔：不限速的种子使用最大间隔"""
+        if state is None or state.phase == C.PHASE_IDLE:
+            return C.DYNAMIC_INTERVAL_MAX
+        return self._interval_for_time_left(state.get_time_left(now))
+
+    def _schedule(self, downloader_id: int, torrent_hash: str, when: float):
+        self._deadlines[(downloader_id, torrent_hash)] = when
+        heapq.heappush(self._deadline_heap, (when, downloader_id, torrent_hash))
+
+    def _pop_due(self, now: float) -> Dict[int, List[str]]:
+        """取出所有已到期的种子，按下载器分组"""
+        due: Dict[int, List[str]] = {}
+        heap = self._deadline_heap
+        while heap and heap[0][0] <= now:
+            when, downloader_id, torrent_hash = heapq.heappop(heap)
+            key = (downloader_id, torrent_hash)
+            if self._deadlines.get(key) != when:
+                continue  # 已被重新安排或清理
+            del self._deadlines[key]
+            due.setdefault(downloader_id, []).append(torrent_hash)
+        return due
+
+    def _prune_deadlines(self, downloader_id: int, active_hashes: set):
+        """全量扫描后丢弃已不活跃种子的截止时间"""
+        for key in [k for k in self._deadlines if k[0] == downloader_id and k[1] not in active_hashes]:
+            del self._deadlines[key]
+
+    def get_suggested_interval(self) -> float:
+        """获取建议的下次检查间隔
+
+        即最早到期的种子（或下一次全量扫描）距现在的时间。每个种子的评估间隔
+        由其自身的阶段和剩余时间决定（见 _eval_interval），不再由全体最小值决定。
+
+        Returns:
+            建议的检查间隔（秒）
+        """
+        now = time.time()
+        next_due = now + C.DYNAMIC_INTERVAL_MAX
+        if self._last_full_scan:
+            next_due = min(next_due, min(self._last_full_scan.values()) + C.FULL_SCAN_INTERVAL)
+
+        heap = self._deadline_heap
+        while heap and self._deadlines.get((heap[0][1], heap[0][2])) != heap[0][0]:
+            heapq.heappop(heap)
+        if heap:
+            next_due = min(next_due, heap[0][0])
+
+        return clamp(next_due - now, C.DYNAMIC_INTERVAL_MIN, C.DYNAMIC_INTERVAL_MAX)
@@ -32,6 +32,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import U2MagicConfig, U2MagicRecord, Downloader, SystemSettings
 from app.services.downloader.context import downloader_client
 from app.utils import parse_size, get_logger
+from app.utils.bencode import TorrentMeta, parse_torrent
 
 logger = get_logger('pt_manager.u2_magic')
 
@@ -821,18 +822,25 @@ class U2MagicService:
         self,
         torrent_data: bytes,
         config: U2MagicConfig,
-        torrent_size: int = 0
+        torrent_size: int = 0,
+        meta: Optional[TorrentMeta] = None,
     ) -> bool:
         """添加种子到下载器（支持多下载器智能分配）
 
         Args:
             torrent_data: 种子文件数据
             config: U2追魔配置
-            torrent_size: 种子大小（字节），用于智能分配
+            torrent_size: 种子大小（字节），用于智能分配；为 0 时取种子文件中的大小
+            meta: 已解析的种子元数据，未传入时在这里解析
 
         Returns:
             是否成功添加
         """
+        if meta is None:
+            meta = parse_torrent(torrent_data)
+        if not torrent_size and meta:
+            torrent_size = meta.total_size
+
         # 解析下载器ID列表
         downloader_ids = self._parse_downloader_ids(config)
 
@@ -840,8 +848,11 @@ class U2MagicService:
             # 保存到监控目录
             if config.watch_dir:
                 try:
-                    import hashlib
-                    hash_name = hashlib.md5(torrent_data[:1024]).hexdigest()[:8]
+                    if meta:
+                        hash_name = meta.info_hash[:8]
+                    else:
+                        import hashlib
+                        hash_name = hashlib.md5(torrent_data[:1024]).hexdigest()[:8]
                     path = os.path.join(config.watch_dir, f"u2_{hash_name}.torrent")
                     os.makedirs(config.watch_dir, exist_ok=True)
                     with open(path, 'wb') as f:
@@ -868,7 +879,7 @@ class U2MagicService:
                 )
 
                 if torrent_hash:
-                    logger.info(f"种子已添加到下载器 {downloader.name}")
+                    logger.info(f"种子已添加到下载器 {downloader.name}: {torrent_hash}")
                     return True
                 return False
         except Exception as e:
@@ -953,8 +964,10 @@ class U2MagicService:
                             await self.backup_torrent(torrent_data, str(tid), config.backup_dir)
 
                         # 添加到下载器（传递种子大小用于智能分配）
-                        torrent_size = info.get('size', 0)
-                        success = await self.add_to_downloader(torrent_data, config, torrent_size)
+                        meta = parse_torrent(torrent_data)
+                        torrent_size = info.get('size', 0) or (meta.total_size if meta else 0)
+                        torrent_hash = meta.info_hash if meta else ""
+                        success = await self.add_to_downloader(torrent_data, config, torrent_size, meta)
 
                         if success:
                             downloaded += 1
@@ -964,9 +977,10 @@ class U2MagicService:
                             record = U2MagicRecord(
                                 torrent_id=str(tid),
                                 torrent_name=info['name'],
+                                torrent_hash=torrent_hash,
                                 magic_type=info.get('magic_type', ''),
                                 seeders=info.get('seeders', 0),
-                                size=info.get('size', 0),
+                                size=torrent_size,
                                 downloaded=True,
                                 download_time=datetime.utcnow(),
                             )
@@ -975,9 +989,10 @@ class U2MagicService:
                             record = U2MagicRecord(
                                 torrent_id=str(tid),
                                 torrent_name=info['name'],
+                                torrent_hash=torrent_hash,
                                 magic_type=info.get('magic_type', ''),
                                 seeders=info.get('seeders', 0),
-                                size=info.get('size', 0),
+                                size=torrent_size,
                                 downloaded=False,
                                 skip_reason="添加到下载器失败",
                             )
@@ -0,0 +1,93 @@
+"""Warm-start persistence - compressed state blobs in the database
+
+容器重启后，仪表盘、删种规则预览和限速状态都要等待下载器的第一轮完整请求，
+大客户端上界面会有一分钟不可用。这里把需要的状态以压缩二进制的形式按 key 存入
+snapshot_blobs 表（每个下载器一条种子快照，外加限速状态），启动时读回，
+先以"stale since"标记的旧数据响应，后台轮询追上后再替换。
+
+读写失败只记录日志，不影响正常流程。
+"""
+
+import json
+import zlib
+from datetime import datetime
+from typing import Any, List, Optional
+
+from sqlalchemy import select
+
+from app.models import SnapshotBlob
+from app.utils import get_logger
+
+logger = get_logger('pt_manager.warm_start')
+
+# key 前缀
+TORRENTS_KEY_PREFIX = "torrents:"
+SPEED_LIMIT_STATUS_KEY = "speed_limit_status"
+
+
+def torrents_key(downloader_id: int) -> str:
+    return f"{TORRENTS_KEY_PREFIX}{downloader_id}"
+
+
+def pack_json(value: Any) -> bytes:
+    return zlib.compress(json.dumps(value, ensure_ascii=False, default=str).encode(), 6)
+
+
+def unpack_json(data: bytes) -> Any:
+    return json.loads(zlib.decompress(data))
+
+
+async def save_blob(
+    key: str,
+    data: bytes,
+    version: int = 0,
+    item_count: int = 0,
+    captured_at: Optional[datetime] = None,
+) -> bool:
+    """写入（或覆盖）一条持久化数据"""
+    from app.database import async_session_maker
+
+    try:
+        async with async_session_maker() as db:
+            result = await db.execute(select(SnapshotBlob).where(SnapshotBlob.key == key))
+            blob = result.scalar_one_or_none()
+            if blob is None:
+                blob = SnapshotBlob(key=key)
+                db.add(blob)
+            blob.data = data
+            blob.version = version
+            blob.item_count = item_count
+            blob.captured_at = captured_at or datetime.utcnow()
+            await db.commit()
+        return True
+    except Exception as e:
+        logger.warning(f"保存预热数据 {key} 失败: {e}")
+        return False
+
+
+async def load_blobs(prefix: str) -> List[SnapshotBlob]:
+    """读取 key 以 prefix 开头的全部持久化数据"""
+    from app.database import async_session_maker
+
+    try:
+        async with async_session_maker() as db:
+            result = await db.execute(select(SnapshotBlob).where(SnapshotBlob.key.startswith(prefix)))
+            return list(result.scalars().all())
+    except Exception as e:
+        logger.warning(f"读取预热数据 {prefix} 失败: {e}")
+        return []
+
+
+async def delete_blob(key: str):
+    """删除一条持久化数据（下载器删除时调用）"""
+    from app.database import async_session_maker
+
+    try:
+        async with async_session_maker() as db:
+            result = await db.execute(select(SnapshotBlob).where(SnapshotBlob.key == key))
+            blob = result.scalar_one_or_none()
+            if blob is not None:
+                await db.delete(blob)
+                await db.commit()
+    except Exception as e:
+        logger.warning(f"删除预热数据 {key} 失败: {e}")
@@ -1,4 +1,5 @@
 import asyncio
+import time
 from datetime import datetime, timedelta
 from typing import Dict, Optional
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
@@ -17,7 +18,10 @@ from app.services.delete_service import DeleteService
 from app.services.speed_limiter import SpeedLimiterService
 from app.services.u2_magic import U2MagicService
 from app.services.netcup_monitor import netcup_monitor_service
-from app.services.downloader import create_downloader
+from app.services.downloader.budget import PRIORITY_CRITICAL, request_priority
+from app.services.downloader.context import downloader_client
+from app.services.downloader.events import EVENT_ADDED, event_bus
+from app.services.notification import TORRENT_WEBHOOK_EVENTS, notify_torrent_events
 from app.utils import get_logger
 
 logger = get_logger('pt_manager.scheduler')
@@ -28,11 +32,20 @@ DELETE_CHECK_INTERVAL_SECONDS = 60
 SPEED_LIMIT_INTERVAL_SECONDS = 5  # 默认间隔，动态调整时作为上限
 SPEED_LIMIT_MIN_INTERVAL = 0.2    # 动态间隔下限（200ms）
 U2_MAGIC_INTERVAL_SECONDS = 60
-AUTO_REPORT_INTERVAL_SECONDS = 60
+# 新种子添加后约 5 分钟自动汇报；错过超过宽限期（如刚启动）的不再补报
+AUTO_REPORT_DELAY_SECONDS = 300
+AUTO_REPORT_GRACE_SECONDS = 30
 CACHE_UPDATE_INTERVAL_SECONDS = 30
 RECORD_CLEANUP_INTERVAL_HOURS = 6
 RECORD_RETENTION_DAYS = 30
 NETCUP_CHECK_INTERVAL_SECONDS = 60
+# 周期任务的随机抖动（秒），避免 RSS/删种/U2 等在同一时刻集中请求下载器
+JOB_JITTER_SECONDS = 10
+
+
+def _interval_trigger(seconds: int) -> IntervalTrigger:
+    """固定间隔触发器，附带不超过间隔 1/4 的随机抖动"""
+    return IntervalTrigger(seconds=seconds, jitter=min(JOB_JITTER_SECONDS, seconds // 4) or None)
 
 
 class TaskScheduler:
@@ -55,6 +68,8 @@ class TaskScheduler:
         self._speed_limit_enabled = False
         self._speed_limit_lock = asyncio.Lock()
         self._setup_task: Optional[asyncio.Task] = None
+        # 种子事件订阅任务（见 downloader/events.py）
+        self._event_tasks: Dict[str, asyncio.Task] = {}
 
     def _on_setup_done(self, task: asyncio.Task):
         """Callback for setup task completion to log any exceptions"""
@@ -80,17 +95,33 @@ class TaskScheduler:
         if self._running:
             # 停止限速循环
             self._stop_speed_limit_loop()
+            self._stop_event_consumers()
             self.scheduler.shutdown()
             self._running = False
             logger.info("Task scheduler stopped")
 
+    async def flush_speed_limit_state(self):
+        """停机时立即保存限速状态（不等 STATE_SAVE_INTERVAL），需在 stop() 之后调用"""
+        task = self._speed_limit_task
+        if task and not task.done():
+            # 等待被取消的循环退出，避免与进行中的一轮共用 db 会话
+            await asyncio.gather(task, return_exceptions=True)
+        if self._speed_limiter is None:
+            return
+        try:
+            async with async_session_maker() as db:
+                self._speed_limiter.db = db
+                await self._speed_limiter.save_state(force=True)
+        except Exception as e:
+            logger.error(f"Failed to flush speed limit state: {e}")
+
     async def _setup_default_jobs(self):
         """Setup default scheduled jobs"""
         # RSS feed checking
         self.add_job(
             "rss_check",
             self._run_rss_check,
-            IntervalTrigger(seconds=RSS_CHECK_INTERVAL_SECONDS),
+            _interval_trigger(RSS_CHECK_INTERVAL_SECONDS),
         )
 
         # Delete rule checking
@@ -98,7 +129,7 @@ class TaskScheduler:
         self.add_job(
             "delete_check",
             self._run_delete_check,
-            IntervalTrigger(seconds=delete_interval),
+            _interval_trigger(delete_interval),
         )
 
         # Speed limit control - 使用动态间隔的循环任务
@@ -109,15 +140,11 @@ class TaskScheduler:
         self.add_job(
             "u2_magic",
             self._run_u2_magic,
-            IntervalTrigger(seconds=U2_MAGIC_INTERVAL_SECONDS),
+            _interval_trigger(U2_MAGIC_INTERVAL_SECONDS),
         )
 
-        # Auto report for new torrents
-        self.add_job(
-            "auto_report",
-            self._run_auto_report,
-            IntervalTrigger(seconds=AUTO_REPORT_INTERVAL_SECONDS),
-        )
+        # Auto report for new torrents and torrent webhooks - 由种子事件驱动，不再定时扫描全部种子
+        self._start_event_consumers()
 
         # Record cleanup task (run every 6 hours)
         self.add_job(
@@ -130,7 +157,7 @@ class TaskScheduler:
         self.add_job(
             "netcup_check",
             self._run_netcup_check,
-            IntervalTrigger(seconds=NETCUP_CHECK_INTERVAL_SECONDS),
+            _interval_trigger(NETCUP_CHECK_INTERVAL_SECONDS),
         )
 
         logger.info("Default jobs configured")
@@ -172,7 +199,7 @@ class TaskScheduler:
         self.add_job(
             "delete_check",
             self._run_delete_check,
-            IntervalTrigger(seconds=seconds),
+            _interval_trigger(seconds),
         )
 
     async def _run_rss_check(self):
@@ -240,7 +267,9 @@ class TaskScheduler:
         # Use a flag to prevent multiple concurrent starts
         if self._speed_limit_task is None or self._speed_limit_task.done():
             self._speed_limit_enabled = True
-            self._speed_limit_task = asyncio.create_task(self._speed_limit_loop_wrapper())
+            # 限速/汇报请求优先于其他任务和界面轮询
+            with request_priority(PRIORITY_CRITICAL):
+                self._speed_limit_task = asyncio.create_task(self._speed_limit_loop_wrapper())
             logger.info("动态限速循环任务已启动")
 
     def _stop_speed_limit_loop(self):
@@ -258,13 +287,14 @@ class TaskScheduler:
     async def _speed_limit_loop_inner(self):
         """动态间隔的限速循环
 
-        根据种子的剩余汇报时间动态调整检查频率：
+        每个种子按自己的剩余汇报时间安排下次评估（截止时间堆，见 SpeedLimiterService）：
         - 剩余 ≤5秒: 200ms
         - 剩余 ≤15秒: 500ms
         - 剩余 ≤30秒: 1秒
         - 剩余 ≤60秒: 2秒
         - 剩余 ≤120秒: 3秒
         - 剩余 >120秒: 5秒
+        循环休眠到最早到期的种子，每轮只查询和计算到期的种子。
         """
         logger.info("动态限速循环开始运行")
         last_interval = SPEED_LIMIT_INTERVAL_SECONDS
@@ -352,48 +382,106 @@ class TaskScheduler:
         except Exception as e:
             logger.error(f"U2 magic error: {e}")
 
-    async def _run_auto_report(self):
-        """Auto report torrents that were added 5 minutes ago"""
+    def _start_event_consumers(self):
+        """启动种子事件的订阅任务（自动汇报、webhook 转发）"""
+        for name, factory in (
+            ("auto_report", self._auto_report_consumer),
+            ("torrent_webhooks", self._torrent_webhook_consumer),
+        ):
+            task = self._event_tasks.get(name)
+            if task is None or task.done():
+                self._event_tasks[name] = asyncio.create_task(factory())
+
+    def _stop_event_consumers(self):
+        for task in self._event_tasks.values():
+            if not task.done():
+                task.cancel()
+        self._event_tasks.clear()
+
+    async def _torrent_webhook_consumer(self):
+        """把种子事件转发给订阅了对应事件的 webhook"""
+        subscription = event_bus.subscribe("webhooks", types=TORRENT_WEBHOOK_EVENTS.keys())
         try:
-            async with async_session_maker() as db:
-                result = await db.execute(
-                    select(Downloader).where(
-                        Downloader.enabled == True,
-                        Downloader.auto_report == True
-                    )
+            async for events in subscription:
+                try:
+                    await notify_torrent_events(events)
+                except Exception as e:
+                    logger.error(f"Torrent event webhook error: {e}")
+        finally:
+            subscription.close()
+
+    async def _auto_report_consumer(self):
+        """Auto report torrents about 5 minutes after they were added
+
+        订阅快照比对产生的 added 事件，按添加时间登记到期时间，
+        到期后按下载器批量汇报。
+        """
+        subscription = event_bus.subscribe("auto_report", types=(EVENT_ADDED,))
+        due: Dict[int, Dict[str, float]] = {}
+        try:
+            while True:
+                timeout = None
+                if due:
+                    next_due = min(min(hashes.values()) for hashes in due.values())
+                    timeout = max(0.0, next_due - time.monotonic())
+                try:
+                    events = await asyncio.wait_for(subscription.get(), timeout)
+                except asyncio.TimeoutError:
+                    events = []
+                try:
+                    if events:
+                        await self._schedule_auto_reports(events, due)
+                    await self._report_due_torrents(due)
+                except Exception as e:
+                    logger.error(f"Auto report error: {e}")
+        finally:
+            subscription.close()
+
+    async def _schedule_auto_reports(self, events, due: Dict[int, Dict[str, float]]):
+        async with async_session_maker() as db:
+            result = await db.execute(
+                select(Downloader.id).where(
+                    Downloader.enabled == True,
+                    Downloader.auto_report == True
                 )
-                downloaders = result.scalars().all()
+            )
+            downloader_ids = set(result.scalars().all())
+
+        now = datetime.now()  # Use local time since torrent.added_time is local
+        monotonic_now = time.monotonic()
+        for event in events:
+            if event.downloader_id not in downloader_ids:
+                continue
+            added_time = event.data.get("added_time") or now
+            delay = AUTO_REPORT_DELAY_SECONDS - (now - added_time).total_seconds()
+            if delay < -AUTO_REPORT_GRACE_SECONDS:
+                continue
+            due.setdefault(event.downloader_id, {})[event.hash] = monotonic_now + max(0.0, delay)
+
+    async def _report_due_torrents(self, due: Dict[int, Dict[str, float]]):
+        now = time.monotonic()
+        for downloader_id in list(due):
+            hashes = [h for h, at in due[downloader_id].items() if at <= now]
+            if not hashes:
+                continue
+            for torrent_hash in hashes:
+                del due[downloader_id][torrent_hash]
+            if not due[downloader_id]:
+                del due[downloader_id]
 
-                now = datetime.now()  # Use local time since torrent.added_time is local
-                report_window_start = timedelta(minutes=4, seconds=30)
-                report_window_end = timedelta(minutes=5, seconds=30)
-
-                for downloader in downloaders:
-                    try:
-                        client = create_downloader(downloader)
-                        if not await client.connect():
-                            continue
-
-                        reported_count = 0
-                        try:
-                            torrents = await client.get_torrents(with_reannounce=False)
-
-                            for torrent in torrents:
-                                if torrent.added_time:
-                                    age = now - torrent.added_time
-                                    # Report torrents added ~5 minutes ago
-                                    if report_window_start < age < report_window_end:
-                                        await client.reannounce_torrent(torrent.hash)
-                                        reported_count += 1
-                        finally:
-                            await client.disconnect()
-
-                        if reported_count > 0:
-                            logger.info(f"Auto reported {reported_count} torrents from {downloader.name}")
-                    except Exception as e:
-                        logger.error(f"Auto report error for {downloader.name}: {e}")
-        except Exception as e:
-            logger.error(f"Auto report error: {e}")
+            try:
+                async with async_session_maker() as db:
+                    result = await db.execute(select(Downloader).where(Downloader.id == downloader_id))
+                    downloader = result.scalar_one_or_none()
+                if not downloader or not downloader.enabled or not downloader.auto_report:
+                    continue
+                async with downloader_client(downloader) as client:
+                    if not client:
+                        continue
+                    if await client.reannounce_torrents(hashes):
+                        logger.info(f"Auto reported {len(hashes)} torrents from {downloader.name}")
+            except Exception as e:
+                logger.error(f"Auto report error for downloader {downloader_id}: {e}")
 
     async def _run_record_cleanup(self):
         """Clean up old records to prevent database bloat"""
@@ -0,0 +1,224 @@
+"""Iterative bencode decoder and torrent metadata extraction
+
+原实现用递归查找 info 字典，并以 find(b'4:info') 定位 —— 如果 announce、comment
+等字段中恰好出现 "4:info" 就会算错哈希，且深层嵌套的文件列表可能触发递归上限。
+
+这里用显式栈一次扫描整个文件：
+- 记录顶层 info 值的字节范围，直接对原始字节计算 v1（SHA-1）和 v2（SHA-256）哈希
+- 同时解出名称、总大小、分块大小、文件列表、announce 列表、注释和 private 标志
+
+parse_torrent() 出错时记录日志并返回 None，与仓库其它工具函数一致。
+"""
+
+import hashlib
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Tuple
+
+from app.utils.logger import get_logger
+
+logger = get_logger('pt_manager.bencode')
+
+_DIGITS = b"0123456789"
+
+
+class BencodeError(ValueError):
+    """Malformed bencoded data"""
+
+
+def _decode_str(raw: bytes) -> str:
+    return raw.decode("utf-8", errors="replace")
+
+
+def _bdecode(data: bytes, track_info: bool = False) -> Tuple[Any, Optional[Tuple[int, int]]]:
+    """Decode one bencoded value; optionally return the byte span of the top-level "info" value"""
+    if not isinstance(data, (bytes, bytearray, memoryview)):
+        raise BencodeError("bencode input must be bytes")
+    data = bytes(data)
+    length = len(data)
+    pos = 0
+    # 栈元素：[容器, 待定的字典键, 值起始位置]
+    stack: List[list] = []
+    info_span: Optional[Tuple[int, int]] = None
+    result: Any = None
+    done = False
+
+    while not done:
+        if pos >= length:
+            raise BencodeError("unexpected end of data")
+        start = pos
+        char = data[pos]
+
+        if char == 0x64:  # 'd'
+            stack.append([{}, None, start])
+            pos += 1
+            continue
+        if char == 0x6C:  # 'l'
+            stack.append([[], None, start])
+            pos += 1
+            continue
+        if char == 0x65:  # 'e'
+            if not stack:
+                raise BencodeError(f"unexpected end marker at {pos}")
+            container, pending_key, container_start = stack.pop()
+            if isinstance(container, dict) and pending_key is not None:
+                raise BencodeError(f"dictionary key without value at {pos}")
+            pos += 1
+            value = container
+            start = container_start
+        elif char == 0x69:  # 'i'
+            end = data.find(b"e", pos + 1)
+            if end == -1:
+                raise BencodeError(f"unterminated integer at {pos}")
+            try:
+                value = int(data[pos + 1:end])
+            except ValueError:
+                raise BencodeError(f"invalid integer at {pos}") from None
+            pos = end + 1
+        elif char in _DIGITS:
+            colon = data.find(b":", pos)
+            if colon == -1:
+                raise BencodeError(f"invalid string length at {pos}")
+            try:
+                size = int(data[pos:colon])
+            except ValueError:
+                raise BencodeError(f"invalid string length at {pos}") from None
+            pos = colon + 1 + size
+            if pos > length:
+                raise BencodeError("string exceeds data length")
+            value = data[colon + 1:pos]
+        else:
+            raise BencodeError(f"unknown bencode type {chr(char)!r} at {pos}")
+
+        # 把解出的值放进父容器
+        if not stack:
+            result = value
+            done = True
+            continue
+        parent = stack[-1]
+        container = parent[0]
+        if isinstance(container, list):
+            container.append(value)
+        elif parent[1] is None:
+            if not isinstance(value, bytes):
+                raise BencodeError(f"dictionary key must be a string at {start}")
+            parent[1] = value
+        else:
+            if track_info and len(stack) == 1 and parent[1] == b"info":
+                info_span = (start, pos)
+            container[parent[1]] = value
+            parent[1] = None
+
+    if pos != length:
+        raise BencodeError(f"trailing data at {pos}")
+    return result, info_span
+
+
+def bdecode(data: bytes) -> Any:
+    """Decode bencoded bytes (dict keys and strings stay as bytes)"""
+    return _bdecode(data)[0]
+
+
+@dataclass
+class TorrentFile:
+    path: str
+    size: int
+
+
+@dataclass
+class TorrentMeta:
+    """Metadata extracted from a .torrent file"""
+    info_hash: str                       # v1 SHA-1（纯 v2 种子为 v2 哈希截断的 40 位）
+    info_hash_v2: Optional[str] = None   # v2 SHA-256，仅 v2 / 混合种子
+    name: str = ""
+    total_size: int = 0
+    piece_length: int = 0
+    files: List[TorrentFile] = field(default_factory=list)
+    announce_urls: List[str] = field(default_factory=list)
+    comment: str = ""
+    private: bool = False
+
+    @property
+    def tracker(self) -> str:
+        """First announce URL, empty when trackerless"""
+        return self.announce_urls[0] if self.announce_urls else ""
+
+
+def _walk_file_tree(tree: dict, prefix: List[str], files: List[TorrentFile]):
+    """Flatten a BEP 52 "file tree" (iteratively)"""
+    pending = [(tree, prefix)]
+    while pending:
+        node, path = pending.pop()
+        for key, child in node.items():
+            if not isinstance(child, dict):
+                continue
+            if key == b"":
+                files.append(TorrentFile("/".join(path), int(child.get(b"length", 0))))
+            else:
+                pending.append((child, path + [_decode_str(key)]))
+
+
+def _announce_urls(root: dict) -> List[str]:
+    urls: List[str] = []
+    announce = root.get(b"announce")
+    if isinstance(announce, bytes):
+        urls.append(_decode_str(announce))
+    for tier in root.get(b"announce-list") or []:
+        if isinstance(tier, bytes):
+            tier = [tier]
+        if not isinstance(tier, list):
+            continue
+        for url in tier:
+            if isinstance(url, bytes):
+                urls.append(_decode_str(url))
+    seen = set()
+    return [u for u in (u.strip() for u in urls) if u and not (u in seen or seen.add(u))]
+
+
+def parse_torrent(data: bytes) -> Optional[TorrentMeta]:
+    """Parse a .torrent file in one pass; returns None when it is not a valid torrent"""
+    try:
+        root, span = _bdecode(data, track_info=True)
+        if not isinstance(root, dict) or span is None or not isinstance(root.get(b"info"), dict):
+            raise BencodeError("missing info dictionary")
+        info = root[b"info"]
+        info_bytes = data[span[0]:span[1]]
+
+        files: List[TorrentFile] = []
+        name = _decode_str(info.get(b"name.utf-8") or info.get(b"name") or b"")
+        is_v2 = info.get(b"meta version") == 2 or isinstance(info.get(b"file tree"), dict)
+
+        if isinstance(info.get(b"files"), list):
+            for entry in info[b"files"]:
+                if not isinstance(entry, dict):
+                    continue
+                parts = entry.get(b"path.utf-8") or entry.get(b"path") or []
+                # BEP 47 填充文件不计入大小
+                if b"p" in (entry.get(b"attr") or b""):
+                    continue
+                files.append(TorrentFile("/".join(_decode_str(p) for p in parts), int(entry.get(b"length", 0))))
+        elif b"length" in info:
+            files.append(TorrentFile(name, int(info[b"length"])))
+        elif is_v2:
+            _walk_file_tree(info[b"file tree"], [], files)
+
+        info_hash_v2 = hashlib.sha256(info_bytes).hexdigest() if is_v2 else None
+        if b"pieces" in info or not is_v2:
+            info_hash = hashlib.sha1(info_bytes).hexdigest()
+        else:
+            # 纯 v2 种子：客户端以截断的 v2 哈希作为 40 位标识
+            info_hash = info_hash_v2[:40]
+
+        return TorrentMeta(
+            info_hash=info_hash,
+            info_hash_v2=info_hash_v2,
+            name=name,
+            total_size=sum(f.size for f in files),
+            piece_length=int(info.get(b"piece length", 0)),
+            files=files,
+            announce_urls=_announce_urls(root),
+            comment=_decode_str(root.get(b"comment.utf-8") or root.get(b"comment") or b""),
+            private=info.get(b"private") == 1,
+        )
+    except Exception as e:
+        logger.debug(f"解析种子文件失败: {e}")
+        return None
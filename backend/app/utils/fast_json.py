@@ -0,0 +1,79 @@
+"""Fast JSON decoding for large downloader / site responses
+
+优先使用 orjson，其次 msgspec，均未安装时回退到标准库 json。
+超过 JSON_THREAD_THRESHOLD 字节的响应在工作线程中解码，避免数十 MB 的种子列表
+阻塞事件循环（限速循环周期只有几百毫秒）。
+
+loads_typed() 在 msgspec 可用时按类型（如 TypedDict 列表）解码，只保留声明的字段；
+否则退化为普通解码，返回结构相同的 dict。
+"""
+
+import asyncio
+import json
+from typing import Any, Dict, Optional
+
+from app.config import settings
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # optional dependency
+    msgspec = None
+
+if orjson is not None:
+    _loads = orjson.loads
+    BACKEND = "orjson"
+elif msgspec is not None:
+    _loads = msgspec.json.Decoder().decode
+    BACKEND = "msgspec"
+else:
+    _loads = json.loads
+    BACKEND = "json"
+
+# msgspec 按类型缓存的解码器
+_typed_decoders: Dict[Any, Any] = {}
+
+
+def loads(data: bytes | str) -> Any:
+    """Decode JSON with the fastest available backend"""
+    return _loads(data)
+
+
+def loads_typed(data: bytes | str, type_: Any) -> Any:
+    """Decode JSON straight into type_ when msgspec is installed
+
+    类型校验失败时回退到普通解码，调用方不需要区分。
+    """
+    if msgspec is None:
+        return _loads(data)
+    decoder = _typed_decoders.get(type_)
+    if decoder is None:
+        decoder = msgspec.json.Decoder(type_)
+        _typed_decoders[type_] = decoder
+    try:
+        return decoder.decode(data)
+    except msgspec.ValidationError:
+        return _loads(data)
+
+
+async def loads_async(
+    data: bytes | str,
+    type_: Any = None,
+    threshold: Optional[int] = None,
+) -> Any:
+    """Decode JSON, offloading to a worker thread above the size threshold"""
+    if threshold is None:
+        threshold = settings.JSON_THREAD_THRESHOLD
+    decode = loads if type_ is None else (lambda raw: loads_typed(raw, type_))
+    if threshold > 0 and len(data) >= threshold:
+        return await asyncio.to_thread(decode, data)
+    return decode(data)
+
+
+async def decode_response(response, type_: Any = None, threshold: Optional[int] = None) -> Any:
+    """Decode an httpx response body (replacement for response.json())"""
+    return await loads_async(response.content, type_, threshold)
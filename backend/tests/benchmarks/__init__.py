@@ -0,0 +1,3 @@
+"""
+基准测试（不由 pytest 自动收集，见 bench_services.py）
+"""
@@ -0,0 +1,215 @@
+"""
+端到端基准测试：限速 / 删种 / RSS 任务对假下载器的请求量、耗时和 CPU
+
+用法（在 backend 目录下）:
+    python -m tests.benchmarks.bench_services --torrents 2000 --ticks 10
+    python -m tests.benchmarks.bench_services --clients qbittorrent --latency 0.01 --error-rate 0.02
+
+每个下载器类型单独启用并运行：
+- SpeedLimiterService.apply_limits（状态跨 tick 保留，与调度器一致）
+- DeleteService.run_all_rules
+- RssService.process_feed（假站点每次抓取追加新条目，首轮之后会真正添加到下载器）
+
+输出每个操作每个 tick 的下载器请求数、墙钟时间（p50/p95）和事件循环线程 CPU 时间。
+数据库使用临时 SQLite 文件，不会触碰 data/ 下的数据。
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+_TMP_DIR = tempfile.mkdtemp(prefix="pt-bench-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_TMP_DIR}/bench.db"
+os.environ.setdefault("SECRET_KEY", "benchmark-only-secret-key")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from sqlalchemy import select, update  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.database import async_session_maker, init_db  # noqa: E402
+from app.models import (  # noqa: E402
+    DeleteRule, Downloader, DownloaderType, RssFeed, SpeedLimitConfig, SpeedLimitSite,
+)
+from app.services.delete_service import DeleteService  # noqa: E402
+from app.services.downloader.pool import session_pool  # noqa: E402
+from app.services.rss_service import RssService  # noqa: E402
+from app.services.speed_limiter import SpeedLimiterService  # noqa: E402
+from tests.fakes import (  # noqa: E402
+    FakeServer, FakeSite, FakeSwarm, FaultInjection,
+    deluge_app, qb_app, site_app, transmission_app,
+)
+from tests.fakes.swarm import TRACKERS  # noqa: E402
+
+APPS = {
+    "qbittorrent": (qb_app, DownloaderType.QBITTORRENT),
+    "transmission": (transmission_app, DownloaderType.TRANSMISSION),
+    "deluge": (deluge_app, DownloaderType.DELUGE),
+}
+
+
+@dataclass
+class Sample:
+    wall: List[float] = field(default_factory=list)
+    cpu: List[float] = field(default_factory=list)
+    requests: List[int] = field(default_factory=list)
+    errors: int = 0
+
+    def row(self, name: str, client: str) -> str:
+        wall = sorted(self.wall)
+        p95 = wall[min(len(wall) - 1, int(round(0.95 * (len(wall) - 1))))]
+        return (
+            f"{name:<14} {client:<13} {len(wall):>5} "
+            f"{statistics.median(wall) * 1000:>10.1f} {p95 * 1000:>10.1f} "
+            f"{statistics.mean(self.cpu) * 1000:>10.1f} {statistics.mean(self.requests):>10.1f} {self.errors:>7}"
+        )
+
+
+HEADER = (
+    f"{'operation':<14} {'client':<13} {'ticks':>5} {'wall p50':>10} {'wall p95':>10} "
+    f"{'cpu/tick':>10} {'req/tick':>10} {'errors':>7}\n"
+    f"{'':<14} {'':<13} {'':>5} {'(ms)':>10} {'(ms)':>10} {'(ms)':>10}"
+)
+
+
+async def seed_database(servers: Dict[str, FakeServer], site: FakeServer):
+    async with async_session_maker() as db:
+        for kind, server in servers.items():
+            db.add(Downloader(
+                name=f"fake-{kind}", type=APPS[kind][1], host="127.0.0.1", port=server.port,
+                username="admin", password="adminadmin", enabled=False,
+            ))
+        db.add(SpeedLimitConfig(enabled=True, target_upload_speed=50 * 1024 * 1024))
+        for tracker in TRACKERS:
+            db.add(SpeedLimitSite(
+                tracker_domain=tracker.split("/")[2], enabled=True,
+                target_upload_speed=30 * 1024 * 1024, limit_download_speed=True,
+            ))
+        db.add(DeleteRule(
+            name="bench-ratio", enabled=True, priority=10, max_delete_count=20,
+            conditions=[
+                {"field": "ratio", "operator": ">", "value": 2.5, "unit": ""},
+                {"field": "seeding_time", "operator": ">", "value": 1, "unit": "hours"},
+            ],
+            condition_logic="AND", delete_files=False, force_report=False,
+        ))
+        db.add(RssFeed(
+            name="bench-feed", url=f"{site.url}/rss", enabled=True, first_run_done=True,
+            auto_assign=True,
+        ))
+        await db.commit()
+
+
+async def enable_only(kind: str):
+    async with async_session_maker() as db:
+        await db.execute(update(Downloader).values(enabled=False))
+        await db.execute(update(Downloader).where(Downloader.name == f"fake-{kind}").values(enabled=True))
+        await db.commit()
+
+
+async def measure(sample: Sample, faults: FaultInjection, coro_factory):
+    faults.reset_counters()
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        await coro_factory()
+    except Exception as e:
+        sample.errors += 1
+        logging.getLogger("bench").warning(f"tick failed: {type(e).__name__}: {e}")
+    sample.cpu.append(time.thread_time() - cpu_start)
+    sample.wall.append(time.perf_counter() - wall_start)
+    sample.requests.append(faults.total_requests)
+    sample.errors += faults.errors
+
+
+async def run(args) -> int:
+    if args.request_rate is not None:
+        settings.DOWNLOADER_REQUEST_RATE = args.request_rate
+    await init_db()
+
+    swarms: Dict[str, FakeSwarm] = {}
+    faults: Dict[str, FaultInjection] = {}
+    servers: Dict[str, FakeServer] = {}
+    for index, kind in enumerate(args.clients):
+        swarms[kind] = FakeSwarm(args.torrents, seed=index)
+        faults[kind] = FaultInjection(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate)
+        servers[kind] = FakeServer(APPS[kind][0](swarms[kind], faults[kind])).start()
+    site = FakeServer(site_app(FakeSite(items=args.rss_items, new_per_fetch=args.rss_new))).start()
+
+    try:
+        await seed_database(servers, site)
+        print(
+            f"torrents={args.torrents} ticks={args.ticks} latency={args.latency}s "
+            f"jitter={args.jitter}s error_rate={args.error_rate} "
+            f"request_rate={settings.DOWNLOADER_REQUEST_RATE}/s\n"
+        )
+        print(HEADER)
+        for kind in args.clients:
+            await enable_only(kind)
+            await session_pool.close_all()
+            limiter = None
+
+            sample = Sample()
+            for _ in range(args.ticks):
+                async with async_session_maker() as db:
+                    if limiter is None:
+                        limiter = SpeedLimiterService(db)
+                    limiter.db = db
+                    await measure(sample, faults[kind], limiter.apply_limits)
+                await asyncio.sleep(args.interval)
+            print(sample.row("apply_limits", kind))
+
+            sample = Sample()
+            for _ in range(args.ticks):
+                async with async_session_maker() as db:
+                    await measure(sample, faults[kind], DeleteService(db).run_all_rules)
+                await asyncio.sleep(args.interval)
+            print(sample.row("delete_rules", kind))
+
+            sample = Sample()
+            for _ in range(args.rss_ticks):
+                async with async_session_maker() as db:
+                    service = RssService(db)
+                    feed = (await db.execute(select(RssFeed).limit(1))).scalar_one()
+                    await measure(sample, faults[kind], lambda: service.process_feed(feed))
+            print(sample.row("rss_feed", kind))
+    finally:
+        await session_pool.close_all()
+        for server in servers.values():
+            server.stop()
+        site.stop()
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", default="qbittorrent,transmission,deluge",
+                        type=lambda v: [c.strip() for c in v.split(",") if c.strip() in APPS])
+    parser.add_argument("--torrents", type=int, default=1000)
+    parser.add_argument("--ticks", type=int, default=5)
+    parser.add_argument("--interval", type=float, default=0.5, help="seconds between ticks")
+    parser.add_argument("--rss-ticks", type=int, default=2)
+    parser.add_argument("--rss-items", type=int, default=50)
+    parser.add_argument("--rss-new", type=int, default=3, help="new RSS entries per fetch")
+    parser.add_argument("--latency", type=float, default=0.0, help="injected latency per request (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of an injected 5xx")
+    parser.add_argument("--request-rate", type=float, default=None,
+                        help="override DOWNLOADER_REQUEST_RATE (0 = unlimited)")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+    for name in ("pt_manager", "httpx", "uvicorn"):
+        logging.getLogger(name).setLevel(logging.INFO if args.verbose else logging.ERROR)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
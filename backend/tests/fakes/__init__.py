@@ -0,0 +1,27 @@
+"""
+假下载器 / 站点服务端，用于端到端测试和基准测试
+"""
+from .swarm import FakeSwarm, FakeTorrent
+from .servers import (
+    FakeServer,
+    FakeSite,
+    FaultInjection,
+    deluge_app,
+    make_torrent_file,
+    qb_app,
+    site_app,
+    transmission_app,
+)
+
+__all__ = [
+    "FakeSwarm",
+    "FakeTorrent",
+    "FakeServer",
+    "FakeSite",
+    "FaultInjection",
+    "qb_app",
+    "transmission_app",
+    "deluge_app",
+    "site_app",
+    "make_torrent_file",
+]
@@ -0,0 +1,773 @@
+"""
+进程内假下载器 / 站点服务端
+
+实现各适配器实际用到的 qBittorrent WebUI API v2、Transmission RPC、Deluge Web JSON-RPC
+子集，以及一个输出 RSS 和 .torrent 文件的假站点。服务端在后台线程中由 uvicorn 运行，
+适配器通过真实的 HTTP 连接访问，可以测量端到端的请求数、耗时和 CPU。
+
+FaultInjection 为每个服务端注入固定/随机延迟和 5xx 错误。
+"""
+import asyncio
+import base64
+import hashlib
+import random
+import socket
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qs
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+from starlette.routing import Route
+
+from .swarm import FakeSwarm, FakeTorrent, make_hash
+
+# maindata 保留的历史快照数（客户端 rid 过旧时返回 full_update）
+MAINDATA_HISTORY = 8
+
+
+# ===== 故障注入与请求统计 =====
+
+@dataclass
+class FaultInjection:
+    latency: float = 0.0  # 每个请求固定延迟（秒）
+    jitter: float = 0.0  # 额外的随机延迟上限（秒）
+    error_rate: float = 0.0  # 返回 error_status 的概率
+    error_status: int = 500
+    requests: Counter = field(default_factory=Counter)  # "METHOD path/rpc-method" -> 次数
+    errors: int = 0
+
+    @property
+    def total_requests(self) -> int:
+        return sum(self.requests.values())
+
+    def reset_counters(self):
+        self.requests.clear()
+        self.errors = 0
+
+
+async def _inject(faults: FaultInjection, swarm: Optional[FakeSwarm], key: str) -> Optional[Response]:
+    faults.requests[key] += 1
+    delay = faults.latency
+    rnd = swarm.random if swarm is not None else random
+    if faults.jitter:
+        delay += rnd.random() * faults.jitter
+    if delay > 0:
+        await asyncio.sleep(delay)
+    if faults.error_rate and rnd.random() < faults.error_rate:
+        faults.errors += 1
+        return PlainTextResponse("injected failure", status_code=faults.error_status)
+    if swarm is not None:
+        swarm.advance()
+    return None
+
+
+# ===== torrent 文件 =====
+
+def bencode(value: Any) -> bytes:
+    if isinstance(value, int):
+        return b"i%de" % value
+    if isinstance(value, str):
+        value = value.encode()
+    if isinstance(value, bytes):
+        return b"%d:%s" % (len(value), value)
+    if isinstance(value, list):
+        return b"l" + b"".join(bencode(v) for v in value) + b"e"
+    if isinstance(value, dict):
+        items = sorted((k.encode() if isinstance(k, str) else k, v) for k, v in value.items())
+        return b"d" + b"".join(bencode(k) + bencode(v) for k, v in items) + b"e"
+    raise TypeError(f"cannot bencode {type(value).__name__}")
+
+
+def make_torrent_file(name: str, size: int, tracker: str) -> bytes:
+    info = {"length": size, "name": name, "piece length": 4 * 1024 * 1024, "pieces": b"\x00" * 20, "private": 1}
+    return bencode({"announce": tracker, "info": info})
+
+
+def info_hash_of(data: bytes) -> str:
+    """info 为最后一个键时（make_torrent_file 生成的文件）计算 info hash"""
+    pos = data.find(b"4:info")
+    if pos < 0:
+        return hashlib.sha1(data).hexdigest()
+    return hashlib.sha1(data[pos + 6:-1]).hexdigest()
+
+
+def _torrent_name(data: bytes) -> str:
+    pos = data.find(b"4:name")
+    if pos < 0:
+        return "added"
+    colon = data.index(b":", pos + 6)
+    length = int(data[pos + 6:colon])
+    return data[colon + 1:colon + 1 + length].decode(errors="replace")
+
+
+def _add_from_file(swarm: FakeSwarm, data: bytes, **kwargs) -> FakeTorrent:
+    return swarm.add(info_hash_of(data), _torrent_name(data), size=len(data) * 1024 * 1024, **kwargs)
+
+
+def _add_from_url(swarm: FakeSwarm, url: str, **kwargs) -> FakeTorrent:
+    return swarm.add(make_hash(url), url.rsplit("/", 1)[-1] or "added", size=1024 ** 3, **kwargs)
+
+
+# ===== qBittorrent WebUI API v2 =====
+
+QB_STATES = {
+    ("downloading", True): "downloading",
+    ("downloading", False): "stalledDL",
+    ("seeding", True): "uploading",
+    ("seeding", False): "stalledUP",
+    ("paused", True): "pausedUP",
+    ("paused", False): "pausedDL",
+}
+QB_FILTERS = {
+    "downloading": {"downloading"},
+    "seeding": {"seeding"},
+    "completed": {"seeding"},
+    "paused": {"paused"},
+    "active": {"downloading", "seeding"},
+}
+
+
+def qb_row(t: FakeTorrent, now: float) -> dict:
+    if t.state == "paused":
+        state = QB_STATES[("paused", t.progress >= 1)]
+    else:
+        state = QB_STATES[(t.state, bool(t.upload_speed or t.download_speed))]
+    return {
+        "hash": t.hash,
+        "name": t.name,
+        "size": t.size,
+        "total_size": t.size,
+        "progress": t.progress,
+        "state": state,
+        "uploaded": t.uploaded,
+        "downloaded": t.downloaded,
+        "ratio": round(t.ratio, 4),
+        "upspeed": t.upload_speed,
+        "dlspeed": t.download_speed,
+        "up_limit": t.upload_limit or -1,
+        "dl_limit": t.download_limit or -1,
+        "num_seeds": min(t.seeders, 5),
+        "num_leechs": min(t.leechers, 5),
+        "num_complete": t.seeders,
+        "num_incomplete": t.leechers,
+        "tracker": t.tracker,
+        "tags": ", ".join(t.tags),
+        "category": t.category,
+        "save_path": t.save_path,
+        "added_on": int(t.added_on),
+        "completion_on": int(t.completion_on) if t.completion_on else -1,
+        "seeding_time": t.seeding_time(now),
+        "completed": t.completed,
+    }
+
+
+def qb_app(swarm: FakeSwarm, faults: Optional[FaultInjection] = None) -> Starlette:
+    faults = faults or FaultInjection()
+    sessions = set()
+    snapshots: "OrderedDict[int, Dict[str, dict]]" = OrderedDict()
+    rid_counter = [0]
+
+    async def form(request: Request) -> dict:
+        content_type = request.headers.get("content-type", "")
+        if content_type.startswith("multipart/"):
+            data = await request.form()
+            return {k: data.getlist(k) if k == "torrents" else data.get(k) for k in data.keys()}
+        return {k: v[0] for k, v in parse_qs((await request.body()).decode()).items()}
+
+    def hashes_of(value: Optional[str]) -> Optional[List[str]]:
+        return value.split("|") if value else None
+
+    def handler(fn: Callable, public: bool = False):
+        async def endpoint(request: Request) -> Response:
+            failure = await _inject(faults, swarm, f"{request.method} {request.url.path}")
+            if failure is not None:
+                return failure
+            if not public and request.cookies.get("SID") not in sessions:
+                return PlainTextResponse("Forbidden", status_code=403)
+            return await fn(request)
+        return endpoint
+
+    async def login(request: Request):
+        sid = make_hash(f"sid-{len(sessions)}-{time.time()}")[:32]
+        sessions.add(sid)
+        response = PlainTextResponse("Ok.")
+        response.set_cookie("SID", sid)
+        return response
+
+    async def logout(request: Request):
+        sessions.discard(request.cookies.get("SID"))
+        return PlainTextResponse("")
+
+    async def version(request: Request):
+        return PlainTextResponse("v4.6.2")
+
+    async def info(request: Request):
+        now = time.time()
+        params = request.query_params
+        torrents = swarm.select(hashes_of(params.get("hashes")))
+        wanted = QB_FILTERS.get(params.get("filter", "all"))
+        if wanted is not None:
+            torrents = [t for t in torrents if t.state in wanted]
+        if params.get("category") is not None:
+            torrents = [t for t in torrents if t.category == params["category"]]
+        if params.get("tag") is not None:
+            torrents = [t for t in torrents if params["tag"] in t.tags]
+        rows = [qb_row(t, now) for t in torrents]
+        if params.get("sort"):
+            rows.sort(key=lambda r: r.get(params["sort"], 0), reverse=params.get("reverse") == "true")
+        offset = int(params.get("offset", 0) or 0)
+        limit = int(params.get("limit", 0) or 0)
+        rows = rows[offset:offset + limit] if limit else rows[offset:]
+        return JSONResponse(rows)
+
+    def server_state() -> dict:
+        return {
+            "up_info_speed": swarm.upload_speed,
+            "dl_info_speed": swarm.download_speed,
+            "up_info_data": swarm.total_uploaded,
+            "dl_info_data": swarm.total_downloaded,
+            "free_space_on_disk": swarm.free_space,
+            "up_rate_limit": swarm.upload_limit,
+            "dl_rate_limit": swarm.download_limit,
+        }
+
+    async def maindata(request: Request):
+        now = time.time()
+        rid = int(request.query_params.get("rid", 0) or 0)
+        current = {t.hash: qb_row(t, now) for t in swarm.torrents.values()}
+        rid_counter[0] += 1
+        previous = snapshots.get(rid)
+        snapshots[rid_counter[0]] = current
+        while len(snapshots) > MAINDATA_HISTORY:
+            snapshots.popitem(last=False)
+
+        if previous is None:
+            return JSONResponse({
+                "rid": rid_counter[0], "full_update": True,
+                "torrents": current, "server_state": server_state(),
+            })
+        changed = {}
+        for torrent_hash, row in current.items():
+            old = previous.get(torrent_hash)
+            if old is None:
+                changed[torrent_hash] = row
+            else:
+                delta = {k: v for k, v in row.items() if old.get(k) != v}
+                if delta:
+                    changed[torrent_hash] = delta
+        removed = [h for h in previous if h not in current]
+        payload = {"rid": rid_counter[0], "torrents": changed, "server_state": server_state()}
+        if removed:
+            payload["torrents_removed"] = removed
+        return JSONResponse(payload)
+
+    async def properties(request: Request):
+        torrent = swarm.torrents.get(request.query_params.get("hash", ""))
+        if torrent is None:
+            return PlainTextResponse("Not Found", status_code=404)
+        now = time.time()
+        return JSONResponse({
+            "reannounce": max(0, int(torrent.next_announce(now) - now)),
+            "seeding_time": torrent.seeding_time(now),
+            "up_limit": torrent.upload_limit or -1,
+            "total_uploaded": torrent.uploaded,
+            "addition_date": int(torrent.added_on),
+        })
+
+    async def trackers(request: Request):
+        torrent = swarm.torrents.get(request.query_params.get("hash", ""))
+        if torrent is None:
+            return PlainTextResponse("Not Found", status_code=404)
+        now = time.time()
+        return JSONResponse([
+            {"url": "** [DHT] **", "tier": -1, "status": 0, "msg": ""},
+            {
+                "url": torrent.tracker, "tier": 0, "status": 2, "msg": "",
+                "num_seeds": torrent.seeders, "num_leeches": torrent.leechers,
+                "next_announce": max(0, int(torrent.next_announce(now) - now)),
+                "interval": torrent.announce_interval, "min_announce": 60,
+            },
+        ])
+
+    async def transfer_info(request: Request):
+        return JSONResponse({
+            "up_info_speed": swarm.upload_speed,
+            "dl_info_speed": swarm.download_speed,
+            "up_info_data": swarm.total_uploaded,
+            "dl_info_data": swarm.total_downloaded,
+        })
+
+    async def add(request: Request):
+        data = await form(request)
+        options = dict(
+            state="paused" if data.get("paused") == "true" else "downloading",
+            category=data.get("category") or "",
+            tags=[t for t in (data.get("tags") or "").split(",") if t],
+            save_path=data.get("savepath") or "/downloads",
+        )
+        added = False
+        for upload in data.get("torrents") or []:
+            _add_from_file(swarm, await upload.read(), **options)
+            added = True
+        for url in (data.get("urls") or "").split("\n"):
+            if url.strip():
+                _add_from_url(swarm, url.strip(), **options)
+                added = True
+        return PlainTextResponse("Ok." if added else "Fails.")
+
+    def mutator(apply: Callable[[List[FakeTorrent], dict], None]):
+        async def endpoint(request: Request):
+            data = await form(request)
+            apply(swarm.select(hashes_of(data.get("hashes"))), data)
+            return PlainTextResponse("")
+        return endpoint
+
+    def set_global(name: str):
+        async def endpoint(request: Request):
+            setattr(swarm, name, max(0, int((await form(request)).get("limit", 0))))
+            return PlainTextResponse("")
+        return endpoint
+
+    def tag(torrents, data):
+        for torrent in torrents:
+            torrent.tags = sorted(set(torrent.tags) | {t for t in data.get("tags", "").split(",") if t})
+
+    def move(torrents, data):
+        for torrent in torrents:
+            torrent.save_path = data.get("location", torrent.save_path)
+
+    routes = [
+        Route("/api/v2/auth/login", handler(login, public=True), methods=["POST"]),
+        Route("/api/v2/auth/logout", handler(logout, public=True), methods=["POST"]),
+        Route("/api/v2/app/version", handler(version, public=True)),
+        Route("/api/v2/torrents/info", handler(info)),
+        Route("/api/v2/sync/maindata", handler(maindata)),
+        Route("/api/v2/torrents/properties", handler(properties)),
+        Route("/api/v2/torrents/trackers", handler(trackers)),
+        Route("/api/v2/transfer/info", handler(transfer_info)),
+        Route("/api/v2/torrents/add", handler(add), methods=["POST"]),
+        Route("/api/v2/torrents/delete", handler(mutator(
+            lambda ts, d: swarm.remove([t.hash for t in ts]))), methods=["POST"]),
+        Route("/api/v2/torrents/pause", handler(mutator(
+            lambda ts, d: swarm.set_state(ts, paused=True))), methods=["POST"]),
+        Route("/api/v2/torrents/resume", handler(mutator(
+            lambda ts, d: swarm.set_state(ts, paused=False))), methods=["POST"]),
+        Route("/api/v2/torrents/reannounce", handler(mutator(
+            lambda ts, d: swarm.reannounce(ts))), methods=["POST"]),
+        Route("/api/v2/torrents/setUploadLimit", handler(mutator(
+            lambda ts, d: swarm.set_limits(ts, upload=max(0, int(d.get("limit", 0)))))), methods=["POST"]),
+        Route("/api/v2/torrents/setDownloadLimit", handler(mutator(
+            lambda ts, d: swarm.set_limits(ts, download=max(0, int(d.get("limit", 0)))))), methods=["POST"]),
+        Route("/api/v2/torrents/setLocation", handler(mutator(move)), methods=["POST"]),
+        Route("/api/v2/torrents/addTags", handler(mutator(tag)), methods=["POST"]),
+        Route("/api/v2/transfer/setUploadLimit", handler(set_global("upload_limit")), methods=["POST"]),
+        Route("/api/v2/transfer/setDownloadLimit", handler(set_global("download_limit")), methods=["POST"]),
+    ]
+    return Starlette(routes=routes)
+
+
+# ===== Transmission RPC =====
+
+TR_STATUS = {"paused": 0, "downloading": 4, "seeding": 6}
+
+
+def tr_row(t: FakeTorrent, now: float, fields: Optional[List[str]] = None) -> dict:
+    row = {
+        "id": t.id,
+        "hashString": t.hash,
+        "name": t.name,
+        "totalSize": t.size,
+        "sizeWhenDone": t.size,
+        "percentDone": t.progress,
+        "status": TR_STATUS[t.state],
+        "error": 0,
+        "uploadedEver": t.uploaded,
+        "downloadedEver": t.downloaded,
+        "uploadRatio": round(t.ratio, 4),
+        "rateUpload": t.upload_speed,
+        "rateDownload": t.download_speed,
+        "peersGettingFromUs": min(t.leechers, 5),
+        "peersSendingToUs": min(t.seeders, 5),
+        "trackers": [{"announce": t.tracker, "id": 0, "tier": 0}],
+        "trackerStats": [{
+            "announce": t.tracker,
+            "nextAnnounceTime": int(t.next_announce(now)),
+            "lastAnnounceTime": int(t.last_announce),
+            "seederCount": t.seeders,
+            "leecherCount": t.leechers,
+            "lastAnnounceResult": "Success",
+        }],
+        "labels": list(t.tags),
+        "downloadDir": t.save_path,
+        "addedDate": int(t.added_on),
+        "doneDate": int(t.completion_on),
+        "secondsSeeding": t.seeding_time(now),
+        "haveValid": t.completed,
+        "haveUnchecked": 0,
+    }
+    if fields is not None:
+        row = {k: row[k] for k in fields if k in row}
+    return row
+
+
+def transmission_app(swarm: FakeSwarm, faults: Optional[FaultInjection] = None) -> Starlette:
+    faults = faults or FaultInjection()
+    session_id = make_hash(f"tr-{time.time()}")[:24]
+
+    def resolve(ids) -> List[FakeTorrent]:
+        if ids is None:
+            return list(swarm.torrents.values())
+        if isinstance(ids, (int, str)):
+            ids = [ids]
+        result = []
+        for value in ids:
+            torrent = swarm.by_id(value) if isinstance(value, int) else swarm.torrents.get(value)
+            if torrent is not None:
+                result.append(torrent)
+        return result
+
+    def torrent_get(args: dict) -> dict:
+        now = time.time()
+        fields = args.get("fields")
+        ids = args.get("ids")
+        if ids == "recently-active":
+            return {
+                "torrents": [tr_row(t, now, fields) for t in swarm.recently_active(now)],
+                "removed": list(swarm.removed),
+            }
+        return {"torrents": [tr_row(t, now, fields) for t in resolve(ids)]}
+
+    def torrent_add(args: dict) -> dict:
+        options = dict(
+            state="paused" if args.get("paused") else "downloading",
+            tags=args.get("labels") or [],
+            save_path=args.get("download-dir") or "/downloads",
+        )
+        if args.get("metainfo"):
+            torrent = _add_from_file(swarm, base64.b64decode(args["metainfo"]), **options)
+        else:
+            torrent = _add_from_url(swarm, args.get("filename", ""), **options)
+        return {"torrent-added": {"id": torrent.id, "hashString": torrent.hash, "name": torrent.name}}
+
+    def torrent_set(args: dict) -> dict:
+        torrents = resolve(args.get("ids"))
+        if "uploadLimited" in args or "uploadLimit" in args:
+            limit = args.get("uploadLimit", 0) * 1024 if args.get("uploadLimited") else 0
+            swarm.set_limits(torrents, upload=limit)
+        if "downloadLimited" in args or "downloadLimit" in args:
+            limit = args.get("downloadLimit", 0) * 1024 if args.get("downloadLimited") else 0
+            swarm.set_limits(torrents, download=limit)
+        if "labels" in args:
+            for torrent in torrents:
+                torrent.tags = list(args["labels"])
+        return {}
+
+    def session_set(args: dict) -> dict:
+        if "speed-limit-up" in args:
+            swarm.upload_limit = args["speed-limit-up"] * 1024 if args.get("speed-limit-up-enabled", True) else 0
+        if "speed-limit-down" in args:
+            swarm.download_limit = args["speed-limit-down"] * 1024 if args.get("speed-limit-down-enabled", True) else 0
+        return {}
+
+    methods: Dict[str, Callable[[dict], dict]] = {
+        "session-get": lambda a: {"version": "4.0.5", "rpc-version": 17, "download-dir": "/downloads"},
+        "session-set": session_set,
+        "session-stats": lambda a: {
+            "uploadSpeed": swarm.upload_speed,
+            "downloadSpeed": swarm.download_speed,
+            "torrentCount": len(swarm.torrents),
+            "cumulative-stats": {"uploadedBytes": swarm.total_uploaded, "downloadedBytes": swarm.total_downloaded},
+        },
+        "free-space": lambda a: {"path": a.get("path", ""), "size-bytes": swarm.free_space},
+        "torrent-get": torrent_get,
+        "torrent-add": torrent_add,
+        "torrent-remove": lambda a: (swarm.remove([t.hash for t in resolve(a.get("ids"))]), {})[1],
+        "torrent-stop": lambda a: (swarm.set_state(resolve(a.get("ids")), paused=True), {})[1],
+        "torrent-start": lambda a: (swarm.set_state(resolve(a.get("ids")), paused=False), {})[1],
+        "torrent-reannounce": lambda a: (swarm.reannounce(resolve(a.get("ids"))), {})[1],
+        "torrent-set": torrent_set,
+    }
+
+    async def rpc(request: Request) -> Response:
+        if request.headers.get("X-Transmission-Session-Id") != session_id:
+            faults.requests["POST 409"] += 1
+            return PlainTextResponse(
+                "Conflict", status_code=409, headers={"X-Transmission-Session-Id": session_id}
+            )
+        payload = await request.json()
+        method = payload.get("method", "")
+        failure = await _inject(faults, swarm, method)
+        if failure is not None:
+            return failure
+        handler = methods.get(method)
+        if handler is None:
+            return JSONResponse({"result": f"method name not recognized: {method}"})
+        return JSONResponse({"result": "success", "arguments": handler(payload.get("arguments") or {})})
+
+    return Starlette(routes=[Route("/transmission/rpc", rpc, methods=["POST"])])
+
+
+# ===== Deluge Web JSON-RPC =====
+
+DELUGE_STATES = {"paused": "Paused", "downloading": "Downloading", "seeding": "Seeding"}
+
+
+def deluge_row(t: FakeTorrent, now: float, keys: Optional[List[str]] = None) -> dict:
+    row = {
+        "name": t.name,
+        "state": DELUGE_STATES[t.state],
+        "total_size": t.size,
+        "progress": t.progress * 100,
+        "total_uploaded": t.uploaded,
+        "total_done": t.completed,
+        "ratio": round(t.ratio, 4),
+        "upload_payload_rate": t.upload_speed,
+        "download_payload_rate": t.download_speed,
+        "total_seeds": t.seeders,
+        "total_peers": t.leechers,
+        "num_seeds": min(t.seeders, 5),
+        "num_peers": min(t.leechers, 5),
+        "tracker_host": t.tracker.split("/")[2],
+        "tracker": t.tracker,
+        "label": t.category,
+        "save_path": t.save_path,
+        "time_added": int(t.added_on),
+        "seeding_time": t.seeding_time(now),
+        "trackers": [{"url": t.tracker, "tier": 0, "next_announce": int(t.next_announce(now))}],
+    }
+    if keys:
+        row = {k: row[k] for k in keys if k in row}
+    return row
+
+
+def deluge_app(swarm: FakeSwarm, faults: Optional[FaultInjection] = None) -> Starlette:
+    faults = faults or FaultInjection()
+    sessions = set()
+
+    def matches(t: FakeTorrent, filters: dict) -> bool:
+        for key, value in (filters or {}).items():
+            values = value if isinstance(value, list) else [value]
+            if key == "id" and t.hash not in values:
+                return False
+            if key == "state" and DELUGE_STATES[t.state] not in values:
+                return False
+            if key == "label" and t.category not in values:
+                return False
+        return True
+
+    def torrents_status(filters: dict, keys: List[str], diff: bool = False) -> dict:
+        now = time.time()
+        return {t.hash: deluge_row(t, now, keys) for t in swarm.torrents.values() if matches(t, filters)}
+
+    def filter_tree(show_zero: bool = True, hide: Optional[list] = None) -> dict:
+        counts = Counter(DELUGE_STATES[t.state] for t in swarm.torrents.values())
+        states = [["All", len(swarm.torrents)]] + [[s, counts.get(s, 0)] for s in DELUGE_STATES.values()]
+        return {"state": states}
+
+    def set_options(ids: List[str], options: dict):
+        torrents = swarm.select(ids)
+        if "max_upload_speed" in options:
+            kib = options["max_upload_speed"]
+            swarm.set_limits(torrents, upload=int(kib * 1024) if kib > 0 else 0)
+        if "max_download_speed" in options:
+            kib = options["max_download_speed"]
+            swarm.set_limits(torrents, download=int(kib * 1024) if kib > 0 else 0)
+        return None
+
+    def set_label(torrent_id: str, label: str):
+        torrent = swarm.torrents.get(torrent_id)
+        if torrent is not None:
+            torrent.category = label
+        return None
+
+    def add_file(filename: str, data: str, options: dict):
+        return _add_from_file(swarm, base64.b64decode(data), save_path=options.get("download_location") or "/downloads").hash
+
+    def add_url(url: str, options: dict):
+        return _add_from_url(swarm, url, save_path=options.get("download_location") or "/downloads").hash
+
+    def remove_many(ids: List[str], remove_data: bool = False):
+        swarm.remove(ids)
+        return []
+
+    methods: Dict[str, Callable[..., Any]] = {
+        "web.connected": lambda: True,
+        "web.get_hosts": lambda: [["fake", "127.0.0.1", 58846, "Connected"]],
+        "web.connect": lambda host_id: [],
+        "auth.delete_session": lambda: True,
+        "core.get_torrents_status": torrents_status,
+        "core.get_torrent_status": lambda tid, keys: (
+            deluge_row(swarm.torrents[tid], time.time(), keys) if tid in swarm.torrents else {}
+        ),
+        "core.get_filter_tree": filter_tree,
+        "core.get_session_status": lambda keys: {
+            "upload_rate": swarm.upload_speed,
+            "download_rate": swarm.download_speed,
+            "total_upload": swarm.total_uploaded,
+            "total_download": swarm.total_downloaded,
+        },
+        "core.get_free_space": lambda path=None: swarm.free_space,
+        "core.set_config": lambda config: None,
+        "core.set_torrent_options": set_options,
+        "core.force_reannounce": lambda ids: swarm.reannounce(swarm.select(ids)),
+        "core.pause_torrent": lambda ids: swarm.set_state(swarm.select(ids), paused=True),
+        "core.resume_torrent": lambda ids: swarm.set_state(swarm.select(ids), paused=False),
+        "core.pause_torrents": lambda ids: swarm.set_state(swarm.select(ids), paused=True),
+        "core.resume_torrents": lambda ids: swarm.set_state(swarm.select(ids), paused=False),
+        "core.pause_session": lambda: swarm.set_state(swarm.select(None), paused=True),
+        "core.resume_session": lambda: swarm.set_state(swarm.select(None), paused=False),
+        "core.remove_torrent": lambda tid, remove_data=False: bool(swarm.remove([tid])),
+        "core.remove_torrents": remove_many,
+        "core.add_torrent_file": add_file,
+        "core.add_torrent_url": add_url,
+        "label.set_torrent": set_label,
+    }
+
+    async def rpc(request: Request) -> Response:
+        payload = await request.json()
+        method = payload.get("method", "")
+        request_id = payload.get("id")
+        failure = await _inject(faults, swarm, method)
+        if failure is not None:
+            return failure
+
+        if method == "auth.login":
+            session = make_hash(f"deluge-{len(sessions)}-{time.time()}")
+            sessions.add(session)
+            response = JSONResponse({"id": request_id, "result": True, "error": None})
+            response.set_cookie("_session_id", session)
+            return response
+        if request.cookies.get("_session_id") not in sessions:
+            return JSONResponse({"id": request_id, "result": None,
+                                 "error": {"message": "Not authenticated", "code": 1}})
+
+        handler = methods.get(method)
+        if handler is None:
+            return JSONResponse({"id": request_id, "result": None,
+                                 "error": {"message": f"Unknown method {method}", "code": 2}})
+        return JSONResponse({"id": request_id, "result": handler(*(payload.get("params") or [])), "error": None})
+
+    return Starlette(routes=[Route("/json", rpc, methods=["POST"])])
+
+
+# ===== 假站点：RSS + .torrent =====
+
+class FakeSite:
+    """RSS 订阅源，每次请求追加 new_per_fetch 个新条目"""
+
+    def __init__(self, items: int = 50, new_per_fetch: int = 5, seed: int = 0):
+        self.seed = seed
+        self.new_per_fetch = new_per_fetch
+        self.count = items
+        self.files: Dict[int, bytes] = {}
+
+    def torrent_file(self, index: int) -> bytes:
+        data = self.files.get(index)
+        if data is None:
+            data = make_torrent_file(
+                f"Fake.Site.{self.seed}.{index:05d}.mkv",
+                (index % 40 + 1) * 1024 ** 3,
+                "https://tracker.alpha.example/announce",
+            )
+            self.files[index] = data
+        return data
+
+    def rss(self, base_url: str) -> str:
+        items = []
+        for index in range(self.count - 1, max(-1, self.count - 200), -1):
+            link = f"{base_url}/download.php?id={index}"
+            items.append(
+                f"<item><title>Fake.Site.{self.seed}.{index:05d} [Free]</title>"
+                f"<link>{base_url}/details.php?id={index}</link>"
+                f"<guid>{base_url}/details.php?id={index}</guid>"
+                f'<enclosure url="{link}" length="{(index % 40 + 1) * 1024 ** 3}" type="application/x-bittorrent"/>'
+                f"</item>"
+            )
+        self.count += self.new_per_fetch
+        return (
+            '<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel>'
+            f"<title>Fake Site</title><link>{base_url}</link>{''.join(items)}</channel></rss>"
+        )
+
+
+def site_app(site: FakeSite, faults: Optional[FaultInjection] = None) -> Starlette:
+    faults = faults or FaultInjection()
+
+    async def rss(request: Request) -> Response:
+        failure = await _inject(faults, None, "GET /rss")
+        if failure is not None:
+            return failure
+        base_url = str(request.base_url).rstrip("/")
+        return Response(site.rss(base_url), media_type="application/rss+xml")
+
+    async def download(request: Request) -> Response:
+        failure = await _inject(faults, None, "GET /download.php")
+        if failure is not None:
+            return failure
+        index = int(request.query_params.get("id", 0))
+        return Response(site.torrent_file(index), media_type="application/x-bittorrent")
+
+    return Starlette(routes=[Route("/rss", rss), Route("/download.php", download)])
+
+
+# ===== 运行 =====
+
+class FakeServer:
+    """Run an ASGI app with uvicorn on 127.0.0.1 in a background thread
+
+    Usage:
+        with FakeServer(qb_app(swarm)) as server:
+            client = QBittorrentClient("127.0.0.1", server.port)
+    """
+
+    def __init__(self, app, host: str = "127.0.0.1"):
+        self.app = app
+        self.host = host
+        self.port = 0
+        self._socket: Optional[socket.socket] = None
+        self._server: Optional[uvicorn.Server] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self, timeout: float = 10.0) -> "FakeServer":
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((self.host, 0))
+        self.port = self._socket.getsockname()[1]
+        # loop="asyncio"：uvloop 会替换全局事件循环策略，影响调用方线程
+        config = uvicorn.Config(self.app, loop="asyncio", log_level="warning", lifespan="off", access_log=False)
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(
+            target=self._server.run, kwargs={"sockets": [self._socket]}, daemon=True,
+            name=f"fake-server-{self.port}",
+        )
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("fake server failed to start")
+            time.sleep(0.01)
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if self._socket is not None:
+            self._socket.close()
+
+    def __enter__(self) -> "FakeServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
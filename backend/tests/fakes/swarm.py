@@ -0,0 +1,267 @@
+"""
+模拟种子群 - 供假下载器服务端使用
+
+FakeSwarm 保存一批种子的状态，每次被访问时按流逝的时间推进：
+- 上传/下载速度随机游走，受单种限速约束
+- 下载完成后转为做种
+- 每个种子有自己的汇报周期，到期自动汇报，也可以强制汇报
+"""
+import hashlib
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+TRACKERS = [
+    "https://tracker.alpha.example/announce",
+    "https://tracker.beta.example/announce",
+    "https://pt.gamma.example/announce.php",
+]
+CATEGORIES = ["movies", "tv", "music", ""]
+ANNOUNCE_INTERVALS = [1800, 2700, 3600]
+
+# 单种速度上限（bytes/s），随机游走的范围
+MAX_UPLOAD_SPEED = 20 * 1024 * 1024
+MAX_DOWNLOAD_SPEED = 50 * 1024 * 1024
+# 速度随机游走每秒的最大变化（bytes/s）
+WALK_STEP = 512 * 1024
+# 最近变化窗口（秒），对应 Transmission 的 recently-active
+RECENT_WINDOW = 60
+
+
+@dataclass
+class FakeTorrent:
+    id: int
+    hash: str
+    name: str
+    size: int
+    tracker: str
+    category: str = ""
+    tags: List[str] = field(default_factory=list)
+    save_path: str = "/downloads"
+    state: str = "seeding"  # downloading / seeding / paused
+    progress: float = 1.0
+    uploaded: int = 0
+    downloaded: int = 0
+    upload_speed: int = 0
+    download_speed: int = 0
+    upload_limit: int = 0  # bytes/s, 0 = unlimited
+    download_limit: int = 0
+    seeders: int = 10
+    leechers: int = 2
+    added_on: float = 0.0
+    completion_on: float = 0.0
+    announce_interval: int = 1800
+    last_announce: float = 0.0
+    changed_at: float = 0.0
+
+    @property
+    def ratio(self) -> float:
+        return self.uploaded / self.downloaded if self.downloaded else 0.0
+
+    @property
+    def completed(self) -> int:
+        return int(self.size * self.progress)
+
+    def next_announce(self, now: float) -> float:
+        return self.last_announce + self.announce_interval
+
+    def seeding_time(self, now: float) -> int:
+        if not self.completion_on or self.state == "downloading":
+            return 0
+        return int(now - self.completion_on)
+
+
+def make_hash(seed: str) -> str:
+    return hashlib.sha1(seed.encode()).hexdigest()
+
+
+class FakeSwarm:
+    """A deterministic, lazily advanced set of torrents"""
+
+    def __init__(self, torrents: int = 1000, seed: int = 0, seeding_ratio: float = 0.8):
+        self.random = random.Random(seed)
+        self.torrents: Dict[str, FakeTorrent] = {}
+        self.removed: Dict[int, float] = {}  # id -> removed_at
+        self.next_id = 1
+        self.upload_limit = 0
+        self.download_limit = 0
+        self.free_space = 2 * 1024 ** 4
+        self.total_uploaded = 0
+        self.total_downloaded = 0
+        self._last_advance = time.time()
+
+        now = self._last_advance
+        for i in range(torrents):
+            seeding = self.random.random() < seeding_ratio
+            self.add(
+                make_hash(f"{seed}-{i}"),
+                f"Fake.Torrent.{i:05d}.1080p.WEB-DL",
+                size=self.random.randint(200, 40_000) * 1024 * 1024,
+                state="seeding" if seeding else "downloading",
+                added_on=now - self.random.randint(600, 90 * 86400),
+                now=now,
+            )
+
+    # ===== 变更 =====
+
+    def add(
+        self,
+        torrent_hash: str,
+        name: str,
+        size: int,
+        state: str = "downloading",
+        category: str = "",
+        tags: Optional[List[str]] = None,
+        save_path: str = "/downloads",
+        added_on: Optional[float] = None,
+        now: Optional[float] = None,
+    ) -> FakeTorrent:
+        now = now or time.time()
+        existing = self.torrents.get(torrent_hash)
+        if existing is not None:
+            return existing
+        rnd = self.random
+        seeding = state == "seeding"
+        added_on = added_on or now
+        torrent = FakeTorrent(
+            id=self.next_id,
+            hash=torrent_hash,
+            name=name,
+            size=size,
+            tracker=rnd.choice(TRACKERS),
+            category=category or rnd.choice(CATEGORIES),
+            tags=list(tags or []),
+            save_path=save_path,
+            state=state,
+            progress=1.0 if seeding else round(rnd.random() * 0.9, 4),
+            seeders=rnd.randint(0, 200),
+            leechers=rnd.randint(0, 50),
+            added_on=added_on,
+            completion_on=added_on + rnd.randint(60, 3600) if seeding else 0.0,
+            announce_interval=rnd.choice(ANNOUNCE_INTERVALS),
+            changed_at=now,
+        )
+        torrent.downloaded = torrent.completed
+        torrent.uploaded = int(torrent.downloaded * rnd.random() * 3)
+        # 汇报时间错开，模拟真实客户端
+        torrent.last_announce = now - rnd.randint(0, torrent.announce_interval)
+        self.next_id += 1
+        self.torrents[torrent_hash] = torrent
+        return torrent
+
+    def remove(self, hashes: Iterable[str]) -> int:
+        now = time.time()
+        count = 0
+        for torrent_hash in hashes:
+            torrent = self.torrents.pop(torrent_hash, None)
+            if torrent is not None:
+                self.removed[torrent.id] = now
+                count += 1
+        return count
+
+    def select(self, hashes: Optional[Iterable[str]]) -> List[FakeTorrent]:
+        """hashes 为 None 或包含 "all" 时返回全部种子"""
+        if hashes is None:
+            return list(self.torrents.values())
+        hashes = list(hashes)
+        if "all" in hashes:
+            return list(self.torrents.values())
+        return [self.torrents[h] for h in hashes if h in self.torrents]
+
+    def by_id(self, torrent_id: int) -> Optional[FakeTorrent]:
+        for torrent in self.torrents.values():
+            if torrent.id == torrent_id:
+                return torrent
+        return None
+
+    def set_state(self, torrents: Iterable[FakeTorrent], paused: bool):
+        now = time.time()
+        for torrent in torrents:
+            if paused:
+                torrent.state = "paused"
+                torrent.upload_speed = torrent.download_speed = 0
+            elif torrent.state == "paused":
+                torrent.state = "seeding" if torrent.progress >= 1 else "downloading"
+            torrent.changed_at = now
+
+    def set_limits(self, torrents: Iterable[FakeTorrent], upload: Optional[int] = None, download: Optional[int] = None):
+        now = time.time()
+        for torrent in torrents:
+            if upload is not None:
+                torrent.upload_limit = max(0, upload)
+                if torrent.upload_limit:
+                    torrent.upload_speed = min(torrent.upload_speed, torrent.upload_limit)
+            if download is not None:
+                torrent.download_limit = max(0, download)
+                if torrent.download_limit:
+                    torrent.download_speed = min(torrent.download_speed, torrent.download_limit)
+            torrent.changed_at = now
+
+    def reannounce(self, torrents: Iterable[FakeTorrent]):
+        now = time.time()
+        for torrent in torrents:
+            torrent.last_announce = now
+            torrent.changed_at = now
+
+    # ===== 推进 =====
+
+    def advance(self, now: Optional[float] = None):
+        """按距离上次推进的时间更新速度、进度和汇报计时"""
+        now = now or time.time()
+        dt = now - self._last_advance
+        if dt <= 0:
+            return
+        self._last_advance = now
+        rnd = self.random
+        # 随机游走步长与流逝时间成正比（每秒最多 ±WALK_STEP）
+        step = min(1.0, dt)
+        for torrent in self.torrents.values():
+            if torrent.state == "paused":
+                continue
+            up_cap = torrent.upload_limit or MAX_UPLOAD_SPEED
+            speed = torrent.upload_speed + int(rnd.uniform(-WALK_STEP, WALK_STEP) * step)
+            speed = max(0, min(up_cap, MAX_UPLOAD_SPEED, speed))
+            if speed != torrent.upload_speed:
+                torrent.upload_speed = speed
+                torrent.changed_at = now
+            uploaded = int(speed * dt)
+            torrent.uploaded += uploaded
+            self.total_uploaded += uploaded
+
+            if torrent.state == "downloading":
+                down_cap = torrent.download_limit or MAX_DOWNLOAD_SPEED
+                speed = torrent.download_speed + int(rnd.uniform(-2 * WALK_STEP, 2 * WALK_STEP) * step)
+                torrent.download_speed = max(0, min(down_cap, MAX_DOWNLOAD_SPEED, speed))
+                downloaded = min(int(torrent.download_speed * dt), torrent.size - torrent.completed)
+                torrent.downloaded += downloaded
+                self.total_downloaded += downloaded
+                torrent.progress = min(1.0, torrent.progress + downloaded / torrent.size)
+                torrent.changed_at = now
+                if torrent.progress >= 1.0:
+                    torrent.state = "seeding"
+                    torrent.download_speed = 0
+                    torrent.completion_on = now
+
+            if now >= torrent.next_announce(now):
+                torrent.last_announce = now
+                torrent.changed_at = now
+
+        # 删除记录只保留最近窗口
+        cutoff = now - RECENT_WINDOW
+        self.removed = {tid: at for tid, at in self.removed.items() if at >= cutoff}
+
+    def recently_active(self, now: Optional[float] = None) -> List[FakeTorrent]:
+        cutoff = (now or time.time()) - RECENT_WINDOW
+        return [
+            t for t in self.torrents.values()
+            if t.changed_at >= cutoff or t.upload_speed or t.download_speed
+        ]
+
+    @property
+    def upload_speed(self) -> int:
+        return sum(t.upload_speed for t in self.torrents.values())
+
+    @property
+    def download_speed(self) -> int:
+        return sum(t.download_speed for t in self.torrents.values())
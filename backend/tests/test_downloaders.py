@@ -1,6 +1,7 @@
 """
 单元测试 - Downloader 客户端
 """
+import json
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 from datetime import datetime
@@ -304,3 +305,1297 @@ class TestRetryMechanism:
         assert delays[0] < delays[1] < delays[2]
         # 验证不超过最大延迟
         assert all(d <= RETRY_MAX_DELAY for d in delays)
+
+
+class TestSessionPool:
+    """测试下载器会话池"""
+
+    @pytest.mark.asyncio
+    async def test_reuse_and_invalidate_on_config_change(self, mock_downloader):
+        """测试会话复用及配置变更后重建"""
+        from app.services.downloader.pool import DownloaderSessionPool
+
+        mock_downloader.updated_at = datetime(2024, 1, 1)
+        created = []
+
+        def fake_create(dl):
+            client = MagicMock()
+            client.connect = AsyncMock(return_value=True)
+            client.disconnect = AsyncMock()
+            client.is_connected = True
+            created.append(client)
+            return client
+
+        pool = DownloaderSessionPool()
+        with patch("app.services.downloader.pool.create_downloader", side_effect=fake_create):
+            first = await pool.acquire(mock_downloader)
+            second = await pool.acquire(mock_downloader)
+            assert first is second
+            assert first.connect.await_count == 1
+
+            mock_downloader.updated_at = datetime(2024, 1, 2)
+            third = await pool.acquire(mock_downloader)
+            assert third is not first
+            first.disconnect.assert_awaited_once()
+
+            await pool.close_all()
+            third.disconnect.assert_awaited_once()
+
+        assert len(created) == 2
+
+
+class TestMaindataSync:
+    """测试 qBittorrent maindata 增量同步"""
+
+    @pytest.mark.asyncio
+    async def test_delta_updates_and_removal(self):
+        """测试 rid 增量、删除及 full_update"""
+        client = QBittorrentClient(host="localhost", port=8080)
+        responses = [
+            {"rid": 1, "full_update": True,
+             "torrents": {"aaa": {"name": "A", "state": "uploading", "upspeed": 10},
+                          "bbb": {"name": "B", "state": "downloading"}},
+             "server_state": {"free_space_on_disk": 100}},
+            {"rid": 2, "torrents": {"aaa": {"upspeed": 20}}, "torrents_removed": ["bbb"]},
+        ]
+        rids = []
+
+        async def fake_request(method, endpoint, **kwargs):
+            rids.append(kwargs["params"]["rid"])
+            resp = MagicMock()
+            resp.content = json.dumps(responses[len(rids) - 1]).encode()
+            return resp
+
+        client._request = fake_request
+
+        torrents = await client.get_torrents(with_reannounce=False)
+        assert sorted(t.hash for t in torrents) == ["aaa", "bbb"]
+
+        client._flights.invalidate()  # 跳过请求合并窗口
+        torrents = await client.get_torrents(with_reannounce=False)
+        assert [t.hash for t in torrents] == ["aaa"]
+        assert torrents[0].upload_speed == 20
+        assert torrents[0].status == "seeding"
+        assert rids == [0, 1]
+
+        # 缓存内的 server_state 在新鲜期内直接复用
+        assert await client.get_free_space() == 100
+        assert rids == [0, 1]
+
+
+    @pytest.mark.asyncio
+    async def test_hashes_only_touch_requested_rows(self):
+        """测试按 hashes 查询时只解析/复制请求的种子"""
+        client = QBittorrentClient(host="localhost", port=8080)
+        rows = {f"{i:040x}": {"name": str(i), "state": "uploading"} for i in range(50)}
+
+        async def fake_request(method, endpoint, **kwargs):
+            resp = MagicMock()
+            resp.content = json.dumps({"rid": 1, "full_update": True, "torrents": rows}).encode()
+            return resp
+
+        client._request = fake_request
+        assert await client.sync_maindata()
+        wanted = [f"{3:040x}", f"{7:040x}", "missing"]
+        client._parse_torrent = MagicMock(side_effect=client._parse_torrent)
+
+        torrents = await client.get_torrents(with_reannounce=False, hashes=wanted)
+        assert sorted(t.hash for t in torrents) == sorted(wanted[:2])
+        assert client._parse_torrent.call_count == 2
+
+        table = await client.get_torrent_table(hashes=wanted)
+        assert sorted(table.hashes) == sorted(wanted[:2])
+
+
+class TestAnnounceRefillQuota:
+    """测试汇报信息缓存补齐的限量与优先级"""
+
+    @pytest.mark.asyncio
+    async def test_cold_cache_refilled_in_action_lane_with_quota(self):
+        from app.services.downloader import qbittorrent as qb_module
+        from app.services.downloader.budget import (
+            PRIORITY_ACTION, PRIORITY_CRITICAL, current_priority, request_priority,
+        )
+
+        client = QBittorrentClient(host="localhost", port=8080)
+        lanes = []
+
+        async def fake_reannounce(torrent_hash):
+            lanes.append(current_priority())
+            return (None, 1800)
+
+        client._get_torrent_reannounce = fake_reannounce
+        torrents = [
+            TorrentInfo(
+                hash=f"{i:040x}", name=str(i), size=1, progress=1.0, status="seeding", uploaded=0,
+                downloaded=0, ratio=0.0, upload_speed=0, download_speed=0, seeders=0, leechers=0,
+                seeds_connected=0, peers_connected=0, tracker="", tags=[], category="", save_path="",
+                added_time=None, seeding_time=0,
+            )
+            for i in range(qb_module.ANNOUNCE_REFILL_PER_CALL * 2 + 5)
+        ]
+
+        with request_priority(PRIORITY_CRITICAL):
+            await client._refresh_announce_cache(torrents)
+        assert len(lanes) == qb_module.ANNOUNCE_REFILL_PER_CALL
+        assert set(lanes) == {PRIORITY_ACTION}
+
+        await client._refresh_announce_cache(torrents)
+        await client._refresh_announce_cache(torrents)
+        assert len(client._announce_cache) == len(torrents)
+
+
+class TestIncrementalStats:
+    """测试 get_stats 使用增量维护的状态计数"""
+
+    @pytest.mark.asyncio
+    async def test_qbittorrent_stats_from_maindata(self):
+        """测试状态计数随 maindata 增量变化，get_stats 不再请求种子列表"""
+        client = QBittorrentClient(host="localhost", port=8080)
+        responses = [
+            {"rid": 1, "full_update": True,
+             "torrents": {"aaa": {"state": "uploading"}, "bbb": {"state": "downloading"},
+                          "ccc": {"state": "downloading"}},
+             "server_state": {"up_info_speed": 5, "dl_info_data": 7, "free_space_on_disk": 100}},
+            {"rid": 2, "torrents": {"bbb": {"state": "stalledUP"}}, "torrents_removed": ["ccc"]},
+        ]
+        endpoints = []
+
+        async def fake_request(method, endpoint, **kwargs):
+            endpoints.append(endpoint)
+            resp = MagicMock()
+            resp.content = json.dumps(responses[len(endpoints) - 1]).encode()
+            return resp
+
+        client._request = fake_request
+
+        stats = await client.get_stats()
+        assert (stats.total_torrents, stats.downloading_torrents, stats.seeding_torrents) == (3, 2, 1)
+        assert stats.upload_speed == 5 and stats.total_downloaded == 7 and stats.free_space == 100
+
+        client._flights.invalidate()  # 跳过请求合并窗口
+        client._maindata.last_sync = 0  # 强制增量同步
+        stats = await client.get_stats()
+        assert (stats.total_torrents, stats.downloading_torrents, stats.seeding_torrents) == (2, 0, 2)
+        assert set(endpoints) == {"/api/v2/sync/maindata"}
+
+    @pytest.mark.asyncio
+    async def test_transmission_status_counts(self):
+        """测试 recently-active 增量同步维护状态计数"""
+        client = TransmissionClient(host="localhost", port=9091)
+        responses = [
+            {"torrents": [{"id": 1, "status": 6}, {"id": 2, "status": 4}, {"id": 3, "status": 4}]},
+            {"torrents": [{"id": 2, "status": 6}], "removed": [3]},
+        ]
+        calls = []
+
+        async def fake_rpc(method, arguments=None, retries=3, bulk=False):
+            calls.append(method)
+            return responses[len(calls) - 1]
+
+        client._rpc_call = fake_rpc
+
+        await client.sync_torrents()
+        assert client._status_counts["downloading"] == 2
+        await client.sync_torrents()
+        assert client._status_counts["downloading"] == 0
+        assert client._status_counts["seeding"] == 2
+
+
+class TestAnnounceInfoCache:
+    """测试 reannounce 缓存的刷新策略"""
+
+    def test_refresh_rules(self):
+        """测试到期、状态变化与强制汇报触发刷新"""
+        from app.services.downloader.announce_cache import AnnounceInfoCache
+
+        cache = AnnounceInfoCache(max_entries=2)
+        now = 1000.0
+        assert cache.needs_refresh("a", now=now)
+
+        cache.put("a", now + 60, 1800, uploaded=100, state="uploading", now=now)
+        assert not cache.needs_refresh("a", uploaded=200, state="uploading", now=now + 10)
+        assert cache.needs_refresh("a", uploaded=200, state="uploading", now=now + 61)
+        assert cache.needs_refresh("a", uploaded=200, state="stalledUP", now=now + 10)
+        assert cache.needs_refresh("a", uploaded=50, state="uploading", now=now + 10)
+
+        cache.invalidate("a")
+        assert cache.needs_refresh("a", now=now + 10)
+
+        # 超出上限时淘汰最久未使用的条目
+        cache.put("b", None, None, now=now)
+        cache.put("c", None, None, now=now)
+        assert cache.get("a") is None
+        assert len(cache) == 2
+
+
+class TestBatchMutations:
+    """测试批量操作接口"""
+
+    @pytest.mark.asyncio
+    async def test_qbittorrent_groups_limits_by_value(self):
+        """测试相同限速值合并为一次请求"""
+        client = QBittorrentClient(host="localhost", port=8080)
+        client._request = AsyncMock(return_value=MagicMock())
+
+        ok = await client.set_torrents_upload_limit({"a": 1024, "b": 1024, "c": 0})
+
+        assert ok
+        assert client._request.await_count == 2
+        sent = {call.kwargs["data"]["limit"]: call.kwargs["data"]["hashes"]
+                for call in client._request.await_args_list}
+        assert sent == {"1024": "a|b", "0": "c"}
+
+    @pytest.mark.asyncio
+    async def test_transmission_uses_ids_list(self):
+        """测试 Transmission 使用 ids 列表"""
+        client = TransmissionClient(host="localhost", port=9091)
+        client._rpc_call = AsyncMock(return_value={})
+
+        assert await client.pause_torrents(["a", "b", "a"])
+        client._rpc_call.assert_awaited_once_with("torrent-stop", {"ids": ["a", "b"]})
+
+
+class TestTransmissionDeltaSync:
+    """测试 Transmission recently-active 增量同步"""
+
+    @pytest.mark.asyncio
+    async def test_recently_active_merge(self):
+        """测试全量后使用 recently-active 合并变化与删除"""
+        client = TransmissionClient(host="localhost", port=9091)
+        calls = []
+        responses = [
+            {"torrents": [{"id": 1, "hashString": "aaa", "status": 6},
+                          {"id": 2, "hashString": "bbb", "status": 4}]},
+            {"torrents": [{"id": 1, "hashString": "aaa", "status": 6, "rateUpload": 50}],
+             "removed": [2]},
+        ]
+
+        async def fake_rpc(method, arguments=None, retries=3, bulk=False):
+            calls.append(arguments.get("ids"))
+            return responses[len(calls) - 1]
+
+        client._rpc_call = fake_rpc
+
+        assert len(await client.get_torrents()) == 2
+        client._flights.invalidate()  # 跳过请求合并窗口
+        torrents = await client.get_torrents()
+        assert [t.hash for t in torrents] == ["aaa"]
+        assert torrents[0].upload_speed == 50
+        assert calls == [None, "recently-active"]
+
+
+class TestDelugeDuplicateAdd:
+    """测试重复添加种子的识别"""
+
+    @pytest.mark.asyncio
+    async def test_web_ui_duplicate_checked_by_hash(self, monkeypatch):
+        """测试 Web UI 模式没有本地种子表时按哈希查询是否已存在"""
+        from types import SimpleNamespace
+        from app.services.downloader import deluge as deluge_module
+
+        client = DelugeClient("localhost", 8112)
+        calls = []
+
+        async def fake_rpc(method, params=None, retries=3, bulk=False):
+            calls.append(method)
+            if method == "core.get_torrent_status":
+                return {"name": "A"}
+            return None
+
+        client._rpc_call = fake_rpc
+        monkeypatch.setattr(deluge_module, "parse_torrent", lambda data: SimpleNamespace(info_hash="aaa"))
+
+        assert await client.add_torrent(b"d4:infode") == "aaa"
+        assert calls == ["core.add_torrent_file", "core.get_torrent_status"]
+
+
+class TestDelugeDaemonDiff:
+    """测试 Deluge 守护进程模式的 diff 增量表"""
+
+    @pytest.mark.asyncio
+    async def test_diff_merge(self):
+        """测试首次全量、之后 diff 合并变化字段并移除已删除种子"""
+        client = DelugeClient(host="localhost", port=8112, daemon_port=58846)
+        calls = []
+        responses = [
+            {"aaa": {"name": "A", "state": "Seeding", "upload_payload_rate": 10},
+             "bbb": {"name": "B", "state": "Paused"}},
+            {"aaa": {"upload_payload_rate": 50}},
+        ]
+
+        async def fake_rpc(method, params=None, retries=3, bulk=False):
+            calls.append(params)
+            return responses[len(calls) - 1]
+
+        client._rpc_call = fake_rpc
+
+        assert len(await client.get_torrents()) == 2
+        client._flights.invalidate()  # 跳过请求合并窗口
+        torrents = await client.get_torrents()
+        assert [t.hash for t in torrents] == ["aaa"]
+        assert torrents[0].name == "A"
+        assert torrents[0].upload_speed == 50
+        assert len(calls[0]) == 2 and calls[1][2] is True
+
+
+class TestFastJson:
+    """测试快速 JSON 解码"""
+
+    @pytest.mark.asyncio
+    async def test_threshold_offload(self):
+        """测试超过阈值时在工作线程解码，结果与标准库一致"""
+        from app.utils import fast_json
+
+        payload = json.dumps([{"hash": "aaa", "size": 1}] * 100).encode()
+        with patch("asyncio.to_thread", wraps=__import__("asyncio").to_thread) as to_thread:
+            assert await fast_json.loads_async(payload, threshold=len(payload) + 1) == json.loads(payload)
+            to_thread.assert_not_called()
+            assert await fast_json.loads_async(payload, threshold=len(payload)) == json.loads(payload)
+            to_thread.assert_called_once()
+
+
+class TestDownloaderHealth:
+    """测试下载器熔断与自适应超时"""
+
+    def test_circuit_open_and_probe(self):
+        """测试连续失败熔断、冷却后单个探测请求、成功后恢复"""
+        from app.services.downloader import health as health_module
+
+        health = health_module.DownloaderHealth("qb")
+        for _ in range(health_module.FAILURE_THRESHOLD):
+            assert health.allow_request()
+            health.record_failure("timeout")
+        assert health.state == health_module.OPEN
+        assert not health.available
+        assert not health.allow_request()
+
+        later = health.opened_at + health.cooldown + 1
+        assert health.allow_request(now=later)
+        assert not health.allow_request(now=later)
+        health.record_success(0.05)
+        assert health.state == health_module.CLOSED
+
+    def test_timeout_from_latency(self):
+        """测试超时由 p99 延迟推导"""
+        from app.services.downloader import health as health_module
+
+        health = health_module.DownloaderHealth("qb")
+        assert health.timeout() == health_module.DEFAULT_TIMEOUT
+        for _ in range(health_module.MIN_SAMPLES):
+            health.record_success(2.0)
+        assert health.timeout() == 8.0
+
+    def test_bulk_timeout_not_below_default(self):
+        """测试廉价轮询把超时压到下限时，全量列表/上传仍使用默认超时"""
+        from app.services.downloader import health as health_module
+
+        health = health_module.DownloaderHealth("qb")
+        for _ in range(health_module.MIN_SAMPLES):
+            health.record_success(0.01)
+        assert health.timeout() == health_module.MIN_TIMEOUT
+        assert health.timeout(bulk=True) == health_module.DEFAULT_TIMEOUT
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_skips_request(self):
+        """测试熔断期间请求直接返回 None"""
+        client = QBittorrentClient(host="localhost", port=8080)
+        client._session = MagicMock()
+        client._session.request = AsyncMock()
+        client.health._open(60)
+        assert await client._request("GET", "/api/v2/app/version") is None
+        client._session.request.assert_not_called()
+
+
+class TestSingleFlight:
+    """测试相同读请求的合并"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_request(self):
+        """测试并发相同调用只请求一次，写操作后重新请求"""
+        import asyncio
+
+        client = TransmissionClient(host="localhost", port=9091)
+        calls = []
+
+        async def fake_send(method, arguments=None, retries=3, bulk=False):
+            calls.append(method)
+            await asyncio.sleep(0.01)
+            if method == "torrent-get":
+                return {"torrents": [{"id": 1, "hashString": "aaa", "status": 6}]}
+            return {}
+
+        client._send_rpc = fake_send
+
+        results = await asyncio.gather(*[client.get_torrents() for _ in range(5)])
+        assert calls == ["torrent-get"]
+        assert all(r[0].hash == "aaa" for r in results)
+        # 每个调用者拿到独立的对象
+        assert results[0][0] is not results[1][0]
+
+        await client.pause_torrent("aaa")
+        await client.get_torrents()
+        assert calls == ["torrent-get", "torrent-stop", "torrent-get"]
+
+    @pytest.mark.asyncio
+    async def test_joins_only_equal_or_higher_priority(self):
+        """测试高优先级调用不加入低优先级的进行中请求，反之可以"""
+        import asyncio
+        from app.services.downloader.budget import PRIORITY_CRITICAL, PRIORITY_READ, request_priority
+        from app.services.downloader.singleflight import SingleFlight
+
+        flights = SingleFlight()
+        calls = []
+
+        async def fetch(tag):
+            calls.append(tag)
+            await asyncio.sleep(0.01)
+            return [tag]
+
+        async def call(priority, tag):
+            with request_priority(priority):
+                return await flights.do("key", lambda: fetch(tag))
+
+        read_first = await asyncio.gather(call(PRIORITY_READ, "read"), call(PRIORITY_CRITICAL, "critical"))
+        assert read_first == [["read"], ["critical"]]
+
+        flights.invalidate()
+        critical_first = await asyncio.gather(call(PRIORITY_CRITICAL, "critical2"), call(PRIORITY_READ, "read2"))
+        assert critical_first == [["critical2"], ["critical2"]]
+        assert calls == ["read", "critical", "critical2"]
+
+    @pytest.mark.asyncio
+    async def test_deferred_read_raises_and_is_not_cached(self):
+        """测试 READ 请求被令牌桶推迟时抛出 RequestDeferred，且不缓存空结果"""
+        from app.services.downloader.budget import RequestDeferred
+
+        client = QBittorrentClient(host="localhost", port=8080)
+        client.budget.acquire = AsyncMock(return_value=False)
+        client._send_request = AsyncMock()
+        with pytest.raises(RequestDeferred):
+            await client.get_torrents(with_reannounce=False)
+        client._send_request.assert_not_called()
+        assert client._flights._results == {}
+
+        client.budget.acquire = AsyncMock(return_value=True)
+        client.sync_maindata = AsyncMock(return_value=True)
+        client._maindata_torrents = MagicMock(return_value=[])
+        assert await client.get_torrents(with_reannounce=False) == []
+        client.sync_maindata.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_empty_result_not_cached_and_tags_copied(self):
+        """测试空结果（适配器出错）不缓存，调用者各自持有 tags 列表"""
+        from app.services.downloader.singleflight import SingleFlight
+
+        flights = SingleFlight()
+        await flights.do("empty", AsyncMock(return_value=[]))
+        assert flights._results == {}
+
+        torrent = TorrentInfo(
+            hash="aaa", name="A", size=1, progress=1.0, status="seeding", uploaded=0, downloaded=0,
+            ratio=0.0, upload_speed=0, download_speed=0, seeders=0, leechers=0, seeds_connected=0,
+            peers_connected=0, tracker="", tags=["a"], category="", save_path="", added_time=None,
+            seeding_time=0,
+        )
+        first = await flights.do("list", AsyncMock(return_value=[torrent]))
+        first[0].tags.append("b")
+        second = await flights.do("list", AsyncMock(return_value=[]))
+        assert second[0].tags == ["a"]
+
+
+    @pytest.mark.asyncio
+    async def test_results_swept_and_capped(self, monkeypatch):
+        """测试每轮不同的 hashes 参数不会让结果一直留在内存中"""
+        from app.services.downloader import singleflight as singleflight_module
+
+        flights = singleflight_module.SingleFlight(ttl=60)
+        for i in range(singleflight_module.MAX_RESULTS * 2):
+            await flights.do(("get_torrents", i), AsyncMock(return_value=[i]))
+        assert len(flights._results) <= singleflight_module.MAX_RESULTS
+        assert ("get_torrents", singleflight_module.MAX_RESULTS * 2 - 1) in flights._results
+
+        clock = [1000.0]
+        monkeypatch.setattr(singleflight_module.time, "monotonic", lambda: clock[0])
+        flights = singleflight_module.SingleFlight(ttl=1)
+        await flights.do("old", AsyncMock(return_value=[1]))
+        clock[0] += 5
+        await flights.do("new", AsyncMock(return_value=[2]))
+        assert list(flights._results) == ["new"]
+
+    @pytest.mark.asyncio
+    async def test_invalidate_stops_joining_earlier_reads(self):
+        """测试写操作之后的调用不加入写之前发起的请求，原等待者仍拿到结果"""
+        import asyncio
+        from app.services.downloader.singleflight import SingleFlight
+
+        flights = SingleFlight()
+        release = asyncio.Event()
+        calls = []
+
+        async def fetch(tag):
+            calls.append(tag)
+            if tag == "before":
+                await release.wait()
+            return [tag]
+
+        earlier = asyncio.ensure_future(flights.do("key", lambda: fetch("before")))
+        await asyncio.sleep(0)
+        flights.invalidate()
+        later = await flights.do("key", lambda: fetch("after"))
+        release.set()
+        assert later == ["after"]
+        assert await earlier == ["before"]
+        assert calls == ["before", "after"]
+        assert flights._inflight == {}
+        assert flights._results["key"][1] == ["after"]
+
+
+class TestRequestBudget:
+    """测试按优先级分道的请求令牌桶"""
+
+    @pytest.mark.asyncio
+    async def test_critical_served_before_reads(self):
+        """测试令牌不足时高优先级请求先放行"""
+        import asyncio
+        from app.services.downloader.budget import (
+            RequestBudget, PRIORITY_CRITICAL, PRIORITY_ACTION, PRIORITY_READ,
+        )
+        budget = RequestBudget(rate=50, burst=1)
+        assert await budget.acquire(PRIORITY_CRITICAL)
+        order = []
+
+        async def take(priority):
+            await budget.acquire(priority)
+            order.append(priority)
+
+        await asyncio.gather(take(PRIORITY_READ), take(PRIORITY_ACTION), take(PRIORITY_CRITICAL))
+        assert order == [PRIORITY_CRITICAL, PRIORITY_ACTION, PRIORITY_READ]
+
+    @pytest.mark.asyncio
+    async def test_read_deferred_under_pressure(self, monkeypatch):
+        """测试 READ 排队超时后放弃"""
+        from app.services.downloader import budget as budget_module
+        from app.services.downloader.budget import RequestBudget, PRIORITY_ACTION, PRIORITY_READ
+        monkeypatch.setattr(budget_module, "READ_MAX_WAIT", 0.05)
+        budget = RequestBudget(rate=1, burst=1)
+        assert await budget.acquire(PRIORITY_ACTION)
+        assert await budget.acquire(PRIORITY_READ) is False
+        assert budget.snapshot()["deferred"]["read"] == 1
+
+
+class TestTorrentTable:
+    """测试列式种子表"""
+
+    def test_row_view_matches_torrent_info(self):
+        """测试行视图与 TorrentInfo 字段一致，并支持向量化过滤"""
+        from app.services.downloader.table import TorrentTable
+
+        client = QBittorrentClient(host="localhost", port=8080)
+        rows = [
+            {"hash": "aaa", "name": "A", "state": "uploading", "size": 100,
+             "upspeed": 5, "tags": "x, y", "category": "movies", "added_on": 1700000000},
+            {"hash": "bbb", "name": "B", "state": "pausedDL", "size": 50, "category": "tv"},
+        ]
+        table = TorrentTable.from_rows(rows, client._torrent_values)
+
+        assert len(table) == 2
+        assert int(table.column("size").sum()) == 150
+        for raw, row in zip(rows, table):
+            assert row.to_info() == client._parse_torrent(raw)
+        assert table.get("aaa").tags == ["x", "y"]
+        assert table.get("bbb").added_time is None
+
+        seeding = client.filter_table(table, status_filter="active", category="movies")
+        assert seeding.hashes == ["aaa"]
+        assert client.filter_table(table, tag="y").hashes == ["aaa"]
+
+    def test_bytes_round_trip(self):
+        """测试紧凑序列化还原后内容一致"""
+        from app.services.downloader.table import TorrentTable
+
+        client = QBittorrentClient(host="localhost", port=8080)
+        rows = [
+            {"hash": "aaa", "name": "电影 A", "state": "uploading", "size": 100, "ratio": 1.5,
+             "upspeed": 5, "tags": "x, y", "category": "movies", "added_on": 1700000000},
+            {"hash": "bbb", "name": "B", "state": "pausedDL", "size": 50, "category": "tv"},
+        ]
+        table = TorrentTable.from_rows(rows, client._torrent_values)
+        restored = TorrentTable.from_bytes(table.to_bytes())
+
+        assert restored.hashes == table.hashes
+        assert restored.to_infos() == table.to_infos()
+        assert restored.get("aaa").tags == ["x", "y"]
+        assert client.filter_table(restored, category="tv").hashes == ["bbb"]
+        with pytest.raises(Exception):
+            TorrentTable.from_bytes(b"not a table")
+
+
+class TestSpeedLimitDeadlines:
+    """测试限速循环的按种子截止时间调度"""
+
+    def test_pop_due_and_suggested_interval(self, mock_db):
+        """测试只取出到期种子，重新安排后旧条目失效，建议间隔取最早到期时间"""
+        import time
+        from app.services.speed_limiter import SpeedLimiterService, C
+
+        service = SpeedLimiterService(mock_db)
+        now = time.time()
+        service._schedule(1, "aaa", now - 1)
+        service._schedule(1, "bbb", now + 60)
+        service._schedule(2, "ccc", now - 0.5)
+        service._schedule(2, "ddd", now - 0.2)
+        service._schedule(2, "ddd", now + 1.0)  # 重新安排，旧条目作废
+
+        assert service._pop_due(now) == {1: ["aaa"], 2: ["ccc"]}
+        assert service._pop_due(now) == {}
+        assert 0.9 <= service.get_suggested_interval() <= 1.0
+
+        service._prune_deadlines(2, set())
+        assert (2, "ddd") not in service._deadlines
+        assert service.get_suggested_interval() == C.DYNAMIC_INTERVAL_MAX
+
+    def test_interval_follows_time_left(self, mock_db):
+        from app.services.speed_limiter import SpeedLimiterService, C
+
+        interval = SpeedLimiterService._interval_for_time_left
+        assert interval(3) == C.DYNAMIC_INTERVAL['critical']
+        assert interval(45) == C.DYNAMIC_INTERVAL['normal']
+        assert interval(600) == C.DYNAMIC_INTERVAL['idle']
+        assert SpeedLimiterService(mock_db)._eval_interval(None, 0) == C.DYNAMIC_INTERVAL_MAX
+
+
+class TestConcurrentApplyLimits:
+    """测试限速按下载器并发处理，慢下载器不阻塞本轮"""
+
+    @pytest.mark.asyncio
+    async def test_straggler_does_not_hold_tick(self, mock_db, monkeypatch):
+        import asyncio
+        import time
+        from types import SimpleNamespace
+        from app.config import settings
+        from app.services.speed_limiter import SpeedLimiterService, C
+
+        monkeypatch.setattr(C, "DOWNLOADER_TICK_DEADLINE", 0.1)
+        monkeypatch.setattr(settings, "SPEED_LIMIT_RAW_RECORDS", True)
+        downloaders = [SimpleNamespace(id=i, name=f"dl{i}", auto_speed_limit=False) for i in (1, 2)]
+        result = MagicMock()
+        result.scalars.return_value.all.return_value = downloaders
+        mock_db.execute = AsyncMock(return_value=result)
+        mock_db.add_all = MagicMock()
+
+        service = SpeedLimiterService(mock_db)
+        service.get_config = AsyncMock(return_value=SimpleNamespace(enabled=True))
+        service.get_site_rules = AsyncMock(return_value=[])
+        service.save_state = AsyncMock()
+        release = asyncio.Event()
+
+        async def fake_apply(downloader, config, site_rule_map, full_scan, due_hashes, now):
+            if downloader.id == 2:
+                await release.wait()
+            return {f"hash{downloader.id}": {}}, [f"record{downloader.id}"]
+
+        service._apply_downloader_limits = fake_apply
+
+        started = time.monotonic()
+        first = await service.apply_limits()
+        assert time.monotonic() - started < 1.0
+        assert list(first["torrents"]) == ["hash1"]
+        mock_db.add_all.assert_called_with(["record1"])
+        assert 2 in service._inflight
+
+        release.set()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert service._pending_records == ["record2"]
+        assert 2 not in service._inflight
+
+
+class TestMultiWindowSpeedTracker:
+    """测试环形缓冲速度追踪器与逐个遍历的结果一致"""
+
+    @staticmethod
+    def _naive(samples, now, phase):
+        from app.services.speed_limiter import C
+
+        weights = C.WINDOW_WEIGHTS.get(phase, C.WINDOW_WEIGHTS['steady'])
+        total_weight = weighted_sum = 0.0
+        for window in C.SPEED_WINDOWS:
+            win = [v for t, v in samples if now - t <= window]
+            if win:
+                w = weights.get(window, 0.25)
+                weighted_sum += sum(win) / len(win) * w
+                total_weight += w
+        return weighted_sum / total_weight if total_weight else 0.0
+
+    def test_matches_naive_after_wraparound(self):
+        import random
+        from app.services.speed_limiter import MultiWindowSpeedTracker
+
+        rng = random.Random(11)
+        tracker = MultiWindowSpeedTracker()
+        samples = []
+        now = 1_700_000_000.0
+        for i in range(3000):
+            now += rng.choice([0.2, 0.5, 1.0, 2.0])
+            speed = float(rng.randint(0, 50 * 1024 * 1024))
+            tracker.record(now, speed)
+            samples = (samples + [(now, speed)])[-MultiWindowSpeedTracker.CAPACITY:]
+            if i % 97 == 0:
+                for phase in ('warmup', 'steady', 'finish'):
+                    assert tracker.get_weighted_avg(now, phase) == pytest.approx(self._naive(samples, now, phase), rel=1e-9)
+
+        recent = [(t, v) for t, v in samples if now - t <= 10]
+        mid = len(recent) // 2
+        first = sum(v for _, v in recent[:mid]) / mid
+        second = sum(v for _, v in recent[mid:]) / (len(recent) - mid)
+        assert tracker.get_recent_trend(now) == pytest.approx((second - first) / first, rel=1e-9)
+        assert len(tracker) == MultiWindowSpeedTracker.CAPACITY
+
+    def test_state_round_trip_and_legacy_format(self):
+        from app.services.speed_limiter import MultiWindowSpeedTracker
+
+        tracker = MultiWindowSpeedTracker()
+        for i in range(50):
+            tracker.record(1000.0 + i, 1024.0 * i)
+        restored = MultiWindowSpeedTracker()
+        restored.set_state(tracker.get_state())
+        assert restored.get_weighted_avg(1050.0, 'steady') == pytest.approx(tracker.get_weighted_avg(1050.0, 'steady'))
+
+        legacy = MultiWindowSpeedTracker()
+        legacy.set_state({'samples': [[1000.0 + i, 1024.0 * i] for i in range(50)]})
+        assert legacy.get_weighted_avg(1050.0, 'steady') == pytest.approx(tracker.get_weighted_avg(1050.0, 'steady'))
+        assert len(MultiWindowSpeedTracker().get_state()['speeds']) == 0
+
+
+class TestBatchLimitEngine:
+    """测试批量控制器与逐个计算的结果一致"""
+
+    @staticmethod
+    def _states(rng, now, count):
+        from app.services.speed_limiter import TorrentState
+
+        states = []
+        for i in range(count):
+            state = TorrentState(hash=f"h{i}", name=f"t{i}", tracker="example.org")
+            state.cycle_synced = rng.random() < 0.8
+            state.cycle_interval = 1800.0
+            state.cache_ts = now
+            state.cached_tl = rng.choice([1.0, 20.0, 60.0, 100.0, 600.0, 1700.0, 20000.0])
+            state.cycle_start_time = now - (1800 - min(state.cached_tl, 1800))
+            state.cycle_start_uploaded = 10 ** 9
+            state.total_uploaded = state.cycle_start_uploaded + int(rng.random() * 1e10)
+            state.eta = rng.choice([0, 30, 600])
+            if rng.random() < 0.5:
+                state.smooth_limiter._smooth_limit = rng.randint(0, 4 * 1024 * 1024)
+            states.append(state)
+        return states
+
+    def test_matches_scalar_path(self, monkeypatch):
+        import copy
+        import random
+        import time as time_module
+        from app.services.speed_limiter import C, SpeedLimiterService
+
+        rng = random.Random(11)
+        now = 1_700_000_000.0
+        engine = SpeedLimiterService(None)._batch_engine
+        batch = self._states(rng, now, 80)
+        scalar = copy.deepcopy(batch)
+        targets = [rng.choice([0, 1024 * 1024, 5 * 1024 * 1024]) for _ in batch]
+        margins = [rng.choice([0.0, 0.05, 0.1]) for _ in batch]
+        downloading = [rng.random() < 0.3 for _ in batch]
+
+        for _ in range(12):
+            now += rng.choice([0.005, 1.0, 2.5])
+            monkeypatch.setattr(time_module, "time", lambda: now)
+            speeds = [float(rng.randint(0, 20 * 1024 * 1024)) for _ in batch]
+            for a, b, speed in zip(batch, scalar, speeds):
+                a.total_uploaded += int(speed)
+                b.total_uploaded += int(speed)
+            etas = [s.eta for s in batch]
+
+            assert len(batch) >= C.BATCH_MIN_SIZE
+            limits = engine.step(batch, speeds, targets, margins, downloading, etas, now)
+            expected = [
+                engine._scalar(state, speed, target, margin, is_dl, eta, now)
+                for state, speed, target, margin, is_dl, eta
+                in zip(scalar, speeds, targets, margins, downloading, etas)
+            ]
+            assert limits == expected
+            for a, b in zip(batch, scalar):
+                assert a.phase == b.phase
+                assert a.smooth_limiter._smooth_limit == b.smooth_limiter._smooth_limit
+                assert a.kalman.get_state() == pytest.approx(b.kalman.get_state())
+                assert a.pid.get_state() == pytest.approx(b.pid.get_state())
+                assert (a.pid.kp, a.pid.ki, a.pid.kd) == (b.pid.kp, b.pid.ki, b.pid.kd)
+        assert any(limits) and not all(limits)
+        assert {s.phase for s in batch} == {C.PHASE_WARMUP, C.PHASE_CATCH, C.PHASE_STEADY, C.PHASE_FINISH, C.PHASE_IDLE}
+
+
+class TestBatchedActionRollback:
+    """测试批量下发失败（返回 False）时回滚限速和汇报状态"""
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_rolls_back(self, mock_db):
+        from app.services.speed_limiter import SpeedLimiterService, TorrentState
+
+        service = SpeedLimiterService(mock_db)
+        state = TorrentState(hash="aaa", name="A", tracker="t.example")
+        state.current_limit = 8192
+        state.last_reannounce = 100.0
+        state.last_announce_time = 100.0
+        previous_reannounce = {"aaa": (state, 100.0, False, 100.0)}
+        previous_limits = {"aaa": (state, 4096)}
+        state.last_reannounce = state.last_announce_time = 200.0
+        state.reannounced_this_cycle = True
+
+        client = MagicMock()
+        client.reannounce_torrents = AsyncMock(return_value=False)
+        client.set_torrents_upload_limit = AsyncMock(return_value=False)
+        await service._flush_batched_actions(client, ["aaa"], {"aaa": 8192}, previous_limits, previous_reannounce)
+
+        assert state.current_limit == 4096
+        assert (state.last_reannounce, state.reannounced_this_cycle, state.last_announce_time) == (100.0, False, 100.0)
+
+        state.current_limit = 8192
+        client.set_torrents_upload_limit = AsyncMock(return_value=True)
+        await service._flush_batched_actions(client, [], {"aaa": 8192}, previous_limits)
+        assert state.current_limit == 8192
+
+
+class TestSpeedLimitStateFlush:
+    """测试停机时强制保存限速状态"""
+
+    @pytest.mark.asyncio
+    async def test_shutdown_forces_save(self, monkeypatch):
+        import importlib
+        from contextlib import asynccontextmanager
+
+        scheduler_module = importlib.import_module("app.tasks.scheduler")
+
+        db = MagicMock()
+
+        @asynccontextmanager
+        async def maker():
+            yield db
+
+        monkeypatch.setattr(scheduler_module, "async_session_maker", maker)
+        sched = scheduler_module.TaskScheduler()
+        sched._speed_limiter = MagicMock()
+        sched._speed_limiter.save_state = AsyncMock()
+        await sched.flush_speed_limit_state()
+
+        assert sched._speed_limiter.db is db
+        sched._speed_limiter.save_state.assert_awaited_once_with(force=True)
+
+
+class TestSpeedLimitStatePersistence:
+    """测试按种子保存限速状态、按需读取及旧版状态迁移"""
+
+    @pytest.mark.asyncio
+    async def test_dirty_states_saved_and_loaded_lazily(self, tmp_path, monkeypatch):
+        import app.database
+        from sqlalchemy import select
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+        from app.database import Base
+        from app.models import SpeedLimitState, SystemSettings
+        from app.services import speed_limiter
+        from app.services.speed_limiter import SpeedLimiterService, TorrentState
+
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'state.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        maker = async_sessionmaker(engine, expire_on_commit=False)
+        monkeypatch.setattr(app.database, "async_session_maker", maker)
+        monkeypatch.setattr(speed_limiter, "_legacy_state_migrated", False)
+
+        legacy = TorrentState(hash="old", name="Old", tracker="t.example", time_added=0, total_size=1)
+        async with maker() as db:
+            db.add(SystemSettings(key=SpeedLimiterService.STATE_KEY, value=json.dumps({"old": legacy.to_dict()})))
+            await db.commit()
+
+        async with maker() as db:
+            service = SpeedLimiterService(db)
+            await service.load_state()
+            assert service.states == {}  # 按需读取
+            torrent = TorrentInfo(
+                hash="aaa", name="A", size=100, progress=1.0, status="seeding", uploaded=10,
+                downloaded=100, ratio=0.1, upload_speed=0, download_speed=0, seeders=0, leechers=0,
+                seeds_connected=0, peers_connected=0, tracker="", tags=[], category="", save_path="",
+                added_time=None, seeding_time=0,
+            )
+            service._get_or_create_state(torrent, "t.example").current_limit = 4096
+            await service.save_state(force=True)
+            assert service._dirty == set()
+            await service.save_state(force=True)  # 没有变化，不写入
+
+        async with maker() as db:
+            rows = (await db.execute(select(SpeedLimitState.torrent_hash))).scalars().all()
+            assert sorted(rows) == ["aaa", "old"]
+            assert (await db.execute(select(SystemSettings))).scalars().all() == []
+
+            service = SpeedLimiterService(db)
+            await service._ensure_states(["aaa", "old", "missing"])
+            assert service.states["aaa"].current_limit == 4096
+            assert service.states["old"].name == "Old"
+            assert "missing" in service._state_checked
+        await engine.dispose()
+
+
+class TestSpeedLimitStateEviction:
+    """测试不活跃种子状态的移出、数量上限和数据库清理"""
+
+    @pytest.mark.asyncio
+    async def test_evict_and_purge(self, tmp_path, monkeypatch):
+        import time
+        import app.database
+        from datetime import datetime, timedelta
+        from sqlalchemy import select
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+        from app.database import Base
+        from app.models import SpeedLimitState
+        from app.services import speed_limiter
+        from app.services.speed_limiter import C, SpeedLimiterService
+
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'state.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        maker = async_sessionmaker(engine, expire_on_commit=False)
+        monkeypatch.setattr(app.database, "async_session_maker", maker)
+        monkeypatch.setattr(speed_limiter, "_legacy_state_migrated", True)
+        monkeypatch.setattr(C, "MAX_STATES", 2)
+
+        def torrent(torrent_hash):
+            return TorrentInfo(
+                hash=torrent_hash, name=torrent_hash.upper(), size=100, progress=1.0, status="seeding",
+                uploaded=10, downloaded=100, ratio=0.1, upload_speed=0, download_speed=0, seeders=0,
+                leechers=0, seeds_connected=0, peers_connected=0, tracker="", tags=[], category="",
+                save_path="", added_time=None, seeding_time=0,
+            )
+
+        async with maker() as db:
+            db.add(SpeedLimitState(torrent_hash="dead", data=b"", updated_at=datetime.utcnow() - timedelta(days=30)))
+            await db.commit()
+
+            service = SpeedLimiterService(db)
+            now = time.time()
+            for i, torrent_hash in enumerate(["gone", "old", "mid", "new"]):
+                service._get_or_create_state(torrent(torrent_hash), "t.example").current_limit = 4096
+                service._last_seen[torrent_hash] = now - 100 + i
+                service._schedule(1, torrent_hash, now + 1)
+            service._last_seen["gone"] = now - C.STATE_EVICT_GRACE - 1
+
+            await service._evict_states(now)
+            await service._purge_saved_states(now)
+            await db.commit()
+
+            assert sorted(service.states) == ["mid", "new"]
+            assert sorted(service._last_seen) == ["mid", "new"]
+            assert {k[1] for k in service._deadlines} == {"mid", "new"}
+            rows = (await db.execute(select(SpeedLimitState.torrent_hash))).scalars().all()
+            assert sorted(rows) == ["gone", "old"]
+
+            # 再次出现时从数据库读回
+            await service._ensure_states(["old"])
+            assert service.states["old"].current_limit == 4096
+        await engine.dispose()
+
+
+class TestRecordRollup:
+    """测试限速记录按分钟汇总后批量写入"""
+
+    @pytest.mark.asyncio
+    async def test_rollup_per_minute(self, tmp_path, monkeypatch):
+        from datetime import datetime
+        from sqlalchemy import func, select
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+        from app.database import Base
+        from app.models import SpeedLimitRecord
+        from app.services import speed_limiter
+        from app.services.speed_limiter import RecordRollup, SpeedLimiterService
+
+        rollup = RecordRollup()
+        monkeypatch.setattr(speed_limiter, "record_rollup", rollup)
+        t0 = datetime(2024, 1, 1, 12, 0, 5)
+        for second, tracker, up in [(5, "a.example", 100), (30, "a.example", 50), (40, "b.example", 7)]:
+            rollup.add(SpeedLimitRecord(
+                tracker_domain=tracker, downloader_id=1, current_speed=up * 2, target_speed=1000,
+                limit_applied=4096, phase="steady", uploaded=up, downloaded=1,
+            ), t0.replace(second=second))
+        rollup.add(SpeedLimitRecord(tracker_domain="a.example", downloader_id=1, uploaded=1), t0.replace(minute=1))
+        assert len(rollup) == 3
+
+        rows = sorted(rollup.take(datetime(2024, 1, 1, 12, 1)), key=lambda r: r["tracker_domain"])
+        assert [(r["tracker_domain"], r["uploaded"], r["downloaded"], r["current_speed"]) for r in rows] == [
+            ("a.example", 150, 2, 150), ("b.example", 7, 1, 14),
+        ]
+        assert rows[0]["created_at"] == datetime(2024, 1, 1, 12, 0)
+        assert len(rollup) == 1
+
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'records.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        maker = async_sessionmaker(engine, expire_on_commit=False)
+        async with maker() as db:
+            service = SpeedLimiterService(db)
+            await service._store_records([SpeedLimitRecord(tracker_domain="a.example", downloader_id=1, uploaded=9)])
+            await service._store_records([], flush_all=True)
+            await db.commit()
+            total = (await db.execute(select(func.count(), func.sum(SpeedLimitRecord.uploaded)))).one()
+            assert tuple(total) == (2, 10)
+            assert len(rollup) == 0
+        await engine.dispose()
+
+
+class TestSnapshotWarmStart:
+    """测试快照持久化与启动读回"""
+
+    @pytest.mark.asyncio
+    async def test_persist_and_restore(self, monkeypatch):
+        """测试写入有变化的版本，读回后标记 stale_since 并在后台刷新"""
+        import asyncio
+        from types import SimpleNamespace
+        from datetime import timedelta
+        from app.services.downloader import snapshots
+        from app.services.downloader.snapshots import TorrentSnapshot, TorrentSnapshotStore
+        from app.services.downloader.table import TorrentTable
+
+        saved = {}
+
+        async def fake_save(key, data, version=0, item_count=0, captured_at=None):
+            saved[key] = SimpleNamespace(key=key, data=data, version=version, captured_at=captured_at)
+            return True
+
+        async def fake_load(prefix):
+            return [b for k, b in saved.items() if k.startswith(prefix)]
+
+        monkeypatch.setattr(snapshots, "save_blob", fake_save)
+        monkeypatch.setattr(snapshots, "load_blobs", fake_load)
+
+        client = QBittorrentClient(host="localhost", port=8080)
+        table = TorrentTable.from_rows([{"hash": "aaa", "name": "A", "size": 100}], client._torrent_values)
+        store = TorrentSnapshotStore(interval=0)
+        store._snapshots[1] = TorrentSnapshot(downloader_id=1, version=3, table=table)
+        assert await store.persist() == 1
+        assert await store.persist() == 0  # 版本未变化
+        saved["torrents:1"].captured_at -= timedelta(minutes=5)
+
+        fresh = TorrentSnapshotStore(interval=0)
+        assert await fresh.load_persisted([1, 2]) == 1
+        snapshot = fresh.peek(1)
+        assert snapshot.restored and snapshot.version == 3
+        assert snapshot.age >= 299
+        assert datetime.utcnow() - snapshot.stale_since >= timedelta(minutes=5)
+        assert snapshot.torrents()[0].size == 100
+
+        refreshed = []
+
+        async def fake_refresh(downloader, max_age=0.0):
+            refreshed.append(downloader.id)
+
+        monkeypatch.setattr(fresh, "refresh", fake_refresh)
+        downloader = SimpleNamespace(id=1, name="dl")
+        assert await fresh.get(downloader, allow_stale=True) is snapshot
+        await asyncio.gather(*fresh._background)
+        assert refreshed == [1]
+
+    @pytest.mark.asyncio
+    async def test_restored_snapshot_not_served_when_refresh_fails(self, monkeypatch):
+        """测试读回旧快照后实时刷新失败，不允许旧数据的调用方得到 None"""
+        from contextlib import asynccontextmanager
+        from types import SimpleNamespace
+        from app.services.downloader import snapshots
+        from app.services.downloader.snapshots import TorrentSnapshot, TorrentSnapshotStore
+        from app.services.downloader.table import TorrentTable
+
+        @asynccontextmanager
+        async def unavailable(downloader):
+            yield None
+
+        monkeypatch.setattr(snapshots, "downloader_client", unavailable)
+        client = QBittorrentClient(host="localhost", port=8080)
+        table = TorrentTable.from_rows([{"hash": "aaa", "name": "A", "size": 100}], client._torrent_values)
+        store = TorrentSnapshotStore(interval=0)
+        restored = TorrentSnapshot(downloader_id=1, version=3, table=table, restored=True)
+        store._snapshots[1] = restored
+        downloader = SimpleNamespace(id=1, name="dl")
+
+        assert await store.refresh(downloader) is restored
+        assert await store.get(downloader) is None
+        assert await store.torrents(downloader) is None
+        assert await store.get(downloader, allow_stale=True) is restored
+
+
+class TestTorrentQueryFilters:
+    """测试 get_torrents 的过滤与字段投影"""
+
+    @pytest.mark.asyncio
+    async def test_qbittorrent_native_filter_params(self):
+        """测试 qBittorrent 过滤参数映射"""
+        client = QBittorrentClient(host="localhost", port=8080)
+        response = MagicMock()
+        response.content = json.dumps([
+            {"hash": "aaa", "state": "uploading", "category": "movies"},
+            {"hash": "bbb", "state": "pausedUP", "category": "movies"},
+        ]).encode()
+        client._request = AsyncMock(return_value=response)
+
+        torrents = await client.get_torrents(
+            with_reannounce=False, status_filter="seeding", category="movies"
+        )
+
+        assert [t.hash for t in torrents] == ["aaa"]
+        params = client._request.await_args.kwargs["params"]
+        assert params == {"filter": "seeding", "category": "movies"}
+
+    @pytest.mark.asyncio
+    async def test_deluge_filter_dict_and_keys(self):
+        """测试 Deluge filter dict 与字段列表"""
+        client = DelugeClient(host="localhost", port=8112)
+        client._rpc_call = AsyncMock(return_value={"aaa": {"total_size": 10, "state": "Seeding"}})
+
+        torrents = await client.get_torrents(fields=["size"], hashes=["aaa"], status_filter="seeding")
+
+        assert torrents[0].size == 10
+        method, params = client._rpc_call.await_args.args
+        assert method == "core.get_torrents_status"
+        assert params[0] == {"id": ["aaa"], "state": "Seeding"}
+        assert set(params[1]) == {"total_size", "state"}
+
+
+class TestBencode:
+    """测试种子文件解析"""
+
+    def test_parse_multi_file_torrent(self):
+        """测试一次解析出哈希、大小、tracker 和注释"""
+        import hashlib
+        from app.utils.bencode import parse_torrent
+        from tests.fakes.servers import bencode
+
+        info = {
+            "name": "Show.S01",
+            "piece length": 16384,
+            "pieces": b"\x00" * 20,
+            "files": [
+                {"length": 100, "path": ["E01.mkv"]},
+                {"length": 50, "path": ["Subs", "E01.ass"]},
+                {"length": 7, "path": [".pad", "7"], "attr": "p"},
+            ],
+        }
+        data = bencode({
+            # 注释中出现 "4:info" 不应影响哈希
+            "comment": "see 4:info https://pt.example/details.php?id=42",
+            "announce": "https://a.example/announce",
+            "announce-list": [["https://a.example/announce"], ["https://b.example/announce"]],
+            "info": info,
+        })
+
+        meta = parse_torrent(data)
+
+        assert meta.info_hash == hashlib.sha1(bencode(info)).hexdigest()
+        assert meta.info_hash_v2 is None
+        assert meta.total_size == 150
+        assert meta.piece_length == 16384
+        assert [f.path for f in meta.files] == ["E01.mkv", "Subs/E01.ass"]
+        assert meta.announce_urls == ["https://a.example/announce", "https://b.example/announce"]
+        assert meta.comment.endswith("id=42")
+
+    def test_parse_v2_and_invalid(self):
+        """测试 v2 文件树与非法数据"""
+        import hashlib
+        from app.utils.bencode import parse_torrent
+        from tests.fakes.servers import bencode
+
+        info = {
+            "name": "album",
+            "meta version": 2,
+            "piece length": 16384,
+            "file tree": {"a.flac": {"": {"length": 10}}, "cd2": {"b.flac": {"": {"length": 5}}}},
+        }
+        meta = parse_torrent(bencode({"info": info}))
+
+        assert meta.info_hash_v2 == hashlib.sha256(bencode(info)).hexdigest()
+        assert meta.info_hash == meta.info_hash_v2[:40]
+        assert meta.total_size == 15
+        assert parse_torrent(b"d4:infoi1ee") is None
+        assert parse_torrent(b"d8:announce") is None
+
+    @pytest.mark.asyncio
+    async def test_qbittorrent_add_returns_local_hash(self):
+        """测试 qBittorrent 添加种子文件后直接返回本地计算的哈希"""
+        from tests.fakes.servers import info_hash_of, make_torrent_file
+
+        client = QBittorrentClient(host="localhost", port=8080)
+        response = MagicMock()
+        response.text = "Ok."
+        client._request = AsyncMock(return_value=response)
+        data = make_torrent_file("Fake", 1024, "https://t.example/a")
+
+        assert await client.add_torrent(data) == info_hash_of(data)
+        assert client._request.await_count == 1
+
+
+class TestTorrentEvents:
+    """测试快照比对事件与事件总线"""
+
+    @staticmethod
+    def _torrent(torrent_hash, **kwargs):
+        values = dict(
+            hash=torrent_hash, name=torrent_hash.upper(), size=100, progress=1.0, status="seeding",
+            uploaded=0, downloaded=100, ratio=0.0, upload_speed=0, download_speed=0,
+            seeders=0, leechers=0, seeds_connected=0, peers_connected=0, tracker="", tags=[],
+            category="", save_path="", added_time=None, seeding_time=0,
+        )
+        values.update(kwargs)
+        return TorrentInfo(**values)
+
+    def test_diff_tables(self):
+        """测试新增、删除、状态变化、完成、tracker 错误和速度阈值"""
+        from app.services.downloader.events import diff_tables
+        from app.services.downloader.table import TorrentTable
+
+        previous = TorrentTable.from_infos([
+            self._torrent("aaa", progress=0.5, status="downloading", download_speed=100),
+            self._torrent("bbb", tracker_status="Success"),
+            self._torrent("ccc", upload_speed=10),
+            self._torrent("ddd"),
+        ])
+        current = TorrentTable.from_infos([
+            self._torrent("eee", status="downloading", progress=0.0),
+            self._torrent("aaa"),
+            self._torrent("bbb", tracker_status="unregistered torrent"),
+            self._torrent("ccc", upload_speed=2000),
+        ])
+
+        events = diff_tables(1, previous, current, speed_threshold=1000)
+        kinds = {(e.type, e.hash) for e in events}
+
+        assert kinds == {
+            ("added", "eee"), ("removed", "ddd"),
+            ("changed", "aaa"), ("state_changed", "aaa"), ("completed", "aaa"),
+            ("tracker_error", "bbb"),
+            ("changed", "ccc"), ("speed_threshold", "ccc"),
+        }
+        state = next(e for e in events if e.type == "state_changed")
+        assert state.data["previous_status"] == "downloading"
+        assert state.data["status"] == "seeding"
+        assert diff_tables(1, current, current, speed_threshold=1000) == []
+
+    @pytest.mark.asyncio
+    async def test_bus_filters_and_drops_oldest(self):
+        """测试订阅按类型过滤，队列满时丢弃最旧批次"""
+        from app.services.downloader.events import TorrentEvent, TorrentEventBus
+
+        bus = TorrentEventBus()
+        added = bus.subscribe("added", types=("added",), maxsize=2)
+        everything = bus.subscribe("all")
+        for i in range(3):
+            bus.publish([TorrentEvent("added", 1, f"h{i}"), TorrentEvent("changed", 1, f"h{i}")])
+
+        assert [e.hash for e in added.drain()] == ["h1", "h2"]
+        assert added.dropped == 1
+        assert len((await everything.get())) == 2
+        everything.close()
+        bus.publish([TorrentEvent("added", 1, "h3")])
+        assert everything.queue.qsize() == 2
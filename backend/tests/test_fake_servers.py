@@ -0,0 +1,120 @@
+"""
+端到端测试 - 适配器对接假下载器服务端
+"""
+import pytest
+
+from app.services.downloader.qbittorrent import QBittorrentClient
+from app.services.downloader.transmission import TransmissionClient
+from app.services.downloader.deluge import DelugeClient
+from tests.fakes import (
+    FakeServer, FakeSwarm, FaultInjection, deluge_app, make_torrent_file, qb_app, transmission_app,
+)
+
+ADAPTERS = [
+    (qb_app, QBittorrentClient),
+    (transmission_app, TransmissionClient),
+    (deluge_app, DelugeClient),
+]
+
+
+class TestFakeServers:
+    """测试三种适配器在真实 HTTP 连接上的基本流程"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("app_factory,client_class", ADAPTERS)
+    async def test_round_trip(self, app_factory, client_class):
+        """测试连接、列表、统计、限速、添加与删除"""
+        swarm = FakeSwarm(50)
+        faults = FaultInjection()
+        with FakeServer(app_factory(swarm, faults)) as server:
+            client = client_class(host="127.0.0.1", port=server.port, username="admin", password="admin")
+            assert await client.connect()
+            try:
+                torrents = await client.get_torrents()
+                assert len(torrents) == 50
+
+                stats = await client.get_stats()
+                assert stats.total_torrents == 50
+                assert stats.downloading_torrents + stats.seeding_torrents == 50
+
+                target = torrents[0].hash
+                assert await client.set_torrent_upload_limit(target, 100 * 1024)
+                assert swarm.torrents[target].upload_limit == 100 * 1024
+                assert await client.reannounce_torrent(target)
+
+                # 批量接口同样返回成功（Deluge 的写方法成功时结果为 null）
+                batch = [t.hash for t in torrents[1:4]]
+                assert await client.set_torrents_upload_limit({h: 200 * 1024 for h in batch})
+                assert all(swarm.torrents[h].upload_limit == 200 * 1024 for h in batch)
+                assert await client.reannounce_torrents(batch)
+                assert await client.pause_torrents(batch)
+                assert await client.resume_torrents(batch)
+
+                added = await client.add_torrent(make_torrent_file("Fake.Added", 1024, "https://t.example/a"))
+                assert added in swarm.torrents
+
+                assert await client.remove_torrent(target)
+                assert target not in swarm.torrents
+                assert faults.total_requests > 0
+            finally:
+                await client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_injected_failures_open_circuit(self):
+        """测试注入 5xx 后熔断器打开"""
+        swarm = FakeSwarm(5)
+        faults = FaultInjection()
+        with FakeServer(transmission_app(swarm, faults)) as server:
+            client = TransmissionClient(host="127.0.0.1", port=server.port)
+            assert await client.connect()
+            try:
+                faults.error_rate = 1.0
+                for _ in range(3):
+                    client._flights.invalidate()
+                    await client.get_free_space()
+                assert client.health.state == "open"
+                assert faults.errors >= 3
+            finally:
+                await client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_snapshot_store_shares_one_fetch(self):
+        """测试快照并发读取只拉取一次、新版本产生事件、刷新失败时保留旧快照"""
+        import asyncio
+        from app.models import Downloader, DownloaderType
+        from app.services.downloader import health_registry
+        from app.services.downloader.pool import session_pool
+        from app.services.downloader.events import event_bus
+        from app.services.downloader.snapshots import TorrentSnapshotStore
+
+        swarm = FakeSwarm(20)
+        faults = FaultInjection()
+        with FakeServer(transmission_app(swarm, faults)) as server:
+            downloader = Downloader(
+                id=9001, name="fake-tr", type=DownloaderType.TRANSMISSION,
+                host="127.0.0.1", port=server.port, username="", password="", use_ssl=False,
+            )
+            store = TorrentSnapshotStore(interval=0, max_age=60)
+            try:
+                snapshots = await asyncio.gather(*[store.get(downloader) for _ in range(5)])
+                assert {s.version for s in snapshots} == {1}
+                assert len(snapshots[0]) == 20
+                assert faults.requests["torrent-get"] == 1
+
+                # 新版本与上一版本比对后发布 added 事件
+                subscription = event_bus.subscribe("test", types=("added",))
+                try:
+                    swarm.add("f" * 40, "Fake.New", size=1024)
+                    await asyncio.sleep(0.35)  # 超过 singleflight 结果复用窗口
+                    assert (await store.get(downloader, max_age=0)).version == 2
+                    assert [e.hash for e in subscription.drain()] == ["f" * 40]
+                finally:
+                    subscription.close()
+
+                faults.error_rate = 1.0
+                await asyncio.sleep(0.35)  # 超过 singleflight 结果复用窗口
+                stale = await store.get(downloader, max_age=0)
+                assert stale.version == 2
+            finally:
+                await session_pool.invalidate(downloader.id)
+                health_registry.remove(downloader.id)